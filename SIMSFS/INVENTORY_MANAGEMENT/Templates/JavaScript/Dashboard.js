@@ -22,20 +22,17 @@
 
    5. The global `charts` and `dashboardData` objects are
       prefixed dash to prevent conflicts with other modules.
+
+   6. All figures come from one call to /api/dashboard/summary/,
+      which aggregates them in the database. The page no longer
+      downloads every inventory item, order, customer, supplier
+      and detail line to total them in the browser.
    ============================================================ */
 
 console.log('Dashboard.js loaded');
 
 /* ---- Global State ---- */
-let dashboardData = {
-    inventory:       [],
-    sales:           [],
-    purchases:       [],
-    customers:       [],
-    suppliers:       [],
-    salesDetails:    [],
-    purchaseDetails: []
-};
+let dashboardData = null;                          /* response of /api/dashboard/summary/ */
 
 let dashCharts = {};
 
@@ -64,13 +61,6 @@ function dashFormatToThousands(num) {
     return num.toFixed(0);
 }
 
-function dashParseDate(dateStr) {
-    if (!dateStr) return new Date();
-    const [day, month, year] = dateStr.split('/');
-    return new Date(year, month - 1, day);
-}
-
-
 /* ---- Loading Overlay ---- */
 function dashShowLoading() {
     const el = document.getElementById('dashLoadingOverlay');
@@ -98,27 +88,8 @@ function initDashboard() {
 async function dashLoadAllData() {
     dashShowLoading();
     try {
-        await Promise.all([
-            dashLoadInventory(),
-            dashLoadSales(),
-            dashLoadPurchases(),
-            dashLoadCustomers(),
-            dashLoadSuppliers()
-        ]);
-
-        await Promise.all([
-            dashLoadSalesDetails(),
-            dashLoadPurchaseDetails()
-        ]);
-
-        console.log('✅ All dashboard data loaded');
-        console.log('- Inventory:',        dashboardData.inventory.length);
-        console.log('- Sales:',            dashboardData.sales.length);
-        console.log('- Purchases:',        dashboardData.purchases.length);
-        console.log('- Customers:',        dashboardData.customers.length);
-        console.log('- Suppliers:',        dashboardData.suppliers.length);
-        console.log('- Sales Details:',    dashboardData.salesDetails.length);
-        console.log('- Purchase Details:', dashboardData.purchaseDetails.length);
+        await dashLoadSummary();
+        console.log('✅ Dashboard summary loaded');
 
         dashCalculateKPIs();
         dashRenderCharts();
@@ -133,77 +104,14 @@ async function dashLoadAllData() {
     }
 }
 
-async function dashLoadInventory() {
-    const res    = await fetch('/api/inventory/all/', {
+async function dashLoadSummary() {
+    const res    = await fetch('/api/dashboard/summary/', {
         headers: { 'Content-Type': 'application/json', 'X-CSRFToken': dashGetCSRFToken() },
         credentials: 'same-origin'
     });
     const result = await res.json();
-    dashboardData.inventory = result.success ? (result.data || []) : [];
-}
-
-async function dashLoadSales() {
-    const res    = await fetch('/api/sales/', {
-        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': dashGetCSRFToken() },
-        credentials: 'same-origin'
-    });
-    const result = await res.json();
-    dashboardData.sales = result.success ? (result.data || []) : [];
-}
-
-async function dashLoadPurchases() {
-    const res    = await fetch('/api/purchases/', {
-        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': dashGetCSRFToken() },
-        credentials: 'same-origin'
-    });
-    const result = await res.json();
-    dashboardData.purchases = result.success ? (result.data || []) : [];
-}
-
-async function dashLoadCustomers() {
-    const res    = await fetch('/api/customers/', {
-        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': dashGetCSRFToken() },
-        credentials: 'same-origin'
-    });
-    const result = await res.json();
-    dashboardData.customers = result.success ? (result.data || []) : [];
-}
-
-async function dashLoadSuppliers() {
-    const res    = await fetch('/api/suppliers/', {
-        headers: { 'Content-Type': 'application/json', 'X-CSRFToken': dashGetCSRFToken() },
-        credentials: 'same-origin'
-    });
-    const result = await res.json();
-    dashboardData.suppliers = result.success ? (result.data || []) : [];
-}
-
-async function dashLoadSalesDetails() {
-    try {
-        const res    = await fetch('/api/dashboard/sales-details/', {
-            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': dashGetCSRFToken() },
-            credentials: 'same-origin'
-        });
-        const result = await res.json();
-        dashboardData.salesDetails = result.success ? (result.data || []) : [];
-    } catch (err) {
-        console.warn('⚠️ Sales details not available:', err);
-        dashboardData.salesDetails = [];
-    }
-}
-
-async function dashLoadPurchaseDetails() {
-    try {
-        const res    = await fetch('/api/dashboard/purchase-details/', {
-            headers: { 'Content-Type': 'application/json', 'X-CSRFToken': dashGetCSRFToken() },
-            credentials: 'same-origin'
-        });
-        const result = await res.json();
-        dashboardData.purchaseDetails = result.success ? (result.data || []) : [];
-    } catch (err) {
-        console.warn('⚠️ Purchase details not available:', err);
-        dashboardData.purchaseDetails = [];
-    }
+    if (!result.success) throw new Error(result.message || 'Dashboard summary failed');
+    dashboardData = result;
 }
 
 
@@ -211,55 +119,42 @@ async function dashLoadPurchaseDetails() {
    KPI CALCULATIONS
    ============================================================ */
 function dashCalculateKPIs() {
+    const kpis = dashboardData.kpis;
 
     /* 1. Inventory Cost Value */
-    const inventoryCostValue = dashboardData.inventory.reduce((sum, item) =>
-        sum + ((parseFloat(item.remainingQty) || 0) * (parseFloat(item.purchase_price) || 0)), 0);
-    document.getElementById('inventoryCostValue').textContent = 'KSH ' + dashFormatNumber(inventoryCostValue);
-    document.getElementById('inventoryCostChange').textContent = `${dashboardData.inventory.length} items | Cost basis`;
+    document.getElementById('inventoryCostValue').textContent = 'KSH ' + dashFormatNumber(kpis.inventory_cost_value);
+    document.getElementById('inventoryCostChange').textContent = `${kpis.inventory_items} items | Cost basis`;
 
     /* 2. Potential Revenue */
-    const potentialRevenue = dashboardData.inventory.reduce((sum, item) =>
-        sum + ((parseFloat(item.remainingQty) || 0) * (parseFloat(item.sale_price) || 0)), 0);
-    const potentialProfit  = potentialRevenue - inventoryCostValue;
-    const potentialMargin  = inventoryCostValue > 0
-        ? ((potentialProfit / inventoryCostValue) * 100).toFixed(1) : 0;
-    document.getElementById('potentialRevenue').textContent = 'KSH ' + dashFormatNumber(potentialRevenue);
+    document.getElementById('potentialRevenue').textContent = 'KSH ' + dashFormatNumber(kpis.potential_revenue);
     const potProfitEl = document.getElementById('potentialProfit');
-    potProfitEl.textContent  = `KSH ${dashFormatNumber(potentialProfit)} (${potentialMargin}% margin)`;
-    potProfitEl.className    = potentialProfit >= 0 ? 'stat-change positive' : 'stat-change negative';
+    potProfitEl.textContent  = `KSH ${dashFormatNumber(kpis.potential_profit)} (${kpis.potential_margin}% margin)`;
+    potProfitEl.className    = kpis.potential_profit >= 0 ? 'stat-change positive' : 'stat-change negative';
 
     /* 3. Total Sales */
-    const totalSales = dashboardData.sales.reduce((sum, s) => sum + (parseFloat(s.total_amount) || 0), 0);
-    document.getElementById('totalSales').textContent   = 'KSH ' + dashFormatNumber(totalSales);
-    document.getElementById('salesChange').textContent  = `${dashboardData.sales.length} sales orders`;
+    document.getElementById('totalSales').textContent   = 'KSH ' + dashFormatNumber(kpis.total_sales);
+    document.getElementById('salesChange').textContent  = `${kpis.sales_orders} sales orders`;
 
     /* 4. Total Purchases */
-    const totalPurchases = dashboardData.purchases.reduce((sum, p) => sum + (parseFloat(p.total_amount) || 0), 0);
-    document.getElementById('totalPurchases').textContent  = 'KSH ' + dashFormatNumber(totalPurchases);
-    document.getElementById('purchasesChange').textContent = `${dashboardData.purchases.length} purchase orders`;
+    document.getElementById('totalPurchases').textContent  = 'KSH ' + dashFormatNumber(kpis.total_purchases);
+    document.getElementById('purchasesChange').textContent = `${kpis.purchase_orders} purchase orders`;
 
     /* 5. Net Profit */
-    const netProfit    = totalSales - totalPurchases;
-    const profitMargin = totalSales > 0 ? ((netProfit / totalSales) * 100).toFixed(1) : 0;
-    document.getElementById('netProfit').textContent = 'KSH ' + dashFormatNumber(netProfit);
+    document.getElementById('netProfit').textContent = 'KSH ' + dashFormatNumber(kpis.net_profit);
     const profitEl = document.getElementById('profitMargin');
-    profitEl.textContent = `Margin: ${profitMargin}%`;
-    profitEl.className   = netProfit >= 0 ? 'stat-change positive' : 'stat-change negative';
+    profitEl.textContent = `Margin: ${kpis.profit_margin}%`;
+    profitEl.className   = kpis.net_profit >= 0 ? 'stat-change positive' : 'stat-change negative';
 
     /* 6. Total Receivables */
-    const totalReceivables = dashboardData.customers.reduce((sum, c) => sum + (parseFloat(c.balance) || 0), 0);
-    document.getElementById('totalReceivables').textContent = 'KSH ' + dashFormatNumber(totalReceivables);
-    document.getElementById('receivablesChange').textContent = `From ${dashboardData.customers.length} customers`;
+    document.getElementById('totalReceivables').textContent = 'KSH ' + dashFormatNumber(kpis.total_receivables);
+    document.getElementById('receivablesChange').textContent = `From ${kpis.customers} customers`;
 
     /* 7. Total Payables */
-    const totalPayables = dashboardData.suppliers.reduce((sum, s) => sum + (parseFloat(s.balance) || 0), 0);
-    document.getElementById('totalPayables').textContent = 'KSH ' + dashFormatNumber(totalPayables);
-    document.getElementById('payablesChange').textContent = `To ${dashboardData.suppliers.length} suppliers`;
+    document.getElementById('totalPayables').textContent = 'KSH ' + dashFormatNumber(kpis.total_payables);
+    document.getElementById('payablesChange').textContent = `To ${kpis.suppliers} suppliers`;
 
     /* 8. Reorder Required Items */
-    const reorderItems = dashboardData.inventory.filter(item => item.reorderRequired === 'YES').length;
-    document.getElementById('reorderItems').textContent = reorderItems;
+    document.getElementById('reorderItems').textContent = kpis.reorder_items;
 }
 
 
@@ -281,21 +176,8 @@ function dashRenderSalesTrendChart() {
     const ctx = document.getElementById('salesTrendChart');
     if (dashCharts.salesTrend) dashCharts.salesTrend.destroy();
 
-    const monthlySales = {};
-    dashboardData.sales.forEach(sale => {
-        const date      = dashParseDate(sale.date);
-        const monthYear = `${date.getMonth() + 1}/${date.getFullYear()}`;
-        if (!monthlySales[monthYear]) monthlySales[monthYear] = { date, amount: 0 };
-        monthlySales[monthYear].amount += parseFloat(sale.total_amount) || 0;
-    });
-
-    const sortedMonths = Object.keys(monthlySales).sort((a, b) => monthlySales[a].date - monthlySales[b].date);
-    const months       = ['Jan','Feb','Mar','Apr','May','Jun','Jul','Aug','Sep','Oct','Nov','Dec'];
-    const labels       = sortedMonths.map(k => {
-        const d = monthlySales[k].date;
-        return `${months[d.getMonth()]} ${d.getFullYear()}`;
-    });
-    const data = sortedMonths.map(k => monthlySales[k].amount);
+    const labels = dashboardData.sales_trend.map(m => m.month);
+    const data   = dashboardData.sales_trend.map(m => m.amount);
 
     dashCharts.salesTrend = new Chart(ctx, {
         type: 'line',
@@ -334,19 +216,15 @@ function dashRenderSalesLocationChart() {
     const ctx = document.getElementById('salesLocationChart');
     if (dashCharts.salesLocation) dashCharts.salesLocation.destroy();
 
-    const locationSales = {};
-    dashboardData.sales.forEach(sale => {
-        const county = sale.county || 'Unknown';
-        locationSales[county] = (locationSales[county] || 0) + (parseFloat(sale.total_amount) || 0);
-    });
+    const locationSales = dashboardData.sales_by_county;
 
     dashCharts.salesLocation = new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: Object.keys(locationSales),
+            labels: locationSales.map(c => c.name),
             datasets: [{
                 label: 'Sales Amount',
-                data: Object.values(locationSales),
+                data: locationSales.map(c => c.amount),
                 backgroundColor: 'rgba(26, 188, 156, 0.7)',
                 borderColor: 'rgba(26, 188, 156, 1)',
                 borderWidth: 2
@@ -369,19 +247,15 @@ function dashRenderPurchasesLocationChart() {
     const ctx = document.getElementById('purchasesLocationChart');
     if (dashCharts.purchasesLocation) dashCharts.purchasesLocation.destroy();
 
-    const locationPurchases = {};
-    dashboardData.purchases.forEach(purchase => {
-        const county = purchase.county || 'Unknown';
-        locationPurchases[county] = (locationPurchases[county] || 0) + (parseFloat(purchase.total_amount) || 0);
-    });
+    const locationPurchases = dashboardData.purchases_by_county;
 
     dashCharts.purchasesLocation = new Chart(ctx, {
         type: 'bar',
         data: {
-            labels: Object.keys(locationPurchases),
+            labels: locationPurchases.map(c => c.name),
             datasets: [{
                 label: 'Purchase Amount',
-                data: Object.values(locationPurchases),
+                data: locationPurchases.map(c => c.amount),
                 backgroundColor: 'rgba(52, 152, 219, 0.7)',
                 borderColor: 'rgba(52, 152, 219, 1)',
                 borderWidth: 2
@@ -405,19 +279,15 @@ function dashRenderPaymentStatusChart() {
     if (dashCharts.paymentStatus) dashCharts.paymentStatus.destroy();
 
     const statusCounts = { completed: 0, pending: 0, partial: 0 };
-
-    dashboardData.purchases.forEach(po => {
-        const status = (po.payment_status || '').toLowerCase();
-        if      (status === 'completed')         statusCounts.completed++;
-        else if (status === 'pending')           statusCounts.pending++;
-        else if (status.includes('partial'))     statusCounts.partial++;
-    });
-
-    dashboardData.sales.forEach(so => {
-        const status = (so.receipt_status || '').toLowerCase();
-        if      (status === 'completed')         statusCounts.completed++;
-        else if (status === 'pending')           statusCounts.pending++;
-        else if (status.includes('partial'))     statusCounts.partial++;
+    const byStatus     = [dashboardData.payment_status.purchases, dashboardData.payment_status.sales];
+
+    byStatus.forEach(counts => {
+        Object.entries(counts).forEach(([name, count]) => {
+            const status = name.toLowerCase();
+            if      (status === 'completed')         statusCounts.completed += count;
+            else if (status === 'pending')           statusCounts.pending   += count;
+            else if (status.includes('partial'))     statusCounts.partial   += count;
+        });
     });
 
     dashCharts.paymentStatus = new Chart(ctx, {
@@ -448,9 +318,7 @@ function dashRenderTopCustomersChart() {
     const ctx = document.getElementById('topCustomersChart');
     if (dashCharts.topCustomers) dashCharts.topCustomers.destroy();
 
-    const top5 = [...dashboardData.customers]
-        .sort((a, b) => (parseFloat(b.sales) || 0) - (parseFloat(a.sales) || 0))
-        .slice(0, 5);
+    const top5 = dashboardData.top_customers;
 
     dashCharts.topCustomers = new Chart(ctx, {
         type: 'bar',
@@ -458,7 +326,7 @@ function dashRenderTopCustomersChart() {
             labels: top5.map(c => c.name || 'Unknown'),
             datasets: [{
                 label: 'Total Sales',
-                data: top5.map(c => parseFloat(c.sales) || 0),
+                data: top5.map(c => c.amount),
                 backgroundColor: 'rgba(155, 89, 182, 0.7)',
                 borderColor: 'rgba(155, 89, 182, 1)',
                 borderWidth: 2
@@ -477,18 +345,12 @@ function dashRenderTopCustomersChart() {
     });
 }
 
-/* Sales by Category (Doughnut) — uses salesDetails */
+/* Sales by Category (Doughnut) */
 function dashRenderSalesCategoryChart() {
     const ctx = document.getElementById('salesCategoryChart');
     if (dashCharts.salesCategory) dashCharts.salesCategory.destroy();
 
-    const categorySales = {};
-    dashboardData.salesDetails.forEach(detail => {
-        const category = detail.item_category || 'Unknown';
-        categorySales[category] = (categorySales[category] || 0) + (parseFloat(detail.total_sales_price) || 0);
-    });
-
-    const sorted = Object.entries(categorySales).sort((a, b) => b[1] - a[1]).slice(0, 6);
+    const sorted = dashboardData.sales_by_category.map(c => [c.name, c.amount]);
 
     dashCharts.salesCategory = new Chart(ctx, {
         type: 'doughnut',
@@ -527,18 +389,12 @@ function dashRenderSalesCategoryChart() {
     });
 }
 
-/* Purchases by Category (Doughnut) — uses purchaseDetails */
+/* Purchases by Category (Doughnut) */
 function dashRenderPurchasesCategoryChart() {
     const ctx = document.getElementById('purchasesCategoryChart');
     if (dashCharts.purchasesCategory) dashCharts.purchasesCategory.destroy();
 
-    const categoryPurchases = {};
-    dashboardData.purchaseDetails.forEach(detail => {
-        const category = detail.item_category || 'Unknown';
-        categoryPurchases[category] = (categoryPurchases[category] || 0) + (parseFloat(detail.total_purchase_price) || 0);
-    });
-
-    const sorted = Object.entries(categoryPurchases).sort((a, b) => b[1] - a[1]).slice(0, 6);
+    const sorted = dashboardData.purchases_by_category.map(c => [c.name, c.amount]);
 
     dashCharts.purchasesCategory = new Chart(ctx, {
         type: 'doughnut',
@@ -580,40 +436,23 @@ function dashRenderPurchasesCategoryChart() {
 
 /* ============================================================
    ADDITIONAL KPIs — top selling item & top sales location
-   These rely on salesDetails so run after those are loaded.
    ============================================================ */
 function dashUpdateAdditionalKPIs() {
     /* Top Selling Item */
-    const itemSales = {};
-    dashboardData.salesDetails.forEach(detail => {
-        const name = detail.item_name;
-        if (!itemSales[name]) itemSales[name] = { qty: 0, revenue: 0, category: detail.item_category, type: detail.item_type };
-        itemSales[name].qty     += parseInt(detail.quantity_sold)       || 0;
-        itemSales[name].revenue += parseFloat(detail.total_sales_price) || 0;
-    });
-
-    const topItem = Object.entries(itemSales).sort((a, b) => b[1].qty - a[1].qty)[0];
+    const topItem = dashboardData.kpis.top_selling_item;
     if (topItem) {
-        const [itemName, data] = topItem;
-        document.getElementById('topSellingItem').textContent  = itemName;
-        document.getElementById('topItemCategory').textContent = `${data.category} | ${data.type}`;
+        document.getElementById('topSellingItem').textContent  = topItem.name;
+        document.getElementById('topItemCategory').textContent = `${topItem.category} | ${topItem.type}`;
     } else {
         document.getElementById('topSellingItem').textContent  = 'No Data';
         document.getElementById('topItemCategory').textContent = 'N/A';
     }
 
     /* Top Sales Location */
-    const locationSales = {};
-    dashboardData.sales.forEach(sale => {
-        const county = sale.county || 'Unknown';
-        locationSales[county] = (locationSales[county] || 0) + (parseFloat(sale.total_amount) || 0);
-    });
-
-    const topLocation = Object.entries(locationSales).sort((a, b) => b[1] - a[1])[0];
+    const topLocation = dashboardData.kpis.top_sales_location;
     if (topLocation) {
-        const [county, amount] = topLocation;
-        document.getElementById('topSalesLocation').textContent  = county;
-        document.getElementById('topLocationAmount').textContent = `KSH ${dashFormatNumber(amount)}`;
+        document.getElementById('topSalesLocation').textContent  = topLocation.name;
+        document.getElementById('topLocationAmount').textContent = `KSH ${dashFormatNumber(topLocation.amount)}`;
     } else {
         document.getElementById('topSalesLocation').textContent  = 'No Data';
         document.getElementById('topLocationAmount').textContent = 'N/A';
@@ -635,10 +474,7 @@ function dashRenderTables() {
 
 function dashRenderLowStockTable() {
     const tbody         = document.getElementById('lowStockTable');
-    const lowStockItems = dashboardData.inventory
-        .filter(item => item.reorderRequired === 'YES')
-        .sort((a, b) => (a.remainingQty - a.reorderLevel) - (b.remainingQty - b.reorderLevel))
-        .slice(0, 10);
+    const lowStockItems = dashboardData.low_stock;
 
     if (lowStockItems.length === 0) {
         tbody.innerHTML = `<tr><td colspan="6" style="text-align:center; padding:30px; color:#2ecc71;">
@@ -661,9 +497,7 @@ function dashRenderLowStockTable() {
 
 function dashRenderRecentSalesTable() {
     const tbody       = document.getElementById('recentSalesTable');
-    const recentSales = [...dashboardData.sales]
-        .sort((a, b) => dashParseDate(b.date) - dashParseDate(a.date))
-        .slice(0, 10);
+    const recentSales = dashboardData.recent_sales;
 
     if (recentSales.length === 0) {
         tbody.innerHTML = '<tr><td colspan="6" style="text-align:center; padding:30px;">No sales orders yet</td></tr>';
@@ -688,9 +522,7 @@ function dashRenderRecentSalesTable() {
 
 function dashRenderRecentPurchasesTable() {
     const tbody           = document.getElementById('recentPurchasesTable');
-    const recentPurchases = [...dashboardData.purchases]
-        .sort((a, b) => dashParseDate(b.date) - dashParseDate(a.date))
-        .slice(0, 10);
+    const recentPurchases = dashboardData.recent_purchases;
 
     if (recentPurchases.length === 0) {
         tbody.innerHTML = '<tr><td colspan="6" style="text-align:center; padding:30px;">No purchase orders yet</td></tr>';
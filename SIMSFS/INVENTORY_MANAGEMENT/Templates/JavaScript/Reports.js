@@ -3,6 +3,7 @@ console.log('📊 Reports.js loading...');
 /* ---- Global State ---- */
 let rptCurrentReportData = null;
 let rptCurrentReportType = null;
+let rptCurrentReportParams = {};                   /* filters of the shown report, re-sent for server-side exports */
 let rptCharts            = {};
 
 
@@ -244,6 +245,9 @@ async function rptGenerateSalesReport(fromDate, toDate, title = 'Sales Summary R
         if (category) params.append('category', category);
         if (county)   params.append('county', county);
 
+        rptCurrentReportType   = 'sales-summary';
+        rptCurrentReportParams = Object.fromEntries(params);
+
         const res    = await fetch(`/api/reports/sales-summary/?${params}`, {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin'
@@ -352,10 +356,14 @@ function rptRenderSalesReport(data, title, fromDate, toDate) {
 /* ============================================================
    2. INVENTORY STATUS REPORT
    ============================================================ */
-async function rptGenerateInventoryReport(category = '') {
+async function rptGenerateInventoryReport(category = '', method = '') {
     try {
         const params = new URLSearchParams();
         if (category) params.append('category', category);
+        if (method)   params.append('method', method);
+
+        rptCurrentReportType   = 'inventory-status';
+        rptCurrentReportParams = Object.fromEntries(params);
 
         const res    = await fetch(`/api/reports/inventory-status/?${params}`, {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
@@ -381,12 +389,19 @@ function rptRenderInventoryReport(data) {
       <h2 class="report-title">Inventory Status Report</h2>
       <p class="report-subtitle">Current stock levels and inventory valuation</p>
       <span class="report-period">Generated: ${rptFormatDate(new Date())}</span>
+      <div style="margin-top:10px;">
+        <label for="valuationMethod">Valuation: </label>
+        <select id="valuationMethod" onchange="rptChangeValuationMethod(this.value)">
+          ${Object.entries(data.valuation_methods).map(([value, label]) => `
+            <option value="${value}" ${value === data.valuation_method ? 'selected' : ''}>${label}</option>`).join('')}
+        </select>
+      </div>
     </div>
     <div class="kpi-grid">
       <div class="kpi-card">
         <div class="kpi-label">Total Cost Value</div>
         <div class="kpi-value">KSH ${rptFormatNumber(data.kpis.total_cost_value)}</div>
-        <div class="kpi-change neutral">At purchase price</div>
+        <div class="kpi-change neutral">${data.valuation_methods[data.valuation_method]}</div>
       </div>
       <div class="kpi-card success">
         <div class="kpi-label">Total Sale Value</div>
@@ -437,8 +452,33 @@ function rptRenderInventoryReport(data) {
         </tbody>
       </table>
     </div>` : ''}
-    <div style="margin-top:30px;">
-      <h3 class="chart-title">Complete Inventory List</h3>
+    <div id="inventoryItemsSection" style="margin-top:30px;"></div>`;
+
+    rptRenderCategoryValueChart(data.category_breakdown);
+    rptRenderStockStatusChart(data.kpis);
+    if (data.kpis.total_items > 0) rptLoadInventoryItems(1);
+}
+
+async function rptChangeValuationMethod(method) {
+    rptShowLoading();
+    try { await rptGenerateInventoryReport(rptCurrentReportParams.category || '', method); }
+    catch (err) { alert('Error generating report: ' + err.message); }
+    rptHideLoading();
+}
+
+// The complete item list is paged from the server (the report itself only carries totals and low stock)
+async function rptLoadInventoryItems(page) {
+    const section = document.getElementById('inventoryItemsSection');
+    if (!section) return;
+    try {
+        const params = new URLSearchParams({ ...rptCurrentReportParams, include_items: 1, page: page, page_size: 25 });
+        const res    = await fetch(`/api/reports/inventory-status/?${params}`, { credentials: 'same-origin' });
+        const result = await res.json();
+        if (!result.success) throw new Error(result.message || 'Failed to load inventory items');
+
+        const p = result.data.items_pagination;
+        section.innerHTML = `
+      <h3 class="chart-title">Complete Inventory List (Page ${p.page} of ${p.total_pages}, ${p.total} items)</h3>
       <table class="data-table">
         <thead><tr>
           <th>Item ID</th><th>Item Name</th><th>Category</th>
@@ -447,21 +487,22 @@ function rptRenderInventoryReport(data) {
           <th class="text-right">Cost Value</th><th class="text-right">Sale Value</th>
         </tr></thead>
         <tbody>
-          ${data.items.map(item => `
+          ${result.data.items.map(item => `
             <tr>
               <td>${item.item_id}</td><td>${item.name}</td><td>${item.category}</td>
               <td class="text-center">${item.purchased_qty}</td>
               <td class="text-center">${item.sold_qty}</td>
-              <td class="text-center ${item.reorder_required === 'YES' ? 'style="color:var(--error);font-weight:600;"' : ''}">${item.remaining_qty}</td>
+              <td class="text-center" ${item.reorder_required === 'YES' ? 'style="color:var(--error);font-weight:600;"' : ''}>${item.remaining_qty}</td>
               <td class="text-right">KSH ${rptFormatNumber(item.cost_value)}</td>
               <td class="text-right">KSH ${rptFormatNumber(item.sale_value)}</td>
             </tr>`).join('')}
         </tbody>
       </table>
-    </div>`;
-
-    rptRenderCategoryValueChart(data.category_breakdown);
-    rptRenderStockStatusChart(data.kpis);
+      <div style="margin-top:10px;display:flex;gap:10px;justify-content:flex-end;">
+        <button class="btn btn-secondary" ${p.page <= 1 ? 'disabled' : ''} onclick="rptLoadInventoryItems(${p.page - 1})">Previous</button>
+        <button class="btn btn-secondary" ${p.page >= p.total_pages ? 'disabled' : ''} onclick="rptLoadInventoryItems(${p.page + 1})">Next</button>
+      </div>`;
+    } catch (err) { console.error('Error loading inventory items:', err); }
 }
 
 
@@ -471,6 +512,9 @@ function rptRenderInventoryReport(data) {
 async function rptGenerateProfitLossReport(fromDate, toDate) {
     try {
         const params = new URLSearchParams({ start_date: fromDate, end_date: toDate });
+        rptCurrentReportType   = 'profit-loss';
+        rptCurrentReportParams = Object.fromEntries(params);
+
         const res    = await fetch(`/api/reports/profit-loss/?${params}`, {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin'
@@ -541,7 +585,7 @@ function rptRenderProfitLossReport(data, fromDate, toDate) {
     </div>
     ${data.monthly_trend.length > 0 ? `
     <div style="margin-top:30px;">
-      <h3 class="chart-title">Monthly Revenue Trend</h3>
+      <h3 class="chart-title">Monthly Revenue, COGS &amp; Net Profit</h3>
       <div class="chart-container" style="height:300px;"><canvas id="monthlyTrendChart"></canvas></div>
     </div>` : ''}`;
 
@@ -558,6 +602,9 @@ async function rptGeneratePurchaseReport(fromDate, toDate, category = '', county
         if (category) params.append('category', category);
         if (county)   params.append('county', county);
 
+        rptCurrentReportType   = 'purchase-summary';
+        rptCurrentReportParams = Object.fromEntries(params);
+
         const res    = await fetch(`/api/reports/purchase-summary/?${params}`, {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin'
@@ -649,6 +696,9 @@ function rptRenderPurchaseReport(data, fromDate, toDate) {
    ============================================================ */
 async function rptGenerateOutstandingBalancesReport() {
     try {
+        rptCurrentReportType   = 'outstanding-balances';
+        rptCurrentReportParams = {};
+
         const res    = await fetch('/api/reports/outstanding-balances/', {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin'
@@ -763,6 +813,9 @@ async function rptGenerateCustomerAnalysisReport(fromDate, toDate, county = '')
         const params = new URLSearchParams({ start_date: fromDate, end_date: toDate });
         if (county) params.append('county', county);
 
+        rptCurrentReportType   = 'customer-analysis';
+        rptCurrentReportParams = Object.fromEntries(params);
+
         const res    = await fetch(`/api/reports/customer-analysis/?${params}`, {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin'
@@ -842,7 +895,7 @@ function rptRenderCustomerAnalysisReport(data, fromDate, toDate) {
         <thead><tr>
           <th>Customer Name</th><th class="text-right">Total Sales</th><th class="text-center">Orders</th>
           <th class="text-right">Avg Order Value</th><th class="text-right">Outstanding</th>
-          <th class="text-center">Payment Ratio</th><th class="text-center">Last Order</th>
+          <th class="text-center">Payment Ratio</th><th class="text-center">Last Order</th><th class="text-center">RFM</th>
         </tr></thead>
         <tbody>
           ${data.top_customers.map(c => `
@@ -854,6 +907,7 @@ function rptRenderCustomerAnalysisReport(data, fromDate, toDate) {
               <td class="text-right" style="color:${c.outstanding_balance > 0 ? 'var(--error)' : 'var(--success)'};">KSH ${rptFormatNumber(c.outstanding_balance)}</td>
               <td class="text-center"><span style="color:${c.payment_ratio >= 90 ? 'var(--success)' : c.payment_ratio >= 70 ? 'var(--warning)' : 'var(--error)'};">${c.payment_ratio.toFixed(1)}%</span></td>
               <td class="text-center">${c.last_order_date}</td>
+              <td class="text-center">${c.rfm_score || ''}<br><small>${(c.rfm_segment || '').replace('_', ' ')}</small></td>
             </tr>`).join('')}
         </tbody>
       </table>
@@ -874,6 +928,9 @@ async function rptGenerateSupplierAnalysisReport(fromDate, toDate, county = '')
         const params = new URLSearchParams({ start_date: fromDate, end_date: toDate });
         if (county) params.append('county', county);
 
+        rptCurrentReportType   = 'supplier-analysis';
+        rptCurrentReportParams = Object.fromEntries(params);
+
         const res    = await fetch(`/api/reports/supplier-analysis/?${params}`, {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin'
@@ -953,7 +1010,7 @@ function rptRenderSupplierAnalysisReport(data, fromDate, toDate) {
         <thead><tr>
           <th>Supplier Name</th><th class="text-right">Total Purchases</th><th class="text-center">Orders</th>
           <th class="text-right">Avg Order Value</th><th class="text-right">Outstanding</th>
-          <th class="text-center">Delivery Rate</th><th class="text-center">Categories</th>
+          <th class="text-center">Delivery Rate</th><th class="text-center">Lead Time</th><th class="text-center">Categories</th>
         </tr></thead>
         <tbody>
           ${data.top_suppliers.map(s => `
@@ -964,6 +1021,7 @@ function rptRenderSupplierAnalysisReport(data, fromDate, toDate) {
               <td class="text-right">KSH ${rptFormatNumber(s.avg_order_value)}</td>
               <td class="text-right" style="color:${s.outstanding_balance > 0 ? 'var(--error)' : 'var(--success)'};">KSH ${rptFormatNumber(s.outstanding_balance)}</td>
               <td class="text-center"><span style="color:${s.delivery_rate >= 90 ? 'var(--success)' : s.delivery_rate >= 70 ? 'var(--warning)' : 'var(--error)'};">${s.delivery_rate.toFixed(1)}%</span></td>
+              <td class="text-center">${s.avg_lead_time !== null ? s.avg_lead_time.toFixed(1) + ' days' : 'N/A'}</td>
               <td class="text-center">${s.categories_supplied}</td>
             </tr>`).join('')}
         </tbody>
@@ -983,6 +1041,9 @@ function rptRenderSupplierAnalysisReport(data, fromDate, toDate) {
 async function rptGenerateTaxSummaryReport(fromDate, toDate) {
     try {
         const params = new URLSearchParams({ start_date: fromDate, end_date: toDate });
+        rptCurrentReportType   = 'tax-summary';
+        rptCurrentReportParams = Object.fromEntries(params);
+
         const res    = await fetch(`/api/reports/tax-summary/?${params}`, {
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin'
@@ -1090,13 +1151,30 @@ function rptRenderTaxSummaryReport(data, fromDate, toDate) {
         ? `<div style="margin-top:20px;padding:15px;background:#fff3cd;border-left:4px solid var(--warning);border-radius:4px;"><strong>⚠️ Action Required:</strong> You have KSH ${rptFormatNumber(taxBalance)} in net tax to remit to the tax authority.</div>`
         : `<div style="margin-top:20px;padding:15px;background:#d4edda;border-left:4px solid var(--success);border-radius:4px;"><strong>✅ Tax Credit:</strong> You have KSH ${rptFormatNumber(Math.abs(taxBalance))} in tax credits available for offset.</div>`}
     </div>
-    ${data.sales_transactions && data.sales_transactions.length > 0 ? `
-    <div style="margin-top:30px;">
-      <h3 class="chart-title">Recent Sales Tax Transactions (Last 20)</h3>
+    <div id="taxTransactionsSection" style="margin-top:30px;"></div>`;
+
+    if (data.sales_by_rate.length > 0)    rptRenderTaxByRateChart(data.sales_by_rate,    'salesTaxChart',    'Sales Tax Collected');
+    if (data.purchase_by_rate.length > 0) rptRenderTaxByRateChart(data.purchase_by_rate, 'purchaseTaxChart', 'Purchase Tax Paid', true);
+    if (data.kpis.sales_transactions > 0) rptLoadTaxTransactions(fromDate, toDate, 1);
+}
+
+// Sales tax transactions are paged from the server (the summary itself only carries per-rate totals)
+async function rptLoadTaxTransactions(fromDate, toDate, page) {
+    const section = document.getElementById('taxTransactionsSection');
+    if (!section) return;
+    try {
+        const params = new URLSearchParams({ type: 'sales', start_date: fromDate, end_date: toDate, page: page, page_size: 20 });
+        const res    = await fetch(`/api/reports/tax-summary/transactions/?${params}`, { credentials: 'same-origin' });
+        const result = await res.json();
+        if (!result.success) throw new Error(result.message || 'Failed to load tax transactions');
+
+        const p = result.pagination;
+        section.innerHTML = `
+      <h3 class="chart-title">Sales Tax Transactions (Page ${p.page} of ${p.total_pages}, ${p.total} lines)</h3>
       <table class="data-table">
         <thead><tr><th>Date</th><th>Invoice</th><th>Customer</th><th>Item</th><th class="text-right">Amount</th><th class="text-center">Rate</th><th class="text-right">Tax</th></tr></thead>
         <tbody>
-          ${data.sales_transactions.slice(0, 20).map(txn => `
+          ${result.transactions.map(txn => `
             <tr>
               <td>${txn.date}</td><td>${txn.invoice}</td><td>${txn.customer}</td><td>${txn.item}</td>
               <td class="text-right">KSH ${rptFormatNumber(txn.amount)}</td>
@@ -1105,10 +1183,11 @@ function rptRenderTaxSummaryReport(data, fromDate, toDate) {
             </tr>`).join('')}
         </tbody>
       </table>
-    </div>` : ''}`;
-
-    if (data.sales_by_rate.length > 0)    rptRenderTaxByRateChart(data.sales_by_rate,    'salesTaxChart',    'Sales Tax Collected');
-    if (data.purchase_by_rate.length > 0) rptRenderTaxByRateChart(data.purchase_by_rate, 'purchaseTaxChart', 'Purchase Tax Paid', true);
+      <div style="margin-top:10px;display:flex;gap:10px;justify-content:flex-end;">
+        <button class="btn btn-secondary" ${p.page <= 1 ? 'disabled' : ''} onclick="rptLoadTaxTransactions('${fromDate}', '${toDate}', ${p.page - 1})">Previous</button>
+        <button class="btn btn-secondary" ${p.page >= p.total_pages ? 'disabled' : ''} onclick="rptLoadTaxTransactions('${fromDate}', '${toDate}', ${p.page + 1})">Next</button>
+      </div>`;
+    } catch (err) { console.error('Error loading tax transactions:', err); }
 }
 
 
@@ -1170,8 +1249,12 @@ function rptRenderMonthlyTrendChart(monthlyData) {
     const ctx = document.getElementById('monthlyTrendChart');
     rptCharts.monthlyTrend = new Chart(ctx, {
         type: 'line',
-        data: { labels: monthlyData.map(m => m.month), datasets: [{ label: 'Monthly Revenue', data: monthlyData.map(m => m.revenue), borderColor: 'rgba(155,89,182,1)', backgroundColor: 'rgba(155,89,182,0.1)', borderWidth: 3, fill: true, tension: 0.4 }] },
-        options: { responsive: true, maintainAspectRatio: false, plugins: { legend: { display: false }, tooltip: { callbacks: { label: (ctx) => 'Revenue: KSH ' + rptFormatNumber(ctx.parsed.y) } } }, scales: { y: { beginAtZero: true, ticks: { callback: (v) => 'KSH ' + (v/1000).toFixed(0) + 'K' } } } }
+        data: { labels: monthlyData.map(m => m.month), datasets: [
+            { label: 'Revenue', data: monthlyData.map(m => m.revenue), borderColor: 'rgba(155,89,182,1)', backgroundColor: 'rgba(155,89,182,0.1)', borderWidth: 3, fill: true, tension: 0.4 },
+            { label: 'COGS', data: monthlyData.map(m => m.cogs || 0), borderColor: 'rgba(230,126,34,1)', backgroundColor: 'rgba(230,126,34,0.1)', borderWidth: 2, fill: false, tension: 0.4 },
+            { label: 'Net Profit', data: monthlyData.map(m => m.net_profit || 0), borderColor: 'rgba(46,204,113,1)', backgroundColor: 'rgba(46,204,113,0.1)', borderWidth: 2, fill: false, tension: 0.4 }
+        ] },
+        options: { responsive: true, maintainAspectRatio: false, plugins: { legend: { display: true, position: 'top' }, tooltip: { callbacks: { label: (ctx) => ctx.dataset.label + ': KSH ' + rptFormatNumber(ctx.parsed.y) } } }, scales: { y: { beginAtZero: true, ticks: { callback: (v) => 'KSH ' + (v/1000).toFixed(0) + 'K' } } } }
     });
 }
 
@@ -1278,6 +1361,11 @@ function rptRenderTaxByRateChart(taxData, canvasId, label, isPurchase = false) {
 /* ============================================================
    EXPORT FUNCTIONS
    ============================================================ */
+/* PDF: the server regenerates the report from its type + filters and renders it in the
+   background; poll the job until it is done, then download the file. */
+const RPT_PDF_POLL_MS      = 1000;
+const RPT_PDF_MAX_ATTEMPTS = 180;
+
 async function rptExportToPDF() {
     if (!rptCurrentReportData || !rptCurrentReportType) {
         alert('Please generate a report first before exporting');
@@ -1289,18 +1377,23 @@ async function rptExportToPDF() {
             method: 'POST',
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin',
-            body: JSON.stringify({ report_type: rptCurrentReportType, report_data: rptCurrentReportData, period: { start: document.getElementById('fromDate').value, end: document.getElementById('toDate').value } })
+            body: JSON.stringify({ report_type: rptCurrentReportType, params: rptCurrentReportParams })
         });
-        if (!res.ok) throw new Error('Failed to generate PDF');
-        const cd       = res.headers.get('Content-Disposition');
-        let filename   = 'report.pdf';
-        if (cd) { const m = /filename="(.+)"/.exec(cd); if (m) filename = m[1]; }
-        const blob = await res.blob();
-        const url  = window.URL.createObjectURL(blob);
-        const a    = document.createElement('a');
-        a.href = url; a.download = filename;
+        let job = await res.json();
+        if (!job.success) throw new Error(job.message || 'Failed to queue PDF export');
+
+        for (let attempt = 0; job.status !== 'done'; attempt++) {
+            if (job.status === 'failed') throw new Error(job.message || 'Failed to generate PDF');
+            if (attempt >= RPT_PDF_MAX_ATTEMPTS) throw new Error('PDF export is taking too long, please try again');
+            await new Promise(resolve => setTimeout(resolve, RPT_PDF_POLL_MS));
+            const statusRes = await fetch(job.status_url || `/api/reports/export-pdf/${job.job_id}/`, { credentials: 'same-origin' });
+            job = { ...job, ...(await statusRes.json()) };
+            if (!job.success) throw new Error(job.message || 'PDF export not found');
+        }
+
+        const a = document.createElement('a');
+        a.href = job.download_url;
         document.body.appendChild(a); a.click();
-        window.URL.revokeObjectURL(url);
         document.body.removeChild(a);
         console.log('✅ PDF exported');
     } catch (err) {
@@ -1316,11 +1409,12 @@ async function rptExportToExcel() {
     }
     try {
         rptShowLoading();
+        /* Regenerated on the server: one sheet per section plus the detail rows behind the report */
         const res = await fetch('/api/reports/export-excel/', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json', 'X-CSRFToken': rptGetCSRFToken() },
             credentials: 'same-origin',
-            body: JSON.stringify({ report_type: rptCurrentReportType, report_data: rptCurrentReportData, period: { start: document.getElementById('fromDate').value, end: document.getElementById('toDate').value } })
+            body: JSON.stringify({ report_type: rptCurrentReportType, params: rptCurrentReportParams, layout: 'sheets' })
         });
         if (!res.ok) throw new Error('Failed to generate Excel file');
         const cd       = res.headers.get('Content-Disposition');
@@ -4,9 +4,10 @@ console.log('📊 Sales Forecasting Module Loading...');
    STATE
 ============================================================ */
 let forecastData = {
-  monthly:      [],   // [{month, total_revenue, order_count}]  — from /api/sales-forecasting/data/
-  salesDetails: [],   // line-item detail rows — from /api/dashboard/sales-details/
-  inventory:    []    // inventory rows        — from /api/inventory/all/
+  monthly:    [],   // [{month, total_revenue, order_count}]  — from /api/sales-forecasting/data/
+  categories: [],   // [{key, label, total_revenue, series}] — from /api/sales-forecasting/series/?group_by=category
+  items:      [],   // [{key, label, total_revenue, series}] — from /api/sales-forecasting/series/?group_by=item
+  inventory:  []    // inventory rows                        — from /api/inventory/all/
 };
 let fctCharts = {};
 
@@ -68,28 +69,32 @@ async function loadHistoricalData() {
     };
     const opts = { headers, credentials: 'same-origin' };
 
-    /* Use the dedicated forecasting endpoint for monthly aggregates.
-       The other two endpoints supply chart-level detail data.          */
+    /* Monthly totals plus per-category / per-item aggregates (ranked by revenue).
+       All grouping happens in SQL — no raw sales lines are downloaded.    */
     const range = document.getElementById('fctHistoricalRange').value;
 
-    const [monthlyRes, detailsRes, inventoryRes] = await Promise.all([
-      fetch(`/api/sales-forecasting/data/?range=${range}`, opts),
-      fetch('/api/dashboard/sales-details/',               opts),
-      fetch('/api/inventory/all/',                         opts)
+    const [monthlyRes, categoryRes, itemRes, inventoryRes] = await Promise.all([
+      fetch(`/api/sales-forecasting/data/?range=${range}`,                                 opts),
+      fetch(`/api/sales-forecasting/series/?group_by=category&range=${range}&page_size=100`, opts),
+      fetch(`/api/sales-forecasting/series/?group_by=item&range=${range}&page_size=200`,     opts),
+      fetch('/api/inventory/all/',                                                         opts)
     ]);
 
     const monthlyResult   = await monthlyRes.json();
-    const detailsResult   = await detailsRes.json();
+    const categoryResult  = await categoryRes.json();
+    const itemResult      = await itemRes.json();
     const inventoryResult = await inventoryRes.json();
 
-    forecastData.monthly      = monthlyResult.success   ? (monthlyResult.data   || []) : [];
-    forecastData.salesDetails = detailsResult.success   ? (detailsResult.data   || []) : [];
-    forecastData.inventory    = inventoryResult.success ? (inventoryResult.data  || []) : [];
+    forecastData.monthly    = monthlyResult.success   ? (monthlyResult.data   || []) : [];
+    forecastData.categories = categoryResult.success  ? (categoryResult.data  || []) : [];
+    forecastData.items      = itemResult.success      ? (itemResult.data      || []) : [];
+    forecastData.inventory  = inventoryResult.success ? (inventoryResult.data  || []) : [];
 
     console.log('✅ Forecast data loaded:', {
-      monthly:      forecastData.monthly.length,
-      salesDetails: forecastData.salesDetails.length,
-      inventory:    forecastData.inventory.length
+      monthly:    forecastData.monthly.length,
+      categories: forecastData.categories.length,
+      items:      forecastData.items.length,
+      inventory:  forecastData.inventory.length
     });
 
     /* Populate the filter dropdown based on analysis type */
@@ -136,13 +141,16 @@ function populateFilterDropdown() {
   };
 
   if (analysisType === 'category') {
-    const cats = [...new Set(forecastData.salesDetails.map(d => d.item_category || 'Unknown'))].sort();
     addOption('__all__', 'All Categories');
-    cats.forEach(c => addOption(c, c));
+    [...forecastData.categories]
+      .sort((a, b) => a.label.localeCompare(b.label))
+      .forEach(c => addOption(c.key, c.label));
   } else if (analysisType === 'item') {
-    const items = [...new Set(forecastData.salesDetails.map(d => d.item_name || 'Unknown'))].sort();
+    /* Option value is the item_id (what the forecast API filters on), label is the name */
     addOption('__all__', 'All Items');
-    items.forEach(i => addOption(i, i));
+    [...forecastData.items]
+      .sort((a, b) => a.label.localeCompare(b.label))
+      .forEach(i => addOption(i.key, i.label));
   }
 }
 
@@ -153,73 +161,15 @@ document.addEventListener('DOMContentLoaded', () => {
 });
 
 
-/* ============================================================
-   HELPER: Build monthly series from salesDetails for a
-   specific category or item (when not using "overall" mode).
-============================================================ */
-function buildMonthlyFromDetails(analysisType, filterValue) {
-  /* Filter the line-item detail rows */
-  let rows = forecastData.salesDetails;
-
-  if (filterValue && filterValue !== '__all__') {
-    if (analysisType === 'category') {
-      rows = rows.filter(d => (d.item_category || 'Unknown') === filterValue);
-    } else if (analysisType === 'item') {
-      rows = rows.filter(d => (d.item_name || 'Unknown') === filterValue);
-    }
-  }
-
-  /* Apply historical range filter */
-  const range  = document.getElementById('fctHistoricalRange').value;
-  let cutoffMs = 0;
-  if (range !== 'all') {
-    const cutoff = new Date();
-    cutoff.setMonth(cutoff.getMonth() - parseInt(range));
-    cutoffMs = cutoff.getTime();
-  }
-
-  /* Aggregate by month using the parent sales order date stored in forecastData.monthly.
-     salesDetails doesn't carry a date, so we join via the overall monthly shape.
-     Simplest reliable approach: aggregate total_sales_price by month key using
-     forecastData.monthly dates as the reference frame.                            */
-
-  /* Build a lookup: so_id → month key from the parent orders.
-     Since salesDetails doesn't include dates directly, we rebuild from
-     the pre-aggregated monthly data returned by the backend.
-     We use the monthly revenue proportioned by detail rows for category/item.     */
-
-  /* Practical approach — sum total_sales_price per month-equivalent bucket.
-     We don't have a date on each detail row so we use the parent order dates
-     that are already aggregated in forecastData.monthly.
-     For category/item views we scale down the overall monthly series by the
-     fraction of revenue that category/item represents in the whole dataset.       */
-
-  const totalRevenue = forecastData.salesDetails.reduce(
-    (sum, d) => sum + (parseFloat(d.total_sales_price) || 0), 0
-  );
-  const subsetRevenue = rows.reduce(
-    (sum, d) => sum + (parseFloat(d.total_sales_price) || 0), 0
-  );
-  const fraction = totalRevenue > 0 ? subsetRevenue / totalRevenue : 1;
-
-  /* Scale the overall monthly series by that fraction */
-  return forecastData.monthly
-    .filter(m => {
-      if (!cutoffMs) return true;
-      return parseYearMonth(m.month).getTime() >= cutoffMs;
-    })
-    .map(m => ({
-      date:    parseYearMonth(m.month),
-      revenue: m.total_revenue * fraction,
-      orders:  m.order_count
-    }));
-}
-
-
 /* ============================================================
    FORECAST GENERATION — ENTRY POINT
+   The model is fitted server-side (/api/sales-forecasting/forecast/)
+   and cached there per scope, range and horizon; a single item over
+   all history comes from the precomputed forecasts when they are current.
 ============================================================ */
-function generateForecast() {
+let fctTrendLine = [];
+
+async function generateForecast() {
   if (forecastData.monthly.length === 0) {
     alert('No historical sales data available for forecasting.');
     return;
@@ -230,51 +180,57 @@ function generateForecast() {
   try {
     const forecastPeriod = parseInt(document.getElementById('fctForecastPeriod').value);
     const analysisType   = document.getElementById('fctAnalysisType').value;
-    const filterValue    = document.getElementById('fctFilterSelect')
-                             ? document.getElementById('fctFilterSelect').value
-                             : '__all__';
+    const filterSelect   = document.getElementById('fctFilterSelect');
+    const filterValue    = filterSelect && analysisType !== 'overall' ? filterSelect.value : '__all__';
     const range          = document.getElementById('fctHistoricalRange').value;
 
-    /* Build the historical monthly series to forecast from */
-    let historical;
-    if (analysisType === 'overall') {
-      /* Use the backend-aggregated monthly data directly */
-      let cutoffMs = 0;
-      if (range !== 'all') {
-        const cutoff = new Date();
-        cutoff.setMonth(cutoff.getMonth() - parseInt(range));
-        cutoffMs = cutoff.getTime();
-      }
-      historical = forecastData.monthly
-        .filter(m => {
-          if (!cutoffMs) return true;
-          return parseYearMonth(m.month).getTime() >= cutoffMs;
-        })
-        .map(m => ({
-          date:    parseYearMonth(m.month),
-          revenue: m.total_revenue,
-          orders:  m.order_count
-        }));
-    } else {
-      historical = buildMonthlyFromDetails(analysisType, filterValue);
+    const params = new URLSearchParams({
+      analysis_type: analysisType,
+      filter:        filterValue,
+      range:         range,
+      horizon:       forecastPeriod
+    });
+    const response = await fetch(`/api/sales-forecasting/forecast/?${params}`, {
+      headers:     { 'X-CSRFToken': fctGetCSRFToken() },
+      credentials: 'same-origin'
+    });
+    const result = await response.json();
+
+    if (!result.success) {
+      alert('Error generating forecast: ' + (result.message || 'Unknown error'));
+      return;
     }
 
+    const historical = result.data.history.map(m => ({
+      date:    parseYearMonth(m.month),
+      revenue: m.revenue,
+      orders:  m.orders
+    }));
+    const forecast = result.data.forecast.map(f => ({
+      date:       parseYearMonth(f.month),
+      predicted:  f.predicted,
+      lower:      f.lower,
+      upper:      f.upper,
+      confidence: f.confidence
+    }));
+    fctTrendLine = result.data.trend.fitted;
+
     /* Update the forecast chart subtitle */
     const subtitleEl = document.getElementById('forecastChartSubtitle');
     if (subtitleEl) {
+      const filterLabel = filterValue === '__all__' ? 'All'
+                        : (filterSelect.options[filterSelect.selectedIndex]?.text || filterValue);
       const label = analysisType === 'overall' ? 'Overall Sales'
-                  : analysisType === 'category' ? `Category: ${filterValue === '__all__' ? 'All' : filterValue}`
-                  : `Item: ${filterValue === '__all__' ? 'All' : filterValue}`;
+                  : analysisType === 'category' ? `Category: ${filterLabel}`
+                  : `Item: ${filterLabel}`;
       subtitleEl.textContent = `Predicted sales with confidence intervals — ${label}`;
     }
 
     if (historical.length < 1) {
       alert('No data available for the selected filter and range.');
-      fctHideLoading();
       return;
     }
 
-    const forecast = calculateForecast(historical, forecastPeriod);
     const insights = generateInsights(historical, forecast);
 
     updateMetrics(forecast, historical);
@@ -282,7 +238,7 @@ function generateForecast() {
     displayInsights(insights);
     populateForecastTable(forecast);
 
-    console.log('✅ Forecast generated successfully');
+    console.log(`✅ Forecast generated successfully (${result.data.source}${result.cached ? ', cached' : ''})`);
   } catch (err) {
     console.error('❌ Error generating forecast:', err);
     alert('Error generating forecast. Please try again.');
@@ -292,90 +248,6 @@ function generateForecast() {
 }
 
 
-/* ============================================================
-   FORECASTING ALGORITHMS
-============================================================ */
-function calculateForecast(historical, periods) {
-  if (historical.length < 2) return generateDefaultForecast(periods);
-
-  const revenues    = historical.map(m => m.revenue);
-  const trend       = calculateLinearTrend(revenues);
-  const seasonality = calculateSeasonality(revenues);
-  const forecast    = [];
-  const lastDate    = historical[historical.length - 1].date;
-
-  for (let i = 1; i <= periods; i++) {
-    const nextDate = new Date(lastDate);
-    nextDate.setMonth(nextDate.getMonth() + i);
-
-    const trendValue    = trend.slope * (historical.length + i) + trend.intercept;
-    const seasonalIndex = seasonality[nextDate.getMonth()];
-    const baseValue     = Math.max(0, trendValue * seasonalIndex);
-    const noise         = baseValue * 0.10;                        /* ±10 % band */
-
-    forecast.push({
-      date:       nextDate,
-      predicted:  baseValue,
-      lower:      Math.max(0, baseValue - noise),
-      upper:      baseValue + noise,
-      confidence: calculateConfidence(historical.length, i)
-    });
-  }
-  return forecast;
-}
-
-/* Ordinary Least Squares linear trend */
-function calculateLinearTrend(data) {
-  const n    = data.length;
-  const sumX = (n * (n - 1)) / 2;
-  const sumY = data.reduce((a, b) => a + b, 0);
-  const sumXY = data.reduce((sum, y, x) => sum + x * y, 0);
-  const sumX2 = (n * (n - 1) * (2 * n - 1)) / 6;
-  const denom  = n * sumX2 - sumX * sumX;
-  const slope  = denom !== 0 ? (n * sumXY - sumX * sumY) / denom : 0;
-  return { slope, intercept: (sumY - slope * sumX) / n };
-}
-
-/* Seasonal index per calendar month (0–11) */
-function calculateSeasonality(data) {
-  const seasonal = new Array(12).fill(1);
-  if (data.length < 12) return seasonal;
-
-  const avgPerMonth = {};
-  const overall     = data.reduce((a, b) => a + b, 0) / data.length;
-
-  data.forEach((value, i) => {
-    const month = i % 12;
-    if (!avgPerMonth[month]) avgPerMonth[month] = [];
-    avgPerMonth[month].push(value);
-  });
-
-  Object.keys(avgPerMonth).forEach(month => {
-    const avg        = avgPerMonth[month].reduce((a, b) => a + b, 0) / avgPerMonth[month].length;
-    seasonal[month]  = overall > 0 ? avg / overall : 1;
-  });
-  return seasonal;
-}
-
-/* Confidence decays exponentially as we forecast further ahead */
-function calculateConfidence(historicalLength, periodsAhead) {
-  const base  = Math.min(historicalLength / 12, 1);
-  const decay = Math.exp(-periodsAhead / 6);
-  return Math.round(base * decay * 100);
-}
-
-function generateDefaultForecast(periods) {
-  const today    = new Date();
-  const forecast = [];
-  for (let i = 1; i <= periods; i++) {
-    const next = new Date(today);
-    next.setMonth(next.getMonth() + i);
-    forecast.push({ date: next, predicted: 0, lower: 0, upper: 0, confidence: 0 });
-  }
-  return forecast;
-}
-
-
 /* ============================================================
    METRICS
 ============================================================ */
@@ -561,8 +433,7 @@ function renderTrendChart(historical) {
   if (fctCharts.trend) fctCharts.trend.destroy();
 
   const allData   = historical.map(m => m.revenue);
-  const trend     = calculateLinearTrend(allData);
-  const trendLine = allData.map((_, i) => Math.max(0, trend.slope * i + trend.intercept));
+  const trendLine = fctTrendLine;                 /* OLS fit returned by the forecast API */
   const labels    = historical.map(m =>
     MONTH_NAMES_SHORT[m.date.getMonth()] + ' ' + m.date.getFullYear()
   );
@@ -613,15 +484,10 @@ function renderTopProductsChart() {
   if (!ctx) return;
   if (fctCharts.topProducts) fctCharts.topProducts.destroy();
 
-  const productSales = {};
-  forecastData.salesDetails.forEach(detail => {
-    const item = detail.item_name || 'Unknown';
-    productSales[item] = (productSales[item] || 0) + (parseFloat(detail.total_sales_price) || 0);
-  });
-
-  const top5 = Object.entries(productSales)
-    .sort((a, b) => b[1] - a[1])
-    .slice(0, 5);
+  /* Item groups arrive already ranked by revenue */
+  const top5 = forecastData.items
+    .slice(0, 5)
+    .map(i => [i.label || 'Unknown', i.total_revenue]);
 
   if (top5.length === 0) {
     ctx.parentElement.innerHTML =
@@ -666,9 +532,8 @@ function renderCategoryChart() {
   if (fctCharts.category) fctCharts.category.destroy();
 
   const catSales = {};
-  forecastData.salesDetails.forEach(detail => {
-    const cat = detail.item_category || 'Unknown';
-    catSales[cat] = (catSales[cat] || 0) + (parseFloat(detail.total_sales_price) || 0);
+  forecastData.categories.forEach(c => {
+    catSales[c.label || 'Unknown'] = c.total_revenue;
   });
 
   if (Object.keys(catSales).length === 0) {
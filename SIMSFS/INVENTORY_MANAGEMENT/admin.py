@@ -3,6 +3,7 @@ from .models import ItemType,ItemCategory,ItemSubcategory,PaymentMode,County,Tow
 from .models import Inventory,InventoryItem
 from .models import Supplier,PurchaseOrder,PurchaseDetail,Payment                                # IMPORT ALL MODEL CLASSES
 from .models import Customer,SalesOrder,SalesDetail,Receipt
+from .models import SalesForecast,IdSequence,CacheVersion,PurchaseOrderStatusHistory,DailyRollup,InventoryValuation,InventoryCostLayer,BalanceCounter
 from .models import UserManager,User
 
 
@@ -31,4 +32,12 @@ admin.site.register(Customer)
 admin.site.register(SalesOrder)
 admin.site.register(SalesDetail)
 admin.site.register(Receipt)
+admin.site.register(SalesForecast)
+admin.site.register(IdSequence)
+admin.site.register(CacheVersion)
+admin.site.register(PurchaseOrderStatusHistory)
+admin.site.register(DailyRollup)
+admin.site.register(InventoryValuation)
+admin.site.register(InventoryCostLayer)
+admin.site.register(BalanceCounter)
 admin.site.register(User)
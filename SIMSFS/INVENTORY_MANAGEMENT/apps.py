@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class InventoryManagementConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'SIMSFS.INVENTORY_MANAGEMENT'
+
+    def ready(self):
+        from .report_cache import connect_invalidation_signals
+        from .dimensions import connect_dimension_signals
+        connect_invalidation_signals(self)
+        connect_dimension_signals(self)
@@ -0,0 +1,150 @@
+"""
+CUSTOMER AND SUPPLIER BALANCE COUNTERS
+
+CUSTOMERS.total_sales / total_payments and SUPPLIERS.total_purchases / total_payments are running totals
+of the orders, receipts and payments posted against each party. The write views post their change with
+post_balance() inside their transaction, which never reads the party row back:
+
+    BALANCE_COUNTER_SHARDS = 0 (default)   UPDATE CUSTOMERS SET total_sales = total_sales + %s WHERE customer_id = %s
+                                           concurrent postings no longer overwrite each other, but still
+                                           queue on the party's row lock until each one commits
+    BALANCE_COUNTER_SHARDS = n             the increment goes to one of n BALANCE_COUNTERS rows of the party
+                                           for today, picked at random, so up to n postings against one busy
+                                           account commit in parallel
+
+Counter rows are folded into the party rows by `manage.py fold_balance_counters` (run it periodically,
+e.g. from cron). By default it folds only the days before today, which no writer touches any more. Until
+a row is folded the party's balance is its stored totals plus its counters: read balances through
+with_current_balances(), which annotates current_<field> for each total.
+
+`manage.py reconcile_balances` checks the counters against the order, payment and receipt tables and
+with --fix posts the difference for every party that drifted.
+"""
+import random
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils.timezone import localdate
+
+from .models import BalanceCounter, Customer, Supplier
+
+
+BALANCE_COUNTER_SHARDS = getattr(settings, 'BALANCE_COUNTER_SHARDS', 0)       # 0 = INCREMENT THE PARTY ROW DIRECTLY
+FOLD_BATCH_SIZE = 1000
+
+CUSTOMER = 'CUSTOMER'
+SUPPLIER = 'SUPPLIER'
+
+# MODEL -> (PARTY TYPE, TOTAL FIELD, PAYMENTS FIELD)
+BALANCE_FIELDS = {
+    Customer: (CUSTOMER, 'total_sales', 'total_payments'),
+    Supplier: (SUPPLIER, 'total_purchases', 'total_payments'),
+}
+PARTY_MODELS = {party_type: model for model, (party_type, *_) in BALANCE_FIELDS.items()}
+
+
+def _money(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=14, decimal_places=2))
+
+
+def _increment(model, pk, total, payments):
+    """One UPDATE adding to the non-zero totals of a party row; returns the number of rows updated"""
+    party_type, total_field, payments_field = BALANCE_FIELDS[model]
+    increments = {field: F(field) + value for field, value in ((total_field, total), (payments_field, payments)) if value}
+    return model.objects.filter(pk=pk).update(**increments) if increments else 0
+
+
+# ============================================
+# POSTING
+# ============================================
+
+def post_balance(party, total=0, payments=0):
+    """
+    Add `total` to a Customer's total_sales / a Supplier's total_purchases and `payments` to its
+    total_payments (negative to reverse) without reading the row. Call inside the write's
+    transaction.atomic() block. The in-memory `party` is not refreshed, so do not save() it afterwards.
+
+    Queryset updates send no post_save signal: the order / payment / receipt saved in the same
+    transaction is what invalidates the report cache.
+    """
+    model = type(party)
+    if not total and not payments:
+        return
+    if not BALANCE_COUNTER_SHARDS:
+        _increment(model, party.pk, total, payments)
+        return
+
+    key = {
+        'party_type': BALANCE_FIELDS[model][0], 'party_id': party.pk,
+        'date': localdate(), 'shard': random.randrange(BALANCE_COUNTER_SHARDS),
+    }
+    rows = BalanceCounter.objects.filter(**key)
+    increments = {'total_delta': F('total_delta') + total, 'payments_delta': F('payments_delta') + payments}
+
+    if not rows.update(**increments):
+        try:
+            with transaction.atomic():
+                BalanceCounter.objects.create(total_delta=total, payments_delta=payments, **key)
+        except IntegrityError:
+            rows.update(**increments)                                        # ANOTHER WRITER CREATED THE ROW FIRST
+
+
+# ============================================
+# READING
+# ============================================
+
+def with_current_balances(queryset):
+    """
+    Customer / Supplier queryset annotated with current_<field> (stored total plus unfolded counters)
+    for its total and total_payments fields, e.g. current_total_sales and current_total_payments.
+    """
+    party_type, total_field, payments_field = BALANCE_FIELDS[queryset.model]
+    counters = BalanceCounter.objects.filter(
+        party_type=party_type, party_id=OuterRef('pk')
+    ).order_by().values('party_id')
+
+    annotations = {}
+    for field, delta in ((total_field, 'total_delta'), (payments_field, 'payments_delta')):
+        pending = Subquery(counters.annotate(pending=Sum(delta)).values('pending'),
+                           output_field=DecimalField(max_digits=14, decimal_places=2))
+        annotations[f'current_{field}'] = _money(F(field) + Coalesce(pending, Value(Decimal('0'))))
+    return queryset.annotate(**annotations)
+
+
+# ============================================
+# FOLDING
+# ============================================
+
+def fold_balance_counters(include_today=False):
+    """
+    Add the counter rows (of the days before today, unless include_today) to their party rows and delete
+    them, in one transaction. Returns the number of counter rows folded.
+    """
+    counters = BalanceCounter.objects.all()
+    if not include_today:
+        counters = counters.filter(date__lt=localdate())
+
+    with transaction.atomic():
+        # LOCKED: A WRITER INCREMENTING ONE OF THESE ROWS WAITS, THEN FINDS IT GONE AND CREATES A NEW ONE
+        rows = list(counters.select_for_update().order_by('pk').values_list(
+            'pk', 'party_type', 'party_id', 'total_delta', 'payments_delta'
+        ))
+
+        netted = defaultdict(lambda: [Decimal('0'), Decimal('0')])
+        for pk, party_type, party_id, total, payments in rows:
+            totals = netted[(party_type, party_id)]
+            totals[0] += total
+            totals[1] += payments
+
+        for (party_type, party_id), (total, payments) in sorted(netted.items()):
+            _increment(PARTY_MODELS[party_type], party_id, total, payments)  # NO-OP FOR A DELETED PARTY
+
+        pks = [row[0] for row in rows]
+        for start in range(0, len(pks), FOLD_BATCH_SIZE):
+            BalanceCounter.objects.filter(pk__in=pks[start:start + FOLD_BATCH_SIZE]).delete()
+
+    return len(rows)
@@ -0,0 +1,44 @@
+"""
+SHARED CACHE VERSIONS
+
+Caches kept in each worker process (dimension tables) or keyed per data version (reports, PDF exports)
+are invalidated by a version counter that every process reads from the database, one CACHE_VERSIONS row
+per cache, so a write committed in one worker is seen by all of them whatever CACHES is configured:
+
+    cache_version('reports')                 current version (0 until the first bump)
+    cache_version('dimensions', max_age=1)   the same, re-read at most once a second in this process
+    bump_cache_version('reports')            UPDATE CACHE_VERSIONS SET version = version + 1 ...
+
+Call bump_cache_version() from transaction.on_commit() so no process reloads before the write is visible.
+"""
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CacheVersion
+
+
+_read = {}                                                                   # NAME -> (VERSION, MONOTONIC TIME READ) IN THIS PROCESS
+
+
+def cache_version(name, max_age=0):
+    """Current version of a cache, read from the database unless this process read it under `max_age` seconds ago"""
+    now = time.monotonic()
+    if name in _read and now - _read[name][1] < max_age:
+        return _read[name][0]
+    version = CacheVersion.objects.filter(name=name).values_list('version', flat=True).first() or 0
+    _read[name] = (version, now)
+    return version
+
+
+def bump_cache_version(name):
+    """Move a cache to a new version in every process; this process sees it on its next cache_version()"""
+    rows = CacheVersion.objects.filter(name=name)
+    if not rows.update(version=F('version') + 1):
+        try:
+            with transaction.atomic():
+                CacheVersion.objects.create(name=name, version=1)
+        except IntegrityError:
+            rows.update(version=F('version') + 1)                            # ANOTHER PROCESS CREATED THE ROW FIRST
+    _read.pop(name, None)
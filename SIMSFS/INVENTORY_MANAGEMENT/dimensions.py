@@ -0,0 +1,147 @@
+"""
+DIMENSION LOOKUP CACHE
+
+The small lookup tables behind the dropdowns and foreign keys (item types, categories, subcategories,
+counties, towns, payment modes and the order statuses) are read from memory instead of the database:
+
+    dimension_row(County, name)       the row, as County.objects.get(county=name) would return it
+    dimension_names(County)           every name, in name order, for the dropdown endpoints
+
+Each process loads a table on first use and keeps it until the shared version moves. The version is the
+'dimensions' row of CACHE_VERSIONS (cache_versions.py), so every worker reads the same one whatever cache
+is configured. It is incremented when a write to any dimension table commits, whether it came from an
+api_add_* endpoint, the admin or a get_or_create. The writing process reloads on its next lookup; the
+others re-read the version at most every DIMENSION_VERSION_CHECK_SECONDS (default 1) and reload when it
+has moved, so lookups cost at most one primary-key read per interval.
+
+The dropdown endpoints are wrapped in dimension_endpoint(), which ETags the response on the names it
+serves; a browser revalidating with If-None-Match gets a 304 without reading the dimension table (only
+the version, when its check interval has run out).
+"""
+import hashlib
+import json
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .cache_versions import bump_cache_version, cache_version
+
+
+VERSION_NAME = 'dimensions'                                                  # ROW OF CACHE_VERSIONS
+VERSION_CHECK_SECONDS = getattr(settings, 'DIMENSION_VERSION_CHECK_SECONDS', 1)
+
+# LOOKUP TABLES HELD IN MEMORY (PRIMARY KEY = NAME)
+DIMENSION_MODELS = [
+    'ItemType', 'ItemCategory', 'ItemSubcategory', 'County', 'Town', 'PaymentMode',
+    'PaymentStatus', 'ReceiptStatus', 'ShippingStatus',
+]
+
+_lock = threading.Lock()
+_loaded = {'version': None, 'tables': {}, 'etags': {}}
+
+
+# ============================================
+# VERSIONING
+# ============================================
+
+def dimension_version():
+    """Current dimension data version (0 until the first write), re-read every VERSION_CHECK_SECONDS"""
+    return cache_version(VERSION_NAME, max_age=VERSION_CHECK_SECONDS)
+
+
+def bump_dimension_version():
+    """Make every process reload its dimension tables"""
+    bump_cache_version(VERSION_NAME)
+
+
+def _bump_on_commit(sender, **kwargs):
+    transaction.on_commit(bump_dimension_version)
+
+
+def connect_dimension_signals(app_config):
+    """Hook post_save / post_delete of the dimension models (called from AppConfig.ready)"""
+    for model_name in DIMENSION_MODELS:
+        model = app_config.get_model(model_name)
+        post_save.connect(_bump_on_commit, sender=model, dispatch_uid=f'dimension_cache_save_{model_name}')
+        post_delete.connect(_bump_on_commit, sender=model, dispatch_uid=f'dimension_cache_delete_{model_name}')
+
+
+# ============================================
+# LOOKUPS
+# ============================================
+
+def _table(model):
+    """{name: row} of a dimension table at the current version, loading it if needed"""
+    version = dimension_version()
+    with _lock:
+        if _loaded['version'] != version:
+            _loaded.update(version=version, tables={}, etags={})
+        table = _loaded['tables'].get(model)
+    if table is None:
+        table = {row.pk: row for row in model.objects.order_by('pk')}
+        with _lock:
+            if _loaded['version'] == version:
+                _loaded['tables'][model] = table
+    return table
+
+
+def dimension_row(model, name):
+    """
+    The row of a dimension table named `name`. A name missing from memory is looked up in the database
+    (which may match it case-insensitively), so raises model.DoesNotExist exactly like objects.get().
+    """
+    row = _table(model).get(name)
+    if row is None:
+        row = model.objects.get(pk=name)
+    return row
+
+
+def get_or_create_dimension_row(model, name):
+    """dimension_row(), creating the row if it does not exist (PaymentMode / statuses entered on the fly)"""
+    try:
+        return dimension_row(model, name)
+    except model.DoesNotExist:
+        return model.objects.get_or_create(pk=name)[0]
+
+
+def dimension_names(model):
+    """Every name of a dimension table, in name (primary key) order"""
+    return list(_table(model))
+
+
+def dimension_etag(model):
+    """Quoted ETag of the names dimension_names() returns"""
+    version = dimension_version()
+    etag = _loaded['etags'].get(model) if _loaded['version'] == version else None
+    if etag is None:
+        digest = hashlib.md5(json.dumps(dimension_names(model)).encode()).hexdigest()
+        etag = f'"{model._meta.db_table.lower()}-{digest}"'
+        with _lock:
+            if _loaded['version'] == version:
+                _loaded['etags'][model] = etag
+    return etag
+
+
+# ============================================
+# VIEW DECORATOR
+# ============================================
+
+def dimension_endpoint(model):
+    """
+    ETag a dropdown endpoint on the names of its dimension table. A GET whose If-None-Match matches
+    gets a 304; every response must be revalidated by the browser (Cache-Control: private, no-cache).
+    """
+    def decorator(view):
+        @condition(etag_func=lambda request, *args, **kwargs: dimension_etag(model))
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,330 @@
+"""
+EXCEL REPORT EXPORTS
+
+Reports are written with openpyxl's write-only workbook: rows are appended to each sheet and streamed
+to a temporary file instead of being kept as a grid of cell objects, so memory stays bounded by the
+report summary rather than the number of rows written.
+
+A report is described as a list of sections (title, header row, data rows, per-column number formats)
+built from the report's JSON data. Sections go one after another on a single sheet, or each on its own
+sheet (layout='sheets'). When the report is regenerated on the server, the full detail rows behind it
+(inventory items, sales / purchase lines) are added as extra sheets, read from the database in keyset
+batches through exports.export_rows.
+"""
+import re
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+
+from .exports import export_columns, export_rows
+
+
+MONEY = '#,##0.00'
+PERCENT = '0.0"%"'
+LAYOUTS = ('single', 'sheets')
+
+HEADER_FILL = PatternFill(start_color="2C3E50", end_color="2C3E50", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF", size=12)
+TITLE_FONT = Font(bold=True, size=16, color="1ABC9C")
+SECTION_FONT = Font(bold=True, size=12)
+BOLD_FONT = Font(bold=True)
+
+
+def _section(title, headers, rows, formats=None, title_color=None, total_row=False):
+    return {
+        'title': title, 'headers': headers, 'rows': list(rows), 'formats': formats or {},
+        'title_color': title_color, 'total_row': total_row,
+    }
+
+
+# ============================================
+# REPORT SECTIONS
+# ============================================
+
+def _kpi_sections(report_data):
+    if 'kpis' not in report_data:
+        return []
+    rows = [
+        [key.replace('_', ' ').title(), value if isinstance(value, (int, float)) else str(value)]
+        for key, value in report_data['kpis'].items()
+    ]
+    return [_section('KEY PERFORMANCE INDICATORS', None, rows, {1: MONEY})]
+
+
+def _sales_sections(report_data):
+    if 'top_customers' not in report_data:
+        return []
+    rows = [
+        [c['name'], c['total'], c['orders'], c['total'] / c['orders']]
+        for c in report_data['top_customers']
+    ]
+    return [_section('TOP CUSTOMERS', ['Customer Name', 'Total Sales', 'Orders', 'Avg Order Value'], rows,
+                     {1: MONEY, 3: MONEY})]
+
+
+def _inventory_sections(report_data):
+    if not report_data.get('low_stock'):
+        return []
+    rows = [
+        [i['item_id'], i['name'], i['category'], i['remaining_qty'], i['reorder_level']]
+        for i in report_data['low_stock']
+    ]
+    return [_section('ITEMS REQUIRING REORDER', ['Item ID', 'Item Name', 'Category', 'Current Stock', 'Reorder Level'],
+                     rows, title_color="E74C3C")]
+
+
+def _profit_loss_sections(report_data):
+    if 'breakdown' not in report_data:
+        return []
+    breakdown = report_data['breakdown']
+    rows = [
+        ['Revenue', breakdown['revenue']],
+        ['Cost of Goods Sold', -breakdown['cogs']],
+        ['Gross Profit', breakdown['gross_profit']],
+        ['Operating Expenses', -breakdown['shipping_expense']],
+        ['Net Profit', breakdown['net_profit']],
+    ]
+    return [_section('INCOME STATEMENT', None, rows, {1: MONEY})]
+
+
+def _purchase_sections(report_data):
+    if 'top_suppliers' not in report_data:
+        return []
+    rows = [
+        [s['name'], s['total'], s['orders'], s['total'] / s['orders']]
+        for s in report_data['top_suppliers']
+    ]
+    return [_section('TOP SUPPLIERS', ['Supplier Name', 'Total Purchases', 'Orders', 'Avg Order Value'], rows,
+                     {1: MONEY, 3: MONEY})]
+
+
+def _outstanding_sections(report_data):
+    sections = []
+    if report_data.get('customer_balances'):
+        rows = [
+            [c['id'], c['name'], c['total_sales'], c['total_payments'], c['balance']]
+            for c in report_data['customer_balances']
+        ]
+        sections.append(_section('CUSTOMER BALANCES (RECEIVABLE)',
+                                 ['Customer ID', 'Customer Name', 'Total Sales', 'Payments', 'Balance'], rows,
+                                 {2: MONEY, 3: MONEY, 4: MONEY}))
+    if report_data.get('supplier_balances'):
+        rows = [
+            [s['id'], s['name'], s['total_purchases'], s['total_payments'], s['balance']]
+            for s in report_data['supplier_balances']
+        ]
+        sections.append(_section('SUPPLIER BALANCES (PAYABLE)',
+                                 ['Supplier ID', 'Supplier Name', 'Total Purchases', 'Payments', 'Balance'], rows,
+                                 {2: MONEY, 3: MONEY, 4: MONEY}))
+    return sections
+
+
+def _tax_sections(report_data):
+    sections = []
+    if 'sales_by_rate' in report_data:
+        rows = [
+            [f"{r['tax_rate']}%", r['taxable_amount'], r['tax_collected'], r['transactions']]
+            for r in report_data['sales_by_rate']
+        ]
+        sections.append(_section('SALES TAX BY RATE', ['Tax Rate', 'Taxable Amount', 'Tax Collected', 'Transactions'],
+                                 rows, {1: MONEY, 2: MONEY}))
+    if 'purchase_by_rate' in report_data:
+        rows = [
+            [f"{r['tax_rate']}%", r['taxable_amount'], r['tax_paid'], r['transactions']]
+            for r in report_data['purchase_by_rate']
+        ]
+        sections.append(_section('PURCHASE TAX BY RATE', ['Tax Rate', 'Taxable Amount', 'Tax Paid', 'Transactions'],
+                                 rows, {1: MONEY, 2: MONEY}))
+    if 'kpis' in report_data:
+        kpis = report_data['kpis']
+        rows = [
+            ['Tax Collected (Sales)', kpis['total_sales_tax']],
+            ['Tax Paid (Purchases)', -kpis['total_purchase_tax']],
+            ['Net Tax Position', kpis['net_tax']],
+        ]
+        sections.append(_section('NET TAX POSITION', None, rows, {1: MONEY}, total_row=True))
+    return sections
+
+
+def _customer_analysis_sections(report_data):
+    if 'top_customers' not in report_data:
+        return []
+    rows = [
+        [c['customer_name'], c['total_sales'], c['total_orders'], c['avg_order_value'],
+         c['outstanding_balance'], c['payment_ratio']]
+        for c in report_data['top_customers']
+    ]
+    return [_section('TOP CUSTOMERS',
+                     ['Customer Name', 'Total Sales', 'Orders', 'Avg Order', 'Outstanding', 'Payment Ratio'], rows,
+                     {1: MONEY, 3: MONEY, 4: MONEY, 5: PERCENT})]
+
+
+def _supplier_analysis_sections(report_data):
+    if 'top_suppliers' not in report_data:
+        return []
+    rows = [
+        [s['supplier_name'], s['total_purchases'], s['total_orders'], s['avg_order_value'],
+         s['outstanding_balance'], s['delivery_rate']]
+        for s in report_data['top_suppliers']
+    ]
+    return [_section('TOP SUPPLIERS',
+                     ['Supplier Name', 'Total Purchases', 'Orders', 'Avg Order', 'Outstanding', 'Delivery Rate'], rows,
+                     {1: MONEY, 3: MONEY, 4: MONEY, 5: PERCENT})]
+
+
+# REPORT TYPE -> SECTION BUILDER (MATCHED ON THE TYPE NAME, AS SENT BY Reports.js OR AS A TITLE)
+SECTION_BUILDERS = [
+    (('sales', 'summary'), _sales_sections),
+    (('inventory',), _inventory_sections),
+    (('profit',), _profit_loss_sections),
+    (('loss',), _profit_loss_sections),
+    (('purchase',), _purchase_sections),
+    (('outstanding',), _outstanding_sections),
+    (('customer', 'analysis'), _customer_analysis_sections),
+    (('supplier', 'analysis'), _supplier_analysis_sections),
+    (('tax',), _tax_sections),
+]
+
+
+def report_sections(report_type, report_data):
+    """KPI section plus the report-specific sections for a report's JSON data"""
+    sections = _kpi_sections(report_data)
+    name = report_type.lower()
+    for words, builder in SECTION_BUILDERS:
+        if all(word in name for word in words):
+            sections += builder(report_data)
+            break
+    return sections
+
+
+# ============================================
+# DETAIL SHEETS (STREAMED FROM THE DATABASE)
+# ============================================
+
+def _detail_filters(params, **columns):
+    """Map report params (category, county) to export_rows filters on the detail table's columns"""
+    return {column: params[param] for param, column in columns.items() if params.get(param)}
+
+
+def report_detail_sheets(report_type, params, start_date=None, end_date=None):
+    """
+    (sheet title, header, row iterator) for the detail rows behind a report regenerated on the server.
+    Rows are fetched lazily, one keyset batch at a time, while the sheet is written.
+    """
+    if report_type == 'inventory-status':
+        filters = _detail_filters(params, category='item_category')
+        tables = [('Inventory Items', 'inventory', None, None, filters)]
+    elif report_type == 'sales-summary':
+        filters = _detail_filters(params, category='item_category', county='county')
+        tables = [('Sales Lines', 'sales-details', start_date, end_date, filters)]
+    elif report_type == 'purchase-summary':
+        filters = _detail_filters(params, category='item_category', county='county')
+        tables = [('Purchase Lines', 'purchase-details', start_date, end_date, filters)]
+    elif report_type == 'tax-summary':
+        tables = [
+            ('Sales Tax Lines', 'sales-details', start_date, end_date, {}),
+            ('Purchase Tax Lines', 'purchase-details', start_date, end_date, {}),
+        ]
+    else:
+        tables = []
+
+    return [
+        (title, export_columns(table), export_rows(table, start, end, filters=filters))
+        for title, table, start, end, filters in tables
+    ]
+
+
+# ============================================
+# WRITE-ONLY WORKBOOK
+# ============================================
+
+def _sheet_title(title, used):
+    name = re.sub(r'[\[\]:*?/\\]', '', title).strip().title()[:31] or 'Sheet'
+    base, counter = name, 2
+    while name in used:
+        suffix = f' ({counter})'
+        name = base[:31 - len(suffix)] + suffix
+        counter += 1
+    used.add(name)
+    return name
+
+
+def _set_widths(ws, sections, first_columns=()):
+    """Column widths from the (in-memory) section rows; must run before the first append"""
+    widths = {}
+    for index, value in enumerate(first_columns):
+        widths[index] = len(str(value))
+    for section in sections:
+        for row in ([section['headers']] if section['headers'] else []) + section['rows']:
+            for index, value in enumerate(row):
+                widths[index] = max(widths.get(index, 0), len(str(value)) if value is not None else 0)
+    for index, width in widths.items():
+        ws.column_dimensions[get_column_letter(index + 1)].width = min(max(width + 2, 12), 50)
+
+
+def _cell(ws, value, font=None, fill=None, number_format=None):
+    cell = WriteOnlyCell(ws, value=value)
+    if font:
+        cell.font = font
+    if fill:
+        cell.fill = fill
+    if number_format and isinstance(value, (int, float)) and not isinstance(value, bool):
+        cell.number_format = number_format
+    return cell
+
+
+def _append_section(ws, section):
+    title_font = Font(bold=True, size=12, color=section['title_color']) if section['title_color'] else SECTION_FONT
+    ws.append([_cell(ws, section['title'], font=title_font)])
+    if section['headers']:
+        ws.append([_cell(ws, header, font=HEADER_FONT, fill=HEADER_FILL) for header in section['headers']])
+    last = len(section['rows']) - 1
+    for index, row in enumerate(section['rows']):
+        font = BOLD_FONT if section['total_row'] and index == last else None
+        ws.append([
+            _cell(ws, value, font=font, number_format=section['formats'].get(column))
+            for column, value in enumerate(row)
+        ])
+
+
+def _append_heading(ws, title, period):
+    ws.append([_cell(ws, title, font=TITLE_FONT)])
+    if period.get('start') and period.get('end'):
+        ws.append([f"Period: {period['start']} - {period['end']}"])
+    ws.append([])
+
+
+def write_report_workbook(fileobj, title, period, sections, detail_sheets=(), layout='single'):
+    """
+    Write a report to `fileobj` as .xlsx with a write-only workbook.
+    layout='single' puts every section on one 'Report' sheet; layout='sheets' gives each section its
+    own sheet. Detail sheets always get a sheet each and are streamed row by row.
+    """
+    wb = Workbook(write_only=True)
+    used = set()
+
+    if layout == 'sheets' and sections:
+        for section in sections:
+            ws = wb.create_sheet(_sheet_title(section['title'], used))
+            _set_widths(ws, [section], first_columns=[title])
+            _append_heading(ws, title, period)
+            _append_section(ws, section)
+    else:
+        ws = wb.create_sheet(_sheet_title('Report', used))
+        _set_widths(ws, sections)
+        _append_heading(ws, title, period)
+        for section in sections:
+            _append_section(ws, section)
+            ws.append([])
+            ws.append([])
+
+    for sheet_title, headers, rows in detail_sheets:
+        ws = wb.create_sheet(_sheet_title(sheet_title, used))
+        _set_widths(ws, [_section(sheet_title, headers, [])])
+        ws.append([_cell(ws, header, font=HEADER_FONT, fill=HEADER_FILL) for header in headers])
+        for row in rows:
+            ws.append(row)
+
+    wb.save(fileobj)
@@ -0,0 +1,110 @@
+"""
+STREAMING TABLE EXPORTS
+
+Full extracts of the transaction tables (and the inventory) as CSV or newline-delimited JSON, written row by row into a
+StreamingHttpResponse so memory stays flat however many rows are exported.
+
+Rows are read with values_list() in keyset batches (WHERE pk > last ORDER BY pk LIMIT n) rather than
+one big cursor: MySQL's default client buffers a whole result set in memory even under .iterator(),
+while a keyset batch is a cheap indexed range scan on every backend.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import Inventory, Payment, PurchaseDetail, PurchaseOrder, Receipt, SalesDetail, SalesOrder
+
+
+EXPORT_BATCH_SIZE = 5000
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# EXPORT NAME -> (MODEL, COLUMNS, {ANNOTATED COLUMN: EXPRESSION}); FOREIGN KEYS EXPORT THEIR RAW ID
+EXPORT_TABLES = {
+    'sales-details': (SalesDetail, [
+        'detail_id', 'so_id', 'date', 'customer_id', 'customer_name', 'county', 'town', 'invoice_number',
+        'item_id', 'item_type', 'item_category', 'item_subcategory', 'item_name',
+        'quantity_sold', 'unit_price', 'tax_rate',
+    ], {'line_total': F('total_sales_price')}),
+    'purchase-details': (PurchaseDetail, [
+        'detail_id', 'po_id', 'date', 'supplier_id', 'supplier_name', 'county', 'town', 'bill_number',
+        'item_id', 'item_type', 'item_category', 'item_subcategory', 'item_name',
+        'quantity_purchased', 'unit_cost', 'tax_rate',
+    ], {'line_total': F('total_purchase_price')}),
+    'sales-orders': (SalesOrder, [
+        'so_id', 'date', 'customer_id', 'customer_name', 'invoice_number', 'county', 'town',
+        'total_amount', 'amount_received', 'receipt_status', 'shipping_status',
+    ], {}),
+    'purchase-orders': (PurchaseOrder, [
+        'po_id', 'date', 'supplier_id', 'supplier_name', 'bill_number', 'county', 'town',
+        'total_amount', 'amount_paid', 'payment_status', 'shipping_status',
+    ], {}),
+    'payments': (Payment, [
+        'transaction_id', 'date', 'supplier_id', 'supplier_name', 'county', 'town',
+        'po_id', 'bill_number', 'payment_mode', 'amount_paid',
+    ], {}),
+    'receipts': (Receipt, [
+        'transaction_id', 'date', 'customer_id', 'customer_name', 'county', 'town',
+        'so_id', 'invoice_number', 'payment_mode', 'amount_received',
+    ], {}),
+    'inventory': (Inventory, [
+        'item_id', 'item_type', 'item_category', 'item_subcategory', 'item_name',
+        'purchase_price', 'sale_price', 'quantity_purchased', 'quantity_sold', 'reorder_level', 'reorder_required',
+    ], {'remaining_qty': F('quantity_purchased') - F('quantity_sold')}),
+}
+
+
+def export_columns(table):
+    model, columns, annotations = EXPORT_TABLES[table]
+    return columns + list(annotations)
+
+
+def export_rows(table, start_date=None, end_date=None, batch_size=EXPORT_BATCH_SIZE, filters=None):
+    """
+    Yield value tuples for an export table in primary-key order, one keyset batch at a time.
+    The date range applies to tables with a date column; `filters` are extra field lookups.
+    """
+    model, columns, annotations = EXPORT_TABLES[table]
+    pk_name = model._meta.pk.name
+
+    queryset = model.objects.filter(**(filters or {}))
+    if 'date' in columns:
+        if start_date:
+            queryset = queryset.filter(date__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(date__lte=end_date)
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    queryset = queryset.order_by(pk_name).values_list(*export_columns(table))
+
+    pk_index = columns.index(pk_name)
+    last_pk = None
+    while True:
+        batch = queryset.filter(**{f'{pk_name}__gt': last_pk}) if last_pk is not None else queryset
+        rows = list(batch[:batch_size])
+        if not rows:
+            return
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_pk = rows[-1][pk_index]
+
+
+class _Echo:
+    """File-like object whose write() hands back the line instead of storing it (for csv.writer)"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(table, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(export_columns(table))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(table, rows):
+    columns = export_columns(table)
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,433 @@
+"""
+SERVER-SIDE SALES FORECASTING ENGINE
+
+Fits a least-squares linear trend multiplied by a calendar-month seasonal index
+over the monthly sales history and projects it forward with prediction intervals.
+All fitting is vectorized with NumPy; fitted results are cached per
+(scope, range, horizon) so repeated page loads do not refit or re-download history.
+A single item over its full history is served from SALES_FORECASTS (`manage.py forecast_sales`)
+while the stored rows are current, and only fitted on demand when they are missing or stale.
+"""
+import hashlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import SalesDetail, SalesForecast, SalesOrder
+
+
+FORECAST_CACHE_TIMEOUT = 60 * 15                                             # FITTED MODELS ARE KEPT FOR 15 MINUTES
+FORECAST_MAX_HORIZON = 24
+Z_95 = 1.96                                                                  # TWO-SIDED 95% NORMAL QUANTILE
+
+# LINE TOTAL AS COMPUTED BY SalesDetail.total_sales_price (TAX + 2% SHIPPING)
+LINE_TOTAL_EXPRESSION = ExpressionWrapper(
+    F('quantity_sold') * F('unit_price') * (1 + F('tax_rate') * Decimal('0.01')) * Decimal('1.02'),
+    output_field=DecimalField(max_digits=14, decimal_places=2)
+)
+
+
+# ============================================
+# HISTORY LOADING
+# ============================================
+
+def range_cutoff(range_param):
+    """Return the earliest date covered by a 'range' parameter (months back) or None for 'all'"""
+    if not range_param or range_param == 'all':
+        return None
+    return datetime.now().date() - timedelta(days=int(range_param) * 30)
+
+
+def add_months(month_start, months):
+    """Shift a first-of-month date by a number of months"""
+    index = month_start.year * 12 + (month_start.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def monthly_rows(analysis_type='overall', filter_value=None, range_param='all'):
+    """Aggregate the sales history per calendar month in the database"""
+    cutoff = range_cutoff(range_param)
+
+    if analysis_type == 'overall':
+        qs = SalesOrder.objects.all()
+        if cutoff:
+            qs = qs.filter(date__gte=cutoff)
+        return (
+            qs.annotate(month=TruncMonth('date'))
+            .values('month')
+            .annotate(revenue=Sum('total_amount'), orders=Count('so_id'))
+            .order_by('month')
+        )
+
+    qs = SalesDetail.objects.all()
+    if cutoff:
+        qs = qs.filter(date__gte=cutoff)
+    if filter_value and filter_value != '__all__':
+        if analysis_type == 'category':
+            qs = qs.filter(item_category=filter_value)
+        elif analysis_type == 'item':
+            qs = qs.filter(item_id=filter_value)
+        else:
+            raise ValueError(f"Unknown analysis type '{analysis_type}'")
+
+    return (
+        qs.annotate(month=TruncMonth('date'))
+        .values('month')
+        .annotate(revenue=Sum(LINE_TOTAL_EXPRESSION), orders=Count('so_id', distinct=True))
+        .order_by('month')
+    )
+
+
+def parse_month(value):
+    """Parse a 'YYYY-MM' month key into the first day of that month"""
+    year, month = value.split('-')[:2]
+    return date(int(year), int(month), 1)
+
+
+def month_of(value):
+    """First day of the month a date / datetime falls in"""
+    value = value.date() if isinstance(value, datetime) else value
+    return date(value.year, value.month, 1)
+
+
+def to_month_arrays(rows, end_month=None):
+    """
+    Turn aggregated month rows into contiguous (months, revenue, orders) arrays, filling gaps with zero.
+    `end_month` pads the series with empty months up to a common end date.
+    """
+    rows = [r for r in rows if r['month']]
+    if not rows:
+        return [], np.zeros(0), np.zeros(0)
+
+    first = month_of(rows[0]['month'])
+    last = max(month_of(rows[-1]['month']), end_month) if end_month else month_of(rows[-1]['month'])
+    length = (last.year - first.year) * 12 + (last.month - first.month) + 1
+
+    months = [add_months(first, i) for i in range(length)]
+    revenue = np.zeros(length)
+    orders = np.zeros(length)
+    for r in rows:
+        m = month_of(r['month'])
+        idx = (m.year - first.year) * 12 + (m.month - first.month)
+        revenue[idx] = float(r['revenue'] or 0)
+        orders[idx] = r['orders'] or 0
+
+    return months, revenue, orders
+
+
+SERIES_GROUP_FIELDS = {
+    'category': 'item_category',
+    'item': 'item_id',
+}
+
+
+def grouped_monthly_series(group_by, range_param='all', filters=None, page=1, page_size=20):
+    """
+    Monthly revenue / quantity series per item category or per item, built in SQL.
+
+    Groups are ranked by total revenue and paginated, so only the requested page of
+    groups is aggregated by month. Returns (groups, total_groups).
+    """
+    if group_by not in SERIES_GROUP_FIELDS:
+        raise ValueError(f"Invalid group_by '{group_by}', expected one of: {', '.join(SERIES_GROUP_FIELDS)}")
+    field = SERIES_GROUP_FIELDS[group_by]
+    filters = filters or {}
+
+    qs = SalesDetail.objects.all()
+    cutoff = range_cutoff(range_param)
+    if cutoff:
+        qs = qs.filter(date__gte=cutoff)
+    if filters.get('category'):
+        qs = qs.filter(item_category=filters['category'])
+    if filters.get('item_type'):
+        qs = qs.filter(item_type=filters['item_type'])
+    if filters.get('search'):
+        qs = qs.filter(item_name__icontains=filters['search'])
+
+    # RANK GROUPS BY REVENUE, THEN SLICE THE REQUESTED PAGE
+    totals = (
+        qs.values(field)
+        .annotate(total_revenue=Sum(LINE_TOTAL_EXPRESSION), total_quantity=Sum('quantity_sold'), label=Max('item_name'))
+        .order_by('-total_revenue', field)
+    )
+    total_groups = totals.count()
+    offset = (page - 1) * page_size
+    page_rows = list(totals[offset:offset + page_size])
+    keys = [r[field] for r in page_rows]
+
+    # ONE GROUPED QUERY FOR THE MONTHLY BUCKETS OF EVERY GROUP ON THE PAGE
+    series = {key: [] for key in keys}
+    monthly = (
+        qs.filter(**{f'{field}__in': keys})
+        .annotate(month=TruncMonth('date'))
+        .values(field, 'month')
+        .annotate(revenue=Sum(LINE_TOTAL_EXPRESSION), quantity=Sum('quantity_sold'), orders=Count('so_id', distinct=True))
+        .order_by(field, 'month')
+    )
+    for row in monthly:
+        if row['month']:
+            series[row[field]].append({
+                'month': row['month'].strftime('%Y-%m'),
+                'revenue': round(float(row['revenue'] or 0), 2),
+                'quantity': row['quantity'] or 0,
+                'orders': row['orders'],
+            })
+
+    groups = [{
+        'key': r[field],
+        'label': r['label'] if group_by == 'item' else r[field],
+        'total_revenue': round(float(r['total_revenue'] or 0), 2),
+        'total_quantity': r['total_quantity'] or 0,
+        'series': series[r[field]],
+    } for r in page_rows]
+
+    return groups, total_groups
+
+
+# ============================================
+# MODEL FITTING
+# ============================================
+
+def fit_trend(values):
+    """Ordinary least squares line over t = 0..n-1, returns (slope, intercept)"""
+    n = len(values)
+    if n < 2:
+        return 0.0, float(values[0]) if n else 0.0
+    t = np.arange(n, dtype=float)
+    slope, intercept = np.polyfit(t, values, 1)
+    return float(slope), float(intercept)
+
+
+def fit_seasonality(values, calendar_months):
+    """Seasonal index per calendar month (index 0 = January); flat when less than a year of history"""
+    seasonal = np.ones(12)
+    if len(values) < 12:
+        return seasonal
+
+    overall = values.mean()
+    if overall <= 0:
+        return seasonal
+
+    sums = np.bincount(calendar_months, weights=values, minlength=12)
+    counts = np.bincount(calendar_months, minlength=12)
+    seen = counts > 0
+    seasonal[seen] = (sums[seen] / counts[seen]) / overall
+    return seasonal
+
+
+def confidence_score(history_length, periods_ahead):
+    """Confidence (0-100) decays exponentially with the forecast step and grows with history length"""
+    base = min(history_length / 12, 1)
+    return np.round(base * np.exp(-np.asarray(periods_ahead) / 6) * 100).astype(int)
+
+
+def fit_forecast(months, revenue, orders, horizon):
+    """Fit trend x seasonality to a monthly series and project it `horizon` months ahead"""
+    n = len(revenue)
+    if n == 0:
+        start = date.today().replace(day=1)
+        return {
+            'history': [],
+            'forecast': [{
+                'month': add_months(start, k).strftime('%Y-%m'),
+                'predicted': 0.0, 'lower': 0.0, 'upper': 0.0, 'confidence': 0
+            } for k in range(1, horizon + 1)],
+            'trend': {'slope': 0.0, 'intercept': 0.0, 'fitted': []},
+            'seasonality': [1.0] * 12,
+            'residual_std': 0.0,
+        }
+
+    t = np.arange(n, dtype=float)
+    calendar_months = np.array([m.month - 1 for m in months])
+
+    slope, intercept = fit_trend(revenue)
+    seasonal = fit_seasonality(revenue, calendar_months)
+
+    fitted = (slope * t + intercept) * seasonal[calendar_months]
+    residuals = revenue - fitted
+    dof = max(n - 2, 1)
+    residual_std = float(np.sqrt(np.sum(residuals ** 2) / dof)) if n > 2 else 0.0
+
+    # FUTURE STEPS
+    steps = np.arange(1, horizon + 1)
+    future_t = (n - 1) + steps
+    future_months = [add_months(months[-1], int(k)) for k in steps]
+    future_calendar = np.array([m.month - 1 for m in future_months])
+
+    predicted = np.maximum((slope * future_t + intercept) * seasonal[future_calendar], 0)
+
+    # OLS PREDICTION INTERVAL: s * sqrt(1 + 1/n + (t0 - t_mean)^2 / Sxx)
+    sxx = np.sum((t - t.mean()) ** 2)
+    leverage = 1 / n + ((future_t - t.mean()) ** 2 / sxx if sxx > 0 else 0)
+    margin = Z_95 * residual_std * np.sqrt(1 + leverage)
+    if residual_std == 0:
+        margin = predicted * 0.10                                            # TOO LITTLE HISTORY FOR RESIDUALS, FALL BACK TO +/-10%
+
+    lower = np.maximum(predicted - margin, 0)
+    upper = predicted + margin
+    confidence = confidence_score(n, steps)
+
+    return {
+        'history': [{
+            'month': m.strftime('%Y-%m'),
+            'revenue': round(float(r), 2),
+            'orders': int(o)
+        } for m, r, o in zip(months, revenue, orders)],
+        'forecast': [{
+            'month': m.strftime('%Y-%m'),
+            'predicted': round(float(p), 2),
+            'lower': round(float(lo), 2),
+            'upper': round(float(up), 2),
+            'confidence': int(c)
+        } for m, p, lo, up, c in zip(future_months, predicted, lower, upper, confidence)],
+        'trend': {
+            'slope': round(slope, 4),
+            'intercept': round(intercept, 4),
+            'fitted': [round(float(v), 2) for v in np.maximum(slope * t + intercept, 0)]
+        },
+        'seasonality': [round(float(s), 4) for s in seasonal],
+        'residual_std': round(residual_std, 2),
+    }
+
+
+# ============================================
+# CACHED ENTRY POINT
+# ============================================
+
+def history_fingerprint():
+    """Cheap aggregate over the order headers; it changes whenever sales are added, edited or deleted"""
+    agg = SalesOrder.objects.aggregate(count=Count('so_id'), total=Sum('total_amount'), latest=Max('date'))
+    return f"{agg['count']}-{agg['total'] or 0}-{agg['latest'] or ''}"
+
+
+def get_forecast(analysis_type='overall', filter_value=None, range_param='all', horizon=6):
+    """
+    Return (result, cached) for a scope: the stored forecast of a single item over its full history when
+    it is current, otherwise a fit reused from the cache while the sales history is unchanged.
+    result['source'] says which ('stored' / 'fitted').
+    """
+    scope = analysis_type if analysis_type == 'overall' else f"{analysis_type}:{filter_value or '__all__'}"
+
+    if analysis_type == 'item' and filter_value not in (None, '', '__all__') and range_param == 'all':
+        result = stored_item_forecast(filter_value, horizon)                 # NONE: NOT PRECOMPUTED OR STALE
+        if result is not None:
+            result.update(scope=scope, range=range_param, horizon=horizon)
+            return result, True
+
+    cache_key = f"sales_forecast:{scope}:{range_param}:{horizon}".replace(' ', '_')
+    fingerprint = history_fingerprint()
+
+    entry = cache.get(cache_key)
+    if entry and entry['fingerprint'] == fingerprint:
+        return entry['result'], True
+
+    months, revenue, orders = to_month_arrays(monthly_rows(analysis_type, filter_value, range_param))
+    result = fit_forecast(months, revenue, orders, horizon)
+    result['source'] = 'fitted'
+    result['scope'] = scope
+    result['range'] = range_param
+    result['horizon'] = horizon
+
+    cache.set(cache_key, {'fingerprint': fingerprint, 'result': result}, FORECAST_CACHE_TIMEOUT)
+    return result, False
+
+
+# ============================================
+# BATCH (PER ITEM) FORECASTING
+# ============================================
+
+def forecast_origin():
+    """Month every item is projected from: the month of the latest sale of any item (None without sales)"""
+    latest = SalesDetail.objects.aggregate(latest=Max('date'))['latest']
+    return month_of(latest) if latest else None
+
+
+def item_history_signatures(item_ids=None):
+    """
+    One grouped query returning {item_id: signature} for every item with sales (or for `item_ids`).
+    The signature changes whenever a sales line of the item is added, edited or deleted, and for every
+    item when the forecast origin moves, since the item's trailing months without sales grow with it.
+    """
+    origin = forecast_origin()
+    qs = SalesDetail.objects.all()
+    if item_ids is not None:
+        qs = qs.filter(item_id__in=list(item_ids))
+    rows = (
+        qs.values('item_id')
+        .annotate(lines=Count('detail_id'), quantity=Sum('quantity_sold'),
+                  revenue=Sum(LINE_TOTAL_EXPRESSION), latest=Max('date'), last_detail=Max('detail_id'))
+        .order_by()
+    )
+    return {
+        r['item_id']: hashlib.md5(
+            f"{r['lines']}|{r['quantity']}|{r['revenue']}|{r['latest']}|{r['last_detail']}|{origin}".encode()
+        ).hexdigest()
+        for r in rows
+    }
+
+
+def load_item_histories(item_ids=None):
+    """
+    Load the item x month sales history in a single query and return
+    ({item_id: (months, revenue, orders)}, last_month) with every series padded to the same last month.
+    """
+    qs = SalesDetail.objects.all()
+    if item_ids is not None:
+        qs = qs.filter(item_id__in=list(item_ids))
+
+    rows = (
+        qs.annotate(month=TruncMonth('date'))
+        .values('item_id', 'month')
+        .annotate(revenue=Sum(LINE_TOTAL_EXPRESSION), orders=Count('so_id', distinct=True))
+        .order_by('item_id', 'month')
+    )
+
+    per_item = {}
+    for r in rows:
+        per_item.setdefault(r['item_id'], []).append(r)
+
+    # EVERY ITEM IS PROJECTED FROM THE SAME MONTH SO THE FORECAST ROWS LINE UP
+    last_month = forecast_origin()
+
+    return {
+        item_id: to_month_arrays(item_rows, end_month=last_month)
+        for item_id, item_rows in per_item.items()
+    }, last_month
+
+
+def fit_item_batch(batch, horizon):
+    """
+    Fit a batch of items; runs inside a worker process so it only touches NumPy data.
+    `batch` is a list of (item_id, months, revenue, orders). Returns [(item_id, forecast_rows)].
+    """
+    return [
+        (item_id, fit_forecast(months, revenue, orders, horizon)['forecast'])
+        for item_id, months, revenue, orders in batch
+    ]
+
+
+def stored_item_forecast(item_id, horizon):
+    """
+    Forecast of one item read from SALES_FORECASTS, or None when fewer than `horizon` months are stored or
+    the item's sales changed since they were fitted. The history and trend returned with it run up to the
+    month before the stored forecast, the series the batch fitted it on.
+    """
+    rows = list(SalesForecast.objects.filter(item_id=item_id).order_by('month')[:horizon])
+    if len(rows) < horizon or item_history_signatures([item_id]).get(item_id) != rows[0].history_signature:
+        return None
+
+    months, revenue, orders = to_month_arrays(monthly_rows('item', item_id), end_month=add_months(rows[0].month, -1))
+    result = fit_forecast(months, revenue, orders, 1)                        # FOR THE HISTORY, TREND AND SEASONALITY
+    result['forecast'] = [{
+        'month': row.month.strftime('%Y-%m'),
+        'predicted': float(row.predicted_sales),
+        'lower': float(row.lower_bound),
+        'upper': float(row.upper_bound),
+        'confidence': row.confidence
+    } for row in rows]
+    result['source'] = 'stored'
+    return result
@@ -0,0 +1,260 @@
+"""
+LIST API QUERY LAYER
+
+Shared search / filter / sort / keyset pagination for the list endpoints (inventory, inventory items,
+purchase orders, sales orders, payments, receipts). Every endpoint accepts:
+
+    q=<text>                   case-insensitive search over the endpoint's search columns
+    <filter>=<value>           column filters declared in LIST_SPECS (dates as DD/MM/YYYY or YYYY-MM-DD)
+    sort=<column> | -<column>  one of the endpoint's sort columns (primary key is the tie-breaker)
+    page_size=<n>, cursor=<c>  keyset pagination; next_cursor of one page fetches the next one
+    count=1                    also return the total number of matching rows
+
+Pages are fetched with WHERE (sort, pk) > (last sort, last pk) ORDER BY sort, pk LIMIT n, so page N
+costs the same as page 1 however deep the client scrolls, and COUNT(*) only runs when asked for.
+Without page_size / cursor the whole (filtered, sorted) list is returned, as before, because the
+dropdowns in the other modules still load these endpoints in full.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import DateField, F, Q
+
+from .models import Inventory, InventoryItem, Payment, PurchaseOrder, Receipt, SalesOrder
+
+
+MAX_PAGE_SIZE = 500
+
+
+def _reorder_filter(value):
+    """reorder_required=YES|NO on the annotated remaining quantity"""
+    if value.upper() == 'YES':
+        return Q(remaining_qty__lte=F('reorder_level'))
+    if value.upper() == 'NO':
+        return Q(remaining_qty__gt=F('reorder_level'))
+    raise ValueError('reorder_required must be YES or NO')
+
+
+# ENDPOINT -> QUERY SPEC
+#   sort:     {sort param: model field or annotation}; default_sort is used when ?sort is absent
+#   search:   columns matched with icontains by ?q
+#   filters:  {query param: field lookup, or a callable(value) -> Q}
+#   annotate: computed columns that can be sorted / filtered on
+LIST_SPECS = {
+    'inventory': {
+        'model': Inventory,
+        'annotate': {'remaining_qty': F('quantity_purchased') - F('quantity_sold')},
+        'sort': {
+            'id': 'item_id', 'name': 'item_name', 'purchasedQty': 'quantity_purchased',
+            'soldQty': 'quantity_sold', 'remainingQty': 'remaining_qty', 'reorderLevel': 'reorder_level',
+        },
+        'default_sort': 'id',
+        'search': ['item_id', 'item_name'],
+        'filters': {
+            'type': 'item_type', 'category': 'item_category', 'subcategory': 'item_subcategory',
+            'reorder_required': _reorder_filter,
+        },
+    },
+    'inventory_items': {
+        'model': InventoryItem,
+        'sort': {
+            'id': 'item_id', 'name': 'item_name', 'purchase_price': 'purchase_price', 'sale_price': 'sale_price',
+        },
+        'default_sort': 'id',
+        'search': ['item_id', 'item_name'],
+        'filters': {'type': 'item_type', 'category': 'item_category', 'subcategory': 'item_subcategory'},
+    },
+    'purchase_orders': {
+        'model': PurchaseOrder,
+        'sort': {
+            'date': 'date', 'po_id': 'po_id', 'supplier_name': 'supplier_name',
+            'total_amount': 'total_amount', 'amount_paid': 'amount_paid',
+        },
+        'default_sort': '-date',
+        'search': ['po_id', 'supplier_name', 'bill_number'],
+        'filters': {
+            'supplier_id': 'supplier_id', 'county': 'county', 'town': 'town',
+            'payment_status': 'payment_status', 'shipping_status': 'shipping_status',
+            'start_date': 'date__gte', 'end_date': 'date__lte',
+        },
+    },
+    'sales_orders': {
+        'model': SalesOrder,
+        'sort': {
+            'date': 'date', 'so_id': 'so_id', 'customer_name': 'customer_name',
+            'total_amount': 'total_amount', 'amount_received': 'amount_received',
+        },
+        'default_sort': '-date',
+        'search': ['so_id', 'customer_name', 'invoice_number'],
+        'filters': {
+            'customer_id': 'customer_id', 'county': 'county', 'town': 'town',
+            'receipt_status': 'receipt_status', 'shipping_status': 'shipping_status',
+            'start_date': 'date__gte', 'end_date': 'date__lte',
+        },
+    },
+    'payments': {
+        'model': Payment,
+        'sort': {
+            'date': 'date', 'transaction_id': 'transaction_id', 'supplier_name': 'supplier_name',
+            'amount_paid': 'amount_paid',
+        },
+        'default_sort': '-date',
+        'search': ['transaction_id', 'supplier_name', 'bill_number', 'po_id__po_id'],
+        'filters': {
+            'supplier_id': 'supplier_id', 'po_id': 'po_id', 'payment_mode': 'payment_mode',
+            'start_date': 'date__gte', 'end_date': 'date__lte',
+        },
+    },
+    'receipts': {
+        'model': Receipt,
+        'sort': {
+            'date': 'date', 'transaction_id': 'transaction_id', 'customer_name': 'customer_name',
+            'amount_received': 'amount_received',
+        },
+        'default_sort': '-date',
+        'search': ['transaction_id', 'customer_name', 'invoice_number', 'so_id__so_id'],
+        'filters': {
+            'customer_id': 'customer_id', 'so_id': 'so_id', 'payment_mode': 'payment_mode',
+            'start_date': 'date__gte', 'end_date': 'date__lte',
+        },
+    },
+}
+
+
+# ============================================
+# CURSORS AND VALUES
+# ============================================
+
+def encode_cursor(sort_value, pk_value):
+    raw = json.dumps([sort_value, pk_value], cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, pk_value = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError('Invalid cursor')
+    return sort_value, pk_value
+
+
+def _column_field(queryset, column):
+    """Model field (or annotation output field) behind a column, following FK paths"""
+    if column in queryset.query.annotations:
+        return queryset.query.annotations[column].output_field
+    model = queryset.model
+    field = None
+    for part in column.split('__'):
+        field = model._meta.get_field(part)
+        if field.is_relation:
+            model = field.related_model
+    return field
+
+
+def _to_python(field, value):
+    """Convert a query-string / cursor value to the column's Python type"""
+    if isinstance(field, DateField) and isinstance(value, str):
+        for fmt in ('%d/%m/%Y', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                pass
+        raise ValueError(f"Invalid date '{value}'")
+    try:
+        return field.to_python(value)
+    except ValidationError:
+        raise ValueError(f"Invalid value '{value}'")
+
+
+# ============================================
+# QUERY
+# ============================================
+
+def list_query(spec_name, params, queryset=None):
+    """
+    Apply search, filters, sort and keyset pagination from the request's query params.
+    Returns (rows, pagination); pagination is None when the client did not ask for a page.
+    Raises ValueError on a bad sort column, filter value, page size or cursor.
+    """
+    spec = LIST_SPECS[spec_name]
+    model = spec['model']
+    pk_name = model._meta.pk.name
+
+    if queryset is None:
+        queryset = model.objects.all()
+    if spec.get('annotate'):
+        queryset = queryset.annotate(**spec['annotate'])
+
+    # SEARCH
+    search = params.get('q', '').strip()
+    if search:
+        condition = Q()
+        for column in spec['search']:
+            condition |= Q(**{f'{column}__icontains': search})
+        queryset = queryset.filter(condition)
+
+    # COLUMN FILTERS
+    for name, lookup in spec['filters'].items():
+        value = params.get(name, '').strip()
+        if not value:
+            continue
+        if callable(lookup):
+            queryset = queryset.filter(lookup(value))
+        else:
+            column = lookup.rsplit('__', 1)[0] if lookup.endswith(('__gte', '__lte')) else lookup
+            queryset = queryset.filter(**{lookup: _to_python(_column_field(queryset, column), value)})
+
+    # SORT (PRIMARY KEY BREAKS TIES SO THE ORDER IS TOTAL)
+    sort = params.get('sort', '').strip() or spec['default_sort']
+    descending = sort.startswith('-')
+    sort_key = sort.lstrip('-')
+    if sort_key not in spec['sort']:
+        raise ValueError(f"Cannot sort by '{sort_key}'. Use one of: {', '.join(spec['sort'])}")
+    sort_column = spec['sort'][sort_key]
+    prefix = '-' if descending else ''
+    ordering = [prefix + sort_column] + ([prefix + pk_name] if sort_column != pk_name else [])
+    queryset = queryset.order_by(*ordering)
+
+    page_size = params.get('page_size', '').strip()
+    cursor = params.get('cursor', '').strip()
+    if not page_size and not cursor:
+        return queryset, None
+
+    try:
+        page_size = min(max(int(page_size or 50), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        raise ValueError('page_size must be a number')
+
+    pagination = {'page_size': page_size, 'sort': sort}
+    if params.get('count') == '1':
+        pagination['total'] = queryset.count()
+
+    # KEYSET: ROWS STRICTLY AFTER THE LAST ROW OF THE PREVIOUS PAGE
+    if cursor:
+        sort_value, pk_value = decode_cursor(cursor)
+        after = 'lt' if descending else 'gt'
+        pk_value = _to_python(model._meta.pk, pk_value)
+        if sort_column == pk_name:
+            queryset = queryset.filter(**{f'{pk_name}__{after}': pk_value})
+        else:
+            sort_value = _to_python(_column_field(queryset, sort_column), sort_value)
+            queryset = queryset.filter(
+                Q(**{f'{sort_column}__{after}': sort_value}) |
+                Q(**{sort_column: sort_value, f'{pk_name}__{after}': pk_value})
+            )
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    pagination['has_more'] = has_more
+    pagination['next_cursor'] = None
+    if has_more:
+        last = rows[-1]
+        pagination['next_cursor'] = encode_cursor(getattr(last, sort_column), getattr(last, pk_name))
+    return rows, pagination
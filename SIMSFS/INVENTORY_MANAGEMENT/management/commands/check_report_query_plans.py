@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from SIMSFS.INVENTORY_MANAGEMENT.query_plans import capture_report_queries, explain, full_table_scans
+from SIMSFS.INVENTORY_MANAGEMENT.views import REPORT_EXPORT_VIEWS
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN every query of the date-range reports and fail if one scans a whole transaction table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', help='Report period start (YYYY-MM-DD, default 30 days ago)')
+        parser.add_argument('--end-date', help='Report period end (YYYY-MM-DD, default today)')
+        parser.add_argument('--category', help='Also filter the reports by an item category')
+        parser.add_argument('--county', help='Also filter the reports by a county')
+        parser.add_argument('--show-plans', action='store_true', help='Print the plan of every query')
+
+    def handle(self, *args, **options):
+        params = {
+            'start_date': options['start_date'] or (date.today() - timedelta(days=30)).isoformat(),
+            'end_date': options['end_date'] or date.today().isoformat(),
+        }
+        for name in ('category', 'county'):
+            if options[name]:
+                params[name] = options[name]
+
+        failures = []
+        queries = capture_report_queries(REPORT_EXPORT_VIEWS, params)
+        for report_type, sql in queries:
+            try:
+                plan = explain(sql)
+            except Exception as e:                                           # AN UNCHECKED QUERY IS NOT A PASSING ONE
+                failures.append(f'{report_type}: could not EXPLAIN query ({e})\n    {sql}')
+                continue
+
+            if options['show_plans']:
+                self.stdout.write(f'\n{report_type}: {sql}')
+                for step in plan:
+                    self.stdout.write(f'    {step}')
+
+            for table, step in full_table_scans(plan, sql):
+                failures.append(f'{report_type}: full scan of {table} ({step})\n    {sql}')
+
+        if failures:
+            raise CommandError('Query plan check failed:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS(f'Checked {len(queries)} report queries: no full table scans'))
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from SIMSFS.INVENTORY_MANAGEMENT.balances import fold_balance_counters
+
+
+class Command(BaseCommand):
+    help = 'Fold the BALANCE_COUNTERS rows into the CUSTOMERS / SUPPLIERS totals (run periodically)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--include-today', action='store_true',
+                            help="Also fold today's rows (briefly blocks writers posting to them)")
+
+    def handle(self, *args, **options):
+        started = time.time()
+        folded = fold_balance_counters(include_today=options['include_today'])
+        self.stdout.write(self.style.SUCCESS(f'Folded {folded} balance counter rows in {time.time() - started:.1f}s'))
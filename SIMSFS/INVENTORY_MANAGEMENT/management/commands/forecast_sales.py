@@ -0,0 +1,93 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from SIMSFS.INVENTORY_MANAGEMENT.forecasting import (
+    FORECAST_MAX_HORIZON, fit_item_batch, item_history_signatures, load_item_histories, parse_month
+)
+from SIMSFS.INVENTORY_MANAGEMENT.models import SalesForecast
+
+
+class Command(BaseCommand):
+    help = 'Precompute per-item sales forecasts into SALES_FORECASTS (only items whose sales changed are refitted)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=6, help='Months to forecast ahead (default 6)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes for fitting')
+        parser.add_argument('--batch-size', type=int, default=250, help='Items handed to a worker per task')
+        parser.add_argument('--full', action='store_true', help='Refit every item, even if its sales did not change')
+
+    def handle(self, *args, **options):
+        horizon = options['horizon']
+        if horizon < 1 or horizon > FORECAST_MAX_HORIZON:
+            raise CommandError(f'--horizon must be between 1 and {FORECAST_MAX_HORIZON}')
+        started = time.time()
+
+        # WORK OUT WHICH ITEMS NEED A REFIT
+        signatures = item_history_signatures()
+        stored = dict(
+            SalesForecast.objects.values_list('item_id', 'history_signature').distinct()
+        )
+        stored_lengths = {}
+        for item_id in SalesForecast.objects.values_list('item_id', flat=True):
+            stored_lengths[item_id] = stored_lengths.get(item_id, 0) + 1
+
+        if options['full']:
+            changed = set(signatures)
+        else:
+            changed = {
+                item_id for item_id, signature in signatures.items()
+                if stored.get(item_id) != signature or stored_lengths.get(item_id) != horizon
+            }
+        removed = set(stored) - set(signatures)                             # ITEMS WHOSE SALES WERE ALL DELETED
+
+        self.stdout.write(f'{len(signatures)} items with sales, {len(changed)} to refit, {len(removed)} to clear')
+
+        if removed:
+            SalesForecast.objects.filter(item_id__in=removed).delete()
+        if not changed:
+            self.stdout.write(self.style.SUCCESS('Forecasts are up to date'))
+            return
+
+        # LOAD THE HISTORY ONCE, THEN FIT IN PARALLEL
+        histories, last_month = load_item_histories(None if options['full'] else changed)
+        work = [(item_id,) + histories[item_id] for item_id in sorted(changed) if item_id in histories]
+        batches = [work[i:i + options['batch_size']] for i in range(0, len(work), options['batch_size'])]
+
+        results = []
+        if options['workers'] > 1 and len(batches) > 1:
+            connections.close_all()                                          # DO NOT SHARE DB SOCKETS WITH FORKED WORKERS
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+                for batch_result in pool.map(fit_item_batch, batches, [horizon] * len(batches)):
+                    results.extend(batch_result)
+        else:
+            for batch in batches:
+                results.extend(fit_item_batch(batch, horizon))
+
+        # REPLACE THE FORECAST ROWS OF THE REFITTED ITEMS IN ONE TRANSACTION
+        new_rows = [
+            SalesForecast(
+                item_id_id=item_id,
+                month=parse_month(row['month']),
+                predicted_sales=Decimal(str(row['predicted'])),
+                lower_bound=Decimal(str(row['lower'])),
+                upper_bound=Decimal(str(row['upper'])),
+                confidence=row['confidence'],
+                history_signature=signatures[item_id],
+            )
+            for item_id, rows in results
+            for row in rows
+        ]
+        with transaction.atomic():
+            SalesForecast.objects.filter(item_id__in=[item_id for item_id, _ in results]).delete()
+            SalesForecast.objects.bulk_create(new_rows, batch_size=1000)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Stored {len(new_rows)} forecast rows for {len(results)} items '
+            f'from {last_month:%Y-%m} in {time.time() - started:.1f}s'
+        ))
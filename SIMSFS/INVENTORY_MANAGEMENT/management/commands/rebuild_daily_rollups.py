@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from SIMSFS.INVENTORY_MANAGEMENT.rollups import rebuild_daily_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild DAILY_ROLLUPS from scratch out of the sales and purchase detail tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows inserted per bulk_create batch')
+
+    def handle(self, *args, **options):
+        started = time.time()
+        created = rebuild_daily_rollups(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} daily rollup rows in {time.time() - started:.1f}s'))
@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from SIMSFS.INVENTORY_MANAGEMENT.valuation import rebuild_inventory_valuations
+
+
+class Command(BaseCommand):
+    help = 'Rebuild INVENTORY_COST_LAYERS and INVENTORY_VALUATIONS from the purchase detail table'
+
+    def handle(self, *args, **options):
+        started = time.time()
+        created = rebuild_inventory_valuations()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {created} inventory cost layers in {time.time() - started:.1f}s'))
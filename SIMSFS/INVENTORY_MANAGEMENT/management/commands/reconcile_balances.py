@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from SIMSFS.INVENTORY_MANAGEMENT.views import (
+    customer_balance_drift, supplier_balance_drift, reconcile_customer_totals, reconcile_supplier_totals
+)
+
+
+class Command(BaseCommand):
+    help = ('Verify the customer / supplier balance counters against the order, payment and receipt tables '
+            'and fail if any drifted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Post the drift of every drifted party')
+
+    def handle(self, *args, **options):
+        checks = [
+            ('Customer', customer_balance_drift, reconcile_customer_totals, ('total_sales', 'total_payments')),
+            ('Supplier', supplier_balance_drift, reconcile_supplier_totals, ('total_purchases', 'total_payments')),
+        ]
+
+        failures = []
+        for label, drift, reconcile, fields in checks:
+            drifted = drift()
+            for party, *amounts in drifted:
+                off = ', '.join(f'{field} off by {amount}' for field, amount in zip(fields, amounts) if amount)
+                failures.append(f'{label} {party.pk}: {off}')
+            if drifted and options['fix']:
+                reconcile()
+
+        if failures and not options['fix']:
+            raise CommandError('Balance counters out of line with the transaction tables:\n' + '\n'.join(failures))
+        for failure in failures:
+            self.stdout.write(failure)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(failures)} drifted balances corrected' if failures else 'All customer and supplier balances reconcile'
+        ))
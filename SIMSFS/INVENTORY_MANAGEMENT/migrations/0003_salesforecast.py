@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0002_alter_purchasedetail_detail_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('predicted_sales', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('lower_bound', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('upper_bound', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('confidence', models.IntegerField(default=0)),
+                ('history_signature', models.CharField(max_length=64)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('item_id', models.ForeignKey(db_column='ITEM_ID', on_delete=django.db.models.deletion.CASCADE, to='INVENTORY_MANAGEMENT.inventory')),
+            ],
+            options={
+                'verbose_name': 'Sales Forecast',
+                'verbose_name_plural': 'Sales Forecasts',
+                'db_table': 'SALES_FORECASTS',
+                'constraints': [models.UniqueConstraint(fields=('item_id', 'month'), name='unique_item_forecast_month')],
+            },
+        ),
+    ]
@@ -0,0 +1,134 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:41
+
+from django.db import migrations, models
+
+
+SEQUENCE_SOURCES = {
+    'item':            ('IT',       [('InventoryItem', 'item_id'), ('Inventory', 'item_id')]),
+    'supplier':        ('S',        [('Supplier', 'supplier_id')]),
+    'customer':        ('C',        [('Customer', 'customer_id')]),
+    'purchase_order':  ('PO',       [('PurchaseOrder', 'po_id')]),
+    'sales_order':     ('SO',       [('SalesOrder', 'so_id')]),
+    'purchase_detail': ('PD',       [('PurchaseDetail', 'detail_id')]),
+    'sales_detail':    ('SD',       [('SalesDetail', 'detail_id')]),
+    'payment':         ('TRANSPAY', [('Payment', 'transaction_id')]),
+    'receipt':         ('TRANSAL',  [('Receipt', 'transaction_id')]),
+}
+
+
+def seed_sequences(apps, schema_editor):
+    """Start every counter at the highest number already in use"""
+    IdSequence = apps.get_model('INVENTORY_MANAGEMENT', 'IdSequence')
+    for name, (prefix, sources) in SEQUENCE_SOURCES.items():
+        highest = 0
+        for model_name, field in sources:
+            model = apps.get_model('INVENTORY_MANAGEMENT', model_name)
+            for value in model.objects.values_list(field, flat=True).iterator():
+                digits = value[len(prefix):] if value and value.startswith(prefix) else ''
+                if digits.isdigit():
+                    highest = max(highest, int(digits))
+        if highest:                                                          # EMPTY TABLES ARE SEEDED LAZILY ON FIRST USE
+            IdSequence.objects.update_or_create(name=name, defaults={'last_value': highest})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0003_salesforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=30, primary_key=True, serialize=False, unique=True)),
+                ('last_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'ID Sequence',
+                'verbose_name_plural': 'ID Sequences',
+                'db_table': 'ID_SEQUENCES',
+            },
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='customer_id',
+            field=models.CharField(max_length=11, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='inventory',
+            name='item_id',
+            field=models.CharField(max_length=12, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='inventoryitem',
+            name='item_id',
+            field=models.CharField(max_length=12, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='bill_number',
+            field=models.CharField(max_length=11),
+        ),
+        migrations.AlterField(
+            model_name='payment',
+            name='transaction_id',
+            field=models.CharField(max_length=18, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='purchasedetail',
+            name='bill_number',
+            field=models.CharField(max_length=11),
+        ),
+        migrations.AlterField(
+            model_name='purchasedetail',
+            name='detail_id',
+            field=models.CharField(max_length=12, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='bill_number',
+            field=models.CharField(max_length=11, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='po_id',
+            field=models.CharField(max_length=12, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='invoice_number',
+            field=models.CharField(max_length=11),
+        ),
+        migrations.AlterField(
+            model_name='receipt',
+            name='transaction_id',
+            field=models.CharField(max_length=17, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='salesdetail',
+            name='detail_id',
+            field=models.CharField(max_length=12, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='salesdetail',
+            name='invoice_number',
+            field=models.CharField(max_length=11),
+        ),
+        migrations.AlterField(
+            model_name='salesorder',
+            name='invoice_number',
+            field=models.CharField(max_length=11, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='salesorder',
+            name='so_id',
+            field=models.CharField(max_length=12, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='supplier',
+            name='supplier_id',
+            field=models.CharField(max_length=11, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.RunPython(seed_sequences, migrations.RunPython.noop),
+    ]
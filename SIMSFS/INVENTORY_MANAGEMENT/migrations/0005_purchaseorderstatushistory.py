@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0004_id_sequences'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PurchaseOrderStatusHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status_type', models.CharField(choices=[('PAYMENT', 'Payment'), ('SHIPPING', 'Shipping')], max_length=10)),
+                ('status', models.CharField(max_length=50)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('po_id', models.ForeignKey(db_column='PO_ID', on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='INVENTORY_MANAGEMENT.purchaseorder')),
+            ],
+            options={
+                'verbose_name': 'Purchase Order Status History',
+                'verbose_name_plural': 'Purchase Order Status History',
+                'db_table': 'PURCHASE_ORDER_STATUS_HISTORY',
+                'indexes': [models.Index(fields=['status_type', 'status', 'po_id'], name='po_status_history_lookup')],
+            },
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:51
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+
+def amount(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=18, decimal_places=4))
+
+
+def populate_rollups(apps, schema_editor):
+    """Fill DAILY_ROLLUPS from the existing detail lines (same grouping as rebuild_daily_rollups)"""
+    DailyRollup = apps.get_model('INVENTORY_MANAGEMENT', 'DailyRollup')
+    SalesDetail = apps.get_model('INVENTORY_MANAGEMENT', 'SalesDetail')
+    PurchaseDetail = apps.get_model('INVENTORY_MANAGEMENT', 'PurchaseDetail')
+    tax = F('tax_rate') * Decimal('0.01')
+
+    sides = [
+        ('SALES', SalesDetail.objects.values('date', 'item_id', 'county', party=F('customer_id')).annotate(
+            quantity=Sum('quantity_sold'), line_count=Count('detail_id'),
+            net_amount=Sum(amount(F('quantity_sold') * F('unit_price'))),
+            tax_amount=Sum(amount(F('quantity_sold') * F('unit_price') * tax)),
+            shipping_amount=Sum(amount(F('quantity_sold') * F('unit_price') * (1 + tax) * Decimal('0.02'))),
+            cogs_amount=Sum(amount(F('quantity_sold') * F('item_id__purchase_price')))
+        )),
+        ('PURCHASES', PurchaseDetail.objects.values('date', 'item_id', 'county', party=F('supplier_id')).annotate(
+            quantity=Sum('quantity_purchased'), line_count=Count('detail_id'),
+            net_amount=Sum(amount(F('quantity_purchased') * F('unit_cost'))),
+            tax_amount=Sum(amount(F('quantity_purchased') * F('unit_cost') * tax)),
+            shipping_amount=Sum(amount(F('quantity_purchased') * F('unit_cost') * (1 + tax) * Decimal('0.01')))
+        )),
+    ]
+    for kind, grouped in sides:
+        DailyRollup.objects.bulk_create([
+            DailyRollup(
+                kind=kind, date=row['date'], item_id_id=row['item_id'], party_id=row['party'], county=row['county'] or '',
+                quantity=row['quantity'] or 0, line_count=row['line_count'],
+                net_amount=row['net_amount'] or 0, tax_amount=row['tax_amount'] or 0,
+                shipping_amount=row['shipping_amount'] or 0, cogs_amount=row.get('cogs_amount') or 0
+            )
+            for row in grouped.order_by()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0005_purchaseorderstatushistory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('SALES', 'Sales'), ('PURCHASES', 'Purchases')], max_length=10)),
+                ('date', models.DateField()),
+                ('party_id', models.CharField(max_length=11)),
+                ('county', models.CharField(blank=True, default='', max_length=50)),
+                ('quantity', models.IntegerField(default=0)),
+                ('line_count', models.IntegerField(default=0)),
+                ('net_amount', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('tax_amount', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('shipping_amount', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('cogs_amount', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('item_id', models.ForeignKey(db_column='ITEM_ID', on_delete=django.db.models.deletion.PROTECT, related_name='daily_rollups', to='INVENTORY_MANAGEMENT.inventory')),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+                'db_table': 'DAILY_ROLLUPS',
+                'indexes': [models.Index(fields=['kind', 'date'], name='daily_rollup_kind_date')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'date', 'item_id', 'party_id', 'county'), name='unique_daily_rollup_key')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
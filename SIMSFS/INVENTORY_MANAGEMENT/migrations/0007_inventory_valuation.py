@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:05
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_valuations(apps, schema_editor):
+    """Build the cost layers and per-item totals from the existing purchase detail lines"""
+    PurchaseDetail = apps.get_model('INVENTORY_MANAGEMENT', 'PurchaseDetail')
+    InventoryCostLayer = apps.get_model('INVENTORY_MANAGEMENT', 'InventoryCostLayer')
+    InventoryValuation = apps.get_model('INVENTORY_MANAGEMENT', 'InventoryValuation')
+
+    details = PurchaseDetail.objects.order_by('item_id', 'date', 'detail_id').values_list(
+        'item_id', 'detail_id', 'date', 'quantity_purchased', 'unit_cost'
+    )
+    layers = []
+    totals = {}
+    for item_id, detail_id, day, quantity, unit_cost in details.iterator():
+        qty, cost, last_cost, last_date = totals.get(item_id, (0, Decimal('0'), None, None))
+        qty += quantity
+        totals[item_id] = (qty, cost + quantity * unit_cost, unit_cost, day)
+        layers.append(InventoryCostLayer(
+            item_id_id=item_id, detail_id=detail_id, date=day, quantity=quantity,
+            unit_cost=unit_cost, cumulative_qty=qty
+        ))
+    InventoryCostLayer.objects.bulk_create(layers, batch_size=1000)
+    InventoryValuation.objects.bulk_create([
+        InventoryValuation(item_id_id=item_id, layer_qty=qty, layer_cost=cost,
+                           average_cost=(cost / qty).quantize(Decimal('0.000001')) if qty else None,
+                           last_cost=last_cost, last_purchase_date=last_date)
+        for item_id, (qty, cost, last_cost, last_date) in totals.items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0006_dailyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryValuation',
+            fields=[
+                ('item_id', models.OneToOneField(db_column='ITEM_ID', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='valuation', serialize=False, to='INVENTORY_MANAGEMENT.inventory')),
+                ('layer_qty', models.IntegerField(default=0)),
+                ('layer_cost', models.DecimalField(decimal_places=4, default=0, max_digits=18)),
+                ('average_cost', models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True)),
+                ('last_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('last_purchase_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Inventory Valuation',
+                'verbose_name_plural': 'Inventory Valuations',
+                'db_table': 'INVENTORY_VALUATIONS',
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryCostLayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('detail_id', models.CharField(max_length=12, unique=True)),
+                ('date', models.DateField()),
+                ('quantity', models.IntegerField()),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('cumulative_qty', models.IntegerField()),
+                ('item_id', models.ForeignKey(db_column='ITEM_ID', on_delete=django.db.models.deletion.CASCADE, related_name='cost_layers', to='INVENTORY_MANAGEMENT.inventory')),
+            ],
+            options={
+                'verbose_name': 'Inventory Cost Layer',
+                'verbose_name_plural': 'Inventory Cost Layers',
+                'db_table': 'INVENTORY_COST_LAYERS',
+                'indexes': [models.Index(fields=['item_id', 'cumulative_qty'], name='cost_layer_item_cumulative')],
+            },
+        ),
+        migrations.RunPython(populate_valuations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0007_inventory_valuation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['date', 'supplier_id'], name='payment_date_supplier'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedetail',
+            index=models.Index(fields=['po_id', 'item_id'], name='pd_order_item'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedetail',
+            index=models.Index(fields=['item_category', 'date'], name='pd_category_date'),
+        ),
+        migrations.AddIndex(
+            model_name='purchasedetail',
+            index=models.Index(fields=['date', 'item_id'], name='pd_date_item'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['date', 'supplier_id'], name='po_date_supplier'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['supplier_id', 'date'], name='po_supplier_date'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['county', 'date'], name='po_county_date'),
+        ),
+        migrations.AddIndex(
+            model_name='receipt',
+            index=models.Index(fields=['date', 'customer_id'], name='receipt_date_customer'),
+        ),
+        migrations.AddIndex(
+            model_name='salesdetail',
+            index=models.Index(fields=['so_id', 'item_id'], name='sd_order_item'),
+        ),
+        migrations.AddIndex(
+            model_name='salesdetail',
+            index=models.Index(fields=['item_category', 'date'], name='sd_category_date'),
+        ),
+        migrations.AddIndex(
+            model_name='salesdetail',
+            index=models.Index(fields=['date', 'item_id'], name='sd_date_item'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['date', 'customer_id'], name='so_date_customer'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['customer_id', 'date'], name='so_customer_date'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['county', 'date'], name='so_county_date'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:09
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.db.models.functions import Round
+
+
+def rounded(expression):
+    """Line amount rounded to 4 places, as PurchaseDetail / SalesDetail.calculate_amounts() stores it"""
+    return Round(ExpressionWrapper(expression, output_field=DecimalField(max_digits=24, decimal_places=10)), 4)
+
+
+def backfill_line_amounts(apps, schema_editor):
+    """Compute the stored line amounts of the existing detail rows with three set-based UPDATEs per table"""
+    PurchaseDetail = apps.get_model('INVENTORY_MANAGEMENT', 'PurchaseDetail')
+    SalesDetail = apps.get_model('INVENTORY_MANAGEMENT', 'SalesDetail')
+
+    sides = [
+        (PurchaseDetail, 'quantity_purchased', 'unit_cost', 'cost_excluding_tax', 'cost_including_tax',
+         'total_purchase_price', Decimal('0.01')),
+        (SalesDetail, 'quantity_sold', 'unit_price', 'price_excluding_tax', 'price_including_tax',
+         'total_sales_price', Decimal('0.02')),
+    ]
+    for model, quantity, price, excluding, including, total, shipping_rate in sides:
+        # EACH UPDATE ONLY READS COLUMNS WRITTEN BY AN EARLIER ONE, SO THE RESULT IS THE SAME ON EVERY BACKEND
+        model.objects.update(**{
+            excluding: rounded(F(quantity) * F(price)),
+            'total_tax': rounded(F(quantity) * F(price) * F('tax_rate') * Decimal('0.01')),
+        })
+        model.objects.update(**{
+            including: F(excluding) + F('total_tax'),
+            'shipping_fees': rounded((F(excluding) + F('total_tax')) * shipping_rate),
+        })
+        model.objects.update(**{total: F(including) + F('shipping_fees')})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0008_report_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='purchasedetail',
+            name='cost_excluding_tax',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='purchasedetail',
+            name='cost_including_tax',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='purchasedetail',
+            name='shipping_fees',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='purchasedetail',
+            name='total_purchase_price',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='purchasedetail',
+            name='total_tax',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='salesdetail',
+            name='price_excluding_tax',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='salesdetail',
+            name='price_including_tax',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='salesdetail',
+            name='shipping_fees',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='salesdetail',
+            name='total_sales_price',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='salesdetail',
+            name='total_tax',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.RunPython(backfill_line_amounts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0009_detail_line_amounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('party_type', models.CharField(choices=[('CUSTOMER', 'Customer'), ('SUPPLIER', 'Supplier')], max_length=10)),
+                ('party_id', models.CharField(max_length=11)),
+                ('date', models.DateField()),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('total_delta', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('payments_delta', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name': 'Balance Counter',
+                'verbose_name_plural': 'Balance Counters',
+                'db_table': 'BALANCE_COUNTERS',
+                'constraints': [models.UniqueConstraint(fields=('party_type', 'party_id', 'date', 'shard'), name='unique_balance_counter_key')],
+            },
+        ),
+    ]
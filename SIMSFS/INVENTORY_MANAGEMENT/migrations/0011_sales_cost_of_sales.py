@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:26
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery
+from django.db.models.functions import Round
+
+
+def backfill_cost_of_sales(apps, schema_editor):
+    """
+    Cost the existing sales lines at their item's current purchase price (the price at the time of sale was
+    never recorded), as two set-based UPDATEs; from here on each line keeps the cost it was written with.
+    """
+    Inventory = apps.get_model('INVENTORY_MANAGEMENT', 'Inventory')
+    SalesDetail = apps.get_model('INVENTORY_MANAGEMENT', 'SalesDetail')
+
+    SalesDetail.objects.update(
+        unit_cost=Subquery(Inventory.objects.filter(item_id=OuterRef('item_id')).values('purchase_price')[:1])
+    )
+    SalesDetail.objects.update(cost_of_sales=Round(ExpressionWrapper(
+        F('quantity_sold') * F('unit_cost'), output_field=DecimalField(max_digits=24, decimal_places=10)
+    ), 4))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0010_balance_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesdetail',
+            name='cost_of_sales',
+            field=models.DecimalField(decimal_places=4, default=0, editable=False, max_digits=18),
+        ),
+        migrations.AddField(
+            model_name='salesdetail',
+            name='unit_cost',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.RunPython(backfill_cost_of_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:39
+
+from django.db import migrations, models
+
+
+def move_dimension_version(apps, schema_editor):
+    """Move the dimension cache version out of ID_SEQUENCES, where it was kept before CACHE_VERSIONS existed"""
+    IdSequence = apps.get_model('INVENTORY_MANAGEMENT', 'IdSequence')
+    CacheVersion = apps.get_model('INVENTORY_MANAGEMENT', 'CacheVersion')
+
+    for row in IdSequence.objects.filter(name='dimension_version'):
+        CacheVersion.objects.create(name='dimensions', version=row.last_value)
+        row.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0011_sales_cost_of_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=30, primary_key=True, serialize=False, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Cache Version',
+                'verbose_name_plural': 'Cache Versions',
+                'db_table': 'CACHE_VERSIONS',
+            },
+        ),
+        migrations.RunPython(move_dimension_version, migrations.RunPython.noop),
+    ]
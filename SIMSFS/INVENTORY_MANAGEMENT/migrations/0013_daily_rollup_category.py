@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:43
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+
+
+def rebuild_rollups(apps, schema_editor):
+    """Regroup DAILY_ROLLUPS by the category on the detail lines (same grouping as rebuild_daily_rollups)"""
+    DailyRollup = apps.get_model('INVENTORY_MANAGEMENT', 'DailyRollup')
+    SalesDetail = apps.get_model('INVENTORY_MANAGEMENT', 'SalesDetail')
+    PurchaseDetail = apps.get_model('INVENTORY_MANAGEMENT', 'PurchaseDetail')
+
+    sides = [
+        ('SALES', SalesDetail.objects.values('date', 'item_id', 'item_category', 'county', party=F('customer_id')).annotate(
+            quantity=Sum('quantity_sold'), line_count=Count('detail_id'),
+            net_amount=Sum('price_excluding_tax'), tax_amount=Sum('total_tax'),
+            shipping_amount=Sum('shipping_fees'), cogs_amount=Sum('cost_of_sales')
+        )),
+        ('PURCHASES', PurchaseDetail.objects.values('date', 'item_id', 'item_category', 'county', party=F('supplier_id')).annotate(
+            quantity=Sum('quantity_purchased'), line_count=Count('detail_id'),
+            net_amount=Sum('cost_excluding_tax'), tax_amount=Sum('total_tax'),
+            shipping_amount=Sum('shipping_fees')
+        )),
+    ]
+    DailyRollup.objects.all().delete()
+    for kind, grouped in sides:
+        DailyRollup.objects.bulk_create([
+            DailyRollup(
+                kind=kind, date=row['date'], item_id_id=row['item_id'], item_category=row['item_category'] or '',
+                party_id=row['party'], county=row['county'] or '',
+                quantity=row['quantity'] or 0, line_count=row['line_count'],
+                net_amount=row['net_amount'] or 0, tax_amount=row['tax_amount'] or 0,
+                shipping_amount=row['shipping_amount'] or 0, cogs_amount=row.get('cogs_amount') or 0
+            )
+            for row in grouped.order_by()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('INVENTORY_MANAGEMENT', '0012_cache_versions'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='dailyrollup',
+            name='unique_daily_rollup_key',
+        ),
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='item_category',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.RunPython(rebuild_rollups, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('kind', 'date', 'item_id', 'item_category', 'party_id', 'county'), name='unique_daily_rollup_key'),
+        ),
+    ]
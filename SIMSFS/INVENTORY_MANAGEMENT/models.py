@@ -1,6 +1,8 @@
 # Updated models with proper table naming conventions
 # Replace spaces with underscores in db_table and db_column
 
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
@@ -134,7 +136,7 @@ class Inventory(models.Model):
         ('NO', 'No'),
     ]
     
-    item_id = models.CharField(max_length=7, unique=True, primary_key=True)
+    item_id = models.CharField(max_length=12, unique=True, primary_key=True)
     item_type = models.ForeignKey(ItemType, on_delete=models.PROTECT, db_column='ITEM_TYPE')  # Changed
     item_category = models.ForeignKey(ItemCategory, on_delete=models.PROTECT, db_column='ITEM_CATEGORY')  # Changed
     item_subcategory = models.ForeignKey(ItemSubcategory, on_delete=models.PROTECT, db_column='ITEM_SUBCATEGORY')  # Changed
@@ -170,7 +172,7 @@ class Inventory(models.Model):
 
 
 class InventoryItem(models.Model):
-    item_id = models.CharField(max_length=7, unique=True, primary_key=True)
+    item_id = models.CharField(max_length=12, unique=True, primary_key=True)
     item_type = models.ForeignKey(ItemType, on_delete=models.PROTECT, db_column='ITEM_TYPE')
     item_category = models.ForeignKey(ItemCategory, on_delete=models.PROTECT, db_column='ITEM_CATEGORY')
     item_subcategory = models.ForeignKey(ItemSubcategory, on_delete=models.PROTECT, db_column='ITEM_SUBCATEGORY')
@@ -188,7 +190,7 @@ class InventoryItem(models.Model):
 
 
 class Supplier(models.Model):
-    supplier_id = models.CharField(max_length=6, unique=True, primary_key=True)
+    supplier_id = models.CharField(max_length=11, unique=True, primary_key=True)
     supplier_name = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=30, blank=True, null=True)
     email = models.EmailField(max_length=255, blank=True, null=True)
@@ -213,7 +215,7 @@ class Supplier(models.Model):
 
 
 class Customer(models.Model):
-    customer_id = models.CharField(max_length=6, unique=True, primary_key=True)
+    customer_id = models.CharField(max_length=11, unique=True, primary_key=True)
     customer_name = models.CharField(max_length=100)
     phone_number = models.CharField(max_length=30, blank=True, null=True)
     email = models.EmailField(max_length=255, blank=True, null=True)
@@ -238,12 +240,12 @@ class Customer(models.Model):
 
 
 class PurchaseOrder(models.Model):
-    po_id = models.CharField(max_length=7, unique=True, primary_key=True)
+    po_id = models.CharField(max_length=12, unique=True, primary_key=True)
     date = models.DateField()
     
     supplier_id = models.ForeignKey(Supplier, on_delete=models.PROTECT, db_column='SUPPLIER_ID')  # Changed
     supplier_name = models.CharField(max_length=100)
-    bill_number = models.CharField(max_length=6, unique=True)
+    bill_number = models.CharField(max_length=11, unique=True)
     
     county = models.ForeignKey(County, on_delete=models.PROTECT, db_column='COUNTY', blank=True, null=True)
     town = models.ForeignKey(Town, on_delete=models.PROTECT, db_column='TOWN', blank=True, null=True)
@@ -258,6 +260,11 @@ class PurchaseOrder(models.Model):
         db_table = 'PURCHASE_ORDERS'  # Changed
         verbose_name = 'Purchase Order'
         verbose_name_plural = 'Purchase Orders'
+        indexes = [
+            models.Index(fields=['date', 'supplier_id'], name='po_date_supplier'),               # DATE-RANGE REPORTS GROUPED BY SUPPLIER
+            models.Index(fields=['supplier_id', 'date'], name='po_supplier_date'),               # A SUPPLIER'S ORDERS IN DATE ORDER
+            models.Index(fields=['county', 'date'], name='po_county_date'),                     # COUNTY FILTER + DATE RANGE
+        ]
     
     @property
     def balance_left(self):
@@ -268,12 +275,12 @@ class PurchaseOrder(models.Model):
 
 
 class SalesOrder(models.Model):
-    so_id = models.CharField(max_length=7, unique=True, primary_key=True)
+    so_id = models.CharField(max_length=12, unique=True, primary_key=True)
     date = models.DateField()
     
     customer_id = models.ForeignKey(Customer, on_delete=models.PROTECT, db_column='CUSTOMER_ID')  # Changed
     customer_name = models.CharField(max_length=100)
-    invoice_number = models.CharField(max_length=6, unique=True)
+    invoice_number = models.CharField(max_length=11, unique=True)
     
     county = models.ForeignKey(County, on_delete=models.PROTECT, db_column='COUNTY', blank=True, null=True)
     town = models.ForeignKey(Town, on_delete=models.PROTECT, db_column='TOWN', blank=True, null=True)
@@ -288,6 +295,11 @@ class SalesOrder(models.Model):
         db_table = 'SALES_ORDERS'  # Changed
         verbose_name = 'Sales Order'
         verbose_name_plural = 'Sales Orders'
+        indexes = [
+            models.Index(fields=['date', 'customer_id'], name='so_date_customer'),              # DATE-RANGE REPORTS GROUPED BY CUSTOMER
+            models.Index(fields=['customer_id', 'date'], name='so_customer_date'),              # A CUSTOMER'S ORDERS IN DATE ORDER (FIRST / LAST ORDER)
+            models.Index(fields=['county', 'date'], name='so_county_date'),                     # COUNTY FILTER + DATE RANGE
+        ]
     
     @property
     def balance_left(self):
@@ -297,8 +309,13 @@ class SalesOrder(models.Model):
         return f"{self.so_id} - {self.customer_name}"
 
 
+def line_amount(value):
+    """Round a detail line amount to the precision it is stored with"""
+    return value.quantize(Decimal('0.0001'), rounding=ROUND_HALF_UP)                # SAME AS SQL ROUND()
+
+
 class PurchaseDetail(models.Model):
-    detail_id = models.CharField(max_length=7, unique=True, primary_key=True)
+    detail_id = models.CharField(max_length=12, unique=True, primary_key=True)
     po_id = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, db_column='PO_ID')  # Changed
     date = models.DateField()
     
@@ -307,7 +324,7 @@ class PurchaseDetail(models.Model):
     county = models.ForeignKey(County, on_delete=models.PROTECT, db_column='COUNTY', blank=True, null=True)
     town = models.ForeignKey(Town, on_delete=models.PROTECT, db_column='TOWN', blank=True, null=True)
     
-    bill_number = models.CharField(max_length=6)
+    bill_number = models.CharField(max_length=11)
     
     item_id = models.ForeignKey(Inventory, on_delete=models.PROTECT, db_column='ITEM_ID')
     item_type = models.CharField(max_length=50)
@@ -319,37 +336,42 @@ class PurchaseDetail(models.Model):
     unit_cost = models.DecimalField(max_digits=12, decimal_places=2)
     tax_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     
+    # LINE AMOUNTS, COMPUTED ON SAVE (AND BY calculate_amounts() BEFORE bulk_create) SO REPORTS CAN Sum() THEM
+    cost_excluding_tax = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    total_tax = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    cost_including_tax = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    shipping_fees = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    total_purchase_price = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    
+    SHIPPING_RATE = Decimal('0.01')                                          # 1% OF THE TAX-INCLUSIVE COST
+    
     class Meta:
         db_table = 'PURCHASE_DETAILS'  # Changed
         verbose_name = 'Purchase Detail'
         verbose_name_plural = 'Purchase Details'
+        indexes = [
+            models.Index(fields=['po_id', 'item_id'], name='pd_order_item'),                    # ORDER -> LINES JOIN
+            models.Index(fields=['item_category', 'date'], name='pd_category_date'),            # CATEGORY FILTER + DATE RANGE
+            models.Index(fields=['date', 'item_id'], name='pd_date_item'),                      # DATE-RANGE LINE READS GROUPED BY ITEM
+        ]
+    
+    def calculate_amounts(self):
+        self.cost_excluding_tax = line_amount(self.quantity_purchased * Decimal(str(self.unit_cost)))
+        self.total_tax = line_amount(self.cost_excluding_tax * Decimal(str(self.tax_rate)) / 100)
+        self.cost_including_tax = self.cost_excluding_tax + self.total_tax
+        self.shipping_fees = line_amount(self.cost_including_tax * self.SHIPPING_RATE)
+        self.total_purchase_price = self.cost_including_tax + self.shipping_fees
     
-    @property
-    def cost_excluding_tax(self):
-        return self.quantity_purchased * self.unit_cost
-    
-    @property
-    def total_tax(self):
-        return self.cost_excluding_tax * self.tax_rate / 100
-    
-    @property
-    def cost_including_tax(self):
-        return self.cost_excluding_tax + self.total_tax
-    
-    @property
-    def shipping_fees(self):
-        return self.cost_including_tax * 1 / 100
-    
-    @property
-    def total_purchase_price(self):
-        return self.cost_including_tax + self.shipping_fees
+    def save(self, *args, **kwargs):
+        self.calculate_amounts()
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.detail_id} - {self.item_name}"
 
 
 class SalesDetail(models.Model):
-    detail_id = models.CharField(max_length=7, unique=True, primary_key=True)
+    detail_id = models.CharField(max_length=12, unique=True, primary_key=True)
     so_id = models.ForeignKey(SalesOrder, on_delete=models.CASCADE, db_column='SO_ID')  # Changed
     date = models.DateField()
     
@@ -358,7 +380,7 @@ class SalesDetail(models.Model):
     county = models.ForeignKey(County, on_delete=models.PROTECT, db_column='COUNTY', blank=True, null=True)
     town = models.ForeignKey(Town, on_delete=models.PROTECT, db_column='TOWN', blank=True, null=True)
     
-    invoice_number = models.CharField(max_length=6)
+    invoice_number = models.CharField(max_length=11)
     
     item_id = models.ForeignKey(Inventory, on_delete=models.PROTECT, db_column='ITEM_ID')
     item_type = models.CharField(max_length=50)
@@ -370,37 +392,49 @@ class SalesDetail(models.Model):
     unit_price = models.DecimalField(max_digits=12, decimal_places=2)
     tax_rate = models.DecimalField(max_digits=5, decimal_places=2, default=0)
     
+    # LINE AMOUNTS, COMPUTED ON SAVE (AND BY calculate_amounts() BEFORE bulk_create) SO REPORTS CAN Sum() THEM
+    price_excluding_tax = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    total_tax = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    price_including_tax = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    shipping_fees = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    total_sales_price = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    
+    # COST OF THE GOODS SOLD, FIXED AT THE ITEM'S PURCHASE PRICE WHEN THE LINE IS WRITTEN (NOT RE-READ LATER)
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True, editable=False)
+    cost_of_sales = models.DecimalField(max_digits=18, decimal_places=4, default=0, editable=False)
+    
+    SHIPPING_RATE = Decimal('0.02')                                          # 2% OF THE TAX-INCLUSIVE PRICE
+    
     class Meta:
         db_table = 'SALES_DETAILS'  # Changed
         verbose_name = 'Sales Detail'
         verbose_name_plural = 'Sales Details'
+        indexes = [
+            models.Index(fields=['so_id', 'item_id'], name='sd_order_item'),                    # ORDER -> LINES JOIN
+            models.Index(fields=['item_category', 'date'], name='sd_category_date'),            # CATEGORY FILTER + DATE RANGE
+            models.Index(fields=['date', 'item_id'], name='sd_date_item'),                      # DATE-RANGE LINE READS GROUPED BY ITEM
+        ]
+    
+    def calculate_amounts(self):
+        self.price_excluding_tax = line_amount(self.quantity_sold * Decimal(str(self.unit_price)))
+        self.total_tax = line_amount(self.price_excluding_tax * Decimal(str(self.tax_rate)) / 100)
+        self.price_including_tax = self.price_excluding_tax + self.total_tax
+        self.shipping_fees = line_amount(self.price_including_tax * self.SHIPPING_RATE)
+        self.total_sales_price = self.price_including_tax + self.shipping_fees
+        if self.unit_cost is None and self.item_id_id:                       # NEW LINE (OR ITS ITEM CHANGED): TAKE TODAY'S COST
+            self.unit_cost = self.item_id.purchase_price
+        self.cost_of_sales = line_amount(self.quantity_sold * Decimal(str(self.unit_cost or 0)))
     
-    @property
-    def price_excluding_tax(self):
-        return self.quantity_sold * self.unit_price
-    
-    @property
-    def total_tax(self):
-        return self.price_excluding_tax * self.tax_rate / 100
-    
-    @property
-    def price_including_tax(self):
-        return self.price_excluding_tax + self.total_tax
-    
-    @property
-    def shipping_fees(self):
-        return self.price_including_tax * 2 / 100
-    
-    @property
-    def total_sales_price(self):
-        return self.price_including_tax + self.shipping_fees
+    def save(self, *args, **kwargs):
+        self.calculate_amounts()
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.detail_id} - {self.item_name}"
 
 
 class Payment(models.Model):
-    transaction_id = models.CharField(max_length=13, unique=True, primary_key=True)
+    transaction_id = models.CharField(max_length=18, unique=True, primary_key=True)
     date = models.DateField()
     
     supplier_id = models.ForeignKey(Supplier, on_delete=models.PROTECT, db_column='SUPPLIER_ID')
@@ -409,7 +443,7 @@ class Payment(models.Model):
     town = models.ForeignKey(Town, on_delete=models.PROTECT, db_column='TOWN', blank=True, null=True)
     
     po_id = models.ForeignKey(PurchaseOrder, on_delete=models.PROTECT, db_column='PO_ID')
-    bill_number = models.CharField(max_length=6)
+    bill_number = models.CharField(max_length=11)
     
     payment_mode = models.ForeignKey(PaymentMode, on_delete=models.PROTECT, db_column='PAYMENT_MODE')
     amount_paid = models.DecimalField(max_digits=12, decimal_places=2)
@@ -418,13 +452,16 @@ class Payment(models.Model):
         db_table = 'PAYMENTS'
         verbose_name = 'Payment'
         verbose_name_plural = 'Payments'
+        indexes = [
+            models.Index(fields=['date', 'supplier_id'], name='payment_date_supplier'),
+        ]
     
     def __str__(self):
         return f"{self.transaction_id} - {self.supplier_name}"
 
 
 class Receipt(models.Model):
-    transaction_id = models.CharField(max_length=12, unique=True, primary_key=True)
+    transaction_id = models.CharField(max_length=17, unique=True, primary_key=True)
     date = models.DateField()
     
     customer_id = models.ForeignKey(Customer, on_delete=models.PROTECT, db_column='CUSTOMER_ID')
@@ -433,7 +470,7 @@ class Receipt(models.Model):
     town = models.ForeignKey(Town, on_delete=models.PROTECT, db_column='TOWN', blank=True, null=True)
     
     so_id = models.ForeignKey(SalesOrder, on_delete=models.PROTECT, db_column='SO_ID')
-    invoice_number = models.CharField(max_length=6)
+    invoice_number = models.CharField(max_length=11)
     
     payment_mode = models.ForeignKey(PaymentMode, on_delete=models.PROTECT, db_column='PAYMENT_MODE')
     amount_received = models.DecimalField(max_digits=12, decimal_places=2)
@@ -442,11 +479,187 @@ class Receipt(models.Model):
         db_table = 'RECEIPTS'
         verbose_name = 'Receipt'
         verbose_name_plural = 'Receipts'
+        indexes = [
+            models.Index(fields=['date', 'customer_id'], name='receipt_date_customer'),
+        ]
     
     def __str__(self):
         return f"{self.transaction_id} - {self.customer_name}"
 
 
+class IdSequence(models.Model):
+    # ONE COUNTER ROW PER GENERATED ID TYPE (SEE sequences.py)
+    name = models.CharField(max_length=30, unique=True, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'ID_SEQUENCES'
+        verbose_name = 'ID Sequence'
+        verbose_name_plural = 'ID Sequences'
+    
+    def __str__(self):
+        return f"{self.name} - {self.last_value}"
+
+
+class CacheVersion(models.Model):
+    # ONE VERSION COUNTER PER IN-PROCESS CACHE, SHARED BY EVERY WORKER (SEE cache_versions.py)
+    name = models.CharField(max_length=30, unique=True, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    
+    class Meta:
+        db_table = 'CACHE_VERSIONS'
+        verbose_name = 'Cache Version'
+        verbose_name_plural = 'Cache Versions'
+    
+    def __str__(self):
+        return f"{self.name} - {self.version}"
+
+
+class SalesForecast(models.Model):
+    item_id = models.ForeignKey(Inventory, on_delete=models.CASCADE, db_column='ITEM_ID')
+    month = models.DateField()                                               # FIRST DAY OF THE FORECAST MONTH
+    
+    predicted_sales = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    lower_bound = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    upper_bound = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    confidence = models.IntegerField(default=0)
+    
+    history_signature = models.CharField(max_length=64)                      # SALES HISTORY FINGERPRINT THE FORECAST WAS FITTED ON
+    generated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'SALES_FORECASTS'
+        verbose_name = 'Sales Forecast'
+        verbose_name_plural = 'Sales Forecasts'
+        constraints = [
+            models.UniqueConstraint(fields=['item_id', 'month'], name='unique_item_forecast_month'),
+        ]
+    
+    def __str__(self):
+        return f"{self.item_id_id} - {self.month:%Y-%m}"
+
+
+class PurchaseOrderStatusHistory(models.Model):
+    # ONE ROW PER PAYMENT/SHIPPING STATUS TRANSITION OF A PURCHASE ORDER (WRITTEN BY update_purchase_order_statuses)
+    STATUS_TYPES = [('PAYMENT', 'Payment'), ('SHIPPING', 'Shipping')]
+    
+    po_id = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, db_column='PO_ID', related_name='status_history')
+    status_type = models.CharField(max_length=10, choices=STATUS_TYPES)
+    status = models.CharField(max_length=50)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'PURCHASE_ORDER_STATUS_HISTORY'
+        verbose_name = 'Purchase Order Status History'
+        verbose_name_plural = 'Purchase Order Status History'
+        indexes = [
+            models.Index(fields=['status_type', 'status', 'po_id'], name='po_status_history_lookup'),
+        ]
+    
+    def __str__(self):
+        return f"{self.po_id_id} - {self.status_type} {self.status}"
+
+
+class DailyRollup(models.Model):
+    # ONE ROW PER SIDE x DAY x ITEM x CATEGORY x CUSTOMER/SUPPLIER x COUNTY, SUMMING THE DETAIL LINES BEHIND IT (MAINTAINED BY rollups.py)
+    KINDS = [('SALES', 'Sales'), ('PURCHASES', 'Purchases')]
+    
+    kind = models.CharField(max_length=10, choices=KINDS)
+    date = models.DateField()
+    item_id = models.ForeignKey(Inventory, on_delete=models.PROTECT, db_column='ITEM_ID', related_name='daily_rollups')
+    item_category = models.CharField(max_length=50, blank=True, default='')  # CATEGORY RECORDED ON THE DETAIL LINES, NOT THE ITEM'S CURRENT ONE
+    party_id = models.CharField(max_length=11)                               # CUSTOMER_ID FOR SALES, SUPPLIER_ID FOR PURCHASES
+    county = models.CharField(max_length=50, blank=True, default='')
+    
+    quantity = models.IntegerField(default=0)
+    line_count = models.IntegerField(default=0)
+    net_amount = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    tax_amount = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    shipping_amount = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    cogs_amount = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    
+    class Meta:
+        db_table = 'DAILY_ROLLUPS'
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'date', 'item_id', 'item_category', 'party_id', 'county'], name='unique_daily_rollup_key'),
+        ]
+        indexes = [
+            models.Index(fields=['kind', 'date'], name='daily_rollup_kind_date'),
+        ]
+    
+    @property
+    def total_amount(self):
+        return self.net_amount + self.tax_amount + self.shipping_amount
+    
+    def __str__(self):
+        return f"{self.kind} {self.date} - {self.item_id_id} - {self.party_id}"
+
+
+class BalanceCounter(models.Model):
+    # UNFOLDED INCREMENTS OF CUSTOMER / SUPPLIER TOTALS: ONE ROW PER PARTY x DAY x SHARD (MAINTAINED BY balances.py)
+    PARTY_TYPES = [('CUSTOMER', 'Customer'), ('SUPPLIER', 'Supplier')]
+    
+    party_type = models.CharField(max_length=10, choices=PARTY_TYPES)
+    party_id = models.CharField(max_length=11)
+    date = models.DateField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    
+    total_delta = models.DecimalField(max_digits=14, decimal_places=2, default=0)     # TOTAL_SALES / TOTAL_PURCHASES
+    payments_delta = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # TOTAL_PAYMENTS
+    
+    class Meta:
+        db_table = 'BALANCE_COUNTERS'
+        verbose_name = 'Balance Counter'
+        verbose_name_plural = 'Balance Counters'
+        constraints = [
+            models.UniqueConstraint(fields=['party_type', 'party_id', 'date', 'shard'], name='unique_balance_counter_key'),
+        ]
+    
+    def __str__(self):
+        return f"{self.party_type} {self.party_id} {self.date} #{self.shard}"
+
+
+class InventoryValuation(models.Model):
+    # PER-ITEM PURCHASE COST TOTALS FOR AVERAGE / LAST COST VALUATION (MAINTAINED BY valuation.py)
+    item_id = models.OneToOneField(Inventory, on_delete=models.CASCADE, primary_key=True, db_column='ITEM_ID', related_name='valuation')
+    layer_qty = models.IntegerField(default=0)                               # UNITS ON ALL COST LAYERS
+    layer_cost = models.DecimalField(max_digits=18, decimal_places=4, default=0)
+    average_cost = models.DecimalField(max_digits=18, decimal_places=6, blank=True, null=True)  # layer_cost / layer_qty
+    last_cost = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    last_purchase_date = models.DateField(blank=True, null=True)
+    
+    class Meta:
+        db_table = 'INVENTORY_VALUATIONS'
+        verbose_name = 'Inventory Valuation'
+        verbose_name_plural = 'Inventory Valuations'
+    
+    def __str__(self):
+        return f"{self.item_id_id} - {self.layer_qty} units"
+
+
+class InventoryCostLayer(models.Model):
+    # ONE FIFO LAYER PER PURCHASE DETAIL LINE, WITH THE ITEM'S RUNNING UNIT COUNT UP TO AND INCLUDING IT
+    item_id = models.ForeignKey(Inventory, on_delete=models.CASCADE, db_column='ITEM_ID', related_name='cost_layers')
+    detail_id = models.CharField(max_length=12, unique=True)
+    date = models.DateField()
+    quantity = models.IntegerField()
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=2)
+    cumulative_qty = models.IntegerField()
+    
+    class Meta:
+        db_table = 'INVENTORY_COST_LAYERS'
+        verbose_name = 'Inventory Cost Layer'
+        verbose_name_plural = 'Inventory Cost Layers'
+        indexes = [
+            models.Index(fields=['item_id', 'cumulative_qty'], name='cost_layer_item_cumulative'),
+        ]
+    
+    def __str__(self):
+        return f"{self.item_id_id} - {self.detail_id} ({self.quantity} @ {self.unit_cost})"
+
+
 # CUSTOM USER MANAGER
 class UserManager(BaseUserManager):
     def create_user(self, email, full_name, phone_number, password=None, user_role=None):
@@ -0,0 +1,186 @@
+"""
+BACKGROUND PDF REPORT EXPORTS
+
+A PDF export is requested with only the report type and its filters. The report data is regenerated
+on the server and the ReportLab document is rendered on a small thread pool, so the request that asks
+for it returns at once and the browser polls for the result:
+
+    POST /api/reports/export-pdf/                 -> job_id, status ('queued' | 'running' | 'done' | 'failed')
+    GET  /api/reports/export-pdf/<job_id>/        -> status
+    GET  /api/reports/export-pdf/<job_id>/download/
+
+The job ID is derived from the report type, normalized filters and data version, so identical requests
+share one job and one file until the underlying data changes. The version is the report cache's row of
+CACHE_VERSIONS, read from the database, so every worker derives the same new job ID after a write in any
+of them and none keeps serving the PDF rendered before it. Rendered files live in REPORT_EXPORT_DIR and
+are removed after PDF_EXPORT_MAX_AGE.
+
+Job status is a <job_id>.json file next to the PDF, replaced atomically on every change, so any worker
+process can answer a poll or serve the download. A job is queued by creating its status file with a
+hard link, which fails if the file exists, so identical requests to different processes still render
+once. A job queued or running for longer than PDF_EXPORT_TIMEOUT is treated as failed (the process that
+owned it died) and may be queued again.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+
+from .report_cache import report_data_version, report_cache_key
+
+
+PDF_EXPORT_WORKERS = 2
+PDF_EXPORT_MAX_AGE = 24 * 60 * 60                                            # RENDERED FILES ARE KEPT FOR A DAY
+PDF_EXPORT_TIMEOUT = 10 * 60                                                 # LONGER THAN ANY RENDER TAKES
+REPORT_EXPORT_DIR = Path(getattr(settings, 'REPORT_EXPORT_DIR', settings.BASE_DIR / 'report_exports'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_executor = ThreadPoolExecutor(max_workers=PDF_EXPORT_WORKERS, thread_name_prefix='pdf-export')
+
+
+def pdf_job_id(report_type, params):
+    """Stable job ID for a report type + filters at the current (shared) data version"""
+    return hashlib.md5(report_cache_key(f'pdf:{report_type}', params).encode()).hexdigest()
+
+
+def pdf_job_path(job_id):
+    return REPORT_EXPORT_DIR / f'{job_id}.pdf'
+
+
+def _status_path(job_id):
+    return REPORT_EXPORT_DIR / f'{job_id}.json'
+
+
+def _temp_path(job_id):
+    """Unique scratch file next to the status file (one per process and thread)"""
+    return REPORT_EXPORT_DIR / f'{job_id}.{os.getpid()}.{threading.get_ident()}.tmp'
+
+
+def _read_status(job_id):
+    try:
+        return json.loads(_status_path(job_id).read_text())
+    except (OSError, ValueError):                                            # MISSING (OR NOT A STATUS FILE)
+        return None
+
+
+def _set_status(job_id, status, **extra):
+    """Replace the status file atomically: readers see the old or the new status, never half of one"""
+    temp = _temp_path(job_id)
+    temp.write_text(json.dumps({'status': status, 'updated_at': time.time(), **extra}))
+    os.replace(temp, _status_path(job_id))
+
+
+def _claim(job_id, **meta):
+    """
+    Create the status file of a job as QUEUED if it does not exist. os.link() fails when the target
+    exists, so exactly one of several processes queueing the same job succeeds. Returns True if this one did.
+    """
+    temp = _temp_path(job_id)
+    temp.write_text(json.dumps({'status': QUEUED, 'updated_at': time.time(), **meta}))
+    try:
+        os.link(temp, _status_path(job_id))
+        return True
+    except FileExistsError:
+        return False
+    finally:
+        temp.unlink()
+
+
+def _abandoned(status):
+    return status['status'] in (QUEUED, RUNNING) and time.time() - status.get('updated_at', 0) > PDF_EXPORT_TIMEOUT
+
+
+def _release(job_id):
+    """
+    Remove the status file of a failed, expired or abandoned job so it can be claimed again. The file is
+    renamed away first (only one process can) and put back if another process has re-queued the job since.
+    """
+    temp = _temp_path(job_id)
+    try:
+        os.rename(_status_path(job_id), temp)
+    except FileNotFoundError:
+        return                                                               # ANOTHER PROCESS RELEASED IT FIRST
+    status = json.loads(temp.read_text())
+    if status['status'] in (QUEUED, RUNNING) and not _abandoned(status):
+        try:
+            os.link(temp, _status_path(job_id))
+        except FileExistsError:
+            pass
+    temp.unlink()
+
+
+def pdf_job_status(job_id):
+    """Status dict of a job, or None if it is unknown (or its file has been cleaned up)"""
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+        return None
+    status = _read_status(job_id)
+    if status is None and pdf_job_path(job_id).exists():
+        status = {'status': DONE}                                            # FILE OUTLIVED ITS STATUS
+    if status and status['status'] == DONE and not pdf_job_path(job_id).exists():
+        _release(job_id)                                                     # FILE EXPIRED, RENDER AGAIN
+        return None
+    if status and _abandoned(status):
+        status = {**status, 'status': FAILED, 'message': 'Export did not finish'}
+    return status
+
+
+def _remove_expired_files():
+    cutoff = time.time() - PDF_EXPORT_MAX_AGE
+    for path in REPORT_EXPORT_DIR.iterdir():                                 # PDFs, STATUS FILES AND LEFTOVER .part / .tmp
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def _render(job_id, render, meta):
+    """Worker: render the PDF bytes and move them into place atomically"""
+    try:
+        _set_status(job_id, RUNNING, **meta)
+        content = render()
+        path = pdf_job_path(job_id)
+        partial = path.with_suffix('.part')
+        partial.write_bytes(content)
+        os.replace(partial, path)
+        _set_status(job_id, DONE, **meta)
+    except Exception as e:
+        _set_status(job_id, FAILED, message=str(e), **meta)
+    finally:
+        connections.close_all()                                              # THIS THREAD'S DB CONNECTIONS
+
+
+def submit_pdf_export(job_id, render, **meta):
+    """
+    Queue `render` (a callable returning the PDF bytes) for a job unless the job is already
+    queued, running or done. `meta` (e.g. the download filename) is kept with the job's status.
+    Returns the job's current status dict.
+    """
+    status = pdf_job_status(job_id)
+    if status and status['status'] != FAILED:
+        return status
+
+    REPORT_EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    if status is not None:
+        _release(job_id)                                                     # RETRY A FAILED JOB
+
+    meta = {'data_version': report_data_version(), **meta}                   # SHOWN WITH THE STATUS, FOR SUPPORT
+
+    # ONLY ONE REQUEST (IN ANY PROCESS) WINS THE RIGHT TO QUEUE THE JOB
+    if not _claim(job_id, **meta):
+        return pdf_job_status(job_id) or {'status': QUEUED, **meta}
+
+    _remove_expired_files()
+    _executor.submit(_render, job_id, render, meta)
+    return {'status': QUEUED, **meta}
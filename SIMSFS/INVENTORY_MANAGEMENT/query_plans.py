@@ -0,0 +1,134 @@
+"""
+REPORT QUERY PLAN CHECK
+
+Runs every report view for a date range, captures the SELECTs it issues and EXPLAINs each one, so a
+report that stops using the date / dimension indexes is caught before it reaches a 5-year history:
+
+    manage.py check_report_query_plans --start-date 2025-01-01 --end-date 2025-01-31
+
+A plan step is a full table scan when it reads every row of one of the FACT_TABLES:
+
+    SQLite       SCAN <table> (or SCAN <table> USING INDEX, which visits every row through an index)
+    MySQL        access_type ALL (or index without a covering "Using index")
+    PostgreSQL   Seq Scan on <table>
+
+Subqueries name their tables by alias (FROM "PURCHASE_ORDERS" V0 ... SCAN V0); aliases are mapped back to
+the table from the captured SQL. Scans of the small dimension tables (inventory, customers, suppliers,
+lookups) are expected and ignored.
+Index-only (covering) scans are allowed. Plans depend on table statistics, so run the check against a
+database of production size, not an empty one.
+"""
+import inspect
+import json
+import re
+
+from django.db import connection, transaction
+from django.http import HttpRequest, QueryDict
+from django.test.utils import CaptureQueriesContext
+
+
+# TABLES THAT GROW WITH EVERY TRANSACTION
+FACT_TABLES = [
+    'SALES_ORDERS', 'SALES_DETAILS', 'PURCHASE_ORDERS', 'PURCHASE_DETAILS', 'PAYMENTS', 'RECEIPTS',
+    'DAILY_ROLLUPS', 'PURCHASE_ORDER_STATUS_HISTORY',
+]
+
+# TABLE REFERENCE WITH A DJANGO-GENERATED ALIAS: FROM "PURCHASE_ORDERS" V0 / JOIN `SALES_DETAILS` AS U1
+TABLE_ALIAS = re.compile(r'(?:FROM|JOIN)\s+["`]?(\w+)["`]?\s+(?:AS\s+)?["`]?([A-Z]\d+)["`]?(?!\w)', re.IGNORECASE)
+
+# REPORTS THAT READ EVERY ROW BY DESIGN (ALL-TIME BALANCES / CURRENT STOCK), NOT CHECKED
+UNBOUNDED_REPORTS = ('outstanding-balances', 'inventory-status')
+
+
+# ============================================
+# CAPTURING REPORT QUERIES
+# ============================================
+
+def capture_report_queries(report_views, params):
+    """
+    Run each report view (undecorated: no login, no report cache) with the given query params and
+    return [(report type, sql)] for the SELECTs it executed. Runs in a transaction that is rolled back.
+    """
+    captured = []
+    for report_type, view in report_views.items():
+        if report_type in UNBOUNDED_REPORTS:
+            continue
+        request = HttpRequest()
+        request.method = 'GET'
+        request.GET = QueryDict(mutable=True)
+        request.GET.update(params)
+
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                inspect.unwrap(view)(request)
+            transaction.set_rollback(True)
+
+        for query in queries.captured_queries:
+            if query['sql'].lstrip().upper().startswith('SELECT'):
+                captured.append((report_type, query['sql']))
+    return captured
+
+
+# ============================================
+# EXPLAIN AND SCAN DETECTION
+# ============================================
+
+def explain(sql):
+    """Query plan of a captured SQL statement as text lines"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+        if connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN FORMAT=JSON {sql}')
+            return [cursor.fetchone()[0]]
+        cursor.execute(f'EXPLAIN {sql}')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _mysql_tables(node):
+    """Every "table" object of a MySQL JSON plan"""
+    if isinstance(node, dict):
+        if 'table_name' in node:
+            yield node
+        for value in node.values():
+            yield from _mysql_tables(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _mysql_tables(value)
+
+
+def table_aliases(sql):
+    """{alias: table} of the aliased table references (subqueries, self joins) in a SQL statement"""
+    return {alias: table for table, alias in TABLE_ALIAS.findall(sql)}
+
+
+def full_table_scans(plan, sql=''):
+    """
+    [(table, plan step)] of the full scans of FACT_TABLES in a plan returned by explain(); `sql` is the
+    statement explained, used to resolve the aliases the plan names tables by.
+    """
+    aliases = table_aliases(sql)
+    scans = []
+    if connection.vendor == 'mysql':
+        for table in _mysql_tables(json.loads(plan[0])):
+            access = table.get('access_type')
+            name = aliases.get(table['table_name'], table['table_name'])
+            if name in FACT_TABLES and (
+                access == 'ALL' or (access == 'index' and not table.get('using_index'))
+            ):
+                scans.append((name, f"access_type {access}"))
+        return scans
+
+    for step in plan:
+        step = step.strip()
+        if connection.vendor == 'sqlite':
+            match = re.match(r'SCAN (\w+)', step)
+            if 'COVERING INDEX' in step:
+                continue
+        else:
+            match = re.search(r'Seq Scan on "?(\w+)"?', step)
+        name = match and aliases.get(match.group(1), match.group(1))
+        if name in FACT_TABLES:
+            scans.append((name, step))
+    return scans
@@ -0,0 +1,148 @@
+"""
+REPORT RESULT CACHE
+
+Generated reports (/api/reports/*) are cached on Django's cache framework (the file-based cache
+configured in settings.CACHES, shared by every worker process), keyed on the report type plus its
+normalized query parameters and a global data version:
+
+    report:<version>:<report type>:<md5 of the sorted, normalized parameters>
+
+The version is the 'reports' row of CACHE_VERSIONS (cache_versions.py), read from the database on
+every report request, so it is the same in every process whatever cache backend is configured.
+Saving or deleting any of the tables the reports read (orders, details, payments, receipts,
+inventory, suppliers, customers) bumps it once the write transaction commits, so every cached
+report is invalidated at once without scanning keys; stale entries simply age out.
+Hit/miss counters are kept in the cache and exposed by api_report_cache_stats; the file-based
+cache increments them without locking, so under concurrent requests they are approximate.
+"""
+import hashlib
+import json
+from datetime import datetime
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+
+from .cache_versions import bump_cache_version, cache_version
+
+
+REPORT_CACHE_TIMEOUT = 60 * 60                                               # A REPORT IS KEPT FOR AN HOUR UNLESS DATA CHANGES
+VERSION_NAME = 'reports'                                                     # ROW OF CACHE_VERSIONS
+HITS_KEY = 'report:hits'
+MISSES_KEY = 'report:misses'
+
+# MODELS WHOSE WRITES INVALIDATE EVERY CACHED REPORT
+INVALIDATING_MODELS = [
+    'PurchaseOrder', 'PurchaseDetail', 'SalesOrder', 'SalesDetail', 'Payment', 'Receipt',
+    'Inventory', 'Supplier', 'Customer',
+]
+
+DATE_PARAMS = ('start_date', 'end_date')
+IGNORED_PARAMS = ('refresh', '_')                                            # CACHE CONTROL / JQUERY CACHE BUSTER
+
+
+# ============================================
+# VERSIONING
+# ============================================
+
+def report_data_version():
+    """Current report data version (0 until the first write), as every process sees it"""
+    return cache_version(VERSION_NAME)
+
+
+def bump_report_version():
+    """Invalidate every cached report, in every process"""
+    bump_cache_version(VERSION_NAME)
+
+
+def _bump_on_commit(sender, **kwargs):
+    transaction.on_commit(bump_report_version)
+
+
+def connect_invalidation_signals(app_config):
+    """Hook post_save / post_delete of the invalidating models (called from AppConfig.ready)"""
+    for model_name in INVALIDATING_MODELS:
+        model = app_config.get_model(model_name)
+        post_save.connect(_bump_on_commit, sender=model, dispatch_uid=f'report_cache_save_{model_name}')
+        post_delete.connect(_bump_on_commit, sender=model, dispatch_uid=f'report_cache_delete_{model_name}')
+
+
+# ============================================
+# KEYS AND COUNTERS
+# ============================================
+
+def _normalize_date(value):
+    for fmt in ('%d/%m/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).date().isoformat()
+        except ValueError:
+            pass
+    return value
+
+
+def report_cache_key(report_type, params):
+    """Cache key for a report and its query parameters (empty values and cache-control params ignored)"""
+    normalized = {}
+    for name in sorted(params):
+        value = params.get(name, '').strip()
+        if not value or name in IGNORED_PARAMS:
+            continue
+        normalized[name] = _normalize_date(value) if name in DATE_PARAMS else value
+    digest = hashlib.md5(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f'report:{report_data_version()}:{report_type}:{digest}'
+
+
+def _count(key):
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def report_cache_stats():
+    """Hit/miss counters since the cache was last cleared"""
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total * 100, 2) if total else 0,
+        'version': report_data_version(),
+        'timeout_seconds': REPORT_CACHE_TIMEOUT,
+    }
+
+
+# ============================================
+# VIEW DECORATOR
+# ============================================
+
+def cached_report(report_type, timeout=REPORT_CACHE_TIMEOUT):
+    """
+    Serve a report view from the cache. Only successful (200) responses are stored, for `timeout`
+    seconds at most; ?refresh=1 recomputes and replaces the cached copy. Adds an X-Report-Cache: HIT/MISS header.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = report_cache_key(report_type, request.GET)
+
+            if request.GET.get('refresh') != '1':
+                content = cache.get(key)
+                if content is not None:
+                    _count(HITS_KEY)
+                    response = HttpResponse(content, content_type='application/json')
+                    response['X-Report-Cache'] = 'HIT'
+                    return response
+
+            _count(MISSES_KEY)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.content, timeout=timeout)
+            response['X-Report-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
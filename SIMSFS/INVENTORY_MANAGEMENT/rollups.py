@@ -0,0 +1,166 @@
+"""
+DAILY SALES / PURCHASE ROLLUPS
+
+DAILY_ROLLUPS holds one row per side (SALES / PURCHASES) x day x item x category x customer-or-supplier
+x county with the quantity, net amount, tax, shipping and COGS of the detail lines behind it. Reports group
+this table instead of re-aggregating SALES_DETAILS / PURCHASE_DETAILS on every request. The category is the
+one recorded on the detail lines, so "by category" reports match the lines even after an item is recategorised.
+
+The write views keep it current inside their own transaction.atomic() block:
+
+    changes = line_contributions([detail], sign=-1)      # BEFORE a line is edited or deleted
+    ...
+    changes += line_contributions([detail])              # AFTER a line is created or edited
+    apply_rollup_changes(changes)
+
+Changes are netted per rollup row and applied as F() increments, so concurrent writers never lose
+an update. COGS comes from SalesDetail.cost_of_sales, costed at the item's purchase price when the line
+was written, so a later price edit changes neither the rollups nor a rebuild of them.
+`manage.py rebuild_daily_rollups` recomputes the whole table from the detail tables.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+from .models import DailyRollup, PurchaseDetail, SalesDetail
+
+
+SALES = 'SALES'
+PURCHASES = 'PURCHASES'
+
+MEASURES = ['quantity', 'line_count', 'net_amount', 'tax_amount', 'shipping_amount', 'cogs_amount']
+
+
+# ============================================
+# PER-LINE AMOUNTS AS SQL EXPRESSIONS
+# ============================================
+# NET / TAX / SHIPPING / COGS ARE STORED ON THE DETAIL ROWS (calculate_amounts())
+
+def _amount(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=18, decimal_places=4))
+
+
+# ROLLUP ROW TOTAL (NET + TAX + SHIPPING), FOR USE IN Sum() OVER DailyRollup
+ROLLUP_TOTAL = _amount(F('net_amount') + F('tax_amount') + F('shipping_amount'))
+
+
+# ============================================
+# INCREMENTAL MAINTENANCE
+# ============================================
+
+def line_contributions(details, sign=1):
+    """
+    What each SalesDetail / PurchaseDetail adds to its rollup row, as a list of (key, measures).
+    Use sign=-1 for the state of a line that is about to be edited or deleted.
+    """
+    contributions = []
+    for detail in details:
+        detail.calculate_amounts()                                           # LINE MAY HAVE BEEN EDITED SINCE IT WAS SAVED
+        if isinstance(detail, SalesDetail):
+            kind, party_id, quantity, net = SALES, detail.customer_id_id, detail.quantity_sold, detail.price_excluding_tax
+            cogs = detail.cost_of_sales
+        else:
+            kind, party_id, quantity, net = PURCHASES, detail.supplier_id_id, detail.quantity_purchased, detail.cost_excluding_tax
+            cogs = Decimal('0')
+
+        tax = detail.total_tax
+        shipping = detail.shipping_fees
+
+        key = (kind, detail.date, detail.item_id_id, detail.item_category or '', party_id, detail.county_id or '')
+        contributions.append((key, [sign * quantity, sign, sign * net, sign * tax, sign * shipping, sign * cogs]))
+    return contributions
+
+
+def apply_rollup_changes(contributions):
+    """
+    Net the contributions per rollup row and apply them with one UPDATE per touched row
+    (creating rows that do not exist yet). Call inside the write's transaction.atomic() block.
+    """
+    netted = defaultdict(lambda: [0, 0, Decimal('0'), Decimal('0'), Decimal('0'), Decimal('0')])
+    for key, measures in contributions:
+        totals = netted[key]
+        for index, value in enumerate(measures):
+            totals[index] += value
+
+    emptied = []
+    for key, totals in netted.items():
+        if not any(totals):
+            continue                                                         # LINE EDITED WITHOUT CHANGING ITS AMOUNTS
+        kind, day, item_id, item_category, party_id, county = key
+        rows = DailyRollup.objects.filter(
+            kind=kind, date=day, item_id_id=item_id, item_category=item_category, party_id=party_id, county=county
+        )
+        increments = {field: F(field) + value for field, value in zip(MEASURES, totals)}
+
+        if not rows.update(**increments):
+            try:
+                with transaction.atomic():
+                    DailyRollup.objects.create(
+                        kind=kind, date=day, item_id_id=item_id, item_category=item_category, party_id=party_id, county=county,
+                        **dict(zip(MEASURES, totals))
+                    )
+            except IntegrityError:
+                rows.update(**increments)                                    # ANOTHER WRITER CREATED THE ROW FIRST
+
+        if totals[1] < 0:
+            emptied.append(rows)
+
+    # DROP ROWS WHOSE LAST LINE WAS REMOVED
+    for rows in emptied:
+        rows.filter(line_count__lte=0).delete()
+
+
+# ============================================
+# FULL REBUILD
+# ============================================
+
+def rollup_rows(kind, details):
+    """Grouped DailyRollup rows (unsaved) for a SalesDetail / PurchaseDetail queryset"""
+    if kind == SALES:
+        grouped = details.values('date', 'item_id', 'item_category', 'county', party=F('customer_id')).annotate(
+            quantity=Sum('quantity_sold'), line_count=Count('detail_id'),
+            net_amount=Sum('price_excluding_tax'), tax_amount=Sum('total_tax'),
+            shipping_amount=Sum('shipping_fees'), cogs_amount=Sum('cost_of_sales')
+        )
+    else:
+        grouped = details.values('date', 'item_id', 'item_category', 'county', party=F('supplier_id')).annotate(
+            quantity=Sum('quantity_purchased'), line_count=Count('detail_id'),
+            net_amount=Sum('cost_excluding_tax'), tax_amount=Sum('total_tax'),
+            shipping_amount=Sum('shipping_fees')
+        )
+
+    for row in grouped.order_by().iterator():
+        yield {
+            'kind': kind,
+            'date': row['date'],
+            'item_id_id': row['item_id'],
+            'item_category': row['item_category'] or '',
+            'party_id': row['party'],
+            'county': row['county'] or '',
+            'quantity': row['quantity'] or 0,
+            'line_count': row['line_count'],
+            'net_amount': row['net_amount'] or 0,
+            'tax_amount': row['tax_amount'] or 0,
+            'shipping_amount': row['shipping_amount'] or 0,
+            'cogs_amount': row.get('cogs_amount') or 0,
+        }
+
+
+def rebuild_daily_rollups(batch_size=1000):
+    """Recompute DAILY_ROLLUPS from the detail tables in one transaction and return the row count"""
+    created = 0
+    with transaction.atomic():
+        DailyRollup.objects.all().delete()
+        for kind, model in ((SALES, SalesDetail), (PURCHASES, PurchaseDetail)):
+            batch = []
+            for row in rollup_rows(kind, model.objects.all()):
+                batch.append(DailyRollup(**row))
+                if len(batch) >= batch_size:
+                    DailyRollup.objects.bulk_create(batch)
+                    created += len(batch)
+                    batch = []
+            DailyRollup.objects.bulk_create(batch)
+            created += len(batch)
+    return created
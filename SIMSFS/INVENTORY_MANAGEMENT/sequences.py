@@ -0,0 +1,127 @@
+"""
+ID SEQUENCE SERVICE
+
+Every generated primary key (IT00001, S00001, PO00001, PD00001, TRANSPAY00001, ...) is drawn
+from a counter row in ID_SEQUENCES that is locked with SELECT ... FOR UPDATE. Allocation is
+O(1), collision-free under concurrent writers, and a whole block of IDs (e.g. all the detail
+lines of an order) is reserved with a single locked update.
+
+Call next_ids() inside the write transaction that uses the IDs: the counter row stays locked
+until that transaction commits, so a rolled-back order leaves no gap and no two transactions
+can ever receive the same number. Only writers of the SAME sequence wait on each other.
+
+Numbers are zero-padded to 5 digits and simply grow wider after 99999 (PO100000). The
+counter, not a lexicographic Max() over the string keys, is the source of truth.
+"""
+from django.db import IntegrityError, transaction
+
+from .models import (
+    IdSequence, Inventory, InventoryItem, Supplier, Customer,
+    PurchaseOrder, PurchaseDetail, SalesOrder, SalesDetail, Payment, Receipt
+)
+
+
+ID_PADDING = 5
+
+# SEQUENCE NAME -> (PREFIX, [(MODEL, FIELD), ...] THE COUNTER IS SEEDED FROM ON FIRST USE)
+SEQUENCES = {
+    'item':            ('IT',       [(InventoryItem, 'item_id'), (Inventory, 'item_id')]),
+    'supplier':        ('S',        [(Supplier, 'supplier_id')]),
+    'customer':        ('C',        [(Customer, 'customer_id')]),
+    'purchase_order':  ('PO',       [(PurchaseOrder, 'po_id')]),
+    'sales_order':     ('SO',       [(SalesOrder, 'so_id')]),
+    'purchase_detail': ('PD',       [(PurchaseDetail, 'detail_id')]),
+    'sales_detail':    ('SD',       [(SalesDetail, 'detail_id')]),
+    'payment':         ('TRANSPAY', [(Payment, 'transaction_id')]),
+    'receipt':         ('TRANSAL',  [(Receipt, 'transaction_id')]),
+}
+
+# DOCUMENT NUMBERS THAT SHARE THE NUMBER OF THEIR ORDER
+BILL_PREFIX = 'B'
+INVOICE_PREFIX = 'I'
+
+
+def format_id(prefix, number):
+    """Format a sequence number, e.g. format_id('PO', 7) -> 'PO00007'"""
+    return f"{prefix}{number:0{ID_PADDING}d}"
+
+
+def id_number(value, prefix):
+    """Numeric part of a generated ID, or None if it does not follow the prefix + digits format"""
+    if not value or not value.startswith(prefix):
+        return None
+    digits = value[len(prefix):]
+    return int(digits) if digits.isdigit() else None
+
+
+def existing_max(name):
+    """Highest number already used for a sequence, compared numerically (not as strings)"""
+    prefix, sources = SEQUENCES[name]
+    highest = 0
+    for model, field in sources:
+        for value in model.objects.values_list(field, flat=True).iterator():
+            number = id_number(value, prefix)
+            if number and number > highest:
+                highest = number
+    return highest
+
+
+def _locked_sequence(name):
+    """Return the counter row for `name` locked FOR UPDATE, creating (and seeding) it on first use"""
+    try:
+        return IdSequence.objects.select_for_update().get(name=name)
+    except IdSequence.DoesNotExist:
+        pass
+
+    try:
+        with transaction.atomic():
+            IdSequence.objects.create(name=name, last_value=existing_max(name))
+    except IntegrityError:
+        pass                                                                 # ANOTHER WRITER SEEDED IT FIRST
+
+    return IdSequence.objects.select_for_update().get(name=name)
+
+
+def next_numbers(name, count=1):
+    """Reserve `count` consecutive numbers from a sequence and return them as a range"""
+    if name not in SEQUENCES:
+        raise ValueError(f"Unknown ID sequence '{name}'")
+    if count < 1:
+        return range(0)
+
+    with transaction.atomic():
+        sequence = _locked_sequence(name)
+        start = sequence.last_value + 1
+        sequence.last_value += count
+        sequence.save(update_fields=['last_value'])
+
+    return range(start, start + count)
+
+
+def next_ids(name, count=1):
+    """Reserve `count` IDs from a sequence, e.g. next_ids('purchase_detail', 3) -> ['PD00041', 'PD00042', 'PD00043']"""
+    prefix = SEQUENCES[name][0] if name in SEQUENCES else ''
+    return [format_id(prefix, n) for n in next_numbers(name, count)]
+
+
+def next_id(name):
+    """Reserve a single ID from a sequence"""
+    return next_ids(name, 1)[0]
+
+
+def peek_numbers(name, count=1):
+    """
+    Numbers the next allocations will PROBABLY receive, without reserving anything.
+    Only for display in forms; the real IDs are assigned when the record is saved.
+    """
+    if name not in SEQUENCES:
+        raise ValueError(f"Unknown ID sequence '{name}'")
+    last_value = IdSequence.objects.filter(name=name).values_list('last_value', flat=True).first()
+    if last_value is None:
+        last_value = existing_max(name)
+    return range(last_value + 1, last_value + 1 + count)
+
+
+def peek_id(name):
+    """Preview of the next ID of a sequence (not reserved)"""
+    return format_id(SEQUENCES[name][0], peek_numbers(name)[0])
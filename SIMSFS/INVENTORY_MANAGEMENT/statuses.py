@@ -0,0 +1,244 @@
+"""
+ORDER STATUS DERIVATION
+
+The payment status of a purchase order, the receipt status of a sales order and the shipping status of
+both follow from the share of the order total paid / received so far:
+
+    paid / received     payment / receipt status     shipping status
+    nothing             PENDING                      PENDING
+    under 50%           PARTIAL PAYMENT              PROCESSING
+    50% - 74%           PARTIAL PAYMENT              DISPATCHED
+    75% - 99%           PARTIAL PAYMENT              IN TRANSIT
+    100% or more        COMPLETED                    DELIVERED
+
+The rules exist twice, side by side: as Python for the single order a write view just saved
+(update_purchase_order_statuses / update_sales_order_statuses) and as CASE expressions for the bulk
+recalculation, which re-derives every order in one UPDATE ... SET payment_status = CASE ... statement
+(preceded, for purchase orders, by INSERT ... SELECT statements recording the transitions):
+
+    recalculate_purchase_order_statuses()       POST /api/purchases/recalculate-statuses/
+    recalculate_sales_order_statuses()          POST /api/sales/recalculate-statuses/
+
+Ratios are compared as paid >= total * threshold, never by dividing, so the SQL and Python agree.
+The status dimension rows (PAYMENT_STATUSES, RECEIPT_STATUSES, SHIPPING_STATUSES) come from the
+in-process dimension cache (dimensions.py) and are created on first use.
+"""
+from decimal import Decimal
+
+from django.db import connections, transaction
+from django.db.models import Case, CharField, DateTimeField, F, Q, Value, When
+from django.utils import timezone
+
+from .models import PaymentStatus, ReceiptStatus, ShippingStatus, PurchaseOrder, SalesOrder, PurchaseOrderStatusHistory
+from .report_cache import bump_report_version
+from .dimensions import get_or_create_dimension_row
+
+
+PENDING = 'PENDING'
+PARTIAL_PAYMENT = 'PARTIAL PAYMENT'
+COMPLETED = 'COMPLETED'
+
+PROCESSING = 'PROCESSING'
+DISPATCHED = 'DISPATCHED'
+IN_TRANSIT = 'IN TRANSIT'
+DELIVERED = 'DELIVERED'
+
+# (SHARE PAID, SHIPPING STATUS), HIGHEST FIRST; BELOW THE LAST ONE AN ORDER IS PROCESSING
+SHIPPING_THRESHOLDS = [
+    (Decimal('1'), DELIVERED),
+    (Decimal('0.75'), IN_TRANSIT),
+    (Decimal('0.5'), DISPATCHED),
+]
+
+# ============================================
+# RULES: PYTHON (ONE ORDER)
+# ============================================
+
+def settlement_status(total_amount, amount_paid):
+    """Payment status of a purchase order / receipt status of a sales order"""
+    if amount_paid == 0:
+        return PENDING
+    if amount_paid >= total_amount:
+        return COMPLETED
+    return PARTIAL_PAYMENT
+
+
+def shipping_status(total_amount, amount_paid):
+    """Shipping status of a purchase or sales order"""
+    if total_amount <= 0 or amount_paid == 0:
+        return PENDING
+    for share, status in SHIPPING_THRESHOLDS:
+        if amount_paid >= total_amount * share:
+            return status
+    return PROCESSING
+
+
+def _status_info(total_amount, amount_paid):
+    total_amount = Decimal(str(total_amount))
+    amount_paid = Decimal(str(amount_paid))
+    return {
+        'payment_percentage': float(amount_paid / total_amount * 100) if total_amount > 0 else 0,
+        'balance_remaining': float(total_amount - amount_paid),
+    }
+
+
+# ============================================
+# RULES: SQL (EVERY ORDER)
+# ============================================
+
+def settlement_status_case(total_field, paid_field):
+    """CASE expression of settlement_status() over an order's columns"""
+    return Case(
+        When(**{paid_field: 0}, then=Value(PENDING)),
+        When(**{f'{paid_field}__gte': F(total_field)}, then=Value(COMPLETED)),
+        default=Value(PARTIAL_PAYMENT),
+        output_field=CharField(),
+    )
+
+
+def shipping_status_case(total_field, paid_field):
+    """CASE expression of shipping_status() over an order's columns"""
+    return Case(
+        When(Q(**{f'{total_field}__lte': 0}) | Q(**{paid_field: 0}), then=Value(PENDING)),
+        *[When(**{f'{paid_field}__gte': F(total_field) * share}, then=Value(status)) for share, status in SHIPPING_THRESHOLDS],
+        default=Value(PROCESSING),
+        output_field=CharField(),
+    )
+
+
+def _insert_transitions(orders, status_type, status_field, new_status):
+    """
+    INSERT INTO PURCHASE_ORDER_STATUS_HISTORY ... SELECT one transition row for each purchase order in
+    `orders` whose `status_field` differs from the `new_status` CASE expression, in a single statement.
+    """
+    rows = orders.exclude(**{status_field: new_status}).annotate(
+        transition_type=Value(status_type, output_field=CharField()),
+        transition_status=new_status,
+        transition_at=Value(timezone.now(), output_field=DateTimeField()),
+    ).values_list('po_id', 'transition_type', 'transition_status', 'transition_at').order_by()
+
+    connection = connections[rows.db]
+    select_sql, params = rows.query.get_compiler(using=rows.db).as_sql()
+    meta = PurchaseOrderStatusHistory._meta
+    columns = ', '.join(
+        connection.ops.quote_name(meta.get_field(name).column) for name in ('po_id', 'status_type', 'status', 'changed_at')
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT INTO {connection.ops.quote_name(meta.db_table)} ({columns}) {select_sql}', params)
+
+
+def _ensure_status_rows(settlement_model):
+    for name in (PENDING, PARTIAL_PAYMENT, COMPLETED):
+        get_or_create_dimension_row(settlement_model, name)
+    for name in (PENDING, PROCESSING, DISPATCHED, IN_TRANSIT, DELIVERED):
+        get_or_create_dimension_row(ShippingStatus, name)
+
+
+# ============================================
+# PURCHASE ORDERS
+# ============================================
+
+def update_purchase_order_statuses(purchase_order):
+    """
+    Re-derive the payment and shipping status of a purchase order just saved with its new totals,
+    record the transitions (their timestamps drive the supplier lead-time metric) and return the
+    status information for the response.
+    """
+    payment_status_name = settlement_status(purchase_order.total_amount, purchase_order.amount_paid)
+    shipping_status_name = shipping_status(purchase_order.total_amount, purchase_order.amount_paid)
+
+    changed = []
+    transitions = []
+    if purchase_order.payment_status_id != payment_status_name:
+        purchase_order.payment_status = get_or_create_dimension_row(PaymentStatus, payment_status_name)
+        changed.append('payment_status')
+        transitions.append(PurchaseOrderStatusHistory(po_id=purchase_order, status_type='PAYMENT', status=payment_status_name))
+    if purchase_order.shipping_status_id != shipping_status_name:
+        purchase_order.shipping_status = get_or_create_dimension_row(ShippingStatus, shipping_status_name)
+        changed.append('shipping_status')
+        transitions.append(PurchaseOrderStatusHistory(po_id=purchase_order, status_type='SHIPPING', status=shipping_status_name))
+
+    if changed:
+        purchase_order.save(update_fields=changed)
+        PurchaseOrderStatusHistory.objects.bulk_create(transitions)
+
+    return {
+        'payment_status': payment_status_name,
+        'shipping_status': shipping_status_name,
+        **_status_info(purchase_order.total_amount, purchase_order.amount_paid),
+    }
+
+
+def recalculate_purchase_order_statuses(queryset=None):
+    """
+    Re-derive the payment and shipping status of every purchase order (or of `queryset`) in one UPDATE,
+    writing only the orders whose status changes, and record their transitions with INSERT ... SELECT.
+    No order row is loaded into Python.
+    Returns the number of purchase orders updated.
+    """
+    if queryset is None:
+        queryset = PurchaseOrder.objects.all()
+    payment_case = settlement_status_case('total_amount', 'amount_paid')
+    shipping_case = shipping_status_case('total_amount', 'amount_paid')
+    _ensure_status_rows(PaymentStatus)
+
+    with transaction.atomic():
+        changed = queryset.exclude(payment_status=payment_case, shipping_status=shipping_case)
+
+        # TRANSITIONS FIRST, IN THE DATABASE: THE UPDATE OVERWRITES THE OLD STATUSES
+        _insert_transitions(changed, 'PAYMENT', 'payment_status', payment_case)
+        _insert_transitions(changed, 'SHIPPING', 'shipping_status', shipping_case)
+
+        updated = changed.update(payment_status=payment_case, shipping_status=shipping_case)
+        if updated:
+            transaction.on_commit(bump_report_version)                      # QUERYSET UPDATES SEND NO post_save SIGNALS
+    return updated
+
+
+# ============================================
+# SALES ORDERS
+# ============================================
+
+def update_sales_order_statuses(sales_order):
+    """
+    Re-derive the receipt and shipping status of a sales order just saved with its new totals and
+    return the status information for the response.
+    """
+    receipt_status_name = settlement_status(sales_order.total_amount, sales_order.amount_received)
+    shipping_status_name = shipping_status(sales_order.total_amount, sales_order.amount_received)
+
+    changed = []
+    if sales_order.receipt_status_id != receipt_status_name:
+        sales_order.receipt_status = get_or_create_dimension_row(ReceiptStatus, receipt_status_name)
+        changed.append('receipt_status')
+    if sales_order.shipping_status_id != shipping_status_name:
+        sales_order.shipping_status = get_or_create_dimension_row(ShippingStatus, shipping_status_name)
+        changed.append('shipping_status')
+
+    if changed:
+        sales_order.save(update_fields=changed)
+
+    return {
+        'receipt_status': receipt_status_name,
+        'shipping_status': shipping_status_name,
+        **_status_info(sales_order.total_amount, sales_order.amount_received),
+    }
+
+
+def recalculate_sales_order_statuses(queryset=None):
+    """
+    Re-derive the receipt and shipping status of every sales order (or of `queryset`) in one UPDATE,
+    writing only the orders whose status changes. Returns the number of sales orders updated.
+    """
+    if queryset is None:
+        queryset = SalesOrder.objects.all()
+    receipt_case = settlement_status_case('total_amount', 'amount_received')
+    shipping_case = shipping_status_case('total_amount', 'amount_received')
+    _ensure_status_rows(ReceiptStatus)
+
+    updated = queryset.exclude(receipt_status=receipt_case, shipping_status=shipping_case).update(
+        receipt_status=receipt_case, shipping_status=shipping_case
+    )
+    if updated:
+        transaction.on_commit(bump_report_version)                          # QUERYSET UPDATES SEND NO post_save SIGNALS
+    return updated
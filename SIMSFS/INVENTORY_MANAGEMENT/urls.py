@@ -81,6 +81,7 @@ urlpatterns = [
     path('api/suppliers/add/', views.api_add_supplier, name='api_add_supplier'),
     path('api/suppliers/update/', views.api_update_supplier, name='api_update_supplier'),
     path('api/suppliers/delete/', views.api_delete_supplier, name='api_delete_supplier'),
+    path('api/suppliers/reconcile/', views.api_reconcile_suppliers, name='api_reconcile_suppliers'),
     
     # CUSTOMER URLS
     path('api/customers/counties/', views.api_get_counties, name='api_get_counties'),
@@ -94,6 +95,7 @@ urlpatterns = [
     path('api/customers/add/', views.api_add_customer, name='api_add_customer'),
     path('api/customers/update/', views.api_update_customer, name='api_update_customer'),
     path('api/customers/delete/', views.api_delete_customer, name='api_delete_customer'),
+    path('api/customers/reconcile/', views.api_reconcile_customers, name='api_reconcile_customers'),
 
 
 # ====================================== PURCHASES MODULE URLs =========================================================================================
@@ -143,6 +145,7 @@ urlpatterns = [
     path('api/sales/add/', views.api_add_sales_order, name='api_add_sales_order'),
     path('api/sales/update/', views.api_update_sales_order, name='api_update_sales_order'),
     path('api/sales/delete-detail/', views.api_delete_sales_detail, name='api_delete_sales_detail'),
+    path('api/sales/recalculate-statuses/', views.api_recalculate_all_so_statuses, name='api_recalculate_so_statuses'),
     path('api/sales/get-next-detail-number/', views.api_get_next_sales_detail_number, name='api_get_next_sales_detail_number'),
     
     
@@ -175,11 +178,15 @@ urlpatterns = [
 
 
     # =============================== DASHBOARD URLS/API ENDPOINTS =======================================================================================================================
+    path('api/dashboard/summary/', views.api_dashboard_summary, name='api_dashboard_summary'),
     path('api/dashboard/sales-details/', views.api_get_all_sales_details, name='api_get_all_sales_details'),
     path('api/dashboard/purchase-details/', views.api_get_all_purchase_details, name='api_get_all_purchase_details'),
 
     # ============================ SALES-FORECASTING MODULE VIEWS =========================================================================================================================
     path('api/sales-forecasting/data/',       views.api_sales_forecast_data,    name='api_sales_forecast_data'),
+    path('api/sales-forecasting/forecast/',   views.api_sales_forecast,         name='api_sales_forecast'),
+    path('api/sales-forecasting/series/',     views.api_sales_forecast_series,  name='api_sales_forecast_series'),
+    path('api/sales-forecasting/items/',      views.api_get_item_forecasts,     name='api_get_item_forecasts'),
     path('api/sales-forecasting/export-csv/', views.api_export_forecast_csv,    name='api_export_forecast_csv'),
 
 
@@ -193,8 +200,13 @@ urlpatterns = [
     path('api/reports/customer-analysis/', views.api_generate_customer_analysis, name='api_customer_analysis'),
     path('api/reports/supplier-analysis/', views.api_generate_supplier_analysis, name='api_supplier_analysis'),
     path('api/reports/tax-summary/', views.api_generate_tax_summary, name='api_tax_summary'),
+    path('api/reports/tax-summary/transactions/', views.api_get_tax_transactions, name='api_tax_transactions'),
+    path('api/reports/cache-stats/', views.api_report_cache_stats, name='api_report_cache_stats'),
     path('api/reports/export-pdf/', views.api_export_report_pdf, name='api_export_pdf'),
+    path('api/reports/export-pdf/<str:job_id>/', views.api_export_report_pdf_status, name='api_export_pdf_status'),
+    path('api/reports/export-pdf/<str:job_id>/download/', views.api_download_report_pdf, name='api_download_pdf'),
     path('api/reports/export-excel/', views.api_export_report_excel, name='api_export_excel'),
+    path('api/exports/<str:table>/', views.api_export_table, name='api_export_table'),
 
     # ======================== SETTINGS MODULE URLs ========================================================================================================
     path('api/user/profile/', views.api_get_user_profile, name='api_get_user_profile'),
@@ -0,0 +1,209 @@
+"""
+INVENTORY VALUATION
+
+The inventory status report values the units on hand (purchased - sold) by one of:
+
+    standard   the item's master purchase price (the default, as before)
+    average    weighted average unit cost of every purchase line of the item
+    last       unit cost of the item's most recent purchase line
+    fifo       first in, first out: sales consume the oldest purchase lines first, so the units on
+               hand are valued at the cost of the newest lines that still cover them
+
+The purchase history behind these is stored, not replayed per report:
+
+    INVENTORY_COST_LAYERS   one row per purchase detail line, in (date, detail_id) order, with the
+                            item's running unit count up to and including that line (cumulative_qty)
+    INVENTORY_VALUATIONS    per item: units, cost and average unit cost of all layers, last unit cost and date
+
+The purchase write views call update_cost_layers() inside their transaction. A line that sorts after
+the item's newest layer (the usual case) is appended with one INSERT; an edit, a delete or a back-dated
+line re-layers only that item. With cumulative_qty stored, the FIFO value of an item is one indexed
+range read of the layers still (partly) on hand:
+
+    consumed = layer units - units on hand
+    value    = SUM(MIN(quantity, cumulative_qty - consumed) * unit_cost) WHERE cumulative_qty > consumed
+
+Units on hand beyond the stored layers (opening stock entered without a purchase order) are valued at
+the purchase price under every method. `manage.py rebuild_inventory_valuations` recomputes both tables.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+
+from .models import Inventory, InventoryCostLayer, InventoryValuation, PurchaseDetail
+
+
+STANDARD = 'standard'
+AVERAGE = 'average'
+LAST = 'last'
+FIFO = 'fifo'
+
+VALUATION_METHODS = {
+    STANDARD: 'Standard (purchase price)',
+    AVERAGE: 'Weighted average cost',
+    LAST: 'Last purchase cost',
+    FIFO: 'FIFO',
+}
+DEFAULT_VALUATION_METHOD = STANDARD
+
+AVERAGE_COST_PLACES = Decimal('0.000001')                                    # STORED AVERAGE UNIT COST PRECISION
+
+
+def _money(expression):
+    return ExpressionWrapper(expression, output_field=DecimalField(max_digits=18, decimal_places=4))
+
+
+# ============================================
+# VALUATION AS SQL EXPRESSIONS
+# ============================================
+
+REMAINING_QTY = ExpressionWrapper(F('quantity_purchased') - F('quantity_sold'), output_field=IntegerField())
+LAYER_QTY = Coalesce(F('valuation__layer_qty'), Value(0))
+
+
+def _fifo_value():
+    """Correlated subquery: cost of the units on hand still covered by the item's layers"""
+    layers = InventoryCostLayer.objects.filter(
+        item_id=OuterRef('item_id'), cumulative_qty__gt=OuterRef('consumed_qty')
+    ).order_by().values('item_id').annotate(
+        value=Sum(_money(Least(F('quantity'), F('cumulative_qty') - OuterRef('consumed_qty')) * F('unit_cost')))
+    ).values('value')
+    return Coalesce(Subquery(layers, output_field=DecimalField(max_digits=18, decimal_places=4)),
+                    Value(Decimal('0')), output_field=DecimalField(max_digits=18, decimal_places=4))
+
+
+def valued_inventory(method=DEFAULT_VALUATION_METHOD, queryset=None):
+    """
+    Inventory queryset annotated with remaining_qty, unit_cost (None under FIFO), cost_value and
+    sale_value under a valuation method. Raises ValueError for an unknown method.
+    """
+    if method not in VALUATION_METHODS:
+        raise ValueError(f"Unknown valuation method '{method}'. Use one of: {', '.join(VALUATION_METHODS)}")
+    if queryset is None:
+        queryset = Inventory.objects.all()
+
+    queryset = queryset.annotate(
+        remaining_qty=REMAINING_QTY,
+        sale_value=_money(REMAINING_QTY * F('sale_price')),
+    )
+
+    if method == FIFO:
+        # UNITS ON HAND BEYOND THE LAYERS ARE VALUED AT THE PURCHASE PRICE
+        return queryset.annotate(
+            consumed_qty=LAYER_QTY - REMAINING_QTY,
+            uncovered_qty=Greatest(REMAINING_QTY - LAYER_QTY, Value(0)),
+        ).annotate(
+            unit_cost=Value(None, output_field=DecimalField(max_digits=12, decimal_places=2)),
+            cost_value=_money(_fifo_value() + F('uncovered_qty') * F('purchase_price')),
+        )
+
+    if method == AVERAGE:
+        unit_cost = Coalesce(F('valuation__average_cost'), F('purchase_price'),
+                             output_field=DecimalField(max_digits=18, decimal_places=6))
+    elif method == LAST:
+        unit_cost = Coalesce(F('valuation__last_cost'), F('purchase_price'))
+    else:
+        unit_cost = F('purchase_price')
+
+    return queryset.annotate(unit_cost=unit_cost).annotate(cost_value=_money(F('remaining_qty') * F('unit_cost')))
+
+
+# ============================================
+# INCREMENTAL MAINTENANCE
+# ============================================
+
+def _average_cost(quantity, cost):
+    return (cost / quantity).quantize(AVERAGE_COST_PLACES) if quantity else None
+
+
+def _relayer_items(item_ids):
+    """Rebuild the cost layers and totals of some items from their purchase detail lines"""
+    # CLEAR FIRST: A LINE MOVED BETWEEN TWO OF THESE ITEMS STILL HAS ITS LAYER UNDER THE OLD ONE
+    InventoryCostLayer.objects.filter(item_id_id__in=item_ids).delete()
+    for item_id in item_ids:
+        _layer_item(item_id)
+
+
+def _layer_item(item_id):
+    """Write one item's cost layers (none may exist yet) and its valuation totals"""
+    details = PurchaseDetail.objects.filter(item_id_id=item_id).order_by('date', 'detail_id').values_list(
+        'detail_id', 'date', 'quantity_purchased', 'unit_cost'
+    )
+
+    layers = []
+    cumulative = 0
+    cost = Decimal('0')
+    for detail_id, day, quantity, unit_cost in details:
+        cumulative += quantity
+        cost += quantity * unit_cost
+        layers.append(InventoryCostLayer(
+            item_id_id=item_id, detail_id=detail_id, date=day, quantity=quantity,
+            unit_cost=unit_cost, cumulative_qty=cumulative
+        ))
+    InventoryCostLayer.objects.bulk_create(layers)
+
+    last = layers[-1] if layers else None
+    InventoryValuation.objects.update_or_create(item_id_id=item_id, defaults={
+        'layer_qty': cumulative,
+        'layer_cost': cost,
+        'average_cost': _average_cost(cumulative, cost),
+        'last_cost': last.unit_cost if last else None,
+        'last_purchase_date': last.date if last else None,
+    })
+
+
+def update_cost_layers(added=(), changed_item_ids=()):
+    """
+    Bring the stored layers up to date after a purchase write. `added` are newly created PurchaseDetail
+    lines; `changed_item_ids` are items whose existing lines were edited, moved or deleted (old and new
+    item of a moved line). Call inside the write's transaction.atomic() block.
+    """
+    relayer = set(changed_item_ids)
+    by_item = defaultdict(list)
+    for detail in added:
+        if detail.item_id_id not in relayer:
+            by_item[detail.item_id_id].append(detail)
+
+    for item_id, details in by_item.items():
+        InventoryValuation.objects.get_or_create(item_id_id=item_id)
+        valuation = InventoryValuation.objects.select_for_update().get(item_id_id=item_id)  # SERIALIZE APPENDS PER ITEM
+        newest = InventoryCostLayer.objects.filter(item_id_id=item_id).order_by('-date', '-detail_id').first()
+
+        details.sort(key=lambda d: (d.date, d.detail_id))
+        if newest and (details[0].date, details[0].detail_id) < (newest.date, newest.detail_id):
+            relayer.add(item_id)                                             # BACK-DATED LINE
+            continue
+
+        layers = []
+        for detail in details:
+            valuation.layer_qty += detail.quantity_purchased
+            valuation.layer_cost += detail.quantity_purchased * Decimal(str(detail.unit_cost))
+            layers.append(InventoryCostLayer(
+                item_id_id=item_id, detail_id=detail.detail_id, date=detail.date,
+                quantity=detail.quantity_purchased, unit_cost=detail.unit_cost, cumulative_qty=valuation.layer_qty
+            ))
+        InventoryCostLayer.objects.bulk_create(layers)
+        valuation.average_cost = _average_cost(valuation.layer_qty, valuation.layer_cost)
+        valuation.last_cost = details[-1].unit_cost
+        valuation.last_purchase_date = details[-1].date
+        valuation.save()
+
+    if relayer:
+        _relayer_items(relayer)
+
+
+# ============================================
+# FULL REBUILD
+# ============================================
+
+def rebuild_inventory_valuations():
+    """Recompute INVENTORY_COST_LAYERS and INVENTORY_VALUATIONS for every item; returns the layer count"""
+    with transaction.atomic():
+        InventoryCostLayer.objects.all().delete()
+        InventoryValuation.objects.all().delete()
+        for item_id in Inventory.objects.order_by('item_id').values_list('item_id', flat=True).iterator():
+            _layer_item(item_id)
+    return InventoryCostLayer.objects.count()
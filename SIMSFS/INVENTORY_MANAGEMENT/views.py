@@ -1,7 +1,7 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import JsonResponse
 from django.http import HttpRequest                                          # IMPORTS FOR HTTP REQUESTS AND RESPONSES
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse, FileResponse, QueryDict
 from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt, ensure_csrf_cookie
 from django.contrib import messages                                          # IMPORTS FOR DISPLAYING MESSAGES TO THE USER
@@ -11,23 +11,21 @@ from django.contrib.auth import authenticate, login, logout
 from django.db.models import Q, Sum, Max, Min, F, Count,Avg                  # IMPORTS FOR COMPLEX QUERIES
 import json                                                                  # REMEMBER TO REVIEW THIS GUY AT THE ENDPOINTS
 import io
+import tempfile
 import math
 from django.db import transaction
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from datetime import datetime,timedelta
 import time
-from django.db.models.functions import TruncMonth, TruncDate
-from django.utils.timezone import now
+from django.db.models.functions import TruncMonth, TruncDate, Coalesce
+from django.utils.timezone import now, localdate
 from django.db.models import F, ExpressionWrapper, DecimalField
+from django.db.models import OuterRef, Subquery, Case, When, Value, IntegerField
 
 from django.core.mail import send_mail
 from django.conf import settings as django_settings
 
-from sklearn.ensemble import RandomForestRegressor
 import numpy as np
-import sklearn
-#from sklearn.linear_model import forward_selection
-from sklearn.metrics import mean_squared_error, r2_score
 
 
 # ReportLab imports for PDF generation
@@ -38,17 +36,25 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 
-# openpyxl imports for Excel generation
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.cell.cell import MergedCell
-
 from .models import ItemType,ItemCategory,ItemSubcategory,PaymentMode,County,Town,PaymentStatus,ReceiptStatus,ShippingStatus,UserRole
 from .models import Inventory,InventoryItem
 from .models import Supplier,PurchaseOrder,PurchaseDetail,Payment
 from .models import Customer,SalesOrder,SalesDetail,Receipt
+from .models import SalesForecast,PurchaseOrderStatusHistory,DailyRollup
 from .models import UserManager,User
+from .sequences import next_id, next_ids, next_numbers, peek_id, peek_numbers, format_id, BILL_PREFIX, INVOICE_PREFIX
+from .forecasting import get_forecast, grouped_monthly_series, range_cutoff, FORECAST_MAX_HORIZON
+from .list_queries import list_query
+from .pdf_exports import pdf_job_id, pdf_job_path, pdf_job_status, submit_pdf_export, DONE as PDF_DONE
+from .excel_exports import LAYOUTS as EXCEL_LAYOUTS, report_sections, report_detail_sheets, write_report_workbook
+from .exports import EXPORT_TABLES, EXPORT_FORMATS, export_rows, stream_csv, stream_ndjson
+from .report_cache import cached_report, bump_report_version, report_cache_stats
+from .rollups import line_contributions, apply_rollup_changes, SALES, PURCHASES, ROLLUP_TOTAL
+from .valuation import VALUATION_METHODS, DEFAULT_VALUATION_METHOD, valued_inventory, update_cost_layers
+from .balances import post_balance, with_current_balances
+from .dimensions import dimension_endpoint, dimension_names, dimension_row, get_or_create_dimension_row
+from .statuses import (update_purchase_order_statuses, update_sales_order_statuses,
+                       recalculate_purchase_order_statuses, recalculate_sales_order_statuses)
 
 
 # A TEST VIEW TO SEE WHETHER THE Test.html DOCUMENT IS PERFECTLY LOADING
@@ -455,10 +461,11 @@ def inventory_items_content(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(ItemType)
 def api_get_item_types(request):
     """Get all item types"""
     try:
-        types = list(ItemType.objects.values_list('item_type', flat=True))
+        types = dimension_names(ItemType)
         return JsonResponse({'success': True, 'data': types})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -495,10 +502,11 @@ def api_add_item_type(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(ItemCategory)
 def api_get_item_categories(request):
     """Get all item categories"""
     try:
-        categories = list(ItemCategory.objects.values_list('item_category', flat=True))
+        categories = dimension_names(ItemCategory)
         return JsonResponse({'success': True, 'data': categories})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -535,10 +543,11 @@ def api_add_item_category(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(ItemSubcategory)
 def api_get_item_subcategories(request):
     """Get all item subcategories"""
     try:
-        subcategories = list(ItemSubcategory.objects.values_list('item_subcategory', flat=True))
+        subcategories = dimension_names(ItemSubcategory)
         return JsonResponse({'success': True, 'data': subcategories})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -576,19 +585,12 @@ def api_add_item_subcategory(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_generate_item_id(request):
-    """Generate unique item ID in format IT00001"""
+    """
+    Preview the next item ID (format IT00001) for the form.
+    The ID is only reserved when the item is saved (see sequences.py).
+    """
     try:
-        # Get the maximum item ID
-        max_item = InventoryItem.objects.aggregate(Max('item_id'))['item_id__max']
-        
-        if max_item:
-            # Extract numeric part and increment
-            num_part = int(max_item[2:]) + 1
-        else:
-            num_part = 1
-        
-        # Format as IT00001
-        new_id = f"IT{num_part:05d}"
+        new_id = peek_id('item')
         
         return JsonResponse({'success': True, 'item_id': new_id})
     
@@ -599,11 +601,11 @@ def api_generate_item_id(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_inventory_items(request):
-    """Get all inventory items"""
+    """Get inventory items (search / filter / sort / cursor paging, see list_queries)"""
     try:
-        items = InventoryItem.objects.select_related(
+        items, pagination = list_query('inventory_items', request.GET, InventoryItem.objects.select_related(
             'item_type', 'item_category', 'item_subcategory'
-        ).all()
+        ))
         
         items_list = []
         for item in items:
@@ -617,8 +619,13 @@ def api_get_inventory_items(request):
                 'sale_price': float(item.sale_price)
             })
         
-        return JsonResponse({'success': True, 'data': items_list})
+        response = {'success': True, 'data': items_list}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
     
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
@@ -633,8 +640,7 @@ def api_add_inventory_item(request):
     try:
         data = json.loads(request.body)
         
-        # Extract and validate data
-        item_id = data.get('item_id', '').strip()
+        # Extract and validate data (the item ID is assigned from the ID sequence on save)
         item_type_name = data.get('item_type', '').strip()
         item_category_name = data.get('item_category', '').strip()
         item_subcategory_name = data.get('item_subcategory', '').strip()
@@ -643,24 +649,17 @@ def api_add_inventory_item(request):
         sale_price = data.get('sale_price', 0)
         
         # Validation
-        if not all([item_id, item_type_name, item_category_name, item_subcategory_name, item_name]):
+        if not all([item_type_name, item_category_name, item_subcategory_name, item_name]):
             return JsonResponse({
                 'success': False, 
                 'message': 'All fields are required'
             }, status=400)
         
-        # Check if item ID already exists
-        if InventoryItem.objects.filter(item_id=item_id).exists():
-            return JsonResponse({
-                'success': False, 
-                'message': 'Item ID already exists'
-            }, status=400)
-        
         # Get foreign key objects
         try:
-            item_type = ItemType.objects.get(item_type=item_type_name)
-            item_category = ItemCategory.objects.get(item_category=item_category_name)
-            item_subcategory = ItemSubcategory.objects.get(item_subcategory=item_subcategory_name)
+            item_type = dimension_row(ItemType, item_type_name)
+            item_category = dimension_row(ItemCategory, item_category_name)
+            item_subcategory = dimension_row(ItemSubcategory, item_subcategory_name)
         except (ItemType.DoesNotExist, ItemCategory.DoesNotExist, ItemSubcategory.DoesNotExist) as e:
             return JsonResponse({
                 'success': False, 
@@ -669,6 +668,8 @@ def api_add_inventory_item(request):
         
         # Create inventory item
         with transaction.atomic():
+            item_id = next_id('item')
+            
             inventory_item = InventoryItem.objects.create(
                 item_id=item_id,
                 item_type=item_type,
@@ -696,7 +697,8 @@ def api_add_inventory_item(request):
         
         return JsonResponse({
             'success': True, 
-            'message': 'Inventory item added successfully'
+            'message': 'Inventory item added successfully',
+            'item_id': item_id
         })
     
     except json.JSONDecodeError:
@@ -731,9 +733,9 @@ def api_update_inventory_item(request):
         
         # Get foreign key objects
         try:
-            item_type = ItemType.objects.get(item_type=item_type_name)
-            item_category = ItemCategory.objects.get(item_category=item_category_name)
-            item_subcategory = ItemSubcategory.objects.get(item_subcategory=item_subcategory_name)
+            item_type = dimension_row(ItemType, item_type_name)
+            item_category = dimension_row(ItemCategory, item_category_name)
+            item_subcategory = dimension_row(ItemSubcategory, item_subcategory_name)
         except (ItemType.DoesNotExist, ItemCategory.DoesNotExist, ItemSubcategory.DoesNotExist):
             return JsonResponse({
                 'success': False, 
@@ -867,11 +869,11 @@ def api_delete_inventory_item(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_inventory(request):
-    """Get all inventory items with quantities and reorder status"""
+    """Get inventory items with quantities and reorder status (search / filter / sort / cursor paging, see list_queries)"""
     try:
-        inventory_items = Inventory.objects.select_related(
+        inventory_items, pagination = list_query('inventory', request.GET, Inventory.objects.select_related(
             'item_type', 'item_category', 'item_subcategory'
-        ).all()
+        ))
         
         items_list = []
         for item in inventory_items:
@@ -893,8 +895,13 @@ def api_get_inventory(request):
                 'sale_price': float(item.sale_price)           
             })
         
-        return JsonResponse({'success': True, 'data': items_list})
+        response = {'success': True, 'data': items_list}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
     
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
@@ -983,6 +990,118 @@ def api_delete_inventory_item(request):
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
     
 
+# ================================= BULK INVENTORY QUANTITY HELPERS ============================================
+def apply_inventory_deltas(field, deltas):
+    """
+    Add per-item quantity changes to an Inventory counter column ('quantity_purchased' or 'quantity_sold')
+    with ONE UPDATE (a CASE per item) instead of a get() + save() per line, then refresh the reorder flags.
+    
+    Args:
+        field (str): Inventory column to adjust
+        deltas (dict): {item_id: quantity to add (negative to subtract)}
+    """
+    deltas = {item_id: qty for item_id, qty in deltas.items() if qty}
+    if not deltas:
+        return
+    
+    Inventory.objects.filter(item_id__in=list(deltas)).update(**{
+        field: F(field) + Case(
+            *[When(item_id=item_id, then=Value(qty)) for item_id, qty in deltas.items()],
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    })
+    refresh_reorder_flags(deltas)
+
+
+def refresh_reorder_flags(item_ids):
+    """Same rule as Inventory.save(): YES when quantity_remaining <= reorder_level, done in one UPDATE"""
+    Inventory.objects.filter(item_id__in=list(item_ids)).update(
+        reorder_required=Case(
+            When(quantity_purchased__lte=F('quantity_sold') + F('reorder_level'), then=Value('YES')),
+            default=Value('NO')
+        )
+    )
+
+
+class InsufficientStock(Exception):
+    """An order change would leave an item with less than nothing in stock (the views answer 400)"""
+
+
+def load_order_items(items, lock=False, item_ids=()):
+    """
+    Fetch every Inventory row referenced by the order lines (plus `item_ids`, e.g. the items of lines
+    being edited away) in a single query.
+    
+    With lock=True the rows are read with SELECT ... FOR UPDATE in item_id order, so stock checked in
+    Python stays valid until the surrounding transaction commits. Only the items on the order are
+    locked, and the fixed lock order keeps two orders touching the same items from deadlocking.
+    Must be called inside transaction.atomic() when locking.
+    """
+    item_ids = {item_data['item_id'] for item_data in items} | set(item_ids)
+    if lock:
+        inventory_items = {
+            item.item_id: item
+            for item in Inventory.objects.select_for_update().filter(item_id__in=list(item_ids)).order_by('item_id')
+        }
+    else:
+        inventory_items = Inventory.objects.in_bulk(list(item_ids))
+    
+    missing = sorted(item_ids - set(inventory_items))
+    if missing:
+        raise Exception(f"Inventory item {', '.join(missing)} not found")
+    
+    return inventory_items
+
+
+def check_stock(inventory_items, field, deltas):
+    """
+    Raise InsufficientStock if adding `deltas` ({item_id: quantity}) to the `field` counter of the
+    locked `inventory_items` would take an item's remaining quantity below zero. Only changes that
+    reduce stock (selling more, or recording fewer purchased) are checked.
+    """
+    for item_id, qty in sorted(deltas.items()):
+        item = inventory_items[item_id]
+        available_qty = item.quantity_purchased - item.quantity_sold
+        if field == 'quantity_sold' and qty > available_qty and qty > 0:
+            raise InsufficientStock(f"Insufficient stock for {item.item_name}. Available: {available_qty}, Requested: {qty}")
+        if field == 'quantity_purchased' and -qty > available_qty and qty < 0:
+            raise InsufficientStock(f"Cannot remove {-qty} purchased units of {item.item_name}: only {available_qty} remain in stock")
+
+
+LINE_TOTAL_TOLERANCE = Decimal('0.01')                                       # CLIENT LINE TOTALS ARE ROUNDED TO CENTS
+
+
+def checked_line_totals(detail_model, items):
+    """
+    Total of each order line as the server stores it (the detail model's calculate_amounts()),
+    checked against the total the client sent with the line. Raises ValueError on the first mismatch.
+    """
+    if detail_model is SalesDetail:
+        quantity_field, price_field, total_field = 'quantity_sold', 'unit_price', 'total_sales_price'
+    else:
+        quantity_field, price_field, total_field = 'quantity_purchased', 'unit_cost', 'total_purchase_price'
+    
+    totals = []
+    for line_number, item_data in enumerate(items, 1):
+        line = detail_model(**{
+            quantity_field: int(item_data[quantity_field]),
+            price_field: Decimal(str(item_data[price_field])),
+            'tax_rate': Decimal(str(item_data['tax_rate'])),
+        })
+        line.calculate_amounts()
+        total = getattr(line, total_field)
+        
+        client_total = Decimal(str(item_data.get(total_field, total)))
+        if abs(client_total - total) > LINE_TOTAL_TOLERANCE:
+            raise ValueError(
+                f"Line {line_number} ({item_data.get('item_name') or item_data.get('item_id', '')}): "
+                f"total {client_total} does not match the calculated total {total:.2f}"
+            )
+        totals.append(total)
+    return totals
+
+
 # ===================== SUPPLIERS MODULE VIEWS =====================
 
 @login_required(login_url='/login/')
@@ -995,148 +1114,84 @@ def suppliers_content(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
-def api_get_counties(request):
-    """Get all counties from database"""
+def api_generate_supplier_id(request):
+    """
+    Preview the next supplier ID (format S00001) for the form.
+    The ID is only reserved when the supplier is saved (see sequences.py).
+    """
     try:
-        counties = list(County.objects.values_list('county', flat=True).order_by('county'))
-        return JsonResponse({'success': True, 'data': counties})
+        new_id = peek_id('supplier')
+        
+        return JsonResponse({'success': True, 'supplier_id': new_id})
+    
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
-@csrf_exempt
-@login_required(login_url='/login/')
-def api_get_towns(request):
-    """Get all towns from database"""
-    try:
-        towns = list(Town.objects.values_list('town', flat=True).order_by('town'))
-        return JsonResponse({'success': True, 'data': towns})
-    except Exception as e:
-        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+def supplier_totals_queryset():
+    """Suppliers annotated with purchase / payment totals summed from their purchase orders (one query)"""
+    return Supplier.objects.annotate(
+        calc_purchases=Coalesce(Sum('purchaseorder__total_amount'), Decimal('0.00'), output_field=DecimalField()),
+        calc_payments=Coalesce(Sum('purchaseorder__amount_paid'), Decimal('0.00'), output_field=DecimalField())
+    )
 
 
-@csrf_exempt
-@login_required(login_url='/login/')
-def api_add_county(request):
-    """Add new county"""
-    if request.method != 'POST':
-        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
-    
-    try:
-        data = json.loads(request.body)
-        county_name = data.get('county_name', '').strip()
-        
-        if not county_name:
-            return JsonResponse({'success': False, 'message': 'County name is required'}, status=400)
-        
-        # Check if already exists
-        if County.objects.filter(county__iexact=county_name).exists():
-            return JsonResponse({'success': False, 'message': 'County already exists'}, status=400)
-        
-        # Create new county
-        County.objects.create(county=county_name)
-        
-        return JsonResponse({'success': True, 'message': 'County added successfully'})
-    
-    except json.JSONDecodeError:
-        return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
-    except Exception as e:
-        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+def supplier_balance_drift():
+    """
+    [(supplier, purchases drift, payments drift)] for suppliers whose balance (stored totals plus unfolded
+    balance counters) differs from their purchase orders; drift = purchase orders - balance.
+    """
+    drifted = []
+    for supplier in with_current_balances(supplier_totals_queryset()):
+        purchases_drift = supplier.calc_purchases - supplier.current_total_purchases
+        payments_drift = supplier.calc_payments - supplier.current_total_payments
+        if purchases_drift or payments_drift:
+            drifted.append((supplier, purchases_drift, payments_drift))
+    return drifted
 
 
-@csrf_exempt
-@login_required(login_url='/login/')
-def api_add_town(request):
-    """Add new town"""
-    if request.method != 'POST':
-        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
-    
-    try:
-        data = json.loads(request.body)
-        town_name = data.get('town_name', '').strip()
-        
-        if not town_name:
-            return JsonResponse({'success': False, 'message': 'Town name is required'}, status=400)
-        
-        # Check if already exists
-        if Town.objects.filter(town__iexact=town_name).exists():
-            return JsonResponse({'success': False, 'message': 'Town already exists'}, status=400)
-        
-        # Create new town
-        Town.objects.create(town=town_name)
-        
-        return JsonResponse({'success': True, 'message': 'Town added successfully'})
-    
-    except json.JSONDecodeError:
-        return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
-    except Exception as e:
-        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+def reconcile_supplier_totals():
+    """
+    Bring the SUPPLIERS.total_purchases / total_payments balances back in line with their purchase orders.
+    The drift of each drifted supplier is posted as an increment, so payments posted meanwhile are kept.
+    Returns the list of corrected supplier IDs.
+    """
+    drifted = supplier_balance_drift()
 
+    with transaction.atomic():
+        for supplier, purchases_drift, payments_drift in drifted:
+            post_balance(supplier, total=purchases_drift, payments=payments_drift)
+        if drifted:
+            transaction.on_commit(bump_report_version)                      # QUERYSET UPDATES SEND NO post_save SIGNALS
 
-@csrf_exempt
-@login_required(login_url='/login/')
-def api_generate_supplier_id(request):
-    """Generate unique supplier ID in format S00001"""
-    try:
-        # Get the maximum supplier ID
-        max_supplier = Supplier.objects.aggregate(Max('supplier_id'))['supplier_id__max']
-        
-        if max_supplier:
-            # Extract numeric part and increment
-            num_part = int(max_supplier[5:]) + 1
-        else:
-            num_part = 1
-        
-        # Format as SUP001
-        new_id = f"S{num_part:05d}"
-        
-        # Make sure it doesn't exist (safety check)
-        while Supplier.objects.filter(supplier_id=new_id).exists():
-            num_part += 1
-            new_id = f"S{num_part:05d}"
-        
-        return JsonResponse({'success': True, 'supplier_id': new_id})
-    
-    except Exception as e:
-        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+    return [supplier.supplier_id for supplier, *drift in drifted]
 
 
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_suppliers(request):
-    """Get all suppliers with calculated totals"""
+    """Get all suppliers with totals calculated from their purchase orders (read-only, single query)"""
     try:
-        suppliers = Supplier.objects.select_related('county', 'town').all()
+        suppliers = supplier_totals_queryset().values(
+            'supplier_id', 'supplier_name', 'phone_number', 'email', 'county', 'town',
+            'calc_purchases', 'calc_payments'
+        ).order_by('supplier_id')
         
         suppliers_list = []
         for supplier in suppliers:
-            # Calculate totals from PurchaseOrders
-            purchase_totals = PurchaseOrder.objects.filter(
-                supplier_id=supplier
-            ).aggregate(
-                total_purchases=Sum('total_amount'),
-                total_payments=Sum('amount_paid')
-            )
-            
-            total_purchases = purchase_totals['total_purchases'] or Decimal('0.00')
-            total_payments = purchase_totals['total_payments'] or Decimal('0.00')
-            balance = total_purchases - total_payments
-            
-            # Update supplier record with calculated values
-            supplier.total_purchases = total_purchases
-            supplier.total_payments = total_payments
-            supplier.save()
+            total_purchases = supplier['calc_purchases']
+            total_payments = supplier['calc_payments']
             
             suppliers_list.append({
-                'id': supplier.supplier_id,
-                'name': supplier.supplier_name,
-                'contact': supplier.phone_number or '',
-                'email': supplier.email or '',
-                'state': supplier.county.county if supplier.county else '',
-                'city': supplier.town.town if supplier.town else '',
+                'id': supplier['supplier_id'],
+                'name': supplier['supplier_name'],
+                'contact': supplier['phone_number'] or '',
+                'email': supplier['email'] or '',
+                'state': supplier['county'] or '',
+                'city': supplier['town'] or '',
                 'purchases': float(total_purchases),
                 'payments': float(total_payments),
-                'balance': float(balance)
+                'balance': float(total_purchases - total_payments)
             })
         
         return JsonResponse({'success': True, 'data': suppliers_list})
@@ -1145,6 +1200,26 @@ def api_get_suppliers(request):
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_reconcile_suppliers(request):
+    """Recalculate the stored supplier totals from their purchase orders"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+    
+    try:
+        corrected = reconcile_supplier_totals()
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'{len(corrected)} supplier(s) corrected',
+            'corrected': corrected
+        })
+    
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_add_supplier(request):
@@ -1155,8 +1230,7 @@ def api_add_supplier(request):
     try:
         data = json.loads(request.body)
         
-        # Extract and validate data
-        supplier_id = data.get('id', '').strip()
+        # Extract and validate data (the supplier ID is assigned from the ID sequence on save)
         supplier_name = data.get('name', '').strip()
         phone_number = data.get('contact', '').strip()
         email = data.get('email', '').strip()
@@ -1164,23 +1238,16 @@ def api_add_supplier(request):
         town_name = data.get('city', '').strip()
         
         # Validation
-        if not all([supplier_id, supplier_name, county_name, town_name]):
-            return JsonResponse({
-                'success': False, 
-                'message': 'Supplier ID, Name, County, and Town are required'
-            }, status=400)
-        
-        # Check if supplier ID already exists
-        if Supplier.objects.filter(supplier_id=supplier_id).exists():
+        if not all([supplier_name, county_name, town_name]):
             return JsonResponse({
                 'success': False, 
-                'message': 'Supplier ID already exists'
+                'message': 'Supplier Name, County, and Town are required'
             }, status=400)
         
         # Get foreign key objects
         try:
-            county = County.objects.get(county=county_name)
-            town = Town.objects.get(town=town_name)
+            county = dimension_row(County, county_name)
+            town = dimension_row(Town, town_name)
         except (County.DoesNotExist, Town.DoesNotExist):
             return JsonResponse({
                 'success': False, 
@@ -1188,20 +1255,24 @@ def api_add_supplier(request):
             }, status=400)
         
         # Create supplier
-        Supplier.objects.create(
-            supplier_id=supplier_id,
-            supplier_name=supplier_name,
-            phone_number=phone_number if phone_number else None,
-            email=email if email else None,
-            county=county,
-            town=town,
-            total_purchases=Decimal('0.00'),
-            total_payments=Decimal('0.00')
-        )
+        with transaction.atomic():
+            supplier_id = next_id('supplier')
+            
+            Supplier.objects.create(
+                supplier_id=supplier_id,
+                supplier_name=supplier_name,
+                phone_number=phone_number if phone_number else None,
+                email=email if email else None,
+                county=county,
+                town=town,
+                total_purchases=Decimal('0.00'),
+                total_payments=Decimal('0.00')
+            )
         
         return JsonResponse({
             'success': True, 
-            'message': 'Supplier added successfully'
+            'message': 'Supplier added successfully',
+            'supplier_id': supplier_id
         })
     
     except json.JSONDecodeError:
@@ -1235,8 +1306,8 @@ def api_update_supplier(request):
         
         # Get foreign key objects
         try:
-            county = County.objects.get(county=county_name)
-            town = Town.objects.get(town=town_name)
+            county = dimension_row(County, county_name)
+            town = dimension_row(Town, town_name)
         except (County.DoesNotExist, Town.DoesNotExist):
             return JsonResponse({
                 'success': False, 
@@ -1249,7 +1320,7 @@ def api_update_supplier(request):
         supplier.email = email if email else None
         supplier.county = county
         supplier.town = town
-        supplier.save()
+        supplier.save(update_fields=['supplier_name', 'phone_number', 'email', 'county', 'town'])  # NOT THE TOTALS
         
         return JsonResponse({
             'success': True, 
@@ -1328,10 +1399,11 @@ def customers_content(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(County)
 def api_get_counties(request):
     """Get all counties from database"""
     try:
-        counties = list(County.objects.values_list('county', flat=True).order_by('county'))
+        counties = dimension_names(County)
         return JsonResponse({'success': True, 'data': counties})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -1339,10 +1411,11 @@ def api_get_counties(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(Town)
 def api_get_towns(request):
     """Get all towns from database"""
     try:
-        towns = list(Town.objects.values_list('town', flat=True).order_by('town'))
+        towns = dimension_names(Town)
         return JsonResponse({'success': True, 'data': towns})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -1409,28 +1482,12 @@ def api_add_town(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_generate_customer_id(request):
-    """Generate unique customer ID in format C00001"""
+    """
+    Preview the next customer ID (format C00001) for the form.
+    The ID is only reserved when the customer is saved (see sequences.py).
+    """
     try:
-        # Get the maximum customer ID
-        max_customer = Customer.objects.aggregate(Max('customer_id'))['customer_id__max']
-        
-        if max_customer:
-            # Extract numeric part and increment
-            # Handle both C00001 and CUST00001 formats
-            if max_customer.startswith('C'):
-                num_part = int(max_customer[4:]) + 1
-            else:
-                num_part = int(max_customer[1:]) + 1
-        else:
-            num_part = 1
-        
-        # Format as C00001
-        new_id = f"C{num_part:05d}"
-        
-        # Make sure it doesn't exist (safety check)
-        while Customer.objects.filter(customer_id=new_id).exists():
-            num_part += 1
-            new_id = f"C{num_part:05d}"
+        new_id = peek_id('customer')
         
         return JsonResponse({'success': True, 'customer_id': new_id})
     
@@ -1438,6 +1495,55 @@ def api_generate_customer_id(request):
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
+def customer_totals_queryset():
+    """Customers annotated with sales / receipt totals from correlated subqueries (one query, no row fan-out)"""
+    sales_sum = SalesOrder.objects.filter(
+        customer_id=OuterRef('pk')
+    ).order_by().values('customer_id').annotate(total=Sum('total_amount')).values('total')
+    
+    receipts_sum = Receipt.objects.filter(
+        customer_id=OuterRef('pk')
+    ).order_by().values('customer_id').annotate(total=Sum('amount_received')).values('total')
+    
+    return Customer.objects.annotate(
+        calc_sales=Coalesce(Subquery(sales_sum, output_field=DecimalField()), Decimal('0.00'), output_field=DecimalField()),
+        calc_receipts=Coalesce(Subquery(receipts_sum, output_field=DecimalField()), Decimal('0.00'), output_field=DecimalField())
+    ).annotate(
+        calc_balance=F('calc_sales') - F('calc_receipts')
+    )
+
+
+def customer_balance_drift():
+    """
+    [(customer, sales drift, payments drift)] for customers whose balance (stored totals plus unfolded
+    balance counters) differs from their orders and receipts; drift = orders / receipts - balance.
+    """
+    drifted = []
+    for customer in with_current_balances(customer_totals_queryset()):
+        sales_drift = customer.calc_sales - customer.current_total_sales
+        payments_drift = customer.calc_receipts - customer.current_total_payments
+        if sales_drift or payments_drift:
+            drifted.append((customer, sales_drift, payments_drift))
+    return drifted
+
+
+def reconcile_customer_totals():
+    """
+    Bring the CUSTOMERS.total_sales / total_payments balances back in line with their orders and receipts.
+    The drift of each drifted customer is posted as an increment, so receipts posted meanwhile are kept.
+    Returns the list of corrected customer IDs.
+    """
+    drifted = customer_balance_drift()
+
+    with transaction.atomic():
+        for customer, sales_drift, payments_drift in drifted:
+            post_balance(customer, total=sales_drift, payments=payments_drift)
+        if drifted:
+            transaction.on_commit(bump_report_version)                      # QUERYSET UPDATES SEND NO post_save SIGNALS
+
+    return [customer.customer_id for customer, *drift in drifted]
+
+
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_customers(request):
@@ -1448,48 +1554,101 @@ def api_get_customers(request):
     - total_sales = Sum of all SalesOrder.total_amount for this customer
     - total_payments = Sum of all Receipt.amount_received for this customer
     - balance_receivable = total_sales - total_payments
+    
+    Both sums are correlated subqueries, so the whole list is one query and the
+    orders / receipts joins cannot multiply each other's rows. Nothing is written.
+    
+    Optional query params:
+    - search: matches ID, name, phone, email, county or town
+    - sort: id | name | sales | receipts | balance (prefix with '-' for descending)
+    - page, page_size: server-side pagination (all rows are returned when page is omitted)
     """
     try:
-        customers = Customer.objects.select_related('county', 'town').all()
+        customers = customer_totals_queryset()
+        
+        # SEARCH
+        search = request.GET.get('search', '').strip()
+        if search:
+            customers = customers.filter(
+                Q(customer_id__icontains=search) | Q(customer_name__icontains=search) |
+                Q(phone_number__icontains=search) | Q(email__icontains=search) |
+                Q(county__county__icontains=search) | Q(town__town__icontains=search)
+            )
+        
+        # SORTING
+        sort_fields = {
+            'id': 'customer_id',
+            'name': 'customer_name',
+            'sales': 'calc_sales',
+            'receipts': 'calc_receipts',
+            'balance': 'calc_balance',
+        }
+        sort = request.GET.get('sort', 'id')
+        descending = sort.startswith('-')
+        sort_field = sort_fields.get(sort.lstrip('-'))
+        if not sort_field:
+            return JsonResponse({'success': False, 'message': f"Invalid sort field '{sort}'"}, status=400)
+        customers = customers.order_by(f"{'-' if descending else ''}{sort_field}", 'customer_id')
+        
+        customers = customers.values(
+            'customer_id', 'customer_name', 'phone_number', 'email', 'county', 'town',
+            'calc_sales', 'calc_receipts', 'calc_balance'
+        )
+        
+        # OPTIONAL PAGINATION
+        pagination = None
+        if 'page' in request.GET:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 50)), 1), 500)
+            total = customers.count()
+            customers = customers[(page - 1) * page_size:page * page_size]
+            pagination = {
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+                'total_pages': math.ceil(total / page_size) if total else 0
+            }
         
         customers_list = []
         for customer in customers:
-            # Calculate total sales from SalesOrders
-            sales_totals = SalesOrder.objects.filter(
-                customer_id=customer
-            ).aggregate(
-                total_sales=Sum('total_amount')
-            )
-            
-            # Calculate total payments from Receipts
-            payment_totals = Receipt.objects.filter(
-                customer_id=customer
-            ).aggregate(
-                total_payments=Sum('amount_received')
-            )
-            
-            total_sales = sales_totals['total_sales'] or Decimal('0.00')
-            total_payments = payment_totals['total_payments'] or Decimal('0.00')
-            balance_receivable = total_sales - total_payments
-            
-            # Update customer record with calculated values
-            customer.total_sales = total_sales
-            customer.total_payments = total_payments
-            customer.save()
-            
             customers_list.append({
-                'id': customer.customer_id,
-                'name': customer.customer_name,
-                'contact': customer.phone_number or '',
-                'email': customer.email or '',
-                'state': customer.county.county if customer.county else '',
-                'city': customer.town.town if customer.town else '',
-                'sales': float(total_sales),
-                'receipts': float(total_payments),  # This is what we send to frontend
-                'balance': float(balance_receivable)
+                'id': customer['customer_id'],
+                'name': customer['customer_name'],
+                'contact': customer['phone_number'] or '',
+                'email': customer['email'] or '',
+                'state': customer['county'] or '',
+                'city': customer['town'] or '',
+                'sales': float(customer['calc_sales']),
+                'receipts': float(customer['calc_receipts']),  # This is what we send to frontend
+                'balance': float(customer['calc_balance'])
             })
         
-        return JsonResponse({'success': True, 'data': customers_list})
+        response = {'success': True, 'data': customers_list}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
+    
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_reconcile_customers(request):
+    """Recalculate the stored customer totals from their sales orders and receipts"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+    
+    try:
+        corrected = reconcile_customer_totals()
+        
+        return JsonResponse({
+            'success': True,
+            'message': f'{len(corrected)} customer(s) corrected',
+            'corrected': corrected
+        })
     
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -1505,8 +1664,7 @@ def api_add_customer(request):
     try:
         data = json.loads(request.body)
         
-        # Extract and validate data
-        customer_id = data.get('id', '').strip()
+        # Extract and validate data (the customer ID is assigned from the ID sequence on save)
         customer_name = data.get('name', '').strip()
         phone_number = data.get('contact', '').strip()
         email = data.get('email', '').strip()
@@ -1514,23 +1672,16 @@ def api_add_customer(request):
         town_name = data.get('city', '').strip()
         
         # Validation
-        if not all([customer_id, customer_name, county_name, town_name]):
-            return JsonResponse({
-                'success': False, 
-                'message': 'Customer ID, Name, County, and Town are required'
-            }, status=400)
-        
-        # Check if customer ID already exists
-        if Customer.objects.filter(customer_id=customer_id).exists():
+        if not all([customer_name, county_name, town_name]):
             return JsonResponse({
                 'success': False, 
-                'message': 'Customer ID already exists'
+                'message': 'Customer Name, County, and Town are required'
             }, status=400)
         
         # Get foreign key objects
         try:
-            county = County.objects.get(county=county_name)
-            town = Town.objects.get(town=town_name)
+            county = dimension_row(County, county_name)
+            town = dimension_row(Town, town_name)
         except (County.DoesNotExist, Town.DoesNotExist):
             return JsonResponse({
                 'success': False, 
@@ -1538,20 +1689,24 @@ def api_add_customer(request):
             }, status=400)
         
         # Create customer with correct field names
-        Customer.objects.create(
-            customer_id=customer_id,
-            customer_name=customer_name,
-            phone_number=phone_number if phone_number else None,
-            email=email if email else None,
-            county=county,
-            town=town,
-            total_sales=Decimal('0.00'),
-            total_payments=Decimal('0.00')  # CORRECTED: Using total_payments not total_receipts
-        )
+        with transaction.atomic():
+            customer_id = next_id('customer')
+            
+            Customer.objects.create(
+                customer_id=customer_id,
+                customer_name=customer_name,
+                phone_number=phone_number if phone_number else None,
+                email=email if email else None,
+                county=county,
+                town=town,
+                total_sales=Decimal('0.00'),
+                total_payments=Decimal('0.00')  # CORRECTED: Using total_payments not total_receipts
+            )
         
         return JsonResponse({
             'success': True, 
-            'message': 'Customer added successfully'
+            'message': 'Customer added successfully',
+            'customer_id': customer_id
         })
     
     except json.JSONDecodeError:
@@ -1585,8 +1740,8 @@ def api_update_customer(request):
         
         # Get foreign key objects
         try:
-            county = County.objects.get(county=county_name)
-            town = Town.objects.get(town=town_name)
+            county = dimension_row(County, county_name)
+            town = dimension_row(Town, town_name)
         except (County.DoesNotExist, Town.DoesNotExist):
             return JsonResponse({
                 'success': False, 
@@ -1599,7 +1754,7 @@ def api_update_customer(request):
         customer.email = email if email else None
         customer.county = county
         customer.town = town
-        customer.save()
+        customer.save(update_fields=['customer_name', 'phone_number', 'email', 'county', 'town'])  # NOT THE TOTALS
         
         return JsonResponse({
             'success': True, 
@@ -1690,10 +1845,11 @@ def purchases_content(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(PaymentStatus)
 def api_get_payment_statuses(request):
     """Get all payment statuses"""
     try:
-        statuses = list(PaymentStatus.objects.values_list('payment_status', flat=True).order_by('payment_status'))
+        statuses = dimension_names(PaymentStatus)
         return JsonResponse({'success': True, 'data': statuses})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -1728,10 +1884,11 @@ def api_add_payment_status(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(ShippingStatus)
 def api_get_shipping_statuses(request):
     """Get all shipping statuses"""
     try:
-        statuses = list(ShippingStatus.objects.values_list('shipping_status', flat=True).order_by('shipping_status'))
+        statuses = dimension_names(ShippingStatus)
         return JsonResponse({'success': True, 'data': statuses})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -1769,29 +1926,17 @@ def api_add_shipping_status(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_generate_po_id(request):
-    """Generate unique PO ID in format PO00001 and corresponding Bill Number B00001"""
+    """
+    Preview the next PO ID (format PO00001) and its Bill Number (B00001) for the form.
+    Both are only reserved when the purchase order is saved (see sequences.py).
+    """
     try:
-        max_po = PurchaseOrder.objects.aggregate(Max('po_id'))['po_id__max']
-        
-        if max_po:
-            num_part = int(max_po[2:]) + 1
-        else:
-            num_part = 1
-        
-        new_po_id = f"PO{num_part:05d}"
-        
-        # Make sure it doesn't exist
-        while PurchaseOrder.objects.filter(po_id=new_po_id).exists():
-            num_part += 1
-            new_po_id = f"PO{num_part:05d}"
-        
-        # Generate corresponding bill number
-        bill_number = f"B{num_part:05d}"
+        num_part = peek_numbers('purchase_order')[0]
         
         return JsonResponse({
             'success': True, 
-            'po_id': new_po_id,
-            'bill_number': bill_number
+            'po_id': format_id('PO', num_part),
+            'bill_number': format_id(BILL_PREFIX, num_part)
         })
     
     except Exception as e:
@@ -1802,33 +1947,11 @@ def api_generate_po_id(request):
 @login_required(login_url='/login/')
 def api_generate_detail_id(request):
     """
-    Generate unique Detail ID for PURCHASES in format PD00001
-    Each call generates a FRESH unique ID
+    Preview the next Detail ID for PURCHASES in format PD00001
+    The real Detail IDs are reserved in bulk when the purchase order is saved
     """
     try:
-        # Always fetch fresh from database
-        max_purchase_detail = PurchaseDetail.objects.aggregate(Max('detail_id'))['detail_id__max']
-        
-        if max_purchase_detail:
-            # Extract numeric part (skip 'PD' prefix)
-            num_part = int(max_purchase_detail[2:]) + 1
-        else:
-            # First purchase detail ever
-            num_part = 1
-        
-        # Format as PD00001
-        new_detail_id = f"PD{num_part:05d}"
-        
-        # Safety check: ensure it doesn't exist
-        attempts = 0
-        while PurchaseDetail.objects.filter(detail_id=new_detail_id).exists():
-            num_part += 1
-            new_detail_id = f"PD{num_part:05d}"
-            attempts += 1
-            if attempts > 1000:
-                return JsonResponse({'success': False, 'message': 'Could not generate unique Detail ID'}, status=500)
-        
-        print(f"✅ GENERATED PURCHASE DETAIL ID: {new_detail_id} at {time.strftime('%H:%M:%S')}")
+        new_detail_id = peek_id('purchase_detail')
         
         return JsonResponse({'success': True, 'detail_id': new_detail_id})
     
@@ -1841,24 +1964,11 @@ def api_generate_detail_id(request):
 @login_required(login_url='/login/')
 def api_get_next_detail_number(request):
     """
-    Get the next available detail number for BOTH Purchases and Sales
+    Get the next available detail number for Purchases (preview only)
     This returns just the number, not the full ID
     """
     try:
-        max_purchase_detail = PurchaseDetail.objects.aggregate(Max('detail_id'))['detail_id__max']
-        max_sales_detail = SalesDetail.objects.aggregate(Max('detail_id'))['detail_id__max']
-        
-        # Compare both and get the highest
-        max_details = []
-        if max_purchase_detail:
-            max_details.append(int(max_purchase_detail[2:]))  # Skip 'PD' prefix
-        if max_sales_detail:
-            max_details.append(int(max_sales_detail[2:]))  # Skip 'SD' prefix
-        
-        if max_details:
-            next_number = max(max_details) + 1
-        else:
-            next_number = 1
+        next_number = peek_numbers('purchase_detail')[0]
         
         return JsonResponse({'success': True, 'next_number': next_number})
     
@@ -1869,11 +1979,11 @@ def api_get_next_detail_number(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_purchase_orders(request):
-    """Get all purchase orders with calculated totals"""
+    """Get purchase orders with calculated totals (search / filter / sort / cursor paging, see list_queries)"""
     try:
-        purchase_orders = PurchaseOrder.objects.select_related(
+        purchase_orders, pagination = list_query('purchase_orders', request.GET, PurchaseOrder.objects.select_related(
             'supplier_id', 'county', 'town', 'payment_status', 'shipping_status'
-        ).all().order_by('-date')
+        ))
         
         po_list = []
         for po in purchase_orders:
@@ -1895,8 +2005,13 @@ def api_get_purchase_orders(request):
                 'shipping_status': po.shipping_status.shipping_status if po.shipping_status else ''
             })
         
-        return JsonResponse({'success': True, 'data': po_list})
+        response = {'success': True, 'data': po_list}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
     
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
@@ -1988,18 +2103,16 @@ def api_add_purchase_order(request):
     try:
         data = json.loads(request.body)
         
-        # Extract PO header data
-        po_id = data.get('po_id', '').strip()
+        # Extract PO header data (PO ID, bill number and detail IDs are assigned from the ID sequences on save)
         date_str = data.get('date', '').strip()
         supplier_id = data.get('supplier_id', '').strip()
         supplier_name = data.get('supplier_name', '').strip()
         county_name = data.get('county', '').strip()
         town_name = data.get('town', '').strip()
-        bill_number = data.get('bill_number', '').strip()
         items = data.get('items', [])
         
         # Validation
-        if not all([po_id, date_str, supplier_name, bill_number]):
+        if not all([date_str, supplier_name]):
             return JsonResponse({
                 'success': False, 
                 'message': 'All PO header fields are required'
@@ -2019,28 +2132,33 @@ def api_add_purchase_order(request):
                 'message': 'Invalid date format. Use DD/MM/YYYY'
             }, status=400)
         
-        # Check if PO already exists
-        if PurchaseOrder.objects.filter(po_id=po_id).exists():
-            return JsonResponse({
-                'success': False, 
-                'message': 'Purchase Order ID already exists'
-            }, status=400)
-        
         # Get foreign key objects
         try:
             supplier = Supplier.objects.get(supplier_id=supplier_id)
-            county = County.objects.get(county=county_name) if county_name else None
-            town = Town.objects.get(town=town_name) if town_name else None
+            county = dimension_row(County, county_name) if county_name else None
+            town = dimension_row(Town, town_name) if town_name else None
         except (Supplier.DoesNotExist, County.DoesNotExist, Town.DoesNotExist) as e:
             return JsonResponse({
                 'success': False, 
                 'message': f'Invalid reference: {str(e)}'
             }, status=400)
         
+        # Line totals are recalculated on the server; the client's must agree
+        try:
+            line_totals = checked_line_totals(PurchaseDetail, items)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        
         # Start transaction
         with transaction.atomic():
+            # Reserve the PO number (bill number shares it) and one detail ID per line
+            po_number = next_numbers('purchase_order')[0]
+            po_id = format_id('PO', po_number)
+            bill_number = format_id(BILL_PREFIX, po_number)
+            detail_ids = next_ids('purchase_detail', len(items))
+            
             # Calculate total amount
-            total_amount = sum(Decimal(str(item['total_purchase_price'])) for item in items)
+            total_amount = sum(line_totals).quantize(Decimal('0.01'))
             
             # Create Purchase Order with initial amount_paid = 0
             purchase_order = PurchaseOrder.objects.create(
@@ -2057,21 +2175,18 @@ def api_add_purchase_order(request):
                 shipping_status=None  # Will be set by update_purchase_order_statuses
             )
             
-            # Create Purchase Details and update inventory
-            for item_data in items:
+            # Create Purchase Details in bulk and update inventory with one UPDATE
+            inventory_items = load_order_items(items)
+            
+            purchase_details = []
+            qty_by_item = {}
+            for detail_id, item_data in zip(detail_ids, items):
                 detail_date = parse_date(item_data['date'])
                 if not detail_date:
                     detail_date = po_date
                 
-                # Get inventory item
-                try:
-                    inventory_item = Inventory.objects.get(item_id=item_data['item_id'])
-                except Inventory.DoesNotExist:
-                    raise Exception(f"Inventory item {item_data['item_id']} not found")
-                
-                # Create purchase detail
-                PurchaseDetail.objects.create(
-                    detail_id=item_data['detail_id'],
+                purchase_details.append(PurchaseDetail(
+                    detail_id=detail_id,
                     po_id=purchase_order,
                     date=detail_date,
                     supplier_id=supplier,
@@ -2079,7 +2194,7 @@ def api_add_purchase_order(request):
                     county=county,
                     town=town,
                     bill_number=bill_number,
-                    item_id=inventory_item,
+                    item_id=inventory_items[item_data['item_id']],
                     item_type=item_data['item_type'],
                     item_category=item_data['item_category'],
                     item_subcategory=item_data['item_subcategory'],
@@ -2087,15 +2202,20 @@ def api_add_purchase_order(request):
                     quantity_purchased=item_data['quantity_purchased'],
                     unit_cost=Decimal(str(item_data['unit_cost'])),
                     tax_rate=Decimal(str(item_data['tax_rate']))
-                )
-                
-                # Update inventory quantities
-                inventory_item.quantity_purchased += item_data['quantity_purchased']
-                inventory_item.save()
+                ))
+                qty_by_item[item_data['item_id']] = qty_by_item.get(item_data['item_id'], 0) + item_data['quantity_purchased']
+            
+            for detail in purchase_details:
+                detail.calculate_amounts()                                   # bulk_create() DOES NOT CALL save()
+            PurchaseDetail.objects.bulk_create(purchase_details)
+            apply_rollup_changes(line_contributions(purchase_details))
+            update_cost_layers(added=purchase_details)
+            
+            # Update inventory quantities
+            apply_inventory_deltas('quantity_purchased', qty_by_item)
             
             # Update supplier total purchases
-            supplier.total_purchases += total_amount
-            supplier.save()
+            post_balance(supplier, total=total_amount)
             
             # *** AUTOMATICALLY SET PAYMENT AND SHIPPING STATUS ***
             status_info = update_purchase_order_statuses(purchase_order)
@@ -2103,6 +2223,9 @@ def api_add_purchase_order(request):
         return JsonResponse({
             'success': True, 
             'message': 'Purchase Order created successfully',
+            'po_id': po_id,
+            'bill_number': bill_number,
+            'detail_ids': detail_ids,
             'status_info': status_info
         })
     
@@ -2136,29 +2259,47 @@ def api_update_purchase_order(request):
         except PurchaseOrder.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Purchase order not found'}, status=404)
         
+        try:
+            line_totals = checked_line_totals(PurchaseDetail, items)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        
         with transaction.atomic():
             # Get existing details
             existing_details = {d.detail_id: d for d in PurchaseDetail.objects.filter(po_id=purchase_order)}
             
+            # Lock every item the order touches (before and after the edit), in item_id order
+            inventory_items = load_order_items(
+                items, lock=True, item_ids=[d.item_id_id for d in existing_details.values()]
+            )
+            qty_by_item = {}
+            
             new_total = Decimal('0.00')
             processed_details = set()
+            rollup_changes = []
+            added_details = []
+            changed_item_ids = set()
             
-            for item_data in items:
+            # Lines the database does not know yet get real Detail IDs reserved as one block
+            new_line_count = sum(1 for item_data in items if item_data['detail_id'] not in existing_details)
+            new_detail_ids = iter(next_ids('purchase_detail', new_line_count))
+            
+            for item_data, total_price in zip(items, line_totals):
                 detail_id = item_data['detail_id']
                 processed_details.add(detail_id)
                 
                 new_qty = item_data['quantity_purchased']
-                total_price = Decimal(str(item_data['total_purchase_price']))
                 new_total += total_price
                 
                 # Get inventory item
-                inventory_item = Inventory.objects.get(item_id=item_data['item_id'])
+                inventory_item = inventory_items[item_data['item_id']]
                 
                 if detail_id in existing_details:
                     # ✅ UPDATE EXISTING DETAIL
                     detail = existing_details[detail_id]
                     old_qty = detail.quantity_purchased
-                    qty_diff = new_qty - old_qty
+                    rollup_changes += line_contributions([detail], sign=-1)
+                    changed_item_ids.update({detail.item_id_id, item_data['item_id']})
                     
                     # Update detail fields
                     detail.quantity_purchased = new_qty
@@ -2169,32 +2310,23 @@ def api_update_purchase_order(request):
                     detail.item_subcategory = item_data['item_subcategory']
                     detail.item_name = item_data['item_name']
                     
-                    # Handle item change
-                    if detail.item_id.item_id != item_data['item_id']:
-                        # Reverse old item
-                        detail.item_id.quantity_purchased -= old_qty
-                        detail.item_id.save()
-                        
-                        # Add to new item
-                        inventory_item.quantity_purchased += new_qty
-                        inventory_item.save()
-                        
-                        detail.item_id = inventory_item
-                    else:
-                        # Same item, adjust quantity
-                        inventory_item.quantity_purchased += qty_diff
-                        inventory_item.save()
+                    # Reverse the old quantity on the old item and add the new one to the (possibly new) item
+                    qty_by_item[detail.item_id_id] = qty_by_item.get(detail.item_id_id, 0) - old_qty
+                    qty_by_item[inventory_item.item_id] = qty_by_item.get(inventory_item.item_id, 0) + new_qty
+                    detail.item_id = inventory_item
                     
                     detail.save()
+                    rollup_changes += line_contributions([detail])
                     print(f"✅ UPDATED Detail: {detail_id}")
                     
                 else:
                     # ✅ CREATE NEW DETAIL (this was missing proper creation)
+                    detail_id = next(new_detail_ids)
                     detail_date = parse_date(item_data.get('date', ''))
                     if not detail_date:
                         detail_date = purchase_order.date
                     
-                    PurchaseDetail.objects.create(
+                    new_detail = PurchaseDetail.objects.create(
                         detail_id=detail_id,
                         po_id=purchase_order,
                         date=detail_date,
@@ -2212,10 +2344,11 @@ def api_update_purchase_order(request):
                         unit_cost=Decimal(str(item_data['unit_cost'])),
                         tax_rate=Decimal(str(item_data['tax_rate']))
                     )
+                    rollup_changes += line_contributions([new_detail])
+                    added_details.append(new_detail)
                     
                     # Update inventory
-                    inventory_item.quantity_purchased += new_qty
-                    inventory_item.save()
+                    qty_by_item[inventory_item.item_id] = qty_by_item.get(inventory_item.item_id, 0) + new_qty
                     
                     print(f"✅ CREATED NEW Detail: {detail_id}")
             
@@ -2223,12 +2356,20 @@ def api_update_purchase_order(request):
             for detail_id, detail in existing_details.items():
                 if detail_id not in processed_details:
                     # Reverse inventory
-                    detail.item_id.quantity_purchased -= detail.quantity_purchased
-                    detail.item_id.save()
+                    qty_by_item[detail.item_id_id] = qty_by_item.get(detail.item_id_id, 0) - detail.quantity_purchased
+                    rollup_changes += line_contributions([detail], sign=-1)
+                    changed_item_ids.add(detail.item_id_id)
                     detail.delete()
                     print(f"✅ DELETED Detail: {detail_id}")
             
+            # Units already sold cannot be removed from the purchase
+            check_stock(inventory_items, 'quantity_purchased', qty_by_item)
+            apply_inventory_deltas('quantity_purchased', qty_by_item)
+            apply_rollup_changes(rollup_changes)
+            update_cost_layers(added=added_details, changed_item_ids=changed_item_ids)
+            
             # Update PO total
+            new_total = new_total.quantize(Decimal('0.01'))
             old_total = purchase_order.total_amount
             total_diff = new_total - old_total
             
@@ -2236,9 +2377,7 @@ def api_update_purchase_order(request):
             purchase_order.save()
             
             # Update supplier total
-            supplier = purchase_order.supplier_id
-            supplier.total_purchases += total_diff
-            supplier.save()
+            post_balance(purchase_order.supplier_id, total=total_diff)
             
             # Update statuses
             status_info = update_purchase_order_statuses(purchase_order)
@@ -2251,6 +2390,8 @@ def api_update_purchase_order(request):
     
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
+    except InsufficientStock as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         print(f"❌ UPDATE ERROR: {str(e)}")
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -2276,23 +2417,24 @@ def api_delete_purchase_detail(request):
             return JsonResponse({'success': False, 'message': 'Purchase detail not found'}, status=404)
         
         with transaction.atomic():
-            # Reverse inventory quantity
-            inventory_item = detail.item_id
-            inventory_item.quantity_purchased -= detail.quantity_purchased
-            inventory_item.save()
+            # Reverse inventory quantity, unless those units have been sold since
+            deltas = {detail.item_id_id: -detail.quantity_purchased}
+            check_stock(load_order_items([], lock=True, item_ids=deltas), 'quantity_purchased', deltas)
+            apply_inventory_deltas('quantity_purchased', deltas)
             
-            # Update PO total
+            # Update PO total (kept to the cent, as when the order was saved)
             po = detail.po_id
-            po.total_amount -= detail.total_purchase_price
+            old_total = po.total_amount
+            po.total_amount = (po.total_amount - detail.total_purchase_price).quantize(Decimal('0.01'))
             po.save()
             
             # Update supplier total
-            supplier = detail.supplier_id
-            supplier.total_purchases -= detail.total_purchase_price
-            supplier.save()
+            post_balance(detail.supplier_id, total=po.total_amount - old_total)
             
             # Delete detail
+            apply_rollup_changes(line_contributions([detail], sign=-1))
             detail.delete()
+            update_cost_layers(changed_item_ids=set(deltas))
         
         return JsonResponse({
             'success': True, 
@@ -2301,121 +2443,12 @@ def api_delete_purchase_detail(request):
     
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
+    except InsufficientStock as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
     
     
-# ==================== UPDATING THE SHIPPING AND PAYMENT STATUSES FOR THE APPLICATION ========================================================================================
-
-def calculate_payment_status(total_amount, amount_paid):
-    """
-    Calculate payment status based on payment percentage
-    
-    Args:
-        total_amount (Decimal): Total amount of the purchase order
-        amount_paid (Decimal): Amount already paid
-    
-    Returns:
-        str: Payment status ('PENDING', 'PARTIAL PAYMENT', 'COMPLETED')
-    """
-    total_amount = Decimal(str(total_amount))
-    amount_paid = Decimal(str(amount_paid))
-    
-    # If no payment made
-    if amount_paid == Decimal('0.00'):
-        return 'PENDING'
-    
-    # If fully paid
-    elif amount_paid >= total_amount:
-        return 'COMPLETED'
-    
-    # If partially paid
-    else:
-        return 'PARTIAL PAYMENT'
-
-
-def calculate_shipping_status(total_amount, amount_paid):
-    """
-    Calculate shipping status based on payment percentage
-    
-    Payment Percentage -> Shipping Status:
-    - 0% -> PENDING
-    - 1%-49% -> PROCESSING
-    - 50%-74% -> DISPATCHED
-    - 75%-99% -> IN TRANSIT
-    - 100% -> DELIVERED
-    
-    Args:
-        total_amount (Decimal): Total amount of the purchase order
-        amount_paid (Decimal): Amount already paid
-    
-    Returns:
-        str: Shipping status
-    """
-    total_amount = Decimal(str(total_amount))
-    amount_paid = Decimal(str(amount_paid))
-    
-    # If no payment made
-    if amount_paid == Decimal('0.00'):
-        return 'PENDING'
-    
-    # Calculate payment percentage
-    payment_percentage = (amount_paid / total_amount) * 100
-    
-    # Determine shipping status based on percentage
-    if payment_percentage >= 100:
-        return 'DELIVERED'
-    elif payment_percentage >= 75:
-        return 'IN TRANSIT'
-    elif payment_percentage >= 50:
-        return 'DISPATCHED'
-    elif payment_percentage >= 1:
-        return 'PROCESSING'
-    else:
-        return 'PENDING'
-
-
-def update_purchase_order_statuses(purchase_order):
-    """
-    Update both payment and shipping status for a purchase order
-    
-    Args:
-        purchase_order: PurchaseOrder instance
-    
-    Returns:
-        dict: Updated status information
-    """
-    # Get or create status objects
-    payment_status_name = calculate_payment_status(
-        purchase_order.total_amount, 
-        purchase_order.amount_paid
-    )
-    
-    shipping_status_name = calculate_shipping_status(
-        purchase_order.total_amount, 
-        purchase_order.amount_paid
-    )
-    
-    # Get or create PaymentStatus and ShippingStatus objects
-    payment_status, _ = PaymentStatus.objects.get_or_create(
-        payment_status=payment_status_name
-    )
-    
-    shipping_status, _ = ShippingStatus.objects.get_or_create(
-        shipping_status=shipping_status_name
-    )
-    
-    # Update the purchase order
-    purchase_order.payment_status = payment_status
-    purchase_order.shipping_status = shipping_status
-    purchase_order.save()
-    
-    return {
-        'payment_status': payment_status_name,
-        'shipping_status': shipping_status_name,
-        'payment_percentage': float((purchase_order.amount_paid / purchase_order.total_amount) * 100),
-        'balance_remaining': float(purchase_order.total_amount - purchase_order.amount_paid)
-    }   
 # ============================================ SALES MODULE VIEWS ======================================================================================
 
 @login_required(login_url='/login/')
@@ -2427,10 +2460,11 @@ def sales_content(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(ReceiptStatus)
 def api_get_receipt_statuses(request):
     """Get all receipt statuses"""
     try:
-        statuses = list(ReceiptStatus.objects.values_list('receipt_status', flat=True).order_by('receipt_status'))
+        statuses = dimension_names(ReceiptStatus)
         return JsonResponse({'success': True, 'data': statuses})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -2465,10 +2499,11 @@ def api_add_receipt_status(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(ShippingStatus)
 def api_get_shipping_statuses_sales(request):
     """Get all shipping statuses"""
     try:
-        statuses = list(ShippingStatus.objects.values_list('shipping_status', flat=True).order_by('shipping_status'))
+        statuses = dimension_names(ShippingStatus)
         return JsonResponse({'success': True, 'data': statuses})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -2478,29 +2513,17 @@ def api_get_shipping_statuses_sales(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_generate_so_id(request):
-    """Generate unique SO ID in format SO00001 and corresponding Invoice Number I00001"""
+    """
+    Preview the next SO ID (format SO00001) and its Invoice Number (I00001) for the form.
+    Both are only reserved when the sales order is saved (see sequences.py).
+    """
     try:
-        max_so = SalesOrder.objects.aggregate(Max('so_id'))['so_id__max']
-        
-        if max_so:
-            num_part = int(max_so[2:]) + 1
-        else:
-            num_part = 1
-        
-        new_so_id = f"SO{num_part:05d}"
-        
-        # Make sure it doesn't exist
-        while SalesOrder.objects.filter(so_id=new_so_id).exists():
-            num_part += 1
-            new_so_id = f"SO{num_part:05d}"
-        
-        # Generate corresponding invoice number
-        invoice_number = f"I{num_part:05d}"
+        num_part = peek_numbers('sales_order')[0]
         
         return JsonResponse({
             'success': True, 
-            'so_id': new_so_id,
-            'invoice_number': invoice_number
+            'so_id': format_id('SO', num_part),
+            'invoice_number': format_id(INVOICE_PREFIX, num_part)
         })
     
     except Exception as e:
@@ -2511,33 +2534,11 @@ def api_generate_so_id(request):
 @login_required(login_url='/login/')
 def api_generate_sales_detail_id(request):
     """
-    Generate unique Detail ID for SALES in format SD00001
-    Each call generates a FRESH unique ID
+    Preview the next Detail ID for SALES in format SD00001
+    The real Detail IDs are reserved in bulk when the sales order is saved
     """
     try:
-        # Always fetch fresh from database
-        max_sales_detail = SalesDetail.objects.aggregate(Max('detail_id'))['detail_id__max']
-        
-        if max_sales_detail:
-            # Extract numeric part (skip 'SD' prefix)
-            num_part = int(max_sales_detail[2:]) + 1
-        else:
-            # First sales detail ever
-            num_part = 1
-        
-        # Format as SD00001
-        new_detail_id = f"SD{num_part:05d}"
-        
-        # Safety check: ensure it doesn't exist
-        attempts = 0
-        while SalesDetail.objects.filter(detail_id=new_detail_id).exists():
-            num_part += 1
-            new_detail_id = f"SD{num_part:05d}"
-            attempts += 1
-            if attempts > 1000:
-                return JsonResponse({'success': False, 'message': 'Could not generate unique Detail ID'}, status=500)
-        
-        print(f"✅ GENERATED SALES DETAIL ID: {new_detail_id} at {time.strftime('%H:%M:%S')}")
+        new_detail_id = peek_id('sales_detail')
         
         return JsonResponse({'success': True, 'detail_id': new_detail_id})
     
@@ -2549,17 +2550,11 @@ def api_generate_sales_detail_id(request):
 @login_required(login_url='/login/')
 def api_get_next_sales_detail_number(request):  
     """
-    Get the next available detail number for Sales
+    Get the next available detail number for Sales (preview only)
     Returns just the number, not the full ID
     """
     try:
-        max_sales_detail = SalesDetail.objects.aggregate(Max('detail_id'))['detail_id__max']
-        
-        if max_sales_detail:
-            # Extract number from SD00007 -> 7, then add 1
-            next_number = int(max_sales_detail[2:]) + 1
-        else:
-            next_number = 1
+        next_number = peek_numbers('sales_detail')[0]
         
         print(f"📊 Next Sales Detail Number: {next_number}")
         return JsonResponse({'success': True, 'next_number': next_number})
@@ -2572,11 +2567,11 @@ def api_get_next_sales_detail_number(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_sales_orders(request):
-    """Get all sales orders with calculated totals"""
+    """Get sales orders with calculated totals (search / filter / sort / cursor paging, see list_queries)"""
     try:
-        sales_orders = SalesOrder.objects.select_related(
+        sales_orders, pagination = list_query('sales_orders', request.GET, SalesOrder.objects.select_related(
             'customer_id', 'county', 'town', 'receipt_status', 'shipping_status'
-        ).all().order_by('-date')
+        ))
         
         so_list = []
         for so in sales_orders:
@@ -2598,8 +2593,13 @@ def api_get_sales_orders(request):
                 'shipping_status': so.shipping_status.shipping_status if so.shipping_status else ''
             })
         
-        return JsonResponse({'success': True, 'data': so_list})
+        response = {'success': True, 'data': so_list}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
     
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
@@ -2685,18 +2685,16 @@ def api_add_sales_order(request):
     try:
         data = json.loads(request.body)
         
-        # Extract SO header data
-        so_id = data.get('so_id', '').strip()
+        # Extract SO header data (SO ID, invoice number and detail IDs are assigned from the ID sequences on save)
         date_str = data.get('date', '').strip()
         customer_id = data.get('customer_id', '').strip()
         customer_name = data.get('customer_name', '').strip()
         county_name = data.get('county', '').strip()
         town_name = data.get('town', '').strip()
-        invoice_number = data.get('invoice_number', '').strip()
         items = data.get('items', [])
         
         # Validation
-        if not all([so_id, date_str, customer_name, invoice_number]):
+        if not all([date_str, customer_name]):
             return JsonResponse({
                 'success': False, 
                 'message': 'All SO header fields are required'
@@ -2716,28 +2714,33 @@ def api_add_sales_order(request):
                 'message': 'Invalid date format. Use DD/MM/YYYY'
             }, status=400)
         
-        # Check if SO already exists
-        if SalesOrder.objects.filter(so_id=so_id).exists():
-            return JsonResponse({
-                'success': False, 
-                'message': 'Sales Order ID already exists'
-            }, status=400)
-        
         # Get foreign key objects
         try:
             customer = Customer.objects.get(customer_id=customer_id)
-            county = County.objects.get(county=county_name) if county_name else None
-            town = Town.objects.get(town=town_name) if town_name else None
+            county = dimension_row(County, county_name) if county_name else None
+            town = dimension_row(Town, town_name) if town_name else None
         except (Customer.DoesNotExist, County.DoesNotExist, Town.DoesNotExist) as e:
             return JsonResponse({
                 'success': False, 
                 'message': f'Invalid reference: {str(e)}'
             }, status=400)
         
+        # Line totals are recalculated on the server; the client's must agree
+        try:
+            line_totals = checked_line_totals(SalesDetail, items)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        
         # Start transaction
         with transaction.atomic():
+            # Reserve the SO number (invoice number shares it) and one detail ID per line
+            so_number = next_numbers('sales_order')[0]
+            so_id = format_id('SO', so_number)
+            invoice_number = format_id(INVOICE_PREFIX, so_number)
+            detail_ids = next_ids('sales_detail', len(items))
+            
             # Calculate total amount
-            total_amount = sum(Decimal(str(item['total_sales_price'])) for item in items)
+            total_amount = sum(line_totals).quantize(Decimal('0.01'))
             
             # Create Sales Order
             sales_order = SalesOrder.objects.create(
@@ -2754,28 +2757,25 @@ def api_add_sales_order(request):
                 shipping_status=None  # Will be set by update_sales_order_statuses
             )
             
-            # Create Sales Details and update inventory
+            # Create Sales Details in bulk and update inventory with one UPDATE.
+            # The item rows are locked first so two tills cannot both sell the last units.
+            inventory_items = load_order_items(items, lock=True)
+            
+            qty_by_item = {}
             for item_data in items:
+                qty_by_item[item_data['item_id']] = qty_by_item.get(item_data['item_id'], 0) + item_data['quantity_sold']
+            
+            # Check if sufficient stock exists (per item, summed over all lines of the order)
+            check_stock(inventory_items, 'quantity_sold', qty_by_item)
+            
+            sales_details = []
+            for detail_id, item_data in zip(detail_ids, items):
                 detail_date = parse_date(item_data['date'])
                 if not detail_date:
                     detail_date = so_date
                 
-                # Get inventory item
-                try:
-                    inventory_item = Inventory.objects.get(item_id=item_data['item_id'])
-                except Inventory.DoesNotExist:
-                    raise Exception(f"Inventory item {item_data['item_id']} not found")
-                
-                # Check if sufficient stock exists
-                qty_to_sell = item_data['quantity_sold']
-                available_qty = inventory_item.quantity_purchased - inventory_item.quantity_sold
-                
-                if qty_to_sell > available_qty:
-                    raise Exception(f"Insufficient stock for {item_data['item_name']}. Available: {available_qty}, Requested: {qty_to_sell}")
-                
-                # Create sales detail
-                SalesDetail.objects.create(
-                    detail_id=item_data['detail_id'],
+                sales_details.append(SalesDetail(
+                    detail_id=detail_id,
                     so_id=sales_order,
                     date=detail_date,
                     customer_id=customer,
@@ -2783,23 +2783,26 @@ def api_add_sales_order(request):
                     county=county,
                     town=town,
                     invoice_number=invoice_number,
-                    item_id=inventory_item,
+                    item_id=inventory_items[item_data['item_id']],
                     item_type=item_data['item_type'],
                     item_category=item_data['item_category'],
                     item_subcategory=item_data['item_subcategory'],
                     item_name=item_data['item_name'],
-                    quantity_sold=qty_to_sell,
+                    quantity_sold=item_data['quantity_sold'],
                     unit_price=Decimal(str(item_data['unit_price'])),
                     tax_rate=Decimal(str(item_data['tax_rate']))
-                )
-                
-                # Update inventory quantities (DECREASE quantity_sold)
-                inventory_item.quantity_sold += qty_to_sell
-                inventory_item.save()  # This will trigger reorder check
+                ))
+            
+            for detail in sales_details:
+                detail.calculate_amounts()                                   # bulk_create() DOES NOT CALL save()
+            SalesDetail.objects.bulk_create(sales_details)
+            apply_rollup_changes(line_contributions(sales_details))
+            
+            # Update inventory quantities (INCREASE quantity_sold, which decreases what remains)
+            apply_inventory_deltas('quantity_sold', qty_by_item)
             
             # Update customer total sales
-            customer.total_sales += total_amount
-            customer.save()
+            post_balance(customer, total=total_amount)
             
             # AUTOMATICALLY SET RECEIPT AND SHIPPING STATUS 
             status_info = update_sales_order_statuses(sales_order)
@@ -2807,127 +2810,19 @@ def api_add_sales_order(request):
         return JsonResponse({
             'success': True, 
             'message': 'Sales Order created successfully',
+            'so_id': so_id,
+            'invoice_number': invoice_number,
+            'detail_ids': detail_ids,
             'status_info': status_info
         })
     
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
+    except InsufficientStock as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
-# ============================ CALCULATING THE RECEIPT STATUS IN THE SALES ORDER ===============================================================================
-@csrf_exempt
-@login_required(login_url='/login/')
-def calculate_receipt_status(total_amount, amount_received):
-    """
-    Calculate receipt status based on payment percentage
-    
-    Args:
-        total_amount (Decimal): Total amount of the sales order
-        amount_received (Decimal): Amount already received
-    
-    Returns:
-        str: Receipt status ('PENDING', 'PARTIAL PAYMENT', 'COMPLETED')
-    """
-    total_amount = Decimal(str(total_amount))
-    amount_received = Decimal(str(amount_received))
-    
-    # If no payment received
-    if amount_received == Decimal('0.00'):
-        return 'PENDING'
-    
-    # If fully paid
-    elif amount_received >= total_amount:
-        return 'COMPLETED'
-    
-    # If partially paid
-    else:
-        return 'PARTIAL PAYMENT'
-    
-# ============================ CALCULATING THE SHIPPING STATUS IN THE SALES ORDER ================================================================================
-def calculate_sales_shipping_status(total_amount, amount_received):
-    """
-    Calculate shipping status based on payment percentage
-    
-    Payment Percentage -> Shipping Status:
-    - 0% -> PENDING
-    - 1%-49% -> PROCESSING
-    - 50%-74% -> DISPATCHED
-    - 75%-99% -> IN TRANSIT
-    - 100% -> DELIVERED
-    
-    Args:
-        total_amount (Decimal): Total amount of the sales order
-        amount_received (Decimal): Amount already received
-    
-    Returns:
-        str: Shipping status
-    """
-    total_amount = Decimal(str(total_amount))
-    amount_received = Decimal(str(amount_received))
-    
-    # If no payment received
-    if amount_received == Decimal('0.00'):
-        return 'PENDING'
-    
-    # Calculate payment percentage
-    payment_percentage = (amount_received / total_amount) * 100
-    
-    # Determine shipping status based on percentage
-    if payment_percentage >= 100:
-        return 'DELIVERED'
-    elif payment_percentage >= 75:
-        return 'IN TRANSIT'
-    elif payment_percentage >= 50:
-        return 'DISPATCHED'
-    elif payment_percentage >= 1:
-        return 'PROCESSING'
-    else:
-        return 'PENDING'
-
-
-def update_sales_order_statuses(sales_order):
-    """
-    Update both receipt and shipping status for a sales order
-    
-    Args:
-        sales_order: SalesOrder instance
-    
-    Returns:
-        dict: Updated status information
-    """
-    # Calculate status names
-    receipt_status_name = calculate_receipt_status(
-        sales_order.total_amount, 
-        sales_order.amount_received
-    )
-    
-    shipping_status_name = calculate_sales_shipping_status(
-        sales_order.total_amount, 
-        sales_order.amount_received
-    )
-    
-    # Get or create ReceiptStatus and ShippingStatus objects
-    receipt_status, _ = ReceiptStatus.objects.get_or_create(
-        receipt_status=receipt_status_name
-    )
-    
-    shipping_status, _ = ShippingStatus.objects.get_or_create(
-        shipping_status=shipping_status_name
-    )
-    
-    # Update the sales order
-    sales_order.receipt_status = receipt_status
-    sales_order.shipping_status = shipping_status
-    sales_order.save()
-    
-    return {
-        'receipt_status': receipt_status_name,
-        'shipping_status': shipping_status_name,
-        'payment_percentage': float((sales_order.amount_received / sales_order.total_amount) * 100) if sales_order.total_amount > 0 else 0,
-        'balance_remaining': float(sales_order.total_amount - sales_order.amount_received)
-    }
-    
 # ================================== UPDATING THE SALES ORDER ==============================================================================================================================    
 @csrf_exempt
 @login_required(login_url='/login/')
@@ -2951,27 +2846,38 @@ def api_update_sales_order(request):
         except SalesOrder.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Sales order not found'}, status=404)
         
+        try:
+            line_totals = checked_line_totals(SalesDetail, items)
+        except ValueError as e:
+            return JsonResponse({'success': False, 'message': str(e)}, status=400)
+        
         with transaction.atomic():
             # Get existing details to calculate old quantities
             existing_details = {d.detail_id: d for d in SalesDetail.objects.filter(so_id=sales_order)}
             
+            # Lock every item the order touches (before and after the edit), in item_id order
+            inventory_items = load_order_items(
+                items, lock=True, item_ids=[d.item_id_id for d in existing_details.values()]
+            )
+            qty_by_item = {}
+            
             # Process each item
             new_total = Decimal('0.00')
             processed_details = set()
+            rollup_changes = []
             
-            for item_data in items:
+            for item_data, total_price in zip(items, line_totals):
                 detail_id = item_data['detail_id']
                 processed_details.add(detail_id)
                 
                 new_qty = item_data['quantity_sold']
-                total_price = Decimal(str(item_data['total_sales_price']))
                 new_total += total_price
                 
                 if detail_id in existing_details:
                     # Update existing detail
                     detail = existing_details[detail_id]
                     old_qty = detail.quantity_sold
-                    qty_diff = new_qty - old_qty
+                    rollup_changes += line_contributions([detail], sign=-1)
                     
                     # Update detail
                     detail.quantity_sold = new_qty
@@ -2982,34 +2888,31 @@ def api_update_sales_order(request):
                     detail.item_subcategory = item_data['item_subcategory']
                     detail.item_name = item_data['item_name']
                     
-                    # Update item_id if changed
-                    new_item = Inventory.objects.get(item_id=item_data['item_id'])
-                    if detail.item_id != new_item:
-                        # Reverse old item quantity (add back)
-                        detail.item_id.quantity_sold -= old_qty
-                        detail.item_id.save()
-                        
-                        # Deduct from new item
-                        new_item.quantity_sold += new_qty
-                        new_item.save()
-                        
-                        detail.item_id = new_item
-                    else:
-                        # Same item, adjust quantity
-                        detail.item_id.quantity_sold += qty_diff
-                        detail.item_id.save()
+                    # Return the old quantity to the old item and take the new one from the (possibly new) item
+                    qty_by_item[detail.item_id_id] = qty_by_item.get(detail.item_id_id, 0) - old_qty
+                    qty_by_item[item_data['item_id']] = qty_by_item.get(item_data['item_id'], 0) + new_qty
+                    if detail.item_id_id != item_data['item_id']:
+                        detail.item_id = inventory_items[item_data['item_id']]
+                        detail.unit_cost = None                              # COSTED AT THE NEW ITEM'S PRICE ON SAVE
                     
                     detail.save()
+                    rollup_changes += line_contributions([detail])
             
             # Handle deleted items (items in DB but not in update)
             for detail_id, detail in existing_details.items():
                 if detail_id not in processed_details:
                     # This item was deleted - reverse inventory (add back)
-                    detail.item_id.quantity_sold -= detail.quantity_sold
-                    detail.item_id.save()
+                    qty_by_item[detail.item_id_id] = qty_by_item.get(detail.item_id_id, 0) - detail.quantity_sold
+                    rollup_changes += line_contributions([detail], sign=-1)
                     detail.delete()
             
+            # Raising a quantity or moving a line to another item must not oversell
+            check_stock(inventory_items, 'quantity_sold', qty_by_item)
+            apply_inventory_deltas('quantity_sold', qty_by_item)
+            apply_rollup_changes(rollup_changes)
+            
             # Update SO total
+            new_total = new_total.quantize(Decimal('0.01'))
             old_total = sales_order.total_amount
             total_diff = new_total - old_total
             
@@ -3017,9 +2920,7 @@ def api_update_sales_order(request):
             sales_order.save()
             
             # Update customer total sales
-            customer = sales_order.customer_id
-            customer.total_sales += total_diff
-            customer.save()
+            post_balance(sales_order.customer_id, total=total_diff)
             
             # *** UPDATE STATUSES ***
             status_info = update_sales_order_statuses(sales_order)
@@ -3032,6 +2933,8 @@ def api_update_sales_order(request):
     
     except json.JSONDecodeError:
         return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
+    except InsufficientStock as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
@@ -3056,22 +2959,20 @@ def api_delete_sales_detail(request):
             return JsonResponse({'success': False, 'message': 'Sales detail not found'}, status=404)
         
         with transaction.atomic():
-            # Reverse inventory quantity (add back)
-            inventory_item = detail.item_id
-            inventory_item.quantity_sold -= detail.quantity_sold
-            inventory_item.save()
+            # Reverse inventory quantity (add back); one UPDATE, so concurrent sales of the item are kept
+            apply_inventory_deltas('quantity_sold', {detail.item_id_id: -detail.quantity_sold})
             
-            # Update SO total
+            # Update SO total (kept to the cent, as when the order was saved)
             so = detail.so_id
-            so.total_amount -= detail.total_sales_price
+            old_total = so.total_amount
+            so.total_amount = (so.total_amount - detail.total_sales_price).quantize(Decimal('0.01'))
             so.save()
             
             # Update customer total
-            customer = detail.customer_id
-            customer.total_sales -= detail.total_sales_price
-            customer.save()
+            post_balance(detail.customer_id, total=so.total_amount - old_total)
             
             # Delete detail
+            apply_rollup_changes(line_contributions([detail], sign=-1))
             detail.delete()
         
         return JsonResponse({
@@ -3102,11 +3003,10 @@ def api_record_payment(request):
         po_id = data.get('po_id', '').strip()
         payment_amount = Decimal(str(data.get('payment_amount', 0)))
         payment_mode = data.get('payment_mode', '').strip()
-        transaction_id = data.get('transaction_id', '').strip()
         payment_date_str = data.get('payment_date', '').strip()
         
         # Validation
-        if not all([po_id, payment_amount, payment_mode, transaction_id]):
+        if not all([po_id, payment_amount, payment_mode]):
             return JsonResponse({
                 'success': False, 
                 'message': 'All payment fields are required'
@@ -3145,7 +3045,10 @@ def api_record_payment(request):
         
         with transaction.atomic():
             # Get payment mode object
-            pmt_mode, _ = PaymentMode.objects.get_or_create(payment_mode=payment_mode)
+            pmt_mode = get_or_create_dimension_row(PaymentMode, payment_mode)
+            
+            # Transaction ID is reserved from the ID sequence inside this transaction
+            transaction_id = next_id('payment')
             
             # Create payment record
             Payment.objects.create(
@@ -3166,9 +3069,7 @@ def api_record_payment(request):
             purchase_order.save()
             
             # Update supplier total_payments
-            supplier = purchase_order.supplier_id
-            supplier.total_payments += payment_amount
-            supplier.save()
+            post_balance(purchase_order.supplier_id, payments=payment_amount)
             
             # AUTOMATICALLY UPDATE PAYMENT AND SHIPPING STATUS
             status_info = update_purchase_order_statuses(purchase_order)
@@ -3176,6 +3077,7 @@ def api_record_payment(request):
         return JsonResponse({
             'success': True, 
             'message': 'Payment recorded successfully',
+            'transaction_id': transaction_id,
             'status_info': status_info,
             'new_balance': float(purchase_order.total_amount - purchase_order.amount_paid)
         })
@@ -3194,20 +3096,36 @@ def api_record_payment(request):
 @login_required(login_url='/login/')
 def api_recalculate_all_po_statuses(request):
     """
-    Recalculate statuses for all purchase orders
+    Recalculate statuses for all purchase orders (one set-based UPDATE, see statuses.py)
     Useful for one-time migration or fixing data inconsistencies
     """
     try:
-        purchase_orders = PurchaseOrder.objects.all()
-        updated_count = 0
+        updated_count = recalculate_purchase_order_statuses()
         
-        for po in purchase_orders:
-            update_purchase_order_statuses(po)
-            updated_count += 1
+        return JsonResponse({
+            'success': True,
+            'message': f'Successfully updated statuses for {updated_count} purchase orders',
+            'updated': updated_count
+        })
+    
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_recalculate_all_so_statuses(request):
+    """
+    Recalculate statuses for all sales orders (one set-based UPDATE, see statuses.py)
+    Useful for one-time migration or fixing data inconsistencies
+    """
+    try:
+        updated_count = recalculate_sales_order_statuses()
         
         return JsonResponse({
             'success': True,
-            'message': f'Successfully updated statuses for {updated_count} purchase orders'
+            'message': f'Successfully updated statuses for {updated_count} sales orders',
+            'updated': updated_count
         })
     
     except Exception as e:
@@ -3230,10 +3148,11 @@ def payments_content(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@dimension_endpoint(PaymentMode)
 def api_get_payment_modes(request):
     """Get all payment modes"""
     try:
-        modes = list(PaymentMode.objects.values_list('payment_mode', flat=True).order_by('payment_mode'))
+        modes = dimension_names(PaymentMode)
         return JsonResponse({'success': True, 'data': modes})
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
@@ -3273,22 +3192,9 @@ def api_add_payment_mode(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_generate_transaction_id(request):
-    """Generate unique Transaction ID in format TRANSPAY00001"""
+    """Preview the next payment Transaction ID (format TRANSPAY00001); reserved when the payment is saved"""
     try:
-        max_payment = Payment.objects.aggregate(Max('transaction_id'))['transaction_id__max']
-        
-        if max_payment:
-            # Extract numeric part from TRANSPAY00001
-            num_part = int(max_payment[8:]) + 1
-        else:
-            num_part = 1
-        
-        new_id = f"TRANSPAY{num_part:05d}"
-        
-        # Safety check
-        while Payment.objects.filter(transaction_id=new_id).exists():
-            num_part += 1
-            new_id = f"TRANSPAY{num_part:05d}"
+        new_id = peek_id('payment')
         
         return JsonResponse({'success': True, 'transaction_id': new_id})
     
@@ -3303,11 +3209,11 @@ def api_generate_transaction_id(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_payments(request):
-    """Get all payments with full details"""
+    """Get payments with full details (search / filter / sort / cursor paging, see list_queries)"""
     try:
-        payments = Payment.objects.select_related(
+        payments, pagination = list_query('payments', request.GET, Payment.objects.select_related(
             'supplier_id', 'county', 'town', 'po_id', 'payment_mode'
-        ).all().order_by('-date')
+        ))
         
         payments_list = []
         for payment in payments:
@@ -3327,82 +3233,17 @@ def api_get_payments(request):
                 'amount_paid': float(payment.amount_paid)
             })
         
-        return JsonResponse({'success': True, 'data': payments_list})
+        response = {'success': True, 'data': payments_list}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
     
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
-# ============================================
-# HELPER: Calculate and Update PO Statuses
-# ============================================
-
-def update_purchase_order_statuses(purchase_order):
-    """
-    Update both payment and shipping status for a purchase order
-    
-    Payment Status Rules:
-    - 0% paid -> PENDING
-    - 1-99% paid -> PARTIAL PAYMENT
-    - 100% paid -> COMPLETED
-    
-    Shipping Status Rules:
-    - 0% paid -> PENDING
-    - 1-49% paid -> PROCESSING
-    - 50-74% paid -> DISPATCHED
-    - 75-99% paid -> IN TRANSIT
-    - 100% paid -> DELIVERED
-    """
-    total_amount = Decimal(str(purchase_order.total_amount))
-    amount_paid = Decimal(str(purchase_order.amount_paid))
-    
-    # Calculate payment percentage
-    if total_amount > 0:
-        payment_percentage = (amount_paid / total_amount) * 100
-    else:
-        payment_percentage = 0
-    
-    # Determine Payment Status
-    if amount_paid == Decimal('0.00'):
-        payment_status_name = 'PENDING'
-    elif amount_paid >= total_amount:
-        payment_status_name = 'COMPLETED'
-    else:
-        payment_status_name = 'PARTIAL PAYMENT'
-    
-    # Determine Shipping Status
-    if payment_percentage == 0:
-        shipping_status_name = 'PENDING'
-    elif payment_percentage >= 100:
-        shipping_status_name = 'DELIVERED'
-    elif payment_percentage >= 75:
-        shipping_status_name = 'IN TRANSIT'
-    elif payment_percentage >= 50:
-        shipping_status_name = 'DISPATCHED'
-    else:
-        shipping_status_name = 'PROCESSING'
-    
-    # Get or create status objects
-    payment_status, _ = PaymentStatus.objects.get_or_create(
-        payment_status=payment_status_name
-    )
-    shipping_status, _ = ShippingStatus.objects.get_or_create(
-        shipping_status=shipping_status_name
-    )
-    
-    # Update purchase order
-    purchase_order.payment_status = payment_status
-    purchase_order.shipping_status = shipping_status
-    purchase_order.save()
-    
-    return {
-        'payment_status': payment_status_name,
-        'shipping_status': shipping_status_name,
-        'payment_percentage': float(payment_percentage),
-        'balance_remaining': float(total_amount - amount_paid)
-    }
-
-
 # ============================================
 # PARSE DATE HELPER
 # ============================================
@@ -3432,7 +3273,6 @@ def api_add_payment(request):
         data = json.loads(request.body)
         
         # Extract payment data
-        transaction_id = data.get('transaction_id', '').strip()
         payment_date_str = data.get('payment_date', '').strip()
         supplier_id = data.get('supplier_id', '').strip()
         supplier_name = data.get('supplier_name', '').strip()
@@ -3444,7 +3284,7 @@ def api_add_payment(request):
         amount_paid = Decimal(str(data.get('amount_paid', 0)))
         
         # Validation
-        if not all([transaction_id, payment_date_str, supplier_name, po_id, payment_mode_name]):
+        if not all([payment_date_str, supplier_name, po_id, payment_mode_name]):
             return JsonResponse({
                 'success': False, 
                 'message': 'All required fields must be filled'
@@ -3456,13 +3296,6 @@ def api_add_payment(request):
                 'message': 'Payment amount must be greater than zero'
             }, status=400)
         
-        # Check if transaction ID already exists
-        if Payment.objects.filter(transaction_id=transaction_id).exists():
-            return JsonResponse({
-                'success': False, 
-                'message': 'Transaction ID already exists'
-            }, status=400)
-        
         # Parse payment date
         payment_date = parse_date(payment_date_str)
         if not payment_date:
@@ -3475,9 +3308,9 @@ def api_add_payment(request):
         try:
             supplier = Supplier.objects.get(supplier_id=supplier_id)
             purchase_order = PurchaseOrder.objects.get(po_id=po_id)
-            payment_mode, _ = PaymentMode.objects.get_or_create(payment_mode=payment_mode_name)
-            county = County.objects.get(county=county_name) if county_name else None
-            town = Town.objects.get(town=town_name) if town_name else None
+            payment_mode = get_or_create_dimension_row(PaymentMode, payment_mode_name)
+            county = dimension_row(County, county_name) if county_name else None
+            town = dimension_row(Town, town_name) if town_name else None
         except (Supplier.DoesNotExist, PurchaseOrder.DoesNotExist) as e:
             return JsonResponse({
                 'success': False, 
@@ -3494,6 +3327,9 @@ def api_add_payment(request):
         
         # Start transaction
         with transaction.atomic():
+            # Transaction ID is reserved from the ID sequence inside this transaction
+            transaction_id = next_id('payment')
+            
             # Create payment record
             Payment.objects.create(
                 transaction_id=transaction_id,
@@ -3513,8 +3349,7 @@ def api_add_payment(request):
             purchase_order.save()
             
             # Update supplier total_payments
-            supplier.total_payments += amount_paid
-            supplier.save()
+            post_balance(supplier, payments=amount_paid)
             
             # Update PO statuses
             status_info = update_purchase_order_statuses(purchase_order)
@@ -3522,6 +3357,7 @@ def api_add_payment(request):
         return JsonResponse({
             'success': True, 
             'message': 'Payment recorded successfully',
+            'transaction_id': transaction_id,
             'status_info': status_info
         })
     
@@ -3554,7 +3390,6 @@ def api_update_payment(request):
         transaction_id = data.get('transaction_id', '').strip()
         original_transaction_id = data.get('original_transaction_id', '').strip()
         original_po_id = data.get('original_po_id', '').strip()
-        original_amount_paid = Decimal(str(data.get('original_amount_paid', 0)))
         
         payment_date_str = data.get('payment_date', '').strip()
         supplier_id = data.get('supplier_id', '').strip()
@@ -3571,6 +3406,7 @@ def api_update_payment(request):
             payment = Payment.objects.get(transaction_id=original_transaction_id)
         except Payment.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Payment not found'}, status=404)
+        original_amount_paid = payment.amount_paid                          # REVERSE WHAT WAS POSTED, NOT WHAT THE CLIENT SENDS
         
         # Parse date
         payment_date = parse_date(payment_date_str)
@@ -3585,9 +3421,9 @@ def api_update_payment(request):
             supplier = Supplier.objects.get(supplier_id=supplier_id)
             new_purchase_order = PurchaseOrder.objects.get(po_id=po_id)
             old_purchase_order = PurchaseOrder.objects.get(po_id=original_po_id)
-            payment_mode, _ = PaymentMode.objects.get_or_create(payment_mode=payment_mode_name)
-            county = County.objects.get(county=county_name) if county_name else None
-            town = Town.objects.get(town=town_name) if town_name else None
+            payment_mode = get_or_create_dimension_row(PaymentMode, payment_mode_name)
+            county = dimension_row(County, county_name) if county_name else None
+            town = dimension_row(Town, town_name) if town_name else None
         except (Supplier.DoesNotExist, PurchaseOrder.DoesNotExist) as e:
             return JsonResponse({
                 'success': False, 
@@ -3601,9 +3437,7 @@ def api_update_payment(request):
             
             # Reverse from supplier if supplier changed
             if payment.supplier_id.supplier_id != supplier_id:
-                old_supplier = payment.supplier_id
-                old_supplier.total_payments -= original_amount_paid
-                old_supplier.save()
+                post_balance(payment.supplier_id, payments=-original_amount_paid)
             
             # Apply new payment to new PO
             new_purchase_order.amount_paid += amount_paid
@@ -3611,12 +3445,10 @@ def api_update_payment(request):
             
             # Update supplier total_payments
             if payment.supplier_id.supplier_id != supplier_id:
-                supplier.total_payments += amount_paid
-                supplier.save()
+                post_balance(supplier, payments=amount_paid)
             else:
                 # Same supplier, adjust by difference
-                supplier.total_payments += (amount_paid - original_amount_paid)
-                supplier.save()
+                post_balance(supplier, payments=amount_paid - original_amount_paid)
             
             # Update payment record
             payment.transaction_id = transaction_id
@@ -3682,9 +3514,7 @@ def api_delete_payment(request):
             purchase_order.save()
             
             # Reverse from supplier
-            supplier = payment.supplier_id
-            supplier.total_payments -= payment.amount_paid
-            supplier.save()
+            post_balance(payment.supplier_id, payments=-payment.amount_paid)
             
             # Update PO statuses
             status_info = update_purchase_order_statuses(purchase_order)
@@ -3706,20 +3536,9 @@ def api_delete_payment(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_generate_receipt_transaction_id(request):
-    """Generate unique Transaction ID in format TRANSAL00001"""
+    """Preview the next receipt Transaction ID (format TRANSAL00001); reserved when the receipt is saved"""
     try:
-        max_receipt = Receipt.objects.aggregate(Max('transaction_id'))['transaction_id__max']
-        
-        if max_receipt:
-            num_part = int(max_receipt[7:]) + 1
-        else:
-            num_part = 1
-        
-        new_id = f"TRANSAL{num_part:05d}"
-        
-        while Receipt.objects.filter(transaction_id=new_id).exists():
-            num_part += 1
-            new_id = f"TRANSAL{num_part:05d}"
+        new_id = peek_id('receipt')
         
         return JsonResponse({'success': True, 'transaction_id': new_id})
     except Exception as e:
@@ -3730,35 +3549,24 @@ def api_generate_receipt_transaction_id(request):
 @login_required(login_url='/login/')
 def api_test_detail_id_generation(request):
     """
-    Test endpoint to generate 10 sequential Detail IDs
-    Call this to verify the generation is working correctly
+    Test endpoint to preview the next 10 sequential Detail IDs
+    Nothing is reserved; real IDs are assigned from the ID sequence when an order is saved
     
     Usage: GET /api/purchases/test-detail-id-generation/
     """
     try:
         results = []
         
-        for i in range(10):
-            # Call the actual generation function
-            response = api_generate_detail_id(request)
-            data = response.content.decode('utf-8')
-            
-            import json
-            result = json.loads(data)
-            
-            if result.get('success'):
-                results.append({
-                    'attempt': i + 1,
-                    'detail_id': result.get('detail_id'),
-                    'timestamp': time.strftime('%H:%M:%S.%f')[:-3]
-                })
-            
-            # Small delay to ensure sequential generation
-            time.sleep(0.1)
+        for i, num_part in enumerate(peek_numbers('purchase_detail', 10)):
+            results.append({
+                'attempt': i + 1,
+                'detail_id': format_id('PD', num_part),
+                'timestamp': time.strftime('%H:%M:%S')
+            })
         
         return JsonResponse({
             'success': True,
-            'message': 'Generated 10 sequential Detail IDs',
+            'message': 'Previewed the next 10 sequential Detail IDs',
             'results': results
         })
     
@@ -3768,11 +3576,11 @@ def api_test_detail_id_generation(request):
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_get_receipts(request):
-    """Get all receipts with full details"""
+    """Get receipts with full details (search / filter / sort / cursor paging, see list_queries)"""
     try:
-        receipts = Receipt.objects.select_related(
+        receipts, pagination = list_query('receipts', request.GET, Receipt.objects.select_related(
             'customer_id', 'county', 'town', 'so_id', 'payment_mode'
-        ).all().order_by('-date')
+        ))
         
         receipts_list = []
         for receipt in receipts:
@@ -3792,81 +3600,17 @@ def api_get_receipts(request):
                 'amount_received': float(receipt.amount_received)
             })
         
-        return JsonResponse({'success': True, 'data': receipts_list})
+        response = {'success': True, 'data': receipts_list}
+        if pagination:
+            response['pagination'] = pagination
+        return JsonResponse(response)
     
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
-# ============================================
-# HELPER: Calculate and Update SO Statuses
-# ============================================
-
-def update_sales_order_statuses(sales_order):
-    """
-    Update both payment and shipping status for a sales order
-    
-    Receipt Status Rules:
-    - 0% paid -> PENDING
-    - 1-99% paid -> PARTIAL PAYMENT
-    - 100% paid -> COMPLETED
-    
-    Shipping Status Rules:
-    - 0% paid -> PENDING
-    - 1-49% paid -> PROCESSING
-    - 50-74% paid -> DISPATCHED
-    - 75-99% paid -> IN TRANSIT
-    - 100% paid -> DELIVERED
-    """
-    total_amount = Decimal(str(sales_order.total_amount))
-    amount_received = Decimal(str(sales_order.amount_received))
-    
-    # Calculate payment percentage
-    if total_amount > 0:
-        payment_percentage = (amount_received / total_amount) * 100
-    else:
-        payment_percentage = 0
-    
-    # Determine Payment Status
-    if amount_received == Decimal('0.00'):
-        receipt_status_name = 'PENDING'
-    elif amount_received >= total_amount:
-        receipt_status_name = 'COMPLETED'
-    else:
-        receipt_status_name = 'PARTIAL PAYMENT'
-    
-    # Determine Shipping Status
-    if payment_percentage == 0:
-        shipping_status_name = 'PENDING'
-    elif payment_percentage >= 100:
-        shipping_status_name = 'DELIVERED'
-    elif payment_percentage >= 75:
-        shipping_status_name = 'IN TRANSIT'
-    elif payment_percentage >= 50:
-        shipping_status_name = 'DISPATCHED'
-    else:
-        shipping_status_name = 'PROCESSING'
-    
-    # Get or create status objects
-    receipt_status, _ = ReceiptStatus.objects.get_or_create(
-        receipt_status=receipt_status_name
-    )
-    shipping_status, _ = ShippingStatus.objects.get_or_create(
-        shipping_status=shipping_status_name
-    )
-    
-    # Update sales order
-    sales_order.receipt_status = receipt_status
-    sales_order.shipping_status = shipping_status
-    sales_order.save()
-    
-    return {
-        'receipt_status': receipt_status_name,
-        'shipping_status': shipping_status_name,
-        'payment_percentage': float(payment_percentage),
-        'balance_remaining': float(total_amount - amount_received)
-    }
-
 # ============================================
 # ADD NEW RECEIPT
 # ============================================
@@ -3884,7 +3628,6 @@ def api_add_receipt(request):
         data = json.loads(request.body)
         
         # Extract receipt data
-        transaction_id = data.get('transaction_id', '').strip()
         receipt_date_str = data.get('receipt_date', '').strip()
         customer_id = data.get('customer_id', '').strip()
         customer_name = data.get('customer_name', '').strip()
@@ -3896,7 +3639,7 @@ def api_add_receipt(request):
         amount_received = Decimal(str(data.get('amount_received', 0)))
         
         # Validation
-        if not all([transaction_id, receipt_date_str, customer_name, so_id, payment_mode_name]):
+        if not all([receipt_date_str, customer_name, so_id, payment_mode_name]):
             return JsonResponse({
                 'success': False, 
                 'message': 'All required fields must be filled'
@@ -3908,13 +3651,6 @@ def api_add_receipt(request):
                 'message': 'Payment amount must be greater than zero'
             }, status=400)
         
-        # Check if transaction ID already exists
-        if Receipt.objects.filter(transaction_id=transaction_id).exists():
-            return JsonResponse({
-                'success': False, 
-                'message': 'Transaction ID already exists'
-            }, status=400)
-        
         # Parse receipt date
         receipt_date = parse_date(receipt_date_str)
         if not receipt_date:
@@ -3927,9 +3663,9 @@ def api_add_receipt(request):
         try:
             customer = Customer.objects.get(customer_id=customer_id)
             sales_order = SalesOrder.objects.get(so_id=so_id)
-            payment_mode, _ = PaymentMode.objects.get_or_create(payment_mode=payment_mode_name)
-            county = County.objects.get(county=county_name) if county_name else None
-            town = Town.objects.get(town=town_name) if town_name else None
+            payment_mode = get_or_create_dimension_row(PaymentMode, payment_mode_name)
+            county = dimension_row(County, county_name) if county_name else None
+            town = dimension_row(Town, town_name) if town_name else None
         except (Customer.DoesNotExist, SalesOrder.DoesNotExist) as e:
             return JsonResponse({
                 'success': False, 
@@ -3946,6 +3682,9 @@ def api_add_receipt(request):
         
         # Start transaction
         with transaction.atomic():
+            # Transaction ID is reserved from the ID sequence inside this transaction
+            transaction_id = next_id('receipt')
+            
             # Create receipt record
             Receipt.objects.create(
                 transaction_id=transaction_id,
@@ -3965,8 +3704,7 @@ def api_add_receipt(request):
             sales_order.save()
             
             # Update customer total_payments
-            customer.total_payments += amount_received
-            customer.save()
+            post_balance(customer, payments=amount_received)
             
             # *** UPDATE SO STATUSES ***
             status_info = update_sales_order_statuses(sales_order)
@@ -3974,6 +3712,7 @@ def api_add_receipt(request):
         return JsonResponse({
             'success': True, 
             'message': 'Receipt recorded successfully',
+            'transaction_id': transaction_id,
             'status_info': status_info
         })
     
@@ -4015,9 +3754,7 @@ def api_delete_receipt(request):
             sales_order.save()
             
             # Reverse from customer
-            customer = receipt.customer_id
-            customer.total_payments -= receipt.amount_received
-            customer.save()
+            post_balance(receipt.customer_id, payments=-receipt.amount_received)
             
             # Update SO statuses
             status_info = update_sales_order_statuses(sales_order)
@@ -4062,7 +3799,6 @@ def api_update_receipt(request):
         transaction_id = data.get('transaction_id', '').strip()
         original_transaction_id = data.get('original_transaction_id', '').strip()
         original_so_id = data.get('original_so_id', '').strip()
-        original_amount_received = Decimal(str(data.get('original_amount_received ', 0)))
         
         receipt_date_str = data.get('receipt_date', '').strip()
         customer_id = data.get('customer_id', '').strip()
@@ -4079,6 +3815,7 @@ def api_update_receipt(request):
             receipt = Receipt.objects.get(transaction_id=original_transaction_id)
         except Receipt.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Receipt not found'}, status=404)
+        original_amount_received = receipt.amount_received                  # REVERSE WHAT WAS POSTED, NOT WHAT THE CLIENT SENDS
         
         # Parse date
         receipt_date = parse_date(receipt_date_str)
@@ -4093,9 +3830,9 @@ def api_update_receipt(request):
             customer = Customer.objects.get(customer_id=customer_id)
             new_sales_order = SalesOrder.objects.get(so_id=so_id)
             old_sales_order = SalesOrder.objects.get(so_id=original_so_id)
-            payment_mode, _ = PaymentMode.objects.get_or_create(payment_mode=payment_mode_name)
-            county = County.objects.get(county=county_name) if county_name else None
-            town = Town.objects.get(town=town_name) if town_name else None
+            payment_mode = get_or_create_dimension_row(PaymentMode, payment_mode_name)
+            county = dimension_row(County, county_name) if county_name else None
+            town = dimension_row(Town, town_name) if town_name else None
         except (Customer.DoesNotExist, SalesOrder.DoesNotExist) as e:
             return JsonResponse({
                 'success': False, 
@@ -4107,24 +3844,20 @@ def api_update_receipt(request):
             old_sales_order.amount_received -= original_amount_received
             old_sales_order.save()
             
-            # Reverse from customer if supplier changed
+            # Reverse from customer if customer changed
             if receipt.customer_id.customer_id != customer_id:
-                old_customer = receipt.customer_id
-                old_customer.total_payments -= original_amount_received
-                old_customer.save()
+                post_balance(receipt.customer_id, payments=-original_amount_received)
             
             # Apply new payment to new PO
             new_sales_order.amount_received += amount_received
             new_sales_order.save()
             
-            # Update supplier total_payments
-            if customer.customer_id.customer_id != customer_id:
-                customer.total_payments += amount_received
-                customer.save()
+            # Update customer total_payments
+            if receipt.customer_id.customer_id != customer_id:
+                post_balance(customer, payments=amount_received)
             else:
                 # Same customer, adjust by difference
-                customer.total_payments += (amount_received - original_amount_received)
-                customer.save()
+                post_balance(customer, payments=amount_received - original_amount_received)
             
             # Update payment record
             receipt.transaction_id = transaction_id
@@ -4156,31 +3889,212 @@ def api_update_receipt(request):
     
     
 # =============================== DASHBOARD VIEWS ==============================================================================================================================================
-# ============================================
-# NEW ENDPOINT: Get All Sales Details
-# ============================================
+
+DASHBOARD_CACHE_TIMEOUT = 60                                                 # KPI TILES MAY LAG A WRITE BY AT MOST A MINUTE
+DASHBOARD_TOP_N = 5
+DASHBOARD_TABLE_ROWS = 10
+
+
+def dashboard_rollup_breakdown(kind, group_by, limit):
+    """Top `limit` groups of DAILY_ROLLUPS for one side, by total amount"""
+    rows = DailyRollup.objects.filter(kind=kind).values(group=F(group_by)).annotate(
+        quantity=Sum('quantity'), amount=Sum(ROLLUP_TOTAL)
+    ).order_by('-amount')[:limit]
+    return [
+        {'name': row['group'] or 'Unknown', 'quantity': row['quantity'] or 0, 'amount': float(row['amount'] or 0)}
+        for row in rows
+    ]
+
+
+def dashboard_status_counts(queryset, status_field):
+    """Order counts per payment / receipt status"""
+    return {
+        row['status'] or 'N/A': row['count']
+        for row in queryset.values(status=F(status_field)).annotate(count=Count('pk')).order_by()
+    }
+
+
 @csrf_exempt
 @login_required(login_url='/login/')
-def api_get_all_sales_details(request):
+@cached_report('dashboard_summary', timeout=DASHBOARD_CACHE_TIMEOUT)
+def api_dashboard_summary(request):
     """
-    Get all sales details efficiently in a single call
-    Used for: Top Selling Item, Sales by Category charts
+    Everything the dashboard renders, aggregated in the database:
+    KPI tiles, monthly sales trend, sales / purchases by county and by category,
+    payment status counts, top customers, top selling item, low stock and recent orders.
+    Cached for DASHBOARD_CACHE_TIMEOUT seconds (and dropped on any write, like the reports).
     """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+    
     try:
-        sales_details = SalesDetail.objects.select_related(
-            'so_id', 'customer_id', 'item_id'
-        ).all()
+        zero = Value(Decimal('0'), output_field=DecimalField())
+        
+        # INVENTORY VALUE AND STOCK LEVELS
+        inventory = Inventory.objects.annotate(remaining_qty=F('quantity_purchased') - F('quantity_sold'))
+        inventory_totals = inventory.aggregate(
+            item_count=Count('item_id'),
+            cost_value=Coalesce(Sum(F('remaining_qty') * F('purchase_price'), output_field=DecimalField()), zero),
+            potential_revenue=Coalesce(Sum(F('remaining_qty') * F('sale_price'), output_field=DecimalField()), zero),
+            reorder_count=Count('item_id', filter=Q(remaining_qty__lte=F('reorder_level')))
+        )
+        low_stock = inventory.filter(remaining_qty__lte=F('reorder_level')).annotate(
+            shortfall=F('remaining_qty') - F('reorder_level')
+        ).order_by('shortfall', 'item_id').values(
+            'item_id', 'item_name', 'item_category', 'remaining_qty', 'reorder_level'
+        )[:DASHBOARD_TABLE_ROWS]
+        
+        # ORDER TOTALS, BALANCES AND COUNTS
+        sales_totals = SalesOrder.objects.aggregate(
+            total=Coalesce(Sum('total_amount'), zero), received=Coalesce(Sum('amount_received'), zero), count=Count('so_id')
+        )
+        purchase_totals = PurchaseOrder.objects.aggregate(
+            total=Coalesce(Sum('total_amount'), zero), paid=Coalesce(Sum('amount_paid'), zero), count=Count('po_id')
+        )
+        total_receipts = Receipt.objects.aggregate(total=Coalesce(Sum('amount_received'), zero))['total']
         
-        details_list = []
-        for detail in sales_details:
-            details_list.append({
-                'detail_id': detail.detail_id,
-                'item_name': detail.item_name,
-                'item_type': detail.item_type,
-                'item_category': detail.item_category,
-                'item_subcategory': detail.item_subcategory,
-                'quantity_sold': detail.quantity_sold,
-                'total_sales_price': float(detail.total_sales_price)
+        cost_value = inventory_totals['cost_value']
+        potential_revenue = inventory_totals['potential_revenue']
+        net_profit = sales_totals['total'] - purchase_totals['total']
+        
+        # MONTHLY SALES TREND
+        monthly_sales = SalesOrder.objects.annotate(month=TruncMonth('date')).values('month').annotate(
+            amount=Sum('total_amount')
+        ).order_by('month')
+        
+        # SALES / PURCHASES BY COUNTY
+        sales_by_county = SalesOrder.objects.values(name=F('county')).annotate(amount=Sum('total_amount')).order_by('-amount')
+        purchases_by_county = PurchaseOrder.objects.values(name=F('county')).annotate(amount=Sum('total_amount')).order_by('-amount')
+        sales_by_county = [{'name': row['name'] or 'Unknown', 'amount': float(row['amount'] or 0)} for row in sales_by_county]
+        purchases_by_county = [{'name': row['name'] or 'Unknown', 'amount': float(row['amount'] or 0)} for row in purchases_by_county]
+        
+        # TOP CUSTOMERS
+        top_customers = SalesOrder.objects.values('customer_id', name=F('customer_id__customer_name')).annotate(
+            amount=Sum('total_amount')
+        ).order_by('-amount')[:DASHBOARD_TOP_N]
+        
+        # TOP SELLING ITEM (BY QUANTITY)
+        top_item = DailyRollup.objects.filter(kind=SALES).values(
+            'item_id', name=F('item_id__item_name'), category=F('item_id__item_category'), type=F('item_id__item_type')
+        ).annotate(quantity=Sum('quantity'), amount=Sum(ROLLUP_TOTAL)).order_by('-quantity', 'item_id').first()
+        
+        # RECENT ORDERS
+        recent_sales = SalesOrder.objects.order_by('-date', '-so_id').values(
+            'so_id', 'date', 'customer_name', 'total_amount', 'receipt_status', 'shipping_status'
+        )[:DASHBOARD_TABLE_ROWS]
+        recent_purchases = PurchaseOrder.objects.order_by('-date', '-po_id').values(
+            'po_id', 'date', 'supplier_name', 'total_amount', 'payment_status', 'shipping_status'
+        )[:DASHBOARD_TABLE_ROWS]
+        
+        return JsonResponse({
+            'success': True,
+            'kpis': {
+                'inventory_items': inventory_totals['item_count'],
+                'inventory_cost_value': float(cost_value),
+                'potential_revenue': float(potential_revenue),
+                'potential_profit': float(potential_revenue - cost_value),
+                'potential_margin': round(float((potential_revenue - cost_value) / cost_value * 100), 1) if cost_value > 0 else 0,
+                'total_sales': float(sales_totals['total']),
+                'sales_orders': sales_totals['count'],
+                'total_purchases': float(purchase_totals['total']),
+                'purchase_orders': purchase_totals['count'],
+                'net_profit': float(net_profit),
+                'profit_margin': round(float(net_profit / sales_totals['total'] * 100), 1) if sales_totals['total'] > 0 else 0,
+                'total_receivables': float(sales_totals['total'] - total_receipts),
+                'customers': Customer.objects.count(),
+                'total_payables': float(purchase_totals['total'] - purchase_totals['paid']),
+                'suppliers': Supplier.objects.count(),
+                'reorder_items': inventory_totals['reorder_count'],
+                'top_selling_item': {
+                    'name': top_item['name'],
+                    'category': top_item['category'],
+                    'type': top_item['type'],
+                    'quantity': top_item['quantity'],
+                    'amount': float(top_item['amount'] or 0),
+                } if top_item else None,
+                'top_sales_location': sales_by_county[0] if sales_by_county else None,
+            },
+            'sales_trend': [
+                {'month': row['month'].strftime('%b %Y'), 'amount': float(row['amount'] or 0)} for row in monthly_sales
+            ],
+            'sales_by_county': sales_by_county,
+            'purchases_by_county': purchases_by_county,
+            'sales_by_category': dashboard_rollup_breakdown(SALES, 'item_category', 6),
+            'purchases_by_category': dashboard_rollup_breakdown(PURCHASES, 'item_category', 6),
+            'payment_status': {
+                'purchases': dashboard_status_counts(PurchaseOrder.objects.all(), 'payment_status'),
+                'sales': dashboard_status_counts(SalesOrder.objects.all(), 'receipt_status'),
+            },
+            'top_customers': [
+                {'id': row['customer_id'], 'name': row['name'] or 'Unknown', 'amount': float(row['amount'] or 0)}
+                for row in top_customers
+            ],
+            'low_stock': [
+                {
+                    'id': row['item_id'],
+                    'name': row['item_name'],
+                    'category': row['item_category'],
+                    'remainingQty': row['remaining_qty'],
+                    'reorderLevel': row['reorder_level'],
+                }
+                for row in low_stock
+            ],
+            'recent_sales': [
+                {
+                    'so_id': row['so_id'],
+                    'date': row['date'].strftime('%d/%m/%Y'),
+                    'customer_name': row['customer_name'],
+                    'total_amount': float(row['total_amount']),
+                    'receipt_status': row['receipt_status'] or '',
+                    'shipping_status': row['shipping_status'] or '',
+                }
+                for row in recent_sales
+            ],
+            'recent_purchases': [
+                {
+                    'po_id': row['po_id'],
+                    'date': row['date'].strftime('%d/%m/%Y'),
+                    'supplier_name': row['supplier_name'],
+                    'total_amount': float(row['total_amount']),
+                    'payment_status': row['payment_status'] or '',
+                    'shipping_status': row['shipping_status'] or '',
+                }
+                for row in recent_purchases
+            ],
+        })
+    
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
+# ============================================
+# NEW ENDPOINT: Get All Sales Details
+# ============================================
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_get_all_sales_details(request):
+    """
+    Get all sales details efficiently in a single call
+    Used for: Top Selling Item, Sales by Category charts
+    """
+    try:
+        sales_details = SalesDetail.objects.values(
+            'detail_id', 'date', 'item_id', 'item_name', 'item_type', 'item_category', 'item_subcategory',
+            'quantity_sold', 'total_sales_price'
+        )
+        
+        details_list = []
+        for detail in sales_details:
+            details_list.append({
+                'detail_id': detail['detail_id'],
+                'date': detail['date'].strftime('%Y-%m-%d') if detail['date'] else '',
+                'item_id': detail['item_id'],
+                'item_name': detail['item_name'],
+                'item_type': detail['item_type'],
+                'item_category': detail['item_category'],
+                'item_subcategory': detail['item_subcategory'],
+                'quantity_sold': detail['quantity_sold'],
+                'total_sales_price': float(detail['total_sales_price'])
             })
         
         return JsonResponse({
@@ -4208,20 +4122,21 @@ def api_get_all_purchase_details(request):
     Used for: Purchases by Category chart
     """
     try:
-        purchase_details = PurchaseDetail.objects.select_related(
-            'po_id', 'supplier_id', 'item_id'
-        ).all()
+        purchase_details = PurchaseDetail.objects.values(
+            'detail_id', 'item_name', 'item_type', 'item_category', 'item_subcategory',
+            'quantity_purchased', 'total_purchase_price'
+        )
         
         details_list = []
         for detail in purchase_details:
             details_list.append({
-                'detail_id': detail.detail_id,
-                'item_name': detail.item_name,
-                'item_type': detail.item_type,
-                'item_category': detail.item_category,
-                'item_subcategory': detail.item_subcategory,
-                'quantity_purchased': detail.quantity_purchased,
-                'total_purchase_price': float(detail.total_purchase_price)
+                'detail_id': detail['detail_id'],
+                'item_name': detail['item_name'],
+                'item_type': detail['item_type'],
+                'item_category': detail['item_category'],
+                'item_subcategory': detail['item_subcategory'],
+                'quantity_purchased': detail['quantity_purchased'],
+                'total_purchase_price': float(detail['total_purchase_price'])
             })
         
         return JsonResponse({
@@ -4247,10 +4162,9 @@ def api_sales_forecast_data(request):
 
         qs = SalesOrder.objects.all()
 
-        if range_param != 'all':
-            months    = int(range_param)
-            cutoff    = datetime.date.today() - datetime.timedelta(days=months * 30)
-            qs        = qs.filter(date__gte=cutoff)
+        cutoff = range_cutoff(range_param)
+        if cutoff:
+            qs = qs.filter(date__gte=cutoff)
 
         monthly = (
             qs
@@ -4277,6 +4191,147 @@ def api_sales_forecast_data(request):
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_sales_forecast(request):
+    """Server-side forecast with prediction intervals for the overall, category or item scope"""
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'GET required'}, status=405)
+
+    try:
+        analysis_type = request.GET.get('analysis_type', 'overall')
+        filter_value  = request.GET.get('filter', '__all__')
+        range_param   = request.GET.get('range', 'all')
+        horizon_param = request.GET.get('horizon', '6')
+
+        if analysis_type not in ('overall', 'category', 'item'):
+            return JsonResponse({'success': False, 'message': f"Invalid analysis type '{analysis_type}'"}, status=400)
+        if range_param != 'all' and not range_param.isdigit():
+            return JsonResponse({'success': False, 'message': f"Invalid range '{range_param}'"}, status=400)
+        if not horizon_param.isdigit():
+            return JsonResponse({'success': False, 'message': f"Invalid horizon '{horizon_param}'"}, status=400)
+        horizon = int(horizon_param)
+        if horizon < 1 or horizon > FORECAST_MAX_HORIZON:
+            return JsonResponse({'success': False, 'message': f'Horizon must be between 1 and {FORECAST_MAX_HORIZON} months'}, status=400)
+
+        result, cached = get_forecast(analysis_type, filter_value, range_param, horizon)
+
+        return JsonResponse({'success': True, 'data': result, 'cached': cached})
+
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        print(f"❌ Error generating forecast: {str(e)}")
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_sales_forecast_series(request):
+    """
+    Monthly sales series per item category or per item, paginated by group.
+    Query params: group_by (category|item), range, category, item_type, search, page, page_size
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'GET required'}, status=405)
+
+    try:
+        group_by    = request.GET.get('group_by', 'category')
+        range_param = request.GET.get('range', 'all')
+        page        = max(int(request.GET.get('page', 1)), 1)
+        page_size   = min(max(int(request.GET.get('page_size', 20)), 1), 500)
+
+        if range_param != 'all' and not range_param.isdigit():
+            return JsonResponse({'success': False, 'message': f"Invalid range '{range_param}'"}, status=400)
+
+        filters = {
+            'category':  request.GET.get('category', '').strip(),
+            'item_type': request.GET.get('item_type', '').strip(),
+            'search':    request.GET.get('search', '').strip(),
+        }
+
+        groups, total_groups = grouped_monthly_series(group_by, range_param, filters, page, page_size)
+
+        return JsonResponse({
+            'success': True,
+            'data': groups,
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total_groups': total_groups,
+                'total_pages': math.ceil(total_groups / page_size) if total_groups else 0
+            }
+        })
+
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        print(f"❌ Error building sales series: {str(e)}")
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_get_item_forecasts(request):
+    """
+    Precomputed per-item forecasts (written by `python manage.py forecast_sales`).
+    Query params: item_id (comma separated), category, page, page_size (items per page)
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'GET required'}, status=405)
+
+    try:
+        page      = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', 50)), 1), 500)
+
+        qs = SalesForecast.objects.select_related('item_id')
+        item_ids = [i.strip() for i in request.GET.get('item_id', '').split(',') if i.strip()]
+        if item_ids:
+            qs = qs.filter(item_id__in=item_ids)
+        category = request.GET.get('category', '').strip()
+        if category:
+            qs = qs.filter(item_id__item_category=category)
+
+        all_items  = qs.values_list('item_id', flat=True).distinct().order_by('item_id')
+        total      = all_items.count()
+        page_items = list(all_items[(page - 1) * page_size:page * page_size])
+
+        data = {}
+        for f in qs.filter(item_id__in=page_items).order_by('item_id', 'month'):
+            entry = data.setdefault(f.item_id_id, {
+                'item_id': f.item_id_id,
+                'item_name': f.item_id.item_name,
+                'item_category': f.item_id.item_category_id,
+                'quantity_remaining': f.item_id.quantity_remaining,
+                'generated_at': f.generated_at.strftime('%Y-%m-%d %H:%M'),
+                'forecast': []
+            })
+            entry['forecast'].append({
+                'month': f.month.strftime('%Y-%m'),
+                'predicted': float(f.predicted_sales),
+                'lower': float(f.lower_bound),
+                'upper': float(f.upper_bound),
+                'confidence': f.confidence
+            })
+
+        return JsonResponse({
+            'success': True,
+            'data': list(data.values()),
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total_items': total,
+                'total_pages': math.ceil(total / page_size) if total else 0
+            }
+        })
+
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    except Exception as e:
+        print(f"❌ Error loading item forecasts: {str(e)}")
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_export_forecast_csv(request):
@@ -4378,11 +4433,13 @@ def get_date_range(range_type):
     
     return None, None
 
+
 # ============================================
 # 1. SALES SUMMARY REPORT
 # ============================================
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('sales_summary')
 def api_generate_sales_summary(request):
     """
     Generate Sales Summary Report
@@ -4422,34 +4479,28 @@ def api_generate_sales_summary(request):
         
         outstanding = total_sales - total_received
         
-        # Sales by category - FIXED: Calculate from detail records
-        category_query = SalesDetail.objects.filter(
-            so_id__in=sales_orders
-        )
-        
+        # Sales by category - from the daily sales rollups (net + tax + 2% shipping)
+        category_query = DailyRollup.objects.filter(kind=SALES)
+        if start_date:
+            category_query = category_query.filter(date__gte=start_date)
+        if end_date:
+            category_query = category_query.filter(date__lte=end_date)
         if category:
             category_query = category_query.filter(item_category=category)
         
-        # ✅ FIX: Calculate total manually instead of using @property
         sales_by_category_raw = category_query.values('item_category').annotate(
-            quantity=Sum('quantity_sold'),
-            subtotal=Sum(F('quantity_sold') * F('unit_price')),
-            tax=Sum(F('quantity_sold') * F('unit_price') * F('tax_rate') / 100)
+            quantity=Sum('quantity'),
+            subtotal=Sum('net_amount'),
+            total=Sum(ROLLUP_TOTAL)
         ).order_by('-subtotal')[:10]
         
-        # Calculate final totals with shipping
-        sales_by_category = []
-        for item in sales_by_category_raw:
-            subtotal = item['subtotal'] or Decimal('0.00')
-            tax = item['tax'] or Decimal('0.00')
-            price_with_tax = subtotal + tax
-            shipping = price_with_tax * Decimal('0.02')  # 2% shipping
-            total = price_with_tax + shipping
-            
-            sales_by_category.append({
+        sales_by_category = [
+            {
                 'category': item['item_category'],
-                'total': float(total)
-            })
+                'total': float(item['total'] or 0)
+            }
+            for item in sales_by_category_raw
+        ]
         
         # Sales trend (daily)
         daily_sales = sales_orders.annotate(
@@ -4532,94 +4583,108 @@ def api_generate_sales_summary(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('inventory_status')
 def api_generate_inventory_status(request):
     """
     Generate Inventory Status Report
     Returns: Current inventory levels and valuations
+    
+    KPIs, the low-stock list and the category breakdown are grouped queries over the inventory table.
+    ?method= picks the valuation (standard, average, last or fifo; see valuation.py). The complete item
+    list is optional: ?include_items=1 returns it one page (?page, ?page_size) at a time.
     """
     try:
         category = request.GET.get('category', '')
+        method = request.GET.get('method', '').strip() or DEFAULT_VALUATION_METHOD
+        if method not in VALUATION_METHODS:
+            return JsonResponse({
+                'success': False,
+                'message': f"Invalid valuation method '{method}'. Use one of: {', '.join(VALUATION_METHODS)}"
+            }, status=400)
         
         # Build query
-        query = Inventory.objects.select_related(
-            'item_type', 'item_category', 'item_subcategory'
-        )
+        query = Inventory.objects.all()
         
         if category:
-            query = query.filter(item_category__item_category=category)
+            query = query.filter(item_category=category)
         
-        inventory_items = query.all()
+        inventory_items = valued_inventory(method, query)
         
         # Calculate totals
-        total_cost_value = Decimal('0.00')
-        total_sale_value = Decimal('0.00')
-        total_items = 0
-        reorder_items = 0
-        
-        items_list = []
-        low_stock_items = []
-        
-        for item in inventory_items:
-            remaining_qty = item.quantity_purchased - item.quantity_sold
-            cost_value = remaining_qty * item.purchase_price
-            sale_value = remaining_qty * item.sale_price
-            
-            total_cost_value += cost_value
-            total_sale_value += sale_value
-            total_items += 1
-            
-            if item.reorder_required == 'YES':
-                reorder_items += 1
-                low_stock_items.append({
-                    'item_id': item.item_id,
-                    'name': item.item_name,
-                    'category': item.item_category.item_category,
-                    'remaining_qty': remaining_qty,
-                    'reorder_level': item.reorder_level
-                })
-            
-            items_list.append({
-                'item_id': item.item_id,
-                'name': item.item_name,
-                'type': item.item_type.item_type,
-                'category': item.item_category.item_category,
-                'subcategory': item.item_subcategory.item_subcategory,
-                'purchased_qty': item.quantity_purchased,
-                'sold_qty': item.quantity_sold,
-                'remaining_qty': remaining_qty,
-                'purchase_price': float(item.purchase_price),
-                'sale_price': float(item.sale_price),
-                'cost_value': float(cost_value),
-                'sale_value': float(sale_value),
-                'reorder_required': item.reorder_required
-            })
-        
+        totals = inventory_items.aggregate(
+            total_cost_value=Sum('cost_value'),
+            total_sale_value=Sum('sale_value'),
+            total_items=Count('item_id'),
+            reorder_items=Count('item_id', filter=Q(reorder_required='YES'))
+        )
+        total_cost_value = totals['total_cost_value'] or Decimal('0.00')
+        total_sale_value = totals['total_sale_value'] or Decimal('0.00')
+        total_items = totals['total_items']
+        reorder_items = totals['reorder_items']
         potential_profit = total_sale_value - total_cost_value
         
-        # Inventory by category
-        by_category = {}
-        for item_data in items_list:
-            cat = item_data['category']
-            if cat not in by_category:
-                by_category[cat] = {
-                    'cost_value': 0,
-                    'sale_value': 0,
-                    'items': 0
-                }
-            by_category[cat]['cost_value'] += item_data['cost_value']
-            by_category[cat]['sale_value'] += item_data['sale_value']
-            by_category[cat]['items'] += 1
+        low_stock_items = [
+            {
+                'item_id': item['item_id'],
+                'name': item['item_name'],
+                'category': item['item_category'],
+                'remaining_qty': item['remaining_qty'],
+                'reorder_level': item['reorder_level']
+            }
+            for item in inventory_items.filter(reorder_required='YES').order_by('item_id').values(
+                'item_id', 'item_name', 'item_category', 'remaining_qty', 'reorder_level'
+            )
+        ]
         
+        # Inventory by category
         category_breakdown = [
             {
-                'category': cat,
-                'cost_value': data['cost_value'],
-                'sale_value': data['sale_value'],
-                'items': data['items']
+                'category': row['item_category'],
+                'cost_value': float(row['cost_value'] or 0),
+                'sale_value': float(row['sale_value'] or 0),
+                'items': row['items']
             }
-            for cat, data in by_category.items()
+            for row in inventory_items.values('item_category').annotate(
+                cost_value=Sum('cost_value'), sale_value=Sum('sale_value'), items=Count('item_id')
+            ).order_by('item_category')
         ]
         
+        # OPTIONAL PAGINATED ITEM LIST
+        items_list = []
+        items_pagination = None
+        if request.GET.get('include_items') == '1':
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 50)), 1), 500)
+            items_page = inventory_items.order_by('item_id').values(
+                'item_id', 'item_name', 'item_type', 'item_category', 'item_subcategory',
+                'quantity_purchased', 'quantity_sold', 'remaining_qty', 'purchase_price', 'sale_price',
+                'unit_cost', 'cost_value', 'sale_value', 'reorder_required'
+            )[(page - 1) * page_size:page * page_size]
+            
+            for item in items_page:
+                items_list.append({
+                    'item_id': item['item_id'],
+                    'name': item['item_name'],
+                    'type': item['item_type'],
+                    'category': item['item_category'],
+                    'subcategory': item['item_subcategory'],
+                    'purchased_qty': item['quantity_purchased'],
+                    'sold_qty': item['quantity_sold'],
+                    'remaining_qty': item['remaining_qty'],
+                    'purchase_price': float(item['purchase_price']),
+                    'sale_price': float(item['sale_price']),
+                    'unit_cost': float(item['unit_cost']) if item['unit_cost'] is not None else None,
+                    'cost_value': float(item['cost_value'] or 0),
+                    'sale_value': float(item['sale_value'] or 0),
+                    'reorder_required': item['reorder_required']
+                })
+            items_pagination = {
+                'page': page,
+                'page_size': page_size,
+                'total': total_items,
+                'total_pages': math.ceil(total_items / page_size) if total_items else 0
+            }
+        
         report_data = {
             'kpis': {
                 'total_cost_value': float(total_cost_value),
@@ -4628,7 +4693,10 @@ def api_generate_inventory_status(request):
                 'total_items': total_items,
                 'reorder_items': reorder_items
             },
+            'valuation_method': method,
+            'valuation_methods': VALUATION_METHODS,
             'items': items_list,
+            'items_pagination': items_pagination,
             'low_stock': low_stock_items,
             'category_breakdown': category_breakdown
         }
@@ -4654,10 +4722,14 @@ def api_generate_inventory_status(request):
 # ============================================
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('profit_loss')
 def api_generate_profit_loss(request):
     """
     Generate Profit & Loss Report
-    Returns: Revenue, expenses, and profit calculations
+    Returns: Revenue, expenses, and profit calculations with a monthly breakdown
+    
+    COGS, tax and shipping are summed per month from DAILY_ROLLUPS, so a period costs two grouped
+    queries however many sales lines it covers.
     """
     try:
         start_date_str = request.GET.get('start_date', '')
@@ -4666,53 +4738,66 @@ def api_generate_profit_loss(request):
         start_date = parse_date(start_date_str) if start_date_str else None
         end_date = parse_date(end_date_str) if end_date_str else None
         
-        # Sales Revenue
+        # Sales Revenue per month (order totals)
         sales_query = SalesOrder.objects.all()
         if start_date:
             sales_query = sales_query.filter(date__gte=start_date)
         if end_date:
             sales_query = sales_query.filter(date__lte=end_date)
         
-        total_revenue = sales_query.aggregate(
-            total=Sum('total_amount')
-        )['total'] or Decimal('0.00')
+        monthly_revenue = {
+            row['month']: row['revenue'] or Decimal('0.00')
+            for row in sales_query.annotate(month=TruncMonth('date')).values('month').annotate(
+                revenue=Sum('total_amount')
+            ).order_by()
+        }
         
-        # Get sales details for COGS calculation
-        sales_details = SalesDetail.objects.filter(so_id__in=sales_query)
+        # COGS, tax and shipping per month, from the daily sales rollups
+        sales_rollups = DailyRollup.objects.filter(kind=SALES)
+        if start_date:
+            sales_rollups = sales_rollups.filter(date__gte=start_date)
+        if end_date:
+            sales_rollups = sales_rollups.filter(date__lte=end_date)
+        
+        monthly_costs = {
+            row['month']: row
+            for row in sales_rollups.annotate(month=TruncMonth('date')).values('month').annotate(
+                cogs=Sum('cogs_amount'),
+                tax=Sum('tax_amount'),
+                shipping=Sum('shipping_amount')
+            ).order_by()
+        }
         
-        # Calculate COGS based on items sold and their purchase prices
-        cogs = Decimal('0.00')
-        for detail in sales_details:
-            item = detail.item_id
-            if item:
-                cogs += detail.quantity_sold * item.purchase_price
+        zero = Decimal('0.00')
+        monthly_trend = []
+        total_revenue = cogs = tax_collected = shipping_expense = zero
+        for month in sorted(set(monthly_revenue) | set(monthly_costs)):
+            revenue = monthly_revenue.get(month, zero)
+            costs = monthly_costs.get(month, {})
+            month_cogs = costs.get('cogs') or zero
+            month_tax = costs.get('tax') or zero
+            month_shipping = costs.get('shipping') or zero
+            month_gross = revenue - month_cogs
+            
+            total_revenue += revenue
+            cogs += month_cogs
+            tax_collected += month_tax
+            shipping_expense += month_shipping
+            
+            monthly_trend.append({
+                'month': month.strftime('%b %Y'),
+                'revenue': float(revenue),
+                'cogs': float(month_cogs),
+                'gross_profit': float(month_gross),
+                'gross_margin': float(month_gross / revenue * 100) if revenue > 0 else 0,
+                'shipping_expense': float(month_shipping),
+                'net_profit': float(month_gross - month_shipping)
+            })
         
         # Gross Profit
         gross_profit = total_revenue - cogs
         gross_margin = (gross_profit / total_revenue * 100) if total_revenue > 0 else 0
         
-        # ✅ FIX: Calculate shipping expenses manually instead of aggregating @property
-        shipping_expense = Decimal('0.00')
-        for detail in sales_details:
-            # Calculate shipping for each detail: 2% of (price + tax)
-            subtotal = detail.quantity_sold * detail.unit_price
-            tax = subtotal * detail.tax_rate / 100
-            price_with_tax = subtotal + tax
-            shipping = price_with_tax * Decimal('0.02')  # 2% shipping
-            shipping_expense += shipping
-            
-        """     ALTERNATIVE FUNCTION/LOGIC FOR CALCULATING OVERALL SHIPPING FEES
-        shipping_data = sales_details.aggregate(
-            shipping_total=Sum(
-                ExpressionWrapper(
-                    (F('quantity_sold') * F('unit_price') * (1 + F('tax_rate') / 100)) * Decimal('0.02'),
-                    output_field=DecimalField(max_digits=12, decimal_places=2)
-                )
-            )
-        )
-        shipping_expense = shipping_data['shipping_total'] or Decimal('0.00') 
-        """   
-        
         # Purchases in period
         purchase_query = PurchaseOrder.objects.all()
         if start_date:
@@ -4729,13 +4814,6 @@ def api_generate_profit_loss(request):
         net_profit = gross_profit - total_expenses
         net_margin = (net_profit / total_revenue * 100) if total_revenue > 0 else 0
         
-        # Monthly breakdown
-        monthly_data = sales_query.annotate(
-            month=TruncMonth('date')
-        ).values('month').annotate(
-            revenue=Sum('total_amount')
-        ).order_by('month')
-        
         report_data = {
             'kpis': {
                 'total_revenue': float(total_revenue),
@@ -4749,17 +4827,13 @@ def api_generate_profit_loss(request):
             'breakdown': {
                 'revenue': float(total_revenue),
                 'cogs': float(cogs),
+                'tax_collected': float(tax_collected),
                 'shipping_expense': float(shipping_expense),
                 'gross_profit': float(gross_profit),
-                'net_profit': float(net_profit)
+                'net_profit': float(net_profit),
+                'total_purchases': float(total_purchases)
             },
-            'monthly_trend': [
-                {
-                    'month': item['month'].strftime('%b %Y'),
-                    'revenue': float(item['revenue'])
-                }
-                for item in monthly_data
-            ],
+            'monthly_trend': monthly_trend,
             'period': {
                 'start': start_date.strftime('%d/%m/%Y') if start_date else '',
                 'end': end_date.strftime('%d/%m/%Y') if end_date else ''
@@ -4786,6 +4860,7 @@ def api_generate_profit_loss(request):
 # ============================================
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('purchase_summary')
 def api_generate_purchase_summary(request):
     """Generate Purchase Summary Report"""
     try:
@@ -4816,31 +4891,26 @@ def api_generate_purchase_summary(request):
         outstanding = total_purchases - total_paid
         total_orders = purchase_orders.count()
         
-        # Purchases by category - FIXED
-        purchase_details = PurchaseDetail.objects.filter(
-            po_id__in=purchase_orders
-        )
+        # Purchases by category - from the daily purchase rollups (net + tax + 1% shipping)
+        category_query = DailyRollup.objects.filter(kind=PURCHASES)
+        if start_date:
+            category_query = category_query.filter(date__gte=start_date)
+        if end_date:
+            category_query = category_query.filter(date__lte=end_date)
         
-        # Calculate total manually
-        purchases_by_category_raw = purchase_details.values('item_category').annotate(
-            quantity=Sum('quantity_purchased'),
-            subtotal=Sum(F('quantity_purchased') * F('unit_cost')),
-            tax=Sum(F('quantity_purchased') * F('unit_cost') * F('tax_rate') / 100)
+        purchases_by_category_raw = category_query.values('item_category').annotate(
+            quantity=Sum('quantity'),
+            subtotal=Sum('net_amount'),
+            total=Sum(ROLLUP_TOTAL)
         ).order_by('-subtotal')[:10]
         
-        # Calculate final totals with shipping
-        purchases_by_category = []
-        for item in purchases_by_category_raw:
-            subtotal = item['subtotal'] or Decimal('0.00')
-            tax = item['tax'] or Decimal('0.00')
-            cost_with_tax = subtotal + tax
-            shipping = cost_with_tax * Decimal('0.01')  # 1% shipping
-            total = cost_with_tax + shipping
-            
-            purchases_by_category.append({
+        purchases_by_category = [
+            {
                 'category': item['item_category'],
-                'total': float(total)
-            })
+                'total': float(item['total'] or 0)
+            }
+            for item in purchases_by_category_raw
+        ]
         
         # Top suppliers
         top_suppliers = purchase_orders.values(
@@ -4905,40 +4975,41 @@ def api_generate_purchase_summary(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('outstanding_balances')
 def api_generate_outstanding_balances(request):
     """Generate Outstanding Balances Report"""
     try:
         # Customer balances
-        customers = Customer.objects.all()
+        customers = with_current_balances(Customer.objects.all())
         customer_balances = []
         total_receivable = Decimal('0.00')
         
         for customer in customers:
-            balance = customer.total_sales - customer.total_payments
+            balance = customer.current_total_sales - customer.current_total_payments
             if balance > 0:
                 total_receivable += balance
                 customer_balances.append({
                     'id': customer.customer_id,
                     'name': customer.customer_name,
-                    'total_sales': float(customer.total_sales),
-                    'total_payments': float(customer.total_payments),
+                    'total_sales': float(customer.current_total_sales),
+                    'total_payments': float(customer.current_total_payments),
                     'balance': float(balance)
                 })
         
         # Supplier balances
-        suppliers = Supplier.objects.all()
+        suppliers = with_current_balances(Supplier.objects.all())
         supplier_balances = []
         total_payable = Decimal('0.00')
         
         for supplier in suppliers:
-            balance = supplier.total_purchases - supplier.total_payments
+            balance = supplier.current_total_purchases - supplier.current_total_payments
             if balance > 0:
                 total_payable += balance
                 supplier_balances.append({
                     'id': supplier.supplier_id,
                     'name': supplier.supplier_name,
-                    'total_purchases': float(supplier.total_purchases),
-                    'total_payments': float(supplier.total_payments),
+                    'total_purchases': float(supplier.current_total_purchases),
+                    'total_payments': float(supplier.current_total_payments),
                     'balance': float(balance)
                 })
         
@@ -4964,12 +5035,40 @@ def api_generate_outstanding_balances(request):
 # ============================================
 # CUSTOMER ANALYSIS REPORT
 # ============================================
+# RFM SEGMENTS, CHECKED IN ORDER (FIRST MATCH WINS)
+RFM_SEGMENT_NAMES = ['champions', 'loyal', 'new', 'at_risk', 'lost', 'others']
+
+
+def quintile_scores(values):
+    """Score each value 1-5 by the quintile it falls in (numpy array in, int array out)"""
+    if len(values) == 0:
+        return np.array([], dtype=int)
+    cutoffs = np.percentile(values, [20, 40, 60, 80])
+    return np.searchsorted(cutoffs, values, side='right') + 1
+
+
+def rfm_segment_labels(r_scores, f_scores, m_scores):
+    """Map arrays of R, F and M scores to RFM_SEGMENT_NAMES labels"""
+    conditions = [
+        (r_scores >= 4) & (f_scores >= 4) & (m_scores >= 4),
+        (f_scores >= 4),
+        (r_scores >= 4) & (f_scores <= 2),
+        (r_scores <= 2) & (f_scores >= 3),
+        (r_scores <= 2) & (f_scores <= 2),
+    ]
+    return np.select(conditions, RFM_SEGMENT_NAMES[:-1], default=RFM_SEGMENT_NAMES[-1])
+
+
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('customer_analysis')
 def api_generate_customer_analysis(request):
     """
     Generate Customer Analysis Report
-    Returns: Customer purchasing behavior, value segmentation, and trends
+    Returns: Customer purchasing behavior, value segmentation, RFM scores and trends
+    
+    Per-customer totals, order counts and first/last order dates come from one grouped query over
+    SalesOrder; segmentation and RFM scoring are vectorized with NumPy over that result.
     """
     try:
         start_date_str = request.GET.get('start_date', '')
@@ -4996,110 +5095,115 @@ def api_generate_customer_analysis(request):
         if county:
             all_customers = all_customers.filter(county__county=county)
         
-        # Customer metrics
+        # Customer metrics - one grouped query for every customer's activity in the period
+        customer_activity = [
+            row for row in sales_query.filter(customer_id__in=all_customers).values('customer_id').annotate(
+                sales_total=Sum('total_amount'),
+                orders_count=Count('so_id'),
+                first_order=Min('date'),
+                last_order=Max('date')
+            ).order_by()
+            if row['sales_total'] and row['sales_total'] > 0
+        ]
+        customers = with_current_balances(all_customers.select_related('county', 'town')).in_bulk(
+            [row['customer_id'] for row in customer_activity]
+        )
+        
         customer_data = []
         total_customers = all_customers.count()
-        active_customers = 0
+        active_customers = len(customer_activity)
         total_customer_value = Decimal('0.00')
         total_customer_orders = 0
         
-        for customer in all_customers:
-            # Get sales for this customer in the period
-            customer_sales = sales_query.filter(customer_id=customer)
-            
-            sales_total = customer_sales.aggregate(
-                total=Sum('total_amount')
-            )['total'] or Decimal('0.00')
+        for row in customer_activity:
+            customer = customers[row['customer_id']]
+            sales_total = row['sales_total']
+            orders_count = row['orders_count']
+            first_order = row['first_order']
+            last_order = row['last_order']
             
-            orders_count = customer_sales.count()
+            total_customer_value += sales_total
+            total_customer_orders += orders_count
             
             # Calculate payment ratio
-            payments_total = customer.total_payments
-            payment_ratio = (payments_total / customer.total_sales * 100) if customer.total_sales > 0 else 0
+            payments_total = customer.current_total_payments
+            payment_ratio = (payments_total / customer.current_total_sales * 100) if customer.current_total_sales > 0 else 0
             
             # Outstanding balance
-            outstanding = customer.total_sales - customer.total_payments
+            outstanding = customer.current_total_sales - customer.current_total_payments
             
-            if sales_total > 0:
-                active_customers += 1
-                total_customer_value += sales_total
-                total_customer_orders += orders_count
-                
-                # Get first and last order dates
-                first_order = customer_sales.order_by('date').first()
-                last_order = customer_sales.order_by('-date').first()
-                
-                # Calculate average days between orders
-                if orders_count > 1 and first_order and last_order:
-                    days_span = (last_order.date - first_order.date).days
-                    avg_days_between = days_span / (orders_count - 1) if orders_count > 1 else 0
-                else:
-                    avg_days_between = 0
-                
-                customer_data.append({
-                    'customer_id': customer.customer_id,
-                    'customer_name': customer.customer_name,
-                    'phone': customer.phone_number or '',
-                    'email': customer.email or '',
-                    'county': customer.county.county if customer.county else '',
-                    'town': customer.town.town if customer.town else '',
-                    'total_sales': float(sales_total),
-                    'total_orders': orders_count,
-                    'avg_order_value': float(sales_total / orders_count) if orders_count > 0 else 0,
-                    'lifetime_value': float(customer.total_sales),
-                    'total_payments': float(payments_total),
-                    'outstanding_balance': float(outstanding),
-                    'payment_ratio': float(payment_ratio),
-                    'first_order_date': first_order.date.strftime('%d/%m/%Y') if first_order else '',
-                    'last_order_date': last_order.date.strftime('%d/%m/%Y') if last_order else '',
-                    'avg_days_between_orders': int(avg_days_between)
-                })
+            # Calculate average days between orders
+            avg_days_between = (last_order - first_order).days / (orders_count - 1) if orders_count > 1 else 0
+            
+            customer_data.append({
+                'customer_id': customer.customer_id,
+                'customer_name': customer.customer_name,
+                'phone': customer.phone_number or '',
+                'email': customer.email or '',
+                'county': customer.county.county if customer.county else '',
+                'town': customer.town.town if customer.town else '',
+                'total_sales': float(sales_total),
+                'total_orders': orders_count,
+                'avg_order_value': float(sales_total / orders_count) if orders_count > 0 else 0,
+                'lifetime_value': float(customer.current_total_sales),
+                'total_payments': float(payments_total),
+                'outstanding_balance': float(outstanding),
+                'payment_ratio': float(payment_ratio),
+                'first_order_date': first_order.strftime('%d/%m/%Y'),
+                'last_order_date': last_order.strftime('%d/%m/%Y'),
+                'avg_days_between_orders': int(avg_days_between),
+                '_last_order': last_order
+            })
         
         # Sort by total sales
         customer_data.sort(key=lambda x: x['total_sales'], reverse=True)
         
-        # Customer segmentation (RFM-like analysis)
-        # Recency, Frequency, Monetary
+        # Customer segmentation by value percentile: top 20% = VIP, next 30% = high-value, rest = regular
+        segmentation = {
+            'vip': {'count': 0, 'total_value': 0, 'percentage': 0},
+            'high_value': {'count': 0, 'total_value': 0, 'percentage': 0},
+            'regular': {'count': 0, 'total_value': 0, 'percentage': 0}
+        }
+        rfm_segments = {name: 0 for name in RFM_SEGMENT_NAMES}
+        
         if customer_data:
-            # Top 20% by value = VIP customers
-            vip_threshold_index = max(1, int(len(customer_data) * 0.2))
-            vip_customers = customer_data[:vip_threshold_index]
-            
-            # Next 30% = High-value customers
-            high_value_threshold_index = max(vip_threshold_index + 1, int(len(customer_data) * 0.5))
-            high_value_customers = customer_data[vip_threshold_index:high_value_threshold_index]
-            
-            # Remaining = Regular customers
-            regular_customers = customer_data[high_value_threshold_index:]
-            
-            segmentation = {
-                'vip': {
-                    'count': len(vip_customers),
-                    'total_value': sum(c['total_sales'] for c in vip_customers),
-                    'percentage': (len(vip_customers) / len(customer_data) * 100) if customer_data else 0
-                },
-                'high_value': {
-                    'count': len(high_value_customers),
-                    'total_value': sum(c['total_sales'] for c in high_value_customers),
-                    'percentage': (len(high_value_customers) / len(customer_data) * 100) if customer_data else 0
-                },
-                'regular': {
-                    'count': len(regular_customers),
-                    'total_value': sum(c['total_sales'] for c in regular_customers),
-                    'percentage': (len(regular_customers) / len(customer_data) * 100) if customer_data else 0
-                }
-            }
-        else:
-            segmentation = {
-                'vip': {'count': 0, 'total_value': 0, 'percentage': 0},
-                'high_value': {'count': 0, 'total_value': 0, 'percentage': 0},
-                'regular': {'count': 0, 'total_value': 0, 'percentage': 0}
-            }
+            monetary = np.array([c['total_sales'] for c in customer_data], dtype=float)
+            frequency = np.array([c['total_orders'] for c in customer_data], dtype=float)
+            reference_date = end_date or now().date()
+            recency = np.array([(reference_date - c['_last_order']).days for c in customer_data], dtype=float)
+            
+            vip_cutoff, high_value_cutoff = np.percentile(monetary, [80, 50])
+            segments = np.where(monetary >= vip_cutoff, 'vip', np.where(monetary >= high_value_cutoff, 'high_value', 'regular'))
+            
+            for name, info in segmentation.items():
+                mask = segments == name
+                info['count'] = int(mask.sum())
+                info['total_value'] = float(monetary[mask].sum())
+                info['percentage'] = float(mask.mean() * 100)
+            
+            # RFM: quintile scores 1-5 (recent, frequent and high-spending customers score 5)
+            r_scores = 6 - quintile_scores(recency)
+            f_scores = quintile_scores(frequency)
+            m_scores = quintile_scores(monetary)
+            rfm_labels = rfm_segment_labels(r_scores, f_scores, m_scores)
+            
+            for index, customer in enumerate(customer_data):
+                customer['segment'] = str(segments[index])
+                customer['recency_days'] = int(recency[index])
+                customer['r_score'] = int(r_scores[index])
+                customer['f_score'] = int(f_scores[index])
+                customer['m_score'] = int(m_scores[index])
+                customer['rfm_score'] = f"{r_scores[index]}{f_scores[index]}{m_scores[index]}"
+                customer['rfm_segment'] = str(rfm_labels[index])
+                rfm_segments[customer['rfm_segment']] += 1
+        
+        for customer in customer_data:
+            del customer['_last_order']
         
         # Geographic distribution
-        geographic_data = all_customers.values('county__county').annotate(
+        geographic_data = with_current_balances(all_customers).values('county__county').annotate(
             customer_count=Count('customer_id'),
-            total_sales=Sum('total_sales')
+            total_sales=Sum('current_total_sales')
         ).order_by('-total_sales')[:10]
         
         # Payment behavior analysis
@@ -5121,22 +5225,15 @@ def api_generate_customer_analysis(request):
             else:
                 payment_analysis['poor'] += 1
         
-        # FIXED: Customer acquisition trend (new customers over time)
+        # Customer acquisition trend (new customers over time)
         # Calculate based on first order date since we don't have a customer created_date
-        customer_first_orders = []
-        for customer in all_customers:
-            first_order = SalesOrder.objects.filter(customer_id=customer).order_by('date').first()
-            if first_order:
-                customer_first_orders.append({
-                    'customer_id': customer.customer_id,
-                    'first_order_date': first_order.date
-                })
-        
-        # Group by month
         from collections import defaultdict
         acquisition_by_month = defaultdict(int)
         
-        for item in customer_first_orders:
+        first_orders = SalesOrder.objects.filter(customer_id__in=all_customers).values('customer_id').annotate(
+            first_order_date=Min('date')
+        ).order_by()
+        for item in first_orders:
             month_key = item['first_order_date'].strftime('%Y-%m')
             acquisition_by_month[month_key] += 1
         
@@ -5160,6 +5257,7 @@ def api_generate_customer_analysis(request):
             'top_customers': customer_data[:10],  # Top 10 customers
             'all_customers': customer_data,  # All customer data
             'segmentation': segmentation,
+            'rfm_segments': rfm_segments,
             'geographic_distribution': [
                 {
                     'county': item['county__county'] or 'Unknown',
@@ -5197,10 +5295,16 @@ def api_generate_customer_analysis(request):
 
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('supplier_analysis')
 def api_generate_supplier_analysis(request):
     """
     Generate Supplier Analysis Report
     Returns: Supplier performance, reliability, and cost analysis
+    
+    The scorecard is built from a fixed number of grouped queries (orders, detail lines, delivery
+    timestamps), however many suppliers there are. Lead time is the number of days from the order date
+    to the first time the order reached DELIVERED, taken from PurchaseOrderStatusHistory; it is None
+    for suppliers with no delivery recorded in the period.
     """
     try:
         start_date_str = request.GET.get('start_date', '')
@@ -5227,92 +5331,101 @@ def api_generate_supplier_analysis(request):
         if county:
             all_suppliers = all_suppliers.filter(county__county=county)
         
+        purchase_query = purchase_query.filter(supplier_id__in=all_suppliers)
+        
+        # Order metrics per supplier (one grouped query)
+        supplier_activity = [
+            row for row in purchase_query.values('supplier_id').annotate(
+                purchase_total=Sum('total_amount'),
+                orders_count=Count('po_id'),
+                delivered_orders=Count('po_id', filter=Q(shipping_status__shipping_status='DELIVERED')),
+                first_order=Min('date'),
+                last_order=Max('date')
+            ).order_by()
+            if row['purchase_total'] and row['purchase_total'] > 0
+        ]
+        
+        # Categories and items supplied per supplier (one grouped query)
+        detail_counts = {
+            row['po_id__supplier_id']: row
+            for row in PurchaseDetail.objects.filter(po_id__in=purchase_query).values('po_id__supplier_id').annotate(
+                categories_supplied=Count('item_category', distinct=True),
+                items_supplied=Count('item_id', distinct=True)
+            ).order_by()
+        }
+        
+        # Lead time: order date -> first DELIVERED transition, per order (one grouped query)
+        lead_times = {}
+        deliveries = PurchaseOrderStatusHistory.objects.filter(
+            po_id__in=purchase_query, status_type='SHIPPING', status='DELIVERED'
+        ).values('po_id', 'po_id__supplier_id', 'po_id__date').annotate(delivered_at=Min('changed_at')).order_by()
+        for row in deliveries:
+            days = (localdate(row['delivered_at']) - row['po_id__date']).days
+            lead_times.setdefault(row['po_id__supplier_id'], []).append(max(days, 0))
+        
+        suppliers = with_current_balances(all_suppliers.select_related('county', 'town')).in_bulk(
+            [row['supplier_id'] for row in supplier_activity]
+        )
+        
         # Supplier metrics
         supplier_data = []
         total_suppliers = all_suppliers.count()
-        active_suppliers = 0
+        active_suppliers = len(supplier_activity)
         total_purchase_value = Decimal('0.00')
         total_purchase_orders = 0
         
-        for supplier in all_suppliers:
-            # Get purchases for this supplier in the period
-            supplier_purchases = purchase_query.filter(supplier_id=supplier)
+        for row in supplier_activity:
+            supplier = suppliers[row['supplier_id']]
+            purchase_total = row['purchase_total']
+            orders_count = row['orders_count']
+            first_order = row['first_order']
+            last_order = row['last_order']
             
-            purchase_total = supplier_purchases.aggregate(
-                total=Sum('total_amount')
-            )['total'] or Decimal('0.00')
-            
-            orders_count = supplier_purchases.count()
+            total_purchase_value += purchase_total
+            total_purchase_orders += orders_count
             
             # Calculate payment ratio
-            payments_total = supplier.total_payments
-            payment_ratio = (payments_total / supplier.total_purchases * 100) if supplier.total_purchases > 0 else 0
+            payments_total = supplier.current_total_payments
+            payment_ratio = (payments_total / supplier.current_total_purchases * 100) if supplier.current_total_purchases > 0 else 0
             
             # Outstanding balance
-            outstanding = supplier.total_purchases - supplier.total_payments
-            
-            # Get purchase details for this supplier
-            supplier_details = PurchaseDetail.objects.filter(
-                po_id__in=supplier_purchases
-            )
+            outstanding = supplier.current_total_purchases - supplier.current_total_payments
             
             # Calculate delivery reliability (based on shipping status)
-            delivered_orders = supplier_purchases.filter(
-                shipping_status__shipping_status='DELIVERED'
-            ).count()
-            delivery_rate = (delivered_orders / orders_count * 100) if orders_count > 0 else 0
-            
-            # Calculate average lead time (days from order to delivery)
-            # This is a simplified calculation
-            avg_lead_time = 0
-            if orders_count > 0:
-                # You can enhance this based on your actual delivery tracking
-                avg_lead_time = 7  # Placeholder
-            
-            # Categories supplied
-            categories_supplied = supplier_details.values('item_category').distinct().count()
-            
-            # Items supplied
-            items_supplied = supplier_details.values('item_id').distinct().count()
-            
-            if purchase_total > 0:
-                active_suppliers += 1
-                total_purchase_value += purchase_total
-                total_purchase_orders += orders_count
-                
-                # Get first and last order dates
-                first_order = supplier_purchases.order_by('date').first()
-                last_order = supplier_purchases.order_by('-date').first()
-                
-                # Calculate average days between orders
-                if orders_count > 1 and first_order and last_order:
-                    days_span = (last_order.date - first_order.date).days
-                    avg_days_between = days_span / (orders_count - 1) if orders_count > 1 else 0
-                else:
-                    avg_days_between = 0
-                
-                supplier_data.append({
-                    'supplier_id': supplier.supplier_id,
-                    'supplier_name': supplier.supplier_name,
-                    'phone': supplier.phone_number or '',
-                    'email': supplier.email or '',
-                    'county': supplier.county.county if supplier.county else '',
-                    'town': supplier.town.town if supplier.town else '',
-                    'total_purchases': float(purchase_total),
-                    'total_orders': orders_count,
-                    'avg_order_value': float(purchase_total / orders_count) if orders_count > 0 else 0,
-                    'lifetime_value': float(supplier.total_purchases),
-                    'total_payments': float(payments_total),
-                    'outstanding_balance': float(outstanding),
-                    'payment_ratio': float(payment_ratio),
-                    'delivery_rate': float(delivery_rate),
-                    'avg_lead_time': avg_lead_time,
-                    'categories_supplied': categories_supplied,
-                    'items_supplied': items_supplied,
-                    'first_order_date': first_order.date.strftime('%d/%m/%Y') if first_order else '',
-                    'last_order_date': last_order.date.strftime('%d/%m/%Y') if last_order else '',
-                    'avg_days_between_orders': int(avg_days_between)
-                })
+            delivery_rate = (row['delivered_orders'] / orders_count * 100) if orders_count > 0 else 0
+            
+            # Average lead time (days from order to delivery) over the deliveries recorded for this supplier
+            supplier_lead_times = lead_times.get(supplier.supplier_id)
+            avg_lead_time = round(sum(supplier_lead_times) / len(supplier_lead_times), 1) if supplier_lead_times else None
+            
+            # Calculate average days between orders
+            avg_days_between = (last_order - first_order).days / (orders_count - 1) if orders_count > 1 else 0
+            
+            details = detail_counts.get(supplier.supplier_id, {})
+            
+            supplier_data.append({
+                'supplier_id': supplier.supplier_id,
+                'supplier_name': supplier.supplier_name,
+                'phone': supplier.phone_number or '',
+                'email': supplier.email or '',
+                'county': supplier.county.county if supplier.county else '',
+                'town': supplier.town.town if supplier.town else '',
+                'total_purchases': float(purchase_total),
+                'total_orders': orders_count,
+                'avg_order_value': float(purchase_total / orders_count) if orders_count > 0 else 0,
+                'lifetime_value': float(supplier.current_total_purchases),
+                'total_payments': float(payments_total),
+                'outstanding_balance': float(outstanding),
+                'payment_ratio': float(payment_ratio),
+                'delivery_rate': float(delivery_rate),
+                'avg_lead_time': avg_lead_time,
+                'tracked_deliveries': len(supplier_lead_times or []),
+                'categories_supplied': details.get('categories_supplied', 0),
+                'items_supplied': details.get('items_supplied', 0),
+                'first_order_date': first_order.strftime('%d/%m/%Y'),
+                'last_order_date': last_order.strftime('%d/%m/%Y'),
+                'avg_days_between_orders': int(avg_days_between)
+            })
         
         # Sort by total purchases
         supplier_data.sort(key=lambda x: x['total_purchases'], reverse=True)
@@ -5355,9 +5468,9 @@ def api_generate_supplier_analysis(request):
             }
         
         # Geographic distribution
-        geographic_data = all_suppliers.values('county__county').annotate(
+        geographic_data = with_current_balances(all_suppliers).values('county__county').annotate(
             supplier_count=Count('supplier_id'),
-            total_purchases=Sum('total_purchases')
+            total_purchases=Sum('current_total_purchases')
         ).order_by('-total_purchases')[:10]
         
         # Performance rating analysis
@@ -5429,12 +5542,27 @@ def api_generate_supplier_analysis(request):
 # 6. TAX SUMMARY REPORT
 # ============================================
 
+def tax_report_details(detail_model, start_date, end_date):
+    """Detail lines (SalesDetail or PurchaseDetail) whose order is dated within the report period"""
+    order_date = 'so_id__date' if detail_model is SalesDetail else 'po_id__date'
+    details = detail_model.objects.all()
+    if start_date:
+        details = details.filter(**{f'{order_date}__gte': start_date})
+    if end_date:
+        details = details.filter(**{f'{order_date}__lte': end_date})
+    return details
+
+
 @csrf_exempt
 @login_required(login_url='/login/')
+@cached_report('tax_summary')
 def api_generate_tax_summary(request):
     """
     Generate Tax Summary Report
-    Returns: Tax collected on sales and paid on purchases
+    Returns: Tax collected on sales and paid on purchases, grouped by tax rate
+    
+    Each side is a single values('tax_rate').annotate(...) query; transaction-level rows are served
+    page by page from api_get_tax_transactions.
     """
     try:
         start_date_str = request.GET.get('start_date', '')
@@ -5443,132 +5571,57 @@ def api_generate_tax_summary(request):
         start_date = parse_date(start_date_str) if start_date_str else None
         end_date = parse_date(end_date_str) if end_date_str else None
         
-        # Get Sales Orders in period
-        sales_query = SalesOrder.objects.all()
-        if start_date:
-            sales_query = sales_query.filter(date__gte=start_date)
-        if end_date:
-            sales_query = sales_query.filter(date__lte=end_date)
-        
-        # Get Purchase Orders in period
-        purchase_query = PurchaseOrder.objects.all()
-        if start_date:
-            purchase_query = purchase_query.filter(date__gte=start_date)
-        if end_date:
-            purchase_query = purchase_query.filter(date__lte=end_date)
-        
-        # Calculate Sales Tax Collected
-        sales_details = SalesDetail.objects.filter(so_id__in=sales_query)
-        
-        total_sales_tax = Decimal('0.00')
-        sales_by_rate = {}
-        sales_transactions = []
-        
-        for detail in sales_details:
-            # Calculate tax for this detail
-            subtotal = detail.quantity_sold * detail.unit_price
-            tax_amount = subtotal * detail.tax_rate / 100
-            total_sales_tax += tax_amount
-            
-            # Group by tax rate
-            rate_key = float(detail.tax_rate)
-            if rate_key not in sales_by_rate:
-                sales_by_rate[rate_key] = {
-                    'tax_rate': rate_key,
-                    'taxable_amount': Decimal('0.00'),
-                    'tax_collected': Decimal('0.00'),
-                    'transactions': 0
-                }
-            
-            sales_by_rate[rate_key]['taxable_amount'] += subtotal
-            sales_by_rate[rate_key]['tax_collected'] += tax_amount
-            sales_by_rate[rate_key]['transactions'] += 1
-            
-            # Add to transactions list
-            sales_transactions.append({
-                'date': detail.date.strftime('%d/%m/%Y') if detail.date else '',
-                'invoice': detail.invoice_number,
-                'customer': detail.customer_name,
-                'item': detail.item_name,
-                'amount': float(subtotal),
-                'tax_rate': float(detail.tax_rate),
-                'tax': float(tax_amount)
-            })
-        
-        # Calculate Purchase Tax Paid
-        purchase_details = PurchaseDetail.objects.filter(po_id__in=purchase_query)
-        
-        total_purchase_tax = Decimal('0.00')
-        purchase_by_rate = {}
-        purchase_transactions = []
-        
-        for detail in purchase_details:
-            # Calculate tax for this detail
-            subtotal = detail.quantity_purchased * detail.unit_cost
-            tax_amount = subtotal * detail.tax_rate / 100
-            total_purchase_tax += tax_amount
-            
-            # Group by tax rate
-            rate_key = float(detail.tax_rate)
-            if rate_key not in purchase_by_rate:
-                purchase_by_rate[rate_key] = {
-                    'tax_rate': rate_key,
-                    'taxable_amount': Decimal('0.00'),
-                    'tax_paid': Decimal('0.00'),
-                    'transactions': 0
-                }
-            
-            purchase_by_rate[rate_key]['taxable_amount'] += subtotal
-            purchase_by_rate[rate_key]['tax_paid'] += tax_amount
-            purchase_by_rate[rate_key]['transactions'] += 1
-            
-            # Add to transactions list
-            purchase_transactions.append({
-                'date': detail.date.strftime('%d/%m/%Y') if detail.date else '',
-                'bill': detail.bill_number,
-                'supplier': detail.supplier_name,
-                'item': detail.item_name,
-                'amount': float(subtotal),
-                'tax_rate': float(detail.tax_rate),
-                'tax': float(tax_amount)
-            })
+        # Sales Tax Collected, per rate
+        sales_by_rate = tax_report_details(SalesDetail, start_date, end_date).values('tax_rate').annotate(
+            taxable_amount=Sum('price_excluding_tax'),
+            tax_collected=Sum('total_tax'),
+            transactions=Count('detail_id')
+        ).order_by('tax_rate')
         
-        # Net Tax Position (Tax Collected - Tax Paid)
-        net_tax = total_sales_tax - total_purchase_tax
+        # Purchase Tax Paid, per rate
+        purchase_by_rate = tax_report_details(PurchaseDetail, start_date, end_date).values('tax_rate').annotate(
+            taxable_amount=Sum('cost_excluding_tax'),
+            tax_paid=Sum('total_tax'),
+            transactions=Count('detail_id')
+        ).order_by('tax_rate')
         
         # Convert to list for JSON
         sales_by_rate_list = [
             {
-                'tax_rate': data['tax_rate'],
-                'taxable_amount': float(data['taxable_amount']),
-                'tax_collected': float(data['tax_collected']),
+                'tax_rate': float(data['tax_rate']),
+                'taxable_amount': float(data['taxable_amount'] or 0),
+                'tax_collected': float(data['tax_collected'] or 0),
                 'transactions': data['transactions']
             }
-            for data in sorted(sales_by_rate.values(), key=lambda x: x['tax_rate'])
+            for data in sales_by_rate
         ]
         
         purchase_by_rate_list = [
             {
-                'tax_rate': data['tax_rate'],
-                'taxable_amount': float(data['taxable_amount']),
-                'tax_paid': float(data['tax_paid']),
+                'tax_rate': float(data['tax_rate']),
+                'taxable_amount': float(data['taxable_amount'] or 0),
+                'tax_paid': float(data['tax_paid'] or 0),
                 'transactions': data['transactions']
             }
-            for data in sorted(purchase_by_rate.values(), key=lambda x: x['tax_rate'])
+            for data in purchase_by_rate
         ]
         
+        total_sales_tax = sum(data['tax_collected'] or Decimal('0.00') for data in sales_by_rate)
+        total_purchase_tax = sum(data['tax_paid'] or Decimal('0.00') for data in purchase_by_rate)
+        
+        # Net Tax Position (Tax Collected - Tax Paid)
+        net_tax = total_sales_tax - total_purchase_tax
+        
         report_data = {
             'kpis': {
                 'total_sales_tax': float(total_sales_tax),
                 'total_purchase_tax': float(total_purchase_tax),
                 'net_tax': float(net_tax),
-                'sales_transactions': len(sales_transactions),
-                'purchase_transactions': len(purchase_transactions)
+                'sales_transactions': sum(data['transactions'] for data in sales_by_rate_list),
+                'purchase_transactions': sum(data['transactions'] for data in purchase_by_rate_list)
             },
             'sales_by_rate': sales_by_rate_list,
             'purchase_by_rate': purchase_by_rate_list,
-            'sales_transactions': sorted(sales_transactions, key=lambda x: x['date'], reverse=True)[:50],
-            'purchase_transactions': sorted(purchase_transactions, key=lambda x: x['date'], reverse=True)[:50],
             'period': {
                 'start': start_date.strftime('%d/%m/%Y') if start_date else '',
                 'end': end_date.strftime('%d/%m/%Y') if end_date else ''
@@ -5589,137 +5642,351 @@ def api_generate_tax_summary(request):
             'success': False,
             'message': str(e)
         }, status=500)
+
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_get_tax_transactions(request):
+    """
+    Transaction-level rows behind the Tax Summary Report, one page at a time (newest first)
+    Query params: type (sales|purchases), start_date, end_date, tax_rate, page, page_size (max 500)
+    """
+    try:
+        transaction_type = request.GET.get('type', 'sales')
+        if transaction_type not in ('sales', 'purchases'):
+            return JsonResponse({'success': False, 'message': 'type must be sales or purchases'}, status=400)
+        
+        start_date = parse_date(request.GET.get('start_date', ''))
+        end_date = parse_date(request.GET.get('end_date', ''))
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', 50)), 1), 500)
+        except ValueError:
+            return JsonResponse({'success': False, 'message': 'page and page_size must be whole numbers'}, status=400)
+        
+        tax_rate = None
+        if request.GET.get('tax_rate', ''):
+            try:
+                tax_rate = Decimal(request.GET['tax_rate'])
+            except InvalidOperation:
+                pass
+            if tax_rate is None or not tax_rate.is_finite():
+                return JsonResponse({'success': False, 'message': 'tax_rate must be a number'}, status=400)
+        
+        if transaction_type == 'sales':
+            details = tax_report_details(SalesDetail, start_date, end_date).annotate(
+                amount=F('price_excluding_tax'), tax=F('total_tax')
+            ).values(
+                'date', 'invoice_number', 'customer_name', 'item_name', 'amount', 'tax_rate', 'tax'
+            )
+        else:
+            details = tax_report_details(PurchaseDetail, start_date, end_date).annotate(
+                amount=F('cost_excluding_tax'), tax=F('total_tax')
+            ).values(
+                'date', 'bill_number', 'supplier_name', 'item_name', 'amount', 'tax_rate', 'tax'
+            )
+        
+        if tax_rate is not None:
+            details = details.filter(tax_rate=tax_rate)
+        
+        total = details.count()
+        rows = details.order_by('-date', '-detail_id')[(page - 1) * page_size:page * page_size]
+        
+        transactions = []
+        for row in rows:
+            transaction_row = {
+                'date': row['date'].strftime('%d/%m/%Y') if row['date'] else '',
+                'item': row['item_name'],
+                'amount': float(row['amount']),
+                'tax_rate': float(row['tax_rate']),
+                'tax': float(row['tax'])
+            }
+            if transaction_type == 'sales':
+                transaction_row.update({'invoice': row['invoice_number'], 'customer': row['customer_name']})
+            else:
+                transaction_row.update({'bill': row['bill_number'], 'supplier': row['supplier_name']})
+            transactions.append(transaction_row)
         
+        return JsonResponse({
+            'success': True,
+            'transactions': transactions,
+            'pagination': {
+                'page': page,
+                'page_size': page_size,
+                'total': total,
+                'total_pages': math.ceil(total / page_size) if total else 0
+            }
+        })
+    
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_report_cache_stats(request):
+    """Report cache hit/miss counters; POST clears every cached report"""
+    try:
+        if request.method == 'POST':
+            bump_report_version()
+        return JsonResponse({'success': True, 'stats': report_cache_stats()})
+    except Exception as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=500)
+
+
+# ============================================
+# STREAMING DATA EXPORTS (CSV / NDJSON)
+# ============================================
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_export_table(request, table):
+    """
+    Stream a full transaction table as CSV or newline-delimited JSON
+    Tables: sales-details, purchase-details, sales-orders, purchase-orders, payments, receipts, inventory
+    Query params: format (csv|ndjson), start_date, end_date
+    """
+    if request.method != 'GET':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+    if table not in EXPORT_TABLES:
+        return JsonResponse({'success': False, 'message': f"Unknown export table '{table}'"}, status=404)
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'success': False, 'message': 'format must be csv or ndjson'}, status=400)
+    
+    start_date = parse_date(request.GET.get('start_date', ''))
+    end_date = parse_date(request.GET.get('end_date', ''))
+    rows = export_rows(table, start_date, end_date)
+    
+    if export_format == 'csv':
+        response = StreamingHttpResponse(stream_csv(table, rows), content_type='text/csv')
+    else:
+        response = StreamingHttpResponse(stream_ndjson(table, rows), content_type='application/x-ndjson')
+    
+    period = '_'.join(d.strftime('%Y%m%d') for d in (start_date, end_date) if d)
+    filename = f"{table}{'_' + period if period else ''}.{export_format}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # ============================================
 # EXPORT TO PDF
 # ============================================
 
+REPORT_EXPORT_VIEWS = {
+    'sales-summary': api_generate_sales_summary,
+    'inventory-status': api_generate_inventory_status,
+    'profit-loss': api_generate_profit_loss,
+    'purchase-summary': api_generate_purchase_summary,
+    'outstanding-balances': api_generate_outstanding_balances,
+    'customer-analysis': api_generate_customer_analysis,
+    'supplier-analysis': api_generate_supplier_analysis,
+    'tax-summary': api_generate_tax_summary,
+}
+
+REPORT_EXPORT_TITLES = {
+    'sales-summary': 'Sales Summary Report',
+    'inventory-status': 'Inventory Status Report',
+    'profit-loss': 'Profit & Loss Statement',
+    'purchase-summary': 'Purchase Summary Report',
+    'outstanding-balances': 'Outstanding Balances Report',
+    'customer-analysis': 'Customer Analysis Report',
+    'supplier-analysis': 'Supplier Analysis Report',
+    'tax-summary': 'Tax Summary Report',
+}
+
+REPORT_EXPORT_PARAMS = ('start_date', 'end_date', 'category', 'county', 'method')
+
+
+def report_export_params(data):
+    """Report filters from an export request body (unknown and empty params dropped)"""
+    return {
+        name: str(value).strip() for name, value in (data.get('params') or {}).items()
+        if name in REPORT_EXPORT_PARAMS and str(value).strip()
+    }
+
+
+def generate_report_data(report_type, params, user):
+    """Run a report view in-process (through the report cache) and return its data"""
+    report_request = HttpRequest()
+    report_request.method = 'GET'
+    report_request.user = user
+    report_request.GET = QueryDict(mutable=True)
+    for name, value in params.items():
+        report_request.GET[name] = value
+    
+    response = REPORT_EXPORT_VIEWS[report_type](report_request)
+    result = json.loads(response.content)
+    if response.status_code != 200 or not result.get('success'):
+        raise ValueError(result.get('message', 'Failed to generate report'))
+    return result['data']
+
+
+def build_report_pdf(report_type, report_data, period):
+    """Render a report's data as a PDF document and return its bytes"""
+    # Create PDF buffer
+    buffer = io.BytesIO()
+    
+    # Create PDF document
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=30,
+        leftMargin=30,
+        topMargin=50,
+        bottomMargin=50
+    )
+    
+    # Container for PDF elements
+    elements = []
+    
+    # Styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=28,
+        textColor=colors.HexColor('#2c3e50'),
+        spaceAfter=12,
+        alignment=TA_CENTER,
+        underlineColor=colors.HexColor('#2c3e50')
+    )
+    
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=colors.HexColor('#1abc9c'),
+        spaceAfter=10,
+        spaceBefore=20
+    )
+    
+    # Title
+    title = Paragraph(REPORT_EXPORT_TITLES.get(report_type, report_type), title_style)
+    elements.append(title)
+    elements.append(Spacer(1, 12))
+    
+    # Period
+    if period.get('start') and period.get('end'):
+        period_text = f"Period: {period['start']} - {period['end']}"
+        period_para = Paragraph(period_text, styles['Normal'])
+        elements.append(period_para)
+        elements.append(Spacer(1, 20))
+    
+    # KPIs Section
+    if 'kpis' in report_data:
+        elements.append(Paragraph('Key Performance Indicators', heading_style))
+        
+        kpi_data = []
+        for key, value in report_data['kpis'].items():
+            label = key.replace('_', ' ').title()
+            if isinstance(value, (int, float)):
+                formatted_value = f"KSH {value:,.2f}" if 'total' in key or 'amount' in key or 'balance' in key else str(value)
+            else:
+                formatted_value = str(value)
+            kpi_data.append([label, formatted_value])
+        
+        kpi_table = Table(kpi_data, colWidths=[3*inch, 2*inch])
+        kpi_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8f9fa')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#ecf0f1'))
+        ]))
+        elements.append(kpi_table)
+        elements.append(Spacer(1, 20))
+    
+    # Add specific report sections based on report_type
+    if 'sales' in report_type.lower():
+        _add_sales_sections(elements, report_data, heading_style, styles)
+    elif 'inventory' in report_type.lower():
+        _add_inventory_sections(elements, report_data, heading_style, styles)
+    elif 'profit' in report_type.lower():
+        _add_profit_loss_sections(elements, report_data, heading_style, styles)
+    elif 'purchase' in report_type.lower():
+        _add_purchase_sections(elements, report_data, heading_style, styles)
+    elif 'outstanding' in report_type.lower():
+        _add_outstanding_sections(elements, report_data, heading_style, styles)
+    elif 'tax' in report_type.lower():
+        _add_tax_sections(elements, report_data, heading_style, styles)
+    
+    # Build PDF
+    doc.build(elements)
+    
+    return buffer.getvalue()
+
+
 @csrf_exempt
 @login_required(login_url='/login/')
 def api_export_report_pdf(request):
     """
-    Export any report to PDF
-    Accepts: report_type, report_data (JSON)
-    Returns: PDF file download
+    Queue a PDF export of a report (rendered in the background, see pdf_exports.py)
+    Accepts: report_type, params (start_date, end_date, category, county)
+    Returns: job_id and status; poll status_url, then fetch download_url
     """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+    
     try:
-        if request.method != 'POST':
-            return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
-        
         data = json.loads(request.body)
-        report_type = data.get('report_type', 'Report')
-        report_data = data.get('report_data', {})
-        period = data.get('period', {})
-        
-        # Create PDF buffer
-        from io import BytesIO
-        buffer = BytesIO()
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=30,
-            leftMargin=30,
-            topMargin=50,
-            bottomMargin=50
-        )
+        report_type = data.get('report_type', '')
+        if report_type not in REPORT_EXPORT_VIEWS:
+            return JsonResponse({'success': False, 'message': f"Unknown report type '{report_type}'"}, status=400)
         
-        # Container for PDF elements
-        elements = []
-        
-        # Styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=28,
-            textColor=colors.HexColor('#2c3e50'),
-            spaceAfter=12,
-            alignment=TA_CENTER,
-            underlineColor=colors.HexColor('#2c3e50')
-        )
+        params = report_export_params(data)
+        period = {'start': params.get('start_date', ''), 'end': params.get('end_date', '')}
+        user = request.user
         
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#1abc9c'),
-            spaceAfter=10,
-            spaceBefore=20
+        job_id = pdf_job_id(report_type, params)
+        filename = f"{report_type.replace('-', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        status = submit_pdf_export(
+            job_id,
+            lambda: build_report_pdf(report_type, generate_report_data(report_type, params, user), period),
+            filename=filename
         )
         
-        # Title
-        title = Paragraph(report_type, title_style)
-        elements.append(title)
-        elements.append(Spacer(1, 12))
-        
-        # Period
-        if period.get('start') and period.get('end'):
-            period_text = f"Period: {period['start']} - {period['end']}"
-            period_para = Paragraph(period_text, styles['Normal'])
-            elements.append(period_para)
-            elements.append(Spacer(1, 20))
-        
-        # KPIs Section
-        if 'kpis' in report_data:
-            elements.append(Paragraph('Key Performance Indicators', heading_style))
-            
-            kpi_data = []
-            for key, value in report_data['kpis'].items():
-                label = key.replace('_', ' ').title()
-                if isinstance(value, (int, float)):
-                    formatted_value = f"KSH {value:,.2f}" if 'total' in key or 'amount' in key or 'balance' in key else str(value)
-                else:
-                    formatted_value = str(value)
-                kpi_data.append([label, formatted_value])
-            
-            kpi_table = Table(kpi_data, colWidths=[3*inch, 2*inch])
-            kpi_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f8f9fa')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#2c3e50')),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#ecf0f1'))
-            ]))
-            elements.append(kpi_table)
-            elements.append(Spacer(1, 20))
-        
-        # Add specific report sections based on report_type
-        if 'sales' in report_type.lower():
-            _add_sales_sections(elements, report_data, heading_style, styles)
-        elif 'inventory' in report_type.lower():
-            _add_inventory_sections(elements, report_data, heading_style, styles)
-        elif 'profit' in report_type.lower():
-            _add_profit_loss_sections(elements, report_data, heading_style, styles)
-        elif 'purchase' in report_type.lower():
-            _add_purchase_sections(elements, report_data, heading_style, styles)
-        elif 'outstanding' in report_type.lower():
-            _add_outstanding_sections(elements, report_data, heading_style, styles)
-        elif 'tax' in report_type.lower():
-            _add_tax_sections(elements, report_data, heading_style, styles)
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Return PDF as download
-        buffer.seek(0)
-        response = HttpResponse(buffer.getvalue(), content_type='application/pdf')
-        filename = f"{report_type.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
+        return JsonResponse({
+            'success': True,
+            'job_id': job_id,
+            **status,
+            'status_url': reverse('api_export_pdf_status', args=[job_id]),
+            'download_url': reverse('api_download_pdf', args=[job_id]),
+        }, status=200 if status['status'] == PDF_DONE else 202)
     
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
     except Exception as e:
-        print(f"Error exporting to PDF: {str(e)}")
-        import traceback
-        traceback.print_exc()
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
 
 
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_export_report_pdf_status(request, job_id):
+    """Status of a queued PDF export: queued | running | done | failed"""
+    status = pdf_job_status(job_id)
+    if status is None:
+        return JsonResponse({'success': False, 'message': 'Export not found or expired'}, status=404)
+    return JsonResponse({'success': True, 'job_id': job_id, **status})
+
+
+@csrf_exempt
+@login_required(login_url='/login/')
+def api_download_report_pdf(request, job_id):
+    """Download a finished PDF export"""
+    status = pdf_job_status(job_id)
+    if status is None or status['status'] != PDF_DONE:
+        return JsonResponse({'success': False, 'message': 'Export not ready'}, status=404)
+    return FileResponse(
+        open(pdf_job_path(job_id), 'rb'), as_attachment=True,
+        filename=status.get('filename', 'report.pdf'), content_type='application/pdf'
+    )
+
+
 # Helper functions for PDF sections
 def _add_sales_sections(elements, report_data, heading_style, styles):
     """Add sales-specific sections to PDF"""
@@ -5932,382 +6199,62 @@ def _add_tax_sections(elements, report_data, heading_style, styles):
 @login_required(login_url='/login/')
 def api_export_report_excel(request):
     """
-    Export any report to Excel
-    Accepts: report_type, report_data (JSON)
+    Export any report to Excel (streamed through a write-only workbook, see excel_exports.py)
+    Accepts: report_type and either
+      - params (start_date, end_date, category, county): the report is regenerated on the server and
+        its detail rows are added as extra sheets (include_details: false to leave them out), or
+      - report_data (JSON) and period, as already generated in the browser
+    Optional: layout = single (default) | sheets (each section on its own sheet)
     Returns: Excel file download
     """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+    
     try:
-        if request.method != 'POST':
-            return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
-        
         data = json.loads(request.body)
         report_type = data.get('report_type', 'Report')
-        report_data = data.get('report_data', {})
-        period = data.get('period', {})
-        
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Report"
-        
-        # Styles
-        header_fill = PatternFill(start_color="2C3E50", end_color="2C3E50", fill_type="solid")
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        title_font = Font(bold=True, size=16, color="1ABC9C")
-        
-        # Title
-        ws['A1'] = report_type
-        ws['A1'].font = title_font
-        ws.merge_cells('A1:E1')
-        
-        # Period
-        if period.get('start') and period.get('end'):
-            ws['A2'] = f"Period: {period['start']} - {period['end']}"
-            ws.merge_cells('A2:E2')
-        
-        current_row = 4
-        
-        # KPIs Section
-        if 'kpis' in report_data:
-            ws[f'A{current_row}'] = 'KEY PERFORMANCE INDICATORS'
-            ws[f'A{current_row}'].font = Font(bold=True, size=12)
-            current_row += 1
-            
-            for key, value in report_data['kpis'].items():
-                label = key.replace('_', ' ').title()
-                ws[f'A{current_row}'] = label
-                if isinstance(value, (int, float)):
-                    ws[f'B{current_row}'] = value
-                    ws[f'B{current_row}'].number_format = '#,##0.00'
-                else:
-                    ws[f'B{current_row}'] = str(value)
-                current_row += 1
-            
-            current_row += 2
-        
-        # Add specific sections based on report type
-        report_type_lower = report_type.lower()
-        
-        if 'sales' in report_type_lower and 'summary' in report_type_lower:
-            current_row = _add_excel_sales_sections(ws, report_data, current_row, header_fill, header_font)
-        elif 'inventory' in report_type_lower:
-            current_row = _add_excel_inventory_sections(ws, report_data, current_row, header_fill, header_font)
-        elif 'profit' in report_type_lower or 'loss' in report_type_lower:
-            current_row = _add_excel_profit_loss_sections(ws, report_data, current_row, header_fill, header_font)
-        elif 'purchase' in report_type_lower:
-            current_row = _add_excel_purchase_sections(ws, report_data, current_row, header_fill, header_font)
-        elif 'outstanding' in report_type_lower:
-            current_row = _add_excel_outstanding_sections(ws, report_data, current_row, header_fill, header_font)
-        elif 'customer' in report_type_lower and 'analysis' in report_type_lower:
-            current_row = _add_excel_customer_analysis_sections(ws, report_data, current_row, header_fill, header_font)
-        elif 'supplier' in report_type_lower and 'analysis' in report_type_lower:
-            current_row = _add_excel_supplier_analysis_sections(ws, report_data, current_row, header_fill, header_font)
-        elif 'tax' in report_type_lower:
-            current_row = _add_excel_tax_sections(ws, report_data, current_row, header_fill, header_font)
-        
-        # Adjust column widths (CORRECTED INDENTATION)
-        from openpyxl.cell.cell import MergedCell
-        
-        for col in ws.columns:
-            max_length = 0
-            column_letter = None
-            
-            for cell in col:
-                # Skip merged cells
-                if isinstance(cell, MergedCell):
-                    continue
-                
-                # Get column letter from first non-merged cell
-                if column_letter is None:
-                    column_letter = cell.column_letter
-                
-                # Calculate max length
-                try:
-                    if cell.value:
-                        cell_length = len(str(cell.value))
-                        if cell_length > max_length:
-                            max_length = cell_length
-                except:
-                    pass
-            
-            # Set column width if we found a valid column letter
-            if column_letter:
-                adjusted_width = min(max_length + 2, 50)  # Cap at 50 characters
-                ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to buffer
-        buffer = io.BytesIO()
-        wb.save(buffer)
+        layout = data.get('layout', 'single')
+        if layout not in EXCEL_LAYOUTS:
+            return JsonResponse({'success': False, 'message': 'layout must be single or sheets'}, status=400)
+        
+        detail_sheets = []
+        if 'report_data' in data:
+            report_data = data.get('report_data') or {}
+            period = data.get('period', {})
+        else:
+            if report_type not in REPORT_EXPORT_VIEWS:
+                return JsonResponse({'success': False, 'message': f"Unknown report type '{report_type}'"}, status=400)
+            params = report_export_params(data)
+            report_data = generate_report_data(report_type, params, request.user)
+            period = {'start': params.get('start_date', ''), 'end': params.get('end_date', '')}
+            if data.get('include_details', True):
+                detail_sheets = report_detail_sheets(
+                    report_type, params,
+                    parse_date(params.get('start_date', '')), parse_date(params.get('end_date', ''))
+                )
+        
+        # WRITE TO A TEMPORARY FILE (REMOVED WHEN THE RESPONSE CLOSES IT)
+        buffer = tempfile.TemporaryFile()
+        write_report_workbook(
+            buffer, REPORT_EXPORT_TITLES.get(report_type, report_type), period,
+            report_sections(report_type, report_data), detail_sheets, layout
+        )
         buffer.seek(0)
         
-        # Return as download
-        response = HttpResponse(
-            buffer.getvalue(),
+        filename = f"{report_type.replace(' ', '_').replace('-', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+        return FileResponse(
+            buffer, as_attachment=True, filename=filename,
             content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         )
-        filename = f"{report_type.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        
-        return response
     
+    except json.JSONDecodeError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON data'}, status=400)
     except Exception as e:
         print(f"❌ Error exporting to Excel: {str(e)}")
         import traceback
         traceback.print_exc()
         return JsonResponse({'success': False, 'message': str(e)}, status=500)
-    
-# Helper functions for Excel sections
-def _add_excel_sales_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add sales data to Excel"""
-    if 'top_customers' in report_data:
-        ws[f'A{start_row}'] = 'TOP CUSTOMERS'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Customer Name', 'Total Sales', 'Orders', 'Avg Order Value']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for customer in report_data['top_customers']:
-            ws.cell(row=start_row, column=1, value=customer['name'])
-            ws.cell(row=start_row, column=2, value=customer['total']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=3, value=customer['orders'])
-            ws.cell(row=start_row, column=4, value=customer['total'] / customer['orders']).number_format = '#,##0.00'
-            start_row += 1
-    
-    return start_row
-
-def _add_excel_inventory_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add inventory data to Excel"""
-    if 'low_stock' in report_data and report_data['low_stock']:
-        ws[f'A{start_row}'] = 'ITEMS REQUIRING REORDER'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12, color="E74C3C")
-        start_row += 1
-        
-        headers = ['Item ID', 'Item Name', 'Category', 'Current Stock', 'Reorder Level']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for item in report_data['low_stock']:
-            ws.cell(row=start_row, column=1, value=item['item_id'])
-            ws.cell(row=start_row, column=2, value=item['name'])
-            ws.cell(row=start_row, column=3, value=item['category'])
-            ws.cell(row=start_row, column=4, value=item['remaining_qty'])
-            ws.cell(row=start_row, column=5, value=item['reorder_level'])
-            start_row += 1
-    
-    return start_row
-
-def _add_excel_profit_loss_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add P&L data to Excel"""
-    if 'breakdown' in report_data:
-        ws[f'A{start_row}'] = 'INCOME STATEMENT'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        pl_items = [
-            ('Revenue', report_data['breakdown']['revenue']),
-            ('Cost of Goods Sold', -report_data['breakdown']['cogs']),
-            ('Gross Profit', report_data['breakdown']['gross_profit']),
-            ('Operating Expenses', -report_data['breakdown']['shipping_expense']),
-            ('Net Profit', report_data['breakdown']['net_profit'])
-        ]
-        
-        for label, value in pl_items:
-            ws.cell(row=start_row, column=1, value=label)
-            ws.cell(row=start_row, column=2, value=value).number_format = '#,##0.00'
-            start_row += 1
-    
-    return start_row
-
-def _add_excel_purchase_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add purchase data to Excel"""
-    if 'top_suppliers' in report_data:
-        ws[f'A{start_row}'] = 'TOP SUPPLIERS'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Supplier Name', 'Total Purchases', 'Orders', 'Avg Order Value']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for supplier in report_data['top_suppliers']:
-            ws.cell(row=start_row, column=1, value=supplier['name'])
-            ws.cell(row=start_row, column=2, value=supplier['total']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=3, value=supplier['orders'])
-            ws.cell(row=start_row, column=4, value=supplier['total'] / supplier['orders']).number_format = '#,##0.00'
-            start_row += 1
-    
-    return start_row
-
-def _add_excel_outstanding_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add outstanding balances to Excel"""
-    if 'customer_balances' in report_data and report_data['customer_balances']:
-        ws[f'A{start_row}'] = 'CUSTOMER BALANCES (RECEIVABLE)'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Customer ID', 'Customer Name', 'Total Sales', 'Payments', 'Balance']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for customer in report_data['customer_balances']:
-            ws.cell(row=start_row, column=1, value=customer['id'])
-            ws.cell(row=start_row, column=2, value=customer['name'])
-            ws.cell(row=start_row, column=3, value=customer['total_sales']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=4, value=customer['total_payments']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=5, value=customer['balance']).number_format = '#,##0.00'
-            start_row += 1
-        
-        start_row += 2
-    
-    if 'supplier_balances' in report_data and report_data['supplier_balances']:
-        ws[f'A{start_row}'] = 'SUPPLIER BALANCES (PAYABLE)'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Supplier ID', 'Supplier Name', 'Total Purchases', 'Payments', 'Balance']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for supplier in report_data['supplier_balances']:
-            ws.cell(row=start_row, column=1, value=supplier['id'])
-            ws.cell(row=start_row, column=2, value=supplier['name'])
-            ws.cell(row=start_row, column=3, value=supplier['total_purchases']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=4, value=supplier['total_payments']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=5, value=supplier['balance']).number_format = '#,##0.00'
-            start_row += 1
-    
-    return start_row
-
-def _add_excel_tax_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add tax summary to Excel"""
-    if 'sales_by_rate' in report_data:
-        ws[f'A{start_row}'] = 'SALES TAX BY RATE'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Tax Rate', 'Taxable Amount', 'Tax Collected', 'Transactions']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for rate in report_data['sales_by_rate']:
-            ws.cell(row=start_row, column=1, value=f"{rate['tax_rate']}%")
-            ws.cell(row=start_row, column=2, value=rate['taxable_amount']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=3, value=rate['tax_collected']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=4, value=rate['transactions'])
-            start_row += 1
-        
-        start_row += 2
-    
-    if 'purchase_by_rate' in report_data:
-        ws[f'A{start_row}'] = 'PURCHASE TAX BY RATE'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Tax Rate', 'Taxable Amount', 'Tax Paid', 'Transactions']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for rate in report_data['purchase_by_rate']:
-            ws.cell(row=start_row, column=1, value=f"{rate['tax_rate']}%")
-            ws.cell(row=start_row, column=2, value=rate['taxable_amount']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=3, value=rate['tax_paid']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=4, value=rate['transactions'])
-            start_row += 1
-        
-        start_row += 2
-    
-    if 'kpis' in report_data:
-        ws[f'A{start_row}'] = 'NET TAX POSITION'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        ws.cell(row=start_row, column=1, value='Tax Collected (Sales)')
-        ws.cell(row=start_row, column=2, value=report_data['kpis']['total_sales_tax']).number_format = '#,##0.00'
-        start_row += 1
-        
-        ws.cell(row=start_row, column=1, value='Tax Paid (Purchases)')
-        ws.cell(row=start_row, column=2, value=-report_data['kpis']['total_purchase_tax']).number_format = '#,##0.00'
-        start_row += 1
-        
-        ws.cell(row=start_row, column=1, value='Net Tax Position').font = Font(bold=True)
-        ws.cell(row=start_row, column=2, value=report_data['kpis']['net_tax']).number_format = '#,##0.00'
-        ws.cell(row=start_row, column=2).font = Font(bold=True)
-        start_row += 1
-    
-    return start_row
 
-def _add_excel_customer_analysis_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add customer analysis data to Excel"""
-    if 'top_customers' in report_data:
-        ws[f'A{start_row}'] = 'TOP CUSTOMERS'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Customer Name', 'Total Sales', 'Orders', 'Avg Order', 'Outstanding', 'Payment Ratio']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for customer in report_data['top_customers']:
-            ws.cell(row=start_row, column=1, value=customer['customer_name'])
-            ws.cell(row=start_row, column=2, value=customer['total_sales']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=3, value=customer['total_orders'])
-            ws.cell(row=start_row, column=4, value=customer['avg_order_value']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=5, value=customer['outstanding_balance']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=6, value=customer['payment_ratio']).number_format = '0.0"%"'
-            start_row += 1
-    
-    return start_row
-
-def _add_excel_supplier_analysis_sections(ws, report_data, start_row, header_fill, header_font):
-    """Add supplier analysis data to Excel"""
-    if 'top_suppliers' in report_data:
-        ws[f'A{start_row}'] = 'TOP SUPPLIERS'
-        ws[f'A{start_row}'].font = Font(bold=True, size=12)
-        start_row += 1
-        
-        headers = ['Supplier Name', 'Total Purchases', 'Orders', 'Avg Order', 'Outstanding', 'Delivery Rate']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-        
-        start_row += 1
-        for supplier in report_data['top_suppliers']:
-            ws.cell(row=start_row, column=1, value=supplier['supplier_name'])
-            ws.cell(row=start_row, column=2, value=supplier['total_purchases']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=3, value=supplier['total_orders'])
-            ws.cell(row=start_row, column=4, value=supplier['avg_order_value']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=5, value=supplier['outstanding_balance']).number_format = '#,##0.00'
-            ws.cell(row=start_row, column=6, value=supplier['delivery_rate']).number_format = '0.0"%"'
-            start_row += 1
-    
-    return start_row
 
 # ====================================== SETTINGS MODULE VIEWS ==================================================================================================
 
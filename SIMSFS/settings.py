@@ -62,6 +62,16 @@ MIDDLEWARE = [
 
 CACHE_MIDDLEWARE_SECONDS = 0           # PREVENTS BROWSER CACHING OF PROTECTED PAGES
 
+# SHARED BY EVERY WORKER PROCESS (CACHED REPORTS, THEIR HIT/MISS COUNTERS, FITTED FORECASTS);
+# SWAP FOR REDIS / MEMCACHED WHERE AVAILABLE
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'django_cache',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
 ROOT_URLCONF = 'SIMSFS.urls'
 
 TEMPLATES = [